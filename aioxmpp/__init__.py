@@ -98,52 +98,100 @@ import asyncio  # NOQA
 if not hasattr(asyncio, "ensure_future"):
     asyncio.ensure_future = getattr(asyncio, "async")
 
-from .errors import (  # NOQA
-    XMPPAuthError,
-    XMPPCancelError,
-    XMPPContinueError,
-    XMPPModifyError,
-    XMPPWaitError,
-    ErrorCondition,
-)
-from .stanza import Presence, IQ, Message  # NOQA: F401
-from .structs import (  # NOQA: F401
-    JID,
-    PresenceShow,
-    PresenceState,
-    MessageType,
-    PresenceType,
-    IQType,
-    ErrorType,
-    jid_escape,
-    jid_unescape,
-)
-from .security_layer import make as make_security_layer  # NOQA: F401
-from .node import Client, PresenceManagedClient  # NOQA: F401
-
-# services
-from .presence import PresenceClient, PresenceServer  # NOQA: F401
-from .roster import RosterClient  # NOQA: F401
-from .disco import DiscoServer, DiscoClient  # NOQA: F401
-from .entitycaps import EntityCapsService  # NOQA: F401
-from .muc import MUCClient  # NOQA: F401
-from .pubsub import PubSubClient  # NOQA: F401
-from .shim import SHIMService  # NOQA: F401
-from .adhoc import AdHocClient, AdHocServer  # NOQA: F401
-from .avatar import AvatarService  # NOQA: F401
-from .blocking import BlockingClient  # NOQA: F401
-from .carbons import CarbonsClient  # NOQA: F401
-from .ping import PingService  # NOQA: F401
-from .pep import PEPClient  # NOQA: F401
-from .bookmarks import BookmarkClient  # NOQA: F401
-from .version import VersionServer  # NOQA: F401
-from .mdr import DeliveryReceiptsService  # NOQA: F401
-
-from . import httpupload  # NOQA: F401
+import importlib.util  # NOQA
+import sys  # NOQA
+
+# The public names of the top-level package are loaded on first access (see
+# PEP 562), so that ``import aioxmpp`` (and importing any submodule, which
+# implies importing the package) does not pay for building all the XSO
+# classes and services up-front.
+_LAZY_ATTRIBUTES = {
+    "XMPPAuthError": ("errors", "XMPPAuthError"),
+    "XMPPCancelError": ("errors", "XMPPCancelError"),
+    "XMPPContinueError": ("errors", "XMPPContinueError"),
+    "XMPPModifyError": ("errors", "XMPPModifyError"),
+    "XMPPWaitError": ("errors", "XMPPWaitError"),
+    "ErrorCondition": ("errors", "ErrorCondition"),
+    "Presence": ("stanza", "Presence"),
+    "IQ": ("stanza", "IQ"),
+    "Message": ("stanza", "Message"),
+    "JID": ("structs", "JID"),
+    "PresenceShow": ("structs", "PresenceShow"),
+    "PresenceState": ("structs", "PresenceState"),
+    "MessageType": ("structs", "MessageType"),
+    "PresenceType": ("structs", "PresenceType"),
+    "IQType": ("structs", "IQType"),
+    "ErrorType": ("structs", "ErrorType"),
+    "jid_escape": ("structs", "jid_escape"),
+    "jid_unescape": ("structs", "jid_unescape"),
+    "make_security_layer": ("security_layer", "make"),
+    "Client": ("node", "Client"),
+    "PresenceManagedClient": ("node", "PresenceManagedClient"),
+    "PresenceClient": ("presence", "PresenceClient"),
+    "PresenceServer": ("presence", "PresenceServer"),
+    "RosterClient": ("roster", "RosterClient"),
+    "DiscoServer": ("disco", "DiscoServer"),
+    "DiscoClient": ("disco", "DiscoClient"),
+    "EntityCapsService": ("entitycaps", "EntityCapsService"),
+    "MUCClient": ("muc", "MUCClient"),
+    "PubSubClient": ("pubsub", "PubSubClient"),
+    "SHIMService": ("shim", "SHIMService"),
+    "AdHocClient": ("adhoc", "AdHocClient"),
+    "AdHocServer": ("adhoc", "AdHocServer"),
+    "AvatarService": ("avatar", "AvatarService"),
+    "BlockingClient": ("blocking", "BlockingClient"),
+    "CarbonsClient": ("carbons", "CarbonsClient"),
+    "PingService": ("ping", "PingService"),
+    "PEPClient": ("pep", "PEPClient"),
+    "BookmarkClient": ("bookmarks", "BookmarkClient"),
+    "VersionServer": ("version", "VersionServer"),
+    "DeliveryReceiptsService": ("mdr", "DeliveryReceiptsService"),
+}
+
+
+def _import_submodule(name):
+    # go through __import__ instead of importlib.import_module so that the
+    # import shows up in ``python -X importtime``
+    qualname = __name__ + "." + name
+    __import__(qualname)
+    return sys.modules[qualname]
+
+
+def __getattr__(name):
+    try:
+        module_name, attr_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        pass
+    else:
+        value = getattr(_import_submodule(module_name), attr_name)
+        globals()[name] = value
+        return value
+
+    # submodules used to be imported implicitly by the eager imports above;
+    # keep ``import aioxmpp; aioxmpp.disco.…`` working
+    if (not name.startswith("_") and
+            importlib.util.find_spec("." + name, __name__) is not None):
+        return _import_submodule(name)
+
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name)
+    )
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+if sys.version_info < (3, 7):
+    # no module-level __getattr__ before Python 3.7, load everything now
+    for _name in _LAZY_ATTRIBUTES:
+        __getattr__(_name)
+    from . import httpupload  # NOQA: F401
+    del _name
 
 
 def set_strict_mode():
-    from .stanza import Error
+    from .stanza import Error, IQ, Message, Presence
     from .stream import StanzaStream
     from . import structs
     Message.type_.type_.allow_coerce = False
@@ -566,6 +566,8 @@ class SyncAdHocSignal(AbstractAdHocSignal):
 
     .. automethod:: fire
 
+    .. automethod:: fire_concurrently
+
     .. automethod:: disconnect
     """
 
@@ -616,6 +618,43 @@ class SyncAdHocSignal(AbstractAdHocSignal):
             if not keep:
                 del self._connections[token]
 
+    async def fire_concurrently(self, *args, **kwargs):
+        """
+        Emit the signal, running all coroutines concurrently with the given
+        arguments.
+
+        The coroutines are started in the order they were registered, so that
+        everything a coroutine does before its first suspension point (for
+        example, enqueueing a stanza) happens in registration order. After
+        that, the coroutines interleave freely. This allows to pipeline
+        independent round-trips instead of waiting for each of them in turn.
+
+        If any of the coroutines raises, the remaining coroutines are
+        cancelled and the exception is re-raised. Coroutines returning a false
+        value are disconnected as with :meth:`fire`.
+
+        .. versionadded:: 0.12
+        """
+        connections = list(self._connections.items())
+        tasks = [
+            asyncio.ensure_future(coro(*args, **kwargs))
+            for _, coro in connections
+        ]
+        if not tasks:
+            return
+
+        try:
+            results = await asyncio.gather(*tasks)
+        except:  # NOQA
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            raise
+
+        for (token, _), keep in zip(connections, results):
+            if not keep:
+                self._connections.pop(token, None)
+
     __call__ = fire
 
 
@@ -45,14 +45,24 @@ Specific connectors
 
 .. autoclass:: XMPPOverTLSConnector
 
+TLS session resumption
+======================
+
+.. autoclass:: TLSSessionCache
+
 """
 
 import abc
 import asyncio
 import logging
+import time
+import weakref
 
 from datetime import timedelta
 
+import OpenSSL.SSL
+
+import aioxmpp.cache
 import aioxmpp.errors as errors
 import aioxmpp.nonza as nonza
 import aioxmpp.protocol as protocol
@@ -63,6 +73,213 @@ def to_ascii(s):
     return s.encode("idna").decode("ascii")
 
 
+class _TLSSessionCacheEntry:
+    __slots__ = ("context", "session", "timestamp", "in_use",
+                 "connections", "__weakref__")
+
+    def __init__(self, context):
+        self.context = context
+        self.session = None
+        self.timestamp = None
+        self.in_use = False
+        self.connections = weakref.WeakSet()
+
+
+class TLSSessionCache:
+    """
+    Cache for TLS sessions, to allow abbreviated handshakes on reconnect.
+
+    :param maxsize: Maximum number of peers for which a session is kept.
+    :type maxsize: :class:`int` or :data:`None`
+    :param max_age: Maximum age of a session before it is discarded.
+    :type max_age: :class:`datetime.timedelta` or :data:`None`
+
+    To use the cache, pass it as `tls_session_cache` to
+    :func:`aioxmpp.make_security_layer` (or set the equally named attribute of
+    a :class:`~aioxmpp.security_layer.SecurityLayer`). The connectors in this
+    module will then offer the session from the most recent connection to the
+    same peer when negotiating TLS.
+
+    Sessions are keyed by the tuple of the host name, the TCP port and the
+    server name indication (the domain of the JID) used for the connection.
+    Sessions (or tickets, in TLS 1.3) issued by the server after the
+    handshake are picked up as well.
+
+    OpenSSL requires that a session is only resumed with the context it was
+    created with. Thus, the cache keeps the :class:`OpenSSL.SSL.Context`
+    together with the session and hands it out again for the next connection
+    to the same peer. If a context is still in use for a handshake, a fresh
+    context is created and no session is offered.
+
+    .. note::
+
+        The certificate verifier is still invoked on every connection.
+        However, on a resumed session, OpenSSL does not re-run the
+        verification callback, since the peer certificate is taken from the
+        session. Only share a cache between security layers which use the
+        same verification policy.
+
+    .. autoattribute:: maxsize
+
+    .. attribute:: max_age
+
+       The maximum age of a session as :class:`datetime.timedelta`. Older
+       sessions are discarded on lookup. If :data:`None`, sessions do not
+       expire (the server may still refuse to resume them).
+
+    .. attribute:: offered
+
+       The number of lookups which found a session to offer to the server.
+       Whether the server actually resumed the session is not tracked, since
+       pyOpenSSL offers no way to find out.
+
+    .. attribute:: misses
+
+       The number of lookups which did not find a usable session.
+
+    .. autoattribute:: offer_rate
+
+    .. automethod:: acquire
+
+    .. automethod:: release
+
+    .. automethod:: clear
+    """
+
+    def __init__(self, *, maxsize=128, max_age=timedelta(hours=1)):
+        super().__init__()
+        self._entries = aioxmpp.cache.LRUDict()
+        self._entries.maxsize = maxsize
+        self.max_age = max_age
+        self.offered = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self):
+        """
+        Maximum number of peers for which sessions are cached. See
+        :attr:`aioxmpp.cache.LRUDict.maxsize` for details.
+        """
+        return self._entries.maxsize
+
+    @maxsize.setter
+    def maxsize(self, value):
+        self._entries.maxsize = value
+
+    @property
+    def offer_rate(self):
+        """
+        The fraction of lookups in which a session was :attr:`offered`, or
+        :data:`None` if no lookups have been made yet.
+        """
+        total = self.offered + self.misses
+        if not total:
+            return None
+        return self.offered / total
+
+    def _is_expired(self, entry):
+        if self.max_age is None or entry.timestamp is None:
+            return False
+        age = time.monotonic() - entry.timestamp
+        return age > self.max_age.total_seconds()
+
+    def _make_info_callback(self, entry):
+        entry_ref = weakref.ref(entry)
+
+        def info_callback(conn, where, ret):
+            entry = entry_ref()
+            if entry is None:
+                return
+
+            if where & OpenSSL.SSL.SSL_CB_HANDSHAKE_START:
+                if (entry.session is not None and
+                        conn not in entry.connections):
+                    conn.set_session(entry.session)
+            elif where & OpenSSL.SSL.SSL_CB_HANDSHAKE_DONE:
+                entry.connections.add(conn)
+                entry.session = conn.get_session()
+                entry.timestamp = time.monotonic()
+            elif (where & OpenSSL.SSL.SSL_CB_CONNECT_LOOP and
+                    conn in entry.connections):
+                # post-handshake messages, such as TLS 1.3 session tickets,
+                # replace the session of the connection
+                entry.session = conn.get_session()
+                entry.timestamp = time.monotonic()
+
+        return info_callback
+
+    def acquire(self, key, ssl_context_factory):
+        """
+        Obtain an SSL context for a connection to the peer identified by
+        `key`.
+
+        :param key: Key identifying the peer.
+        :type key: hashable
+        :param ssl_context_factory: Factory for new contexts.
+        :type ssl_context_factory: callable returning
+            :class:`OpenSSL.SSL.Context`
+        :return: The context to use for the connection.
+        :rtype: :class:`OpenSSL.SSL.Context`
+
+        If a session for `key` is known, the context it belongs to is
+        returned and the session is offered to the server during the
+        handshake. Otherwise, a new context is obtained from
+        `ssl_context_factory`.
+
+        The context must be passed to :meth:`release` once the TLS handshake
+        has completed or failed.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and self._is_expired(entry):
+            del self._entries[key]
+            entry = None
+
+        if entry is not None and entry.in_use:
+            self.misses += 1
+            return ssl_context_factory()
+
+        if entry is not None and entry.session is not None:
+            self.offered += 1
+            entry.in_use = True
+            return entry.context
+
+        self.misses += 1
+        ctx = ssl_context_factory()
+        entry = _TLSSessionCacheEntry(ctx)
+        entry.in_use = True
+        ctx.set_info_callback(self._make_info_callback(entry))
+        self._entries[key] = entry
+        return ctx
+
+    def release(self, key, ssl_context, *, failed=False):
+        """
+        Release an SSL context obtained from :meth:`acquire`.
+
+        :param key: Key passed to :meth:`acquire`.
+        :param ssl_context: Context returned by :meth:`acquire`.
+        :type ssl_context: :class:`OpenSSL.SSL.Context`
+        :param failed: Whether the TLS handshake failed.
+        :type failed: :class:`bool`
+
+        If `failed` is true, the cached session for `key` is discarded.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.context is not ssl_context:
+            return
+
+        entry.in_use = False
+        if failed:
+            del self._entries[key]
+
+    def clear(self):
+        """
+        Discard all cached sessions.
+
+        The statistics are not reset.
+        """
+        self._entries.clear()
+
+
 class BaseConnector(metaclass=abc.ABCMeta):
     """
     This is the base class for connectors. It defines the public interface of
@@ -169,12 +386,19 @@ class STARTTLSConnector(BaseConnector):
 
         :attr:`~.security_layer.SecurityLayer.ssl_context_factory` and
         :attr:`~.security_layer.SecurityLayer.certificate_verifier_factory` are
-        used to configure the TLS connection.
+        used to configure the TLS connection. If
+        :attr:`~.security_layer.SecurityLayer.tls_session_cache` is set, it is
+        used to resume a previous TLS session with the same peer.
 
         .. versionchanged:: 0.10
 
             The `negotiation_timeout` is set as
             :attr:`~.XMLStream.deadtime_hard_limit` on the returned XML stream.
+
+        .. versionchanged:: 0.12
+
+            Support for
+            :attr:`~.security_layer.SecurityLayer.tls_session_cache`.
         """
 
         features_future = asyncio.Future(loop=loop)
@@ -257,13 +481,29 @@ class STARTTLSConnector(BaseConnector):
             metadata,
         )
 
-        ssl_context = metadata.ssl_context_factory()
-        verifier.setup_context(ssl_context, transport)
+        session_cache = metadata.tls_session_cache
+        if session_cache is not None:
+            session_key = (host, port, to_ascii(domain))
+            ssl_context = session_cache.acquire(
+                session_key,
+                metadata.ssl_context_factory,
+            )
+        else:
+            ssl_context = metadata.ssl_context_factory()
+
+        try:
+            verifier.setup_context(ssl_context, transport)
+            await stream.starttls(
+                ssl_context=ssl_context,
+                post_handshake_callback=verifier.post_handshake,
+            )
+        except:  # NOQA
+            if session_cache is not None:
+                session_cache.release(session_key, ssl_context, failed=True)
+            raise
 
-        await stream.starttls(
-            ssl_context=ssl_context,
-            post_handshake_callback=verifier.post_handshake,
-        )
+        if session_cache is not None:
+            session_cache.release(session_key, ssl_context)
 
         features = await protocol.reset_stream_and_get_features(
             stream,
@@ -288,9 +528,12 @@ class XMPPOverTLSConnector(BaseConnector):
     def tls_supported(self):
         return True
 
-    def _context_factory_factory(self, logger, metadata, verifier):
+    def _context_factory_factory(self, logger, metadata, verifier,
+                                 ssl_context=None):
         def context_factory(transport):
-            ssl_context = metadata.ssl_context_factory()
+            nonlocal ssl_context
+            if ssl_context is None:
+                ssl_context = metadata.ssl_context_factory()
 
             if hasattr(ssl_context, "set_alpn_protos"):
                 try:
@@ -327,12 +570,19 @@ class XMPPOverTLSConnector(BaseConnector):
 
         :attr:`~.security_layer.SecurityLayer.ssl_context_factory` and
         :attr:`~.security_layer.SecurityLayer.certificate_verifier_factory` are
-        used to configure the TLS connection.
+        used to configure the TLS connection. If
+        :attr:`~.security_layer.SecurityLayer.tls_session_cache` is set, it is
+        used to resume a previous TLS session with the same peer.
 
         .. versionchanged:: 0.10
 
             The `negotiation_timeout` is set as
             :attr:`~.XMLStream.deadtime_hard_limit` on the returned XML stream.
+
+        .. versionchanged:: 0.12
+
+            Support for
+            :attr:`~.security_layer.SecurityLayer.tls_session_cache`.
         """
 
         features_future = asyncio.Future(loop=loop)
@@ -358,8 +608,19 @@ class XMPPOverTLSConnector(BaseConnector):
             metadata,
         )
 
+        session_cache = metadata.tls_session_cache
+        if session_cache is not None:
+            session_key = (host, port, to_ascii(domain))
+            ssl_context = session_cache.acquire(
+                session_key,
+                metadata.ssl_context_factory,
+            )
+        else:
+            ssl_context = None
+
         context_factory = self._context_factory_factory(logger, metadata,
-                                                        verifier)
+                                                        verifier,
+                                                        ssl_context)
 
         try:
             transport, _ = await ssl_transport.create_starttls_connection(
@@ -374,9 +635,14 @@ class XMPPOverTLSConnector(BaseConnector):
                 use_starttls=False,
             )
         except:  # NOQA
+            if session_cache is not None:
+                session_cache.release(session_key, ssl_context, failed=True)
             stream.abort()
             raise
 
+        if session_cache is not None:
+            session_cache.release(session_key, ssl_context)
+
         stream.deadtime_hard_limit = timedelta(seconds=negotiation_timeout)
 
         return transport, stream, await features_future
@@ -67,6 +67,15 @@ The detailed documentation of the classes follows:
 
 .. currentmodule:: aioxmpp.disco
 
+.. autoclass:: CacheEntryStatistics()
+
+Crawling
+--------
+
+.. autoclass:: DiscoCrawler
+
+.. autoclass:: CrawlResult()
+
 Entity information
 ------------------
 
@@ -115,5 +124,7 @@ Item queries
 """
 
 from . import xso  # NOQA: F401
+from .crawler import DiscoCrawler, CrawlResult  # NOQA: F401
 from .service import (DiscoClient, DiscoServer, Node, StaticNode,  # NOQA: F401
-                      mount_as_node, register_feature, RegisteredFeature)
+                      mount_as_node, register_feature, RegisteredFeature,
+                      CacheEntryStatistics)
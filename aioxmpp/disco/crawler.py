@@ -0,0 +1,206 @@
+########################################################################
+# File name: crawler.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import asyncio
+import collections
+
+import aioxmpp.errors as errors
+
+
+class CrawlResult(collections.namedtuple(
+        "CrawlResult",
+        ["jid", "node", "depth", "info", "items", "error",
+         "items_error"])):
+    """
+    The outcome of crawling a single entity with :class:`DiscoCrawler`.
+
+    .. attribute:: jid
+
+       The :class:`~aioxmpp.JID` of the entity.
+
+    .. attribute:: node
+
+       The node of the entity or :data:`None`.
+
+    .. attribute:: depth
+
+       The number of items hops from the root of the crawl; the root itself
+       has depth zero.
+
+    .. attribute:: info
+
+       The :class:`~.xso.InfoQuery` of the entity or :data:`None` if the
+       query failed.
+
+    .. attribute:: items
+
+       The :class:`~.xso.ItemsQuery` of the entity or :data:`None` if the
+       items were not queried (because the maximum depth was reached) or the
+       query failed.
+
+    .. attribute:: error
+
+       The exception raised by the info query or :data:`None`.
+
+    .. attribute:: items_error
+
+       The exception raised by the items query or :data:`None`.
+
+    .. versionadded:: 0.12
+    """
+
+
+class DiscoCrawler:
+    """
+    Walk the service discovery tree below an entity.
+
+    :param disco: The service discovery client to send the queries with.
+    :type disco: :class:`~aioxmpp.DiscoClient`
+    :param root: The entity to start at.
+    :type root: :class:`~aioxmpp.JID`
+    :param node: The node to start at.
+    :type node: :class:`str` or :data:`None`
+    :param max_depth: The number of items hops to follow from the root.
+    :type max_depth: :class:`int`
+    :param max_in_flight: The maximum number of entities which are queried
+        concurrently.
+    :type max_in_flight: :class:`int`
+    :param follow_nodes: Whether to follow items which refer to a node.
+    :type follow_nodes: :class:`bool`
+
+    The crawler is an asynchronous iterator. For each entity, its
+    ``disco#info`` and, if its depth is less than `max_depth`, its
+    ``disco#items`` are queried. The items are in turn crawled with the
+    depth increased by one. Each entity (identified by its JID and node) is
+    crawled only once.
+
+    A :class:`CrawlResult` is yielded as soon as the queries for an entity
+    have completed; the order is thus not defined. Queries only progress
+    while the iterator is consumed. Errors replied by entities are reported
+    in the :attr:`~CrawlResult.error` and :attr:`~CrawlResult.items_error`
+    of the result and do not stop the crawl, and so are timeouts; other
+    exceptions are re-raised from the iterator after all
+    running queries have been cancelled.
+
+    Example which finds the components of a server::
+
+      crawler = aioxmpp.disco.DiscoCrawler(disco, server_jid)
+      async for result in crawler:
+          if result.info is not None:
+              print(result.jid, result.info.features)
+
+    The default `max_depth` of 1 covers the server itself and the entities
+    it announces. By default, items with a node (such as :xep:`60` nodes)
+    are not followed, because they are usually numerous and do not denote
+    separate services.
+
+    .. automethod:: close
+
+    .. versionadded:: 0.12
+    """
+
+    def __init__(self, disco, root, *, node=None, max_depth=1,
+                 max_in_flight=8, follow_nodes=False):
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be positive")
+        self._disco = disco
+        self._max_depth = max_depth
+        self._max_in_flight = max_in_flight
+        self._follow_nodes = follow_nodes
+        self._seen = {(root, node)}
+        self._queue = collections.deque([(root, node, 0)])
+        self._running = set()
+        self._results = collections.deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._results:
+            while self._queue and len(self._running) < self._max_in_flight:
+                self._running.add(asyncio.ensure_future(
+                    self._crawl_one(*self._queue.popleft())
+                ))
+
+            if not self._running:
+                raise StopAsyncIteration
+
+            done, _ = await asyncio.wait(
+                self._running,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            self._running.difference_update(done)
+
+            for task in done:
+                try:
+                    result = task.result()
+                except:  # NOQA
+                    self.close()
+                    raise
+                self._results.append(result)
+                self._enqueue_items(result)
+
+        return self._results.popleft()
+
+    def _enqueue_items(self, result):
+        if result.items is None:
+            return
+
+        for item in result.items.items:
+            if item.jid is None:
+                continue
+            if item.node is not None and not self._follow_nodes:
+                continue
+            key = item.jid, item.node
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self._queue.append((item.jid, item.node, result.depth + 1))
+
+    async def _crawl_one(self, jid, node, depth):
+        info = None
+        error = None
+        try:
+            info = await self._disco.query_info(jid, node=node)
+        except (errors.XMPPError, asyncio.TimeoutError) as exc:
+            error = exc
+
+        items = None
+        items_error = None
+        if depth < self._max_depth:
+            try:
+                items = await self._disco.query_items(jid, node=node)
+            except (errors.XMPPError, asyncio.TimeoutError) as exc:
+                items_error = exc
+
+        return CrawlResult(jid, node, depth, info, items, error, items_error)
+
+    def close(self):
+        """
+        Stop crawling.
+
+        All running queries are cancelled and the iterator is exhausted.
+        """
+        for task in self._running:
+            task.cancel()
+        self._running.clear()
+        self._queue.clear()
+        self._results.clear()
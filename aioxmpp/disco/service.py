@@ -23,6 +23,9 @@ import asyncio
 import contextlib
 import functools
 import itertools
+import weakref
+
+from datetime import timedelta
 
 import aioxmpp.cache
 import aioxmpp.callbacks
@@ -499,6 +502,54 @@ class DiscoServer(service.Service, Node):
         del self._node_mounts[mountpoint]
 
 
+class CacheEntryStatistics:
+    """
+    Statistics about a single cache entry of a :class:`DiscoClient`.
+
+    .. versionadded:: 0.12
+
+    All times are in the reference of
+    :meth:`asyncio.AbstractEventLoop.time`.
+
+    .. attribute:: created
+
+       The time at which the entry was created.
+
+    .. attribute:: completed
+
+       The time at which the result or error of the query arrived, or
+       :data:`None` if the query is still running.
+
+    .. attribute:: hits
+
+       The number of queries which were answered by this entry instead of
+       sending a request.
+
+    .. attribute:: negative
+
+       True if the entry holds a cached error reply (see
+       :attr:`DiscoClient.negative_cache_ttl`).
+    """
+
+    __slots__ = ("created", "completed", "hits", "negative")
+
+    def __init__(self, created):
+        self.created = created
+        self.completed = None
+        self.hits = 0
+        self.negative = False
+
+    def __repr__(self):
+        return "<{}.{} created={} completed={} hits={} negative={}>".format(
+            type(self).__module__,
+            type(self).__qualname__,
+            self.created,
+            self.completed,
+            self.hits,
+            self.negative,
+        )
+
+
 class DiscoClient(service.Service):
     """
     Provide cache-backed Service Discovery (:xep:`30`) queries.
@@ -537,6 +588,43 @@ class DiscoClient(service.Service):
 
     .. automethod:: flush_cache
 
+    The lifetime of cache entries is controlled with the following attributes:
+
+    .. attribute:: cache_ttl
+       :annotation: = None
+
+       The :class:`datetime.timedelta` after which a result expires. An
+       expired result is treated as if it was not in the cache. If
+       :data:`None`, results do not expire.
+
+       .. versionadded:: 0.12
+
+    .. attribute:: negative_cache_ttl
+       :annotation: = timedelta(minutes=5)
+
+       The :class:`datetime.timedelta` for which ``item-not-found`` and
+       ``service-unavailable`` error replies are cached. During that time,
+       queries for the same target re-raise the cached error. If
+       :data:`None`, error replies are never cached.
+
+       .. versionadded:: 0.12
+
+    .. attribute:: keep_cache_on_reconnect
+       :annotation: = False
+
+       If true, completed results are kept when the stream is destroyed
+       instead of clearing the whole cache. Running queries are still
+       cancelled. Entries of entities which announce their capabilities
+       (:xep:`115`, :xep:`390`) are replaced by the :class:`.EntityCapsService`
+       once their presence is received again, so those are re-validated
+       against the current capability hash.
+
+       .. versionadded:: 0.12
+
+    .. automethod:: get_info_cache_statistics
+
+    .. automethod:: get_items_cache_statistics
+
     Usage example, assuming that you have a :class:`.node.Client` `client`::
 
       import aioxmpp.disco as disco
@@ -557,6 +645,11 @@ class DiscoClient(service.Service):
 
     on_info_result = aioxmpp.callbacks.Signal()
 
+    NEGATIVE_CACHE_CONDITIONS = frozenset([
+        errors.ErrorCondition.ITEM_NOT_FOUND,
+        errors.ErrorCondition.SERVICE_UNAVAILABLE,
+    ])
+
     def __init__(self, client, **kwargs):
         super().__init__(client, **kwargs)
 
@@ -564,6 +657,14 @@ class DiscoClient(service.Service):
         self._info_pending.maxsize = 10000
         self._items_pending = aioxmpp.cache.LRUDict()
         self._items_pending.maxsize = 100
+        self._statistics = weakref.WeakKeyDictionary()
+        # futures from set_info_future whose completion is not watched yet;
+        # attaching a callback would start a LazyTask
+        self._unwatched = weakref.WeakSet()
+
+        self.cache_ttl = None
+        self.negative_cache_ttl = timedelta(minutes=5)
+        self.keep_cache_on_reconnect = False
 
         self.client.on_stream_destroyed.connect(
             self._clear_cache
@@ -599,15 +700,100 @@ class DiscoClient(service.Service):
         self._items_pending.maxsize = value
 
     def _clear_cache(self):
-        for fut in self._info_pending.values():
-            if not fut.done():
-                fut.cancel()
-        self._info_pending.clear()
+        for cache in (self._info_pending, self._items_pending):
+            for key in list(cache):
+                fut = cache[key]
+                if not fut.done():
+                    fut.cancel()
+                elif self.keep_cache_on_reconnect:
+                    continue
+                del cache[key]
+
+    def _track(self, fut, *, watch=True):
+        stats = CacheEntryStatistics(asyncio.get_event_loop().time())
+        self._statistics[fut] = stats
+        if fut.done():
+            self._entry_completed(stats, fut)
+        elif watch:
+            self._watch(fut, stats)
+        else:
+            self._unwatched.add(fut)
+        return fut
 
-        for fut in self._items_pending.values():
-            if not fut.done():
-                fut.cancel()
-        self._items_pending.clear()
+    def _watch(self, fut, stats):
+        fut.add_done_callback(
+            functools.partial(self._entry_completed, stats)
+        )
+
+    def _entry_completed(self, stats, fut):
+        stats.completed = asyncio.get_event_loop().time()
+        stats.negative = self._is_cached_error(fut)
+
+    def _is_cached_error(self, fut):
+        if self.negative_cache_ttl is None or fut.cancelled():
+            return False
+        exc = fut.exception()
+        return (isinstance(exc, errors.XMPPError) and
+                exc.condition in self.NEGATIVE_CACHE_CONDITIONS)
+
+    def _lookup_cached(self, cache, key):
+        request = cache[key]
+        stats = self._statistics.get(request)
+        if stats is None:
+            return request
+
+        if request in self._unwatched:
+            self._unwatched.discard(request)
+            if request.done():
+                self._entry_completed(stats, request)
+            else:
+                self._watch(request, stats)
+
+        if stats.completed is not None:
+            ttl = self.negative_cache_ttl if stats.negative else self.cache_ttl
+            if (ttl is not None and
+                    asyncio.get_event_loop().time() >=
+                    stats.completed + ttl.total_seconds()):
+                del cache[key]
+                raise KeyError(key)
+
+        stats.hits += 1
+        return request
+
+    def _get_statistics(self, cache, key):
+        try:
+            return self._statistics.get(cache[key])
+        except KeyError:
+            return None
+
+    def get_info_cache_statistics(self, jid, node=None):
+        """
+        Return the statistics of the :meth:`query_info` cache entry of a
+        target.
+
+        :param jid: The entity of the entry.
+        :type jid: :class:`aioxmpp.JID`
+        :param node: The node of the entry.
+        :type node: :class:`str` or :data:`None`
+        :rtype: :class:`CacheEntryStatistics` or :data:`None`
+        :return: The statistics of the entry or :data:`None` if there is no
+            entry for the target.
+
+        .. versionadded:: 0.12
+        """
+        return self._get_statistics(self._info_pending, (jid, node))
+
+    def get_items_cache_statistics(self, jid, node=None):
+        """
+        Return the statistics of the :meth:`query_items` cache entry of a
+        target.
+
+        The arguments and return value are the same as for
+        :meth:`get_info_cache_statistics`.
+
+        .. versionadded:: 0.12
+        """
+        return self._get_statistics(self._items_pending, (jid, node))
 
     def _handle_info_received(self, jid, node, task):
         try:
@@ -685,16 +871,24 @@ class DiscoClient(service.Service):
         target re-raise that exception. The result is not cached though. If a
         new query is sent at a later point for the same target, a new query is
         actually sent, independent of the value chosen for `require_fresh`.
+        As an exception to this, ``item-not-found`` and
+        ``service-unavailable`` errors are cached for
+        :attr:`negative_cache_ttl`.
 
         .. versionchanged:: 0.9
 
             The `no_cache` argument was added.
+
+        .. versionchanged:: 0.12
+
+            Results expire after :attr:`cache_ttl` and some errors are
+            cached.
         """
         key = jid, node
 
         if not require_fresh:
             try:
-                request = self._info_pending[key]
+                request = self._lookup_cached(self._info_pending, key)
             except KeyError:
                 pass
             else:
@@ -703,9 +897,9 @@ class DiscoClient(service.Service):
                 except asyncio.CancelledError:
                     pass
 
-        request = asyncio.ensure_future(
+        request = self._track(asyncio.ensure_future(
             self.send_and_decode_info_query(jid, node)
-        )
+        ))
         request.add_done_callback(
             functools.partial(
                 self._handle_info_received,
@@ -727,7 +921,7 @@ class DiscoClient(service.Service):
             else:
                 result = await request
         except:  # NOQA
-            if request.done():
+            if request.done() and not self._is_cached_error(request):
                 try:
                     pending = self._info_pending[key]
                 except KeyError:
@@ -762,7 +956,7 @@ class DiscoClient(service.Service):
 
         if not require_fresh:
             try:
-                request = self._items_pending[key]
+                request = self._lookup_cached(self._items_pending, key)
             except KeyError:
                 pass
             else:
@@ -774,9 +968,9 @@ class DiscoClient(service.Service):
         request_iq = stanza.IQ(to=jid, type_=structs.IQType.GET)
         request_iq.payload = disco_xso.ItemsQuery(node=node)
 
-        request = asyncio.ensure_future(
+        request = self._track(asyncio.ensure_future(
             self.client.send(request_iq)
-        )
+        ))
 
         self._items_pending[key] = request
         try:
@@ -790,7 +984,7 @@ class DiscoClient(service.Service):
             else:
                 result = await request
         except:  # NOQA
-            if request.done():
+            if request.done() and not self._is_cached_error(request):
                 try:
                     pending = self._items_pending[key]
                 except KeyError:
@@ -839,7 +1033,18 @@ class DiscoClient(service.Service):
            uses `require_fresh`.
 
         .. versionadded:: 0.5
+
+        .. versionchanged:: 0.12
+
+            The future is subject to :attr:`cache_ttl` and
+            :attr:`negative_cache_ttl` like the results of queries. A future
+            which is not done yet is only watched once a query uses it, so
+            that a :class:`aioxmpp.utils.LazyTask` is not started early.
         """
+        if fut not in self._statistics:
+            # the future may be lazy (like the ones used by entity caps), so
+            # its completion is only watched once a query uses it
+            self._track(fut, watch=False)
         self._info_pending[jid, node] = fut
 
 
@@ -20,6 +20,7 @@
 #
 ########################################################################
 import aioxmpp.forms.xso as forms_xso
+import aioxmpp.rsm.xso as rsm_xso
 import aioxmpp.stanza as stanza
 import aioxmpp.xso as xso
 
@@ -293,6 +294,13 @@ class ItemsQuery(xso.XSO):
 
        The items at the addressed entity.
 
+    .. attribute:: rsm
+
+       The :class:`~.rsm.xso.ResultSetMetadata` of a paged query or response,
+       or :data:`None`.
+
+       .. versionadded:: 0.12
+
     """
     TAG = (namespaces.xep0030_items, "query")
 
@@ -300,6 +308,8 @@ class ItemsQuery(xso.XSO):
 
     items = xso.ChildList([Item])
 
+    rsm = xso.Child([rsm_xso.ResultSetMetadata])
+
     def __init__(self, *, node=None, items=()):
         super().__init__()
         self.items.extend(items)
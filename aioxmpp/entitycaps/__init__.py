@@ -53,6 +53,8 @@ Service
 
 .. autoclass:: Cache
 
+.. autoclass:: SQLiteCapsStore
+
 .. currentmodule:: aioxmpp.entitycaps.xso
 
 
@@ -60,4 +62,5 @@ Service
 
 from .service import EntityCapsService, Cache  # NOQA: F401
 from . import xso  # NOQA: F401
+from .store import SQLiteCapsStore  # NOQA: F401
 Service = EntityCapsService
@@ -27,7 +27,9 @@ import urllib.parse
 
 from xml.sax.saxutils import escape
 
-from .common import AbstractKey, AbstractImplementation
+import aioxmpp.cache
+
+from .common import AbstractKey, AbstractImplementation, structure_key
 from . import xso as caps_xso
 
 
@@ -110,17 +112,32 @@ def build_forms_string(forms):
     return b"<".join(parts)
 
 
+def _build_hash_input(query):
+    return b"".join([
+        build_identities_string(query.identities),
+        build_features_string(query.features),
+        build_forms_string(query.exts),
+    ])
+
+
+_hash_inputs = aioxmpp.cache.LRUDict()
+_hash_inputs.maxsize = 128
+
+
+def _get_hash_input(query):
+    key = structure_key(query)
+    try:
+        return _hash_inputs[key]
+    except KeyError:
+        pass
+    result = _build_hash_input(query)
+    _hash_inputs[key] = result
+    return result
+
+
 def hash_query(query, algo):
     hashimpl = hashlib.new(algo)
-    hashimpl.update(
-        build_identities_string(query.identities)
-    )
-    hashimpl.update(
-        build_features_string(query.features)
-    )
-    hashimpl.update(
-        build_forms_string(query.exts)
-    )
+    hashimpl.update(_get_hash_input(query))
 
     return base64.b64encode(hashimpl.digest()).decode("ascii")
 
@@ -24,9 +24,10 @@ import pathlib
 import collections
 import urllib.parse
 
+import aioxmpp.cache
 import aioxmpp.hashes
 
-from .common import AbstractKey
+from .common import AbstractKey, structure_key
 from . import xso as caps_xso
 
 
@@ -121,7 +122,7 @@ def _process_extensions(exts):
     return b"".join(parts)+b"\x1c"
 
 
-def _get_hash_input(info):
+def _build_hash_input(info):
     return b"".join([
         _process_features(info.features),
         _process_identities(info.identities),
@@ -129,6 +130,21 @@ def _get_hash_input(info):
     ])
 
 
+_hash_inputs = aioxmpp.cache.LRUDict()
+_hash_inputs.maxsize = 128
+
+
+def _get_hash_input(info):
+    key = structure_key(info)
+    try:
+        return _hash_inputs[key]
+    except KeyError:
+        pass
+    result = _build_hash_input(info)
+    _hash_inputs[key] = result
+    return result
+
+
 def _calculate_hash(algo, hash_input):
     impl = aioxmpp.hashes.hash_from_algo(algo)
     impl.update(hash_input)
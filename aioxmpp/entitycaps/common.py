@@ -20,6 +20,40 @@
 #
 ########################################################################
 import abc
+import collections
+
+
+def structure_key(info):
+    """
+    Return a hashable key which describes the parts of a disco#info response
+    which are relevant for capability hashing.
+
+    :param info: The disco#info response.
+    :type info: :class:`~.disco.xso.InfoQuery`
+
+    Two responses with the same key produce the same hash inputs for all
+    supported capability hashing schemes. This allows to memoise the hash
+    inputs, which are comparatively expensive to build.
+    """
+    identities = collections.Counter(
+        (identity.category,
+         identity.type_,
+         None if identity.lang is None else str(identity.lang),
+         identity.name)
+        for identity in info.identities
+    )
+    forms = tuple(
+        tuple(
+            (field.var, tuple(field.values))
+            for field in form.fields
+        )
+        for form in info.exts
+    )
+    return (
+        frozenset(info.features),
+        frozenset(identities.items()),
+        forms,
+    )
 
 
 class AbstractKey(metaclass=abc.ABCMeta):
@@ -23,13 +23,18 @@ import asyncio
 import collections
 import copy
 import functools
+import io
 import logging
 import os
 import tempfile
+import weakref
+
+from datetime import timedelta
 
 import aioxmpp.callbacks
 import aioxmpp.disco as disco
 import aioxmpp.service
+import aioxmpp.stream
 import aioxmpp.utils
 import aioxmpp.xml
 import aioxmpp.xso
@@ -37,6 +42,7 @@ import aioxmpp.xso
 from aioxmpp.utils import namespaces
 
 from . import caps115, caps390
+from .common import structure_key
 
 
 logger = logging.getLogger("aioxmpp.entitycaps")
@@ -57,12 +63,22 @@ class Cache:
     In addition to serving the databases, it provides deduplication for queries
     by holding a cache of futures looking up the same hash.
 
+    Entries which have been looked up or added are kept in memory, up to
+    :attr:`max_memory_entries`. Entries with the same content are shared
+    among keys (for example, the :xep:`115` and :xep:`390` keys of the same
+    entity). Keys whose verification or query failed are remembered for
+    :attr:`negative_ttl` to avoid querying them again on every presence.
+
     Database management (user API):
 
     .. automethod:: set_system_db_path
 
     .. automethod:: set_user_db_path
 
+    .. automethod:: set_system_db_store
+
+    .. automethod:: set_user_db_store
+
     Queries (API intended for :class:`Service`):
 
     .. automethod:: create_query_future
@@ -70,13 +86,42 @@ class Cache:
     .. automethod:: lookup_in_database
 
     .. automethod:: lookup
+
+    .. automethod:: add_negative_cache_entry
+
+    .. automethod:: has_negative_cache_entry
+
+    Memory usage:
+
+    .. attribute:: max_memory_entries
+
+       The maximum number of entries kept in memory. When more entries are
+       added, the least recently used ones are dropped from memory (but not
+       from the databases).
+
+       .. versionadded:: 0.12
+
+    .. attribute:: negative_ttl
+
+       The time for which a failed key is remembered, as
+       :class:`datetime.timedelta`.
+
+       .. versionadded:: 0.12
     """
 
     def __init__(self):
         self._lookup_cache = {}
-        self._memory_overlay = {}
+        self._memory_overlay = collections.OrderedDict()
+        self._interned = weakref.WeakValueDictionary()
+        self._negative = collections.OrderedDict()
+        self.max_memory_entries = 4096
+        self.negative_ttl = timedelta(minutes=10)
         self._system_db_path = None
         self._user_db_path = None
+        self._system_db_store = None
+        self._user_db_store = None
+        self._store_writes = {}
+        self._store_flush_handle = None
 
     def _erase_future(self, key, fut):
         try:
@@ -93,9 +138,87 @@ class Cache:
     def set_user_db_path(self, path):
         self._user_db_path = path
 
+    def set_system_db_store(self, store, *, preload=True):
+        """
+        Use a single-file store as trusted database.
+
+        :param store: The store to use.
+        :type store: :class:`.SQLiteCapsStore`
+        :param preload: Load all entries of the store into memory at once.
+        :type preload: :class:`bool`
+
+        The store is consulted after the directory set with
+        :meth:`set_system_db_path`, if any. Entries found in a store are
+        parsed once and then kept in memory.
+
+        .. versionadded:: 0.12
+        """
+        if preload:
+            store.preload()
+        self._system_db_store = store
+
+    def set_user_db_store(self, store, *, preload=True):
+        """
+        Use a single-file store as user-level database.
+
+        :param store: The store to use.
+        :type store: :class:`.SQLiteCapsStore`
+        :param preload: Load all entries of the store into memory at once.
+        :type preload: :class:`bool`
+
+        The store is consulted after the directory set with
+        :meth:`set_user_db_path`, if any. New entries are written to the
+        store in batches, one transaction per event loop iteration, instead
+        of one file per entry.
+
+        .. versionadded:: 0.12
+        """
+        if preload:
+            store.preload()
+        self._user_db_store = store
+
+    def _remember(self, key, entry, fingerprint):
+        entry = self._interned.setdefault(fingerprint, entry)
+        self._memory_overlay[key] = entry
+        self._memory_overlay.move_to_end(key)
+        while len(self._memory_overlay) > self.max_memory_entries:
+            self._memory_overlay.popitem(last=False)
+        return entry
+
+    def _lookup_in_store(self, store, key):
+        data = store.get(key.path.as_posix())
+        result = aioxmpp.xml.read_single_xso(io.BytesIO(data),
+                                             disco.xso.InfoQuery)
+        return self._remember(key, result, structure_key(result))
+
+    def _flush_store_writes(self):
+        self._store_flush_handle = None
+        writes, self._store_writes = self._store_writes, {}
+        if writes and self._user_db_store is not None:
+            return asyncio.ensure_future(
+                asyncio.get_event_loop().run_in_executor(
+                    None,
+                    self._user_db_store.put_many,
+                    list(writes.items())))
+
+    def lookup_in_memory(self, key):
+        """
+        Return the entry for `key` if it is held in memory.
+
+        :raises KeyError: if the entry is not in memory.
+
+        Unlike :meth:`lookup_in_database`, this never reads from the
+        databases.
+
+        .. versionadded:: 0.12
+        """
+        result = self._memory_overlay[key]
+        self._memory_overlay.move_to_end(key)
+        return result
+
     def lookup_in_database(self, key):
         try:
-            result = self._memory_overlay[key]
+            result = self.lookup_in_memory(key)
         except KeyError:
             pass
         else:
@@ -114,7 +237,19 @@ class Cache:
             else:
                 logger.debug("system db hit: %s", key)
                 with f:
-                    return aioxmpp.xml.read_single_xso(f, disco.xso.InfoQuery)
+                    result = aioxmpp.xml.read_single_xso(
+                        f, disco.xso.InfoQuery
+                    )
+                return self._remember(key, result, structure_key(result))
+
+        if self._system_db_store is not None:
+            try:
+                result = self._lookup_in_store(self._system_db_store, key)
+            except KeyError:
+                pass
+            else:
+                logger.debug("system db store hit: %s", key)
+                return result
 
         if self._user_db_path is not None:
             try:
@@ -126,7 +261,19 @@ class Cache:
             else:
                 logger.debug("user db hit: %s", key)
                 with f:
-                    return aioxmpp.xml.read_single_xso(f, disco.xso.InfoQuery)
+                    result = aioxmpp.xml.read_single_xso(
+                        f, disco.xso.InfoQuery
+                    )
+                return self._remember(key, result, structure_key(result))
+
+        if self._user_db_store is not None:
+            try:
+                result = self._lookup_in_store(self._user_db_store, key)
+            except KeyError:
+                pass
+            else:
+                logger.debug("user db store hit: %s", key)
+                return result
 
         raise KeyError(key)
 
@@ -184,13 +331,57 @@ class Cache:
         that the caller perfoms the validation.
         """
         copied_entry = copy.copy(entry)
-        self._memory_overlay[key] = copied_entry
+        self._negative.pop(key, None)
+        self._remember(key, copied_entry, structure_key(entry))
         if self._user_db_path is not None:
             asyncio.ensure_future(asyncio.get_event_loop().run_in_executor(
                 None,
                 writeback,
                 self._user_db_path / key.path,
                 entry.captured_events))
+        if self._user_db_store is not None:
+            self._store_writes[key.path.as_posix()] = _serialize_events(
+                entry.captured_events
+            )
+            if self._store_flush_handle is None:
+                self._store_flush_handle = \
+                    asyncio.get_event_loop().call_soon(
+                        self._flush_store_writes
+                    )
+
+    def add_negative_cache_entry(self, key):
+        """
+        Remember that looking up `key` failed.
+
+        :param key: The key whose verification or query failed.
+
+        For :attr:`negative_ttl`, :meth:`has_negative_cache_entry` returns
+        true for `key`.
+
+        .. versionadded:: 0.12
+        """
+        self._negative.pop(key, None)
+        self._negative[key] = (
+            asyncio.get_event_loop().time() +
+            self.negative_ttl.total_seconds()
+        )
+        while len(self._negative) > self.max_memory_entries:
+            self._negative.popitem(last=False)
+
+    def has_negative_cache_entry(self, key):
+        """
+        Return whether looking up `key` failed recently.
+
+        .. versionadded:: 0.12
+        """
+        try:
+            expires_at = self._negative[key]
+        except KeyError:
+            return False
+        if expires_at <= asyncio.get_event_loop().time():
+            del self._negative[key]
+            return False
+        return True
 
 
 class EntityCapsService(aioxmpp.service.Service):
@@ -244,6 +435,15 @@ class EntityCapsService(aioxmpp.service.Service):
 
     .. autoattribute:: xep390_support
 
+    The service also keeps an index of the features of all entities which sent
+    capability information in their presence and whose capabilities are known
+    (either from the :attr:`cache` or because they have been looked up). The
+    index answers queries without any network traffic:
+
+    .. automethod:: get_entities_with_feature
+
+    .. automethod:: get_known_features
+
     .. versionchanged:: 0.8
 
        This class was formerly known as :class:`aioxmpp.entitycaps.Service`. It
@@ -266,6 +466,10 @@ class EntityCapsService(aioxmpp.service.Service):
     on_ver_changed = aioxmpp.callbacks.Signal()
 
     def __init__(self, node, **kwargs):
+        # the features registered by the descriptors below already trigger
+        # _info_changed during super().__init__
+        self._update_hash_handle = None
+
         super().__init__(node, **kwargs)
 
         self.__current_keys = {}
@@ -282,6 +486,13 @@ class EntityCapsService(aioxmpp.service.Service):
         self.__active_hashsets = []
         self.__key_users = collections.Counter()
 
+        self._index_jid_keys = {}
+        self._index_key_jids = {}
+        self._index_key_features = {}
+        self._index_feature_keys = {}
+        self._interned_feature_sets = weakref.WeakValueDictionary()
+        self._index_pending = set()
+
     @property
     def xep115_support(self):
         """
@@ -355,36 +566,70 @@ class EntityCapsService(aioxmpp.service.Service):
         disco.DiscoServer,
         "on_info_changed")
     def _info_changed(self):
+        if self._update_hash_handle is not None:
+            # coalesce bursts of changes (e.g. many services registering
+            # features during startup) into a single re-calculation
+            return
+
         self.logger.debug("info changed, scheduling re-calculation of version")
-        asyncio.get_event_loop().call_soon(
+        self._update_hash_handle = asyncio.get_event_loop().call_soon(
             self.update_hash
         )
 
     async def _shutdown(self):
+        if self._update_hash_handle is not None:
+            self._update_hash_handle.cancel()
+            self._update_hash_handle = None
+
         for group in self.__current_keys.values():
             for key in group:
                 self.disco_server.unmount_node(key.node)
 
     async def query_and_cache(self, jid, key, fut):
-        data = await self.disco_client.query_info(
-            jid,
-            node=key.node,
-            require_fresh=True,
-            no_cache=True,  # the caps node is never queried by apps
-        )
+        try:
+            data = await self.disco_client.query_info(
+                jid,
+                node=key.node,
+                require_fresh=True,
+                no_cache=True,  # the caps node is never queried by apps
+            )
+        except Exception as exc:
+            self.cache.add_negative_cache_entry(key)
+            # other entities waiting on fut must query themselves instead of
+            # failing with our error, so hand them a ValueError (see
+            # Cache.lookup)
+            error = ValueError("query for {!r} failed".format(key))
+            error.__cause__ = exc
+            fut.set_exception(error)
+            raise
 
         try:
             if key.verify(data):
                 self.cache.add_cache_entry(key, data)
+                self._index_key_info(key, data)
                 fut.set_result(data)
             else:
                 raise ValueError("hash mismatch")
         except ValueError as exc:
+            self.cache.add_negative_cache_entry(key)
             fut.set_exception(exc)
 
         return data
 
     async def lookup_info(self, jid, keys):
+        keys = [
+            key for key in keys
+            if not self.cache.has_negative_cache_entry(key)
+        ]
+        if not keys:
+            self.logger.debug("all keys of %s failed recently, querying "
+                              "without caps node", jid)
+            return await self.disco_client.query_info(
+                jid,
+                require_fresh=True,
+                no_cache=True,
+            )
+
         for key in keys:
             try:
                 info = await self.cache.lookup(key)
@@ -392,6 +637,7 @@ class EntityCapsService(aioxmpp.service.Service):
                 continue
 
             self.logger.debug("found %s in cache", key)
+            self._index_key_info(key, info)
             return info
 
         first_key = keys[0]
@@ -436,6 +682,18 @@ class EntityCapsService(aioxmpp.service.Service):
         if self.xep115_support:
             keys.extend(self.__115.extract_keys(presence))
 
+        if presence.type_ == aioxmpp.structs.PresenceType.AVAILABLE:
+            self._index_entity(presence.from_, keys)
+        elif presence.type_ == aioxmpp.structs.PresenceType.UNAVAILABLE:
+            self._unindex_entity(presence.from_)
+
+        # do not even prime the disco cache with keys which are known to be
+        # broken; apps will query the entity directly instead
+        keys = [
+            key for key in keys
+            if not self.cache.has_negative_cache_entry(key)
+        ]
+
         if keys:
             lookup_task = aioxmpp.utils.LazyTask(
                 self.lookup_info,
@@ -450,6 +708,134 @@ class EntityCapsService(aioxmpp.service.Service):
 
         return presence
 
+    @aioxmpp.service.depsignal(aioxmpp.stream.StanzaStream,
+                               "on_stream_destroyed")
+    def _clear_index(self, reason=None):
+        self._index_pending.clear()
+        self._index_jid_keys.clear()
+        self._index_key_jids.clear()
+        self._index_key_features.clear()
+        self._index_feature_keys.clear()
+
+    def _index_entity(self, jid, keys):
+        keys = tuple(keys)
+        if self._index_jid_keys.get(jid, ()) == keys:
+            return
+
+        self._unindex_entity(jid)
+        if not keys:
+            return
+
+        self._index_jid_keys[jid] = keys
+        for key in keys:
+            self._index_key_jids.setdefault(key, set()).add(jid)
+            if key in self._index_key_features:
+                continue
+
+            # this runs inside a stanza filter: only use what is in memory
+            # and defer reading the databases
+            try:
+                info = self.cache.lookup_in_memory(key)
+            except KeyError:
+                if key not in self._index_pending:
+                    self._index_pending.add(key)
+                    asyncio.get_event_loop().call_soon(
+                        self._index_from_database,
+                        key,
+                    )
+                continue
+            self._index_key_info(key, info)
+
+    def _index_from_database(self, key):
+        self._index_pending.discard(key)
+        if (key not in self._index_key_jids or
+                key in self._index_key_features):
+            return
+
+        try:
+            info = self.cache.lookup_in_database(key)
+        except KeyError:
+            return
+        except Exception:  # NOQA
+            self.logger.warning(
+                "failed to read %s from the capability database",
+                key,
+                exc_info=True,
+            )
+            return
+
+        self._index_key_info(key, info)
+
+    def _unindex_entity(self, jid):
+        for key in self._index_jid_keys.pop(jid, ()):
+            jids = self._index_key_jids[key]
+            jids.discard(jid)
+            if jids:
+                continue
+
+            del self._index_key_jids[key]
+            for feature in self._index_key_features.pop(key, ()):
+                feature_keys = self._index_feature_keys[feature]
+                feature_keys.discard(key)
+                if not feature_keys:
+                    del self._index_feature_keys[feature]
+
+    def _index_key_info(self, key, info):
+        if (key not in self._index_key_jids or
+                key in self._index_key_features):
+            return
+
+        features = frozenset(info.features)
+        features = self._interned_feature_sets.setdefault(features, features)
+        self._index_key_features[key] = features
+        for feature in features:
+            self._index_feature_keys.setdefault(feature, set()).add(key)
+
+    def get_entities_with_feature(self, feature):
+        """
+        Return the entities which are known to support a feature.
+
+        :param feature: The feature namespace to look for.
+        :type feature: :class:`str`
+        :return: The full JIDs of the entities which support `feature`.
+        :rtype: :class:`set` of :class:`~aioxmpp.JID`
+
+        Only entities which are currently available, have sent capability
+        information and whose capabilities are known are considered. No
+        queries are sent.
+
+        .. versionadded:: 0.12
+        """
+        result = set()
+        for key in self._index_feature_keys.get(feature, ()):
+            result.update(self._index_key_jids[key])
+        return result
+
+    def get_known_features(self, jid):
+        """
+        Return the features of an entity, if they are known.
+
+        :param jid: The full JID of the entity.
+        :type jid: :class:`~aioxmpp.JID`
+        :return: The features of the entity or :data:`None`.
+        :rtype: :class:`frozenset` of :class:`str`
+
+        :data:`None` is returned if the entity is not available, has not sent
+        capability information or its capabilities have not been looked up
+        yet. No queries are sent.
+
+        Entities with identical capabilities share the same
+        :class:`frozenset` instance.
+
+        .. versionadded:: 0.12
+        """
+        for key in self._index_jid_keys.get(jid, ()):
+            try:
+                return self._index_key_features[key]
+            except KeyError:
+                pass
+        return None
+
     def _push_hashset(self, node, hashset):
         if self.__active_hashsets and hashset == self.__active_hashsets[-1]:
             return False
@@ -474,6 +860,10 @@ class EntityCapsService(aioxmpp.service.Service):
         return True
 
     def update_hash(self):
+        if self._update_hash_handle is not None:
+            self._update_hash_handle.cancel()
+            self._update_hash_handle = None
+
         node = disco.StaticNode.clone(self.disco_server)
         info = node.as_info_xso()
 
@@ -496,6 +886,17 @@ class EntityCapsService(aioxmpp.service.Service):
     _xep390_feature = disco.register_feature(namespaces.xep0390_caps)
 
 
+def _serialize_events(captured_events):
+    buf = io.BytesIO()
+    generator = aioxmpp.xml.XMPPXMLGenerator(
+        buf,
+        short_empty_elements=True)
+    generator.startDocument()
+    aioxmpp.xso.events_to_sax(captured_events, generator)
+    generator.endDocument()
+    return buf.getvalue()
+
+
 def writeback(path, captured_events):
     aioxmpp.utils.mkdir_exist_ok(path.parent)
     with tempfile.NamedTemporaryFile(dir=str(path.parent),
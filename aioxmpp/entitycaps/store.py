@@ -0,0 +1,213 @@
+########################################################################
+# File name: store.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import os
+import pathlib
+import sqlite3
+import tempfile
+import threading
+
+import aioxmpp.utils
+
+
+class SQLiteCapsStore:
+    """
+    Entity capabilities database backed by a single SQLite file.
+
+    :param path: Path to the database file.
+    :type path: :class:`str` or :class:`pathlib.Path`
+
+    The store maps the relative path of a cache key in the directory-based
+    database layout (see :meth:`set_system_db_path
+    <aioxmpp.entitycaps.Cache.set_system_db_path>`) to the serialised
+    disco#info response. It is used with
+    :meth:`~aioxmpp.entitycaps.Cache.set_system_db_store` and
+    :meth:`~aioxmpp.entitycaps.Cache.set_user_db_store`.
+
+    The database is opened (and created, if needed) on first use. The store
+    may be used from several threads (for example, from an executor); access
+    to the database is serialised.
+
+    .. automethod:: preload
+
+    .. automethod:: get
+
+    .. automethod:: put_many
+
+    .. automethod:: import_directory
+
+    .. automethod:: export_directory
+
+    .. automethod:: compact
+
+    .. automethod:: close
+
+    .. versionadded:: 0.12
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self._path = str(path)
+        self._conn = None
+        self._preloaded = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS caps_entries "
+                    "(path TEXT PRIMARY KEY, data BLOB NOT NULL)"
+                )
+            self._conn = conn
+        return self._conn
+
+    def __len__(self):
+        if self._preloaded is not None:
+            return len(self._preloaded)
+        with self._lock:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM caps_entries"
+            ).fetchone()[0]
+
+    def preload(self):
+        """
+        Load all entries into memory with a single query.
+
+        After preloading, :meth:`get` is answered from memory without
+        accessing the database. Entries are kept in their serialised form;
+        parsing happens on lookup.
+        """
+        with self._lock:
+            self._preloaded = dict(self._connect().execute(
+                "SELECT path, data FROM caps_entries"
+            ))
+
+    def get(self, path):
+        """
+        Return the serialised entry stored under `path`.
+
+        :param path: The relative path of the cache key.
+        :type path: :class:`str`
+        :raises KeyError: if there is no entry for `path`.
+        :rtype: :class:`bytes`
+        """
+        if self._preloaded is not None:
+            return self._preloaded[path]
+
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT data FROM caps_entries WHERE path = ?",
+                (path,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(path)
+        return row[0]
+
+    def put_many(self, entries):
+        """
+        Store multiple entries in a single transaction.
+
+        :param entries: The entries to store.
+        :type entries: iterable of pairs of :class:`str` and :class:`bytes`
+
+        Existing entries with the same path are replaced.
+        """
+        entries = list(entries)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO caps_entries (path, data) "
+                    "VALUES (?, ?)",
+                    entries,
+                )
+        if self._preloaded is not None:
+            self._preloaded.update(entries)
+
+    def import_directory(self, root):
+        """
+        Import all entries from a directory-based database.
+
+        :param root: The root directory of the database.
+        :type root: :class:`pathlib.Path`
+        :return: The number of imported entries.
+        :rtype: :class:`int`
+        """
+        root = pathlib.Path(root)
+        entries = [
+            (path.relative_to(root).as_posix(), path.read_bytes())
+            for path in root.rglob("*.xml")
+            if path.is_file()
+        ]
+        self.put_many(entries)
+        return len(entries)
+
+    def export_directory(self, root):
+        """
+        Export all entries into a directory-based database.
+
+        :param root: The root directory of the database.
+        :type root: :class:`pathlib.Path`
+        :return: The number of exported entries.
+        :rtype: :class:`int`
+
+        Each file is replaced atomically.
+        """
+        root = pathlib.Path(root)
+        with self._lock:
+            entries = self._connect().execute(
+                "SELECT path, data FROM caps_entries"
+            ).fetchall()
+        count = 0
+        for path, data in entries:
+            _write_file(root / path, data)
+            count += 1
+        return count
+
+    def compact(self):
+        """
+        Reclaim unused space in the database file.
+        """
+        with self._lock:
+            self._connect().execute("VACUUM")
+
+    def close(self):
+        """
+        Close the database.
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _write_file(path, data):
+    aioxmpp.utils.mkdir_exist_ok(path.parent)
+    with tempfile.NamedTemporaryFile(dir=str(path.parent),
+                                     delete=False) as tmpf:
+        try:
+            tmpf.write(data)
+        except:  # NOQA
+            os.unlink(tmpf.name)
+            raise
+    os.replace(tmpf.name, str(path))
@@ -102,6 +102,27 @@ Pre-Authenticated Roster Subcription (:xep:`379`)
    The pre-auth element associate with a subscription request.
 
 
+Unique and Stable Stanza IDs (:xep:`359`)
+=========================================
+
+.. autoclass:: StanzaID
+
+.. autoclass:: OriginID
+
+.. attribute:: aioxmpp.Message.xep0359_stanza_ids
+
+   A list of :class:`StanzaID` instances, one per entity which assigned an
+   identifier to the message.
+
+   .. versionadded:: 0.12
+
+.. attribute:: aioxmpp.Message.xep0359_origin_id
+
+   The :class:`OriginID` assigned by the sender of the message, if any.
+
+   .. versionadded:: 0.12
+
+
 Current Jabber OpenPGP Usage (:xep:`27`)
 ========================================
 
@@ -134,6 +155,7 @@ from .markers import (  # NOQA: F401
 )
 from .json import JSONContainer, JSONContainerType  # NOQA: F401
 from .pars import Preauth  # NOQA: F401
+from .sid import StanzaID, OriginID  # NOQA: F401
 from .openpgp_legacy import (
     OpenPGPEncrypted,
     OpenPGPSigned,
@@ -0,0 +1,90 @@
+########################################################################
+# File name: sid.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import aioxmpp.xso as xso
+
+from aioxmpp.utils import namespaces
+
+from ..stanza import Message
+
+
+namespaces.xep0359_sid = "urn:xmpp:sid:0"
+
+
+class StanzaID(xso.XSO):
+    """
+    A stable identifier assigned to the stanza by an entity.
+
+    .. attribute:: id_
+
+       The identifier assigned to the stanza.
+
+    .. attribute:: by
+
+       The address as :class:`aioxmpp.JID` of the entity which assigned the
+       identifier.
+
+    .. warning::
+
+       An entity may only trust a stanza ID if `by` is an entity which is
+       known to assign stanza IDs and to strip foreign ones, as described in
+       the security considerations of :xep:`359`.
+    """
+
+    TAG = namespaces.xep0359_sid, "stanza-id"
+
+    id_ = xso.Attr(
+        "id",
+    )
+
+    by = xso.Attr(
+        "by",
+        type_=xso.JID(),
+    )
+
+    def __init__(self, id_=None, by=None):
+        super().__init__()
+        self.id_ = id_
+        self.by = by
+
+
+class OriginID(xso.XSO):
+    """
+    A stable identifier assigned to the stanza by its originating entity.
+
+    .. attribute:: id_
+
+       The identifier assigned to the stanza.
+    """
+
+    TAG = namespaces.xep0359_sid, "origin-id"
+
+    id_ = xso.Attr(
+        "id",
+    )
+
+    def __init__(self, id_=None):
+        super().__init__()
+        self.id_ = id_
+
+
+Message.xep0359_stanza_ids = xso.ChildList([StanzaID])
+Message.xep0359_origin_id = xso.Child([OriginID])
@@ -67,6 +67,8 @@ Inside rooms, there are occupants:
 
 .. autoclass:: ServiceMember
 
+.. autoclass:: OccupantBatch
+
 Timeout controls / :xep:`0410` (MUC Self-Ping) support
 ------------------------------------------------------
 
@@ -247,6 +249,7 @@ Owner namespace
 from .service import (  # NOQA: F401
     MUCClient,
     Occupant,
+    OccupantBatch,
     Room,
     LeaveMode,
     RoomState,
@@ -20,6 +20,10 @@
 #
 ########################################################################
 import asyncio
+import collections
+import functools
+import heapq
+import itertools
 import random
 import time
 
@@ -299,6 +303,219 @@ class MUCPinger:
                     fut.cancel()
 
 
+class MUCPingScheduler:
+    """
+    :param client: Client to send pings with.
+    :param logger: Logger to use.
+    :param loop: Event loop to use (defaults to the current event loop)
+
+    Schedule the self-pings of many :class:`MUCMonitor` instances on a single
+    timer instead of running one :class:`MUCPinger` task per room.
+
+    Pingers created with :meth:`create_pinger` behave like
+    :class:`MUCPinger`, with the following differences:
+
+    * The first ping after :meth:`MUCPinger.start` is delayed by a random
+      amount of up to :attr:`spread`. This spreads the pings of rooms whose
+      timeouts trip at the same time (e.g. after a reconnect) over time.
+    * At most :attr:`max_in_flight_per_service` pings are in flight per MUC
+      service (the domain of the ping address). Further pings are sent
+      when earlier ones complete.
+
+    Rooms which deliver traffic are not pinged at all: the monitor stops the
+    pinger on each received stanza, which removes its pending pings from the
+    schedule.
+
+    .. automethod:: create_pinger
+
+    .. autoattribute:: spread
+
+    .. attribute:: max_in_flight_per_service
+
+        The maximum number of pings in flight per MUC service, or
+        :data:`None` for no limit.
+
+    .. versionadded:: 0.12
+    """
+
+    def __init__(self, client, logger, loop=None):
+        super().__init__()
+        self._client = client
+        self._logger = logger
+        self._loop = loop or asyncio.get_event_loop()
+        self._spread = timedelta(seconds=10)
+        self.max_in_flight_per_service = 4
+        self._schedule = []
+        self._seq = itertools.count()
+        self._timer = None
+        self._in_flight = collections.Counter()
+        # maps services to ordered dicts mapping waiting pingers to the
+        # generation they were queued with
+        self._waiting = {}
+
+    @property
+    def spread(self) -> timedelta:
+        """
+        The maximum delay of the first ping after a pinger was started.
+        """
+        return self._spread
+
+    @spread.setter
+    def spread(self, value: timedelta):
+        # cheap & duck-typey enforcement of timedelta compatibility
+        self._spread = value + timedelta()
+
+    def create_pinger(self, ping_address, on_fresh, on_exited, logger):
+        """
+        Create a pinger which is scheduled by this scheduler.
+
+        The arguments are the same as for :class:`MUCPinger`.
+        """
+        return _ScheduledPinger(self, ping_address, self._client,
+                                on_fresh, on_exited, logger, self._loop)
+
+    def _push(self, pinger, delay):
+        heapq.heappush(
+            self._schedule,
+            (self._loop.time() + delay, next(self._seq),
+             pinger._generation, pinger),
+        )
+
+    def _schedule_ping(self, pinger, delay):
+        self._push(pinger, delay)
+        self._rearm()
+
+    def _rearm(self):
+        while self._schedule:
+            _, _, generation, pinger = self._schedule[0]
+            if generation == pinger._generation:
+                break
+            heapq.heappop(self._schedule)
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._schedule:
+            self._timer = self._loop.call_at(self._schedule[0][0],
+                                             self._run_due)
+
+    def _run_due(self):
+        self._timer = None
+        now = self._loop.time()
+        while self._schedule and self._schedule[0][0] <= now:
+            _, _, generation, pinger = heapq.heappop(self._schedule)
+            if generation != pinger._generation:
+                continue
+
+            self._push(
+                pinger,
+                _apply_jitter(pinger.ping_interval.total_seconds(), 0.1),
+            )
+
+            # do not send pings while the client is in suspended state
+            # (= Stream Management hibernation), see MUCPinger
+            if self._client.suspended:
+                self._logger.debug(
+                    "%s: omitting self-ping, as the stream is currently "
+                    "hibernated",
+                    pinger.ping_address,
+                )
+                continue
+
+            service = pinger.ping_address.domain
+            if (self.max_in_flight_per_service is not None and
+                    self._in_flight[service] >=
+                    self.max_in_flight_per_service):
+                self._logger.debug(
+                    "%s: deferring self-ping, too many pings in flight to %s",
+                    pinger.ping_address,
+                    service,
+                )
+                # a pinger which is still waiting from an earlier interval
+                # keeps its place in the queue instead of being added again
+                waiting = self._waiting.setdefault(
+                    service,
+                    collections.OrderedDict(),
+                )
+                waiting[pinger] = generation
+                continue
+
+            self._send_ping(pinger, service)
+
+        self._rearm()
+
+    def _send_ping(self, pinger, service):
+        self._logger.debug(
+            "%s: sending self-ping with timeout %r",
+            pinger.ping_address,
+            pinger.ping_timeout,
+        )
+        self._in_flight[service] += 1
+        fut = asyncio.ensure_future(
+            asyncio.wait_for(
+                aioxmpp.ping.ping(self._client, pinger.ping_address),
+                pinger.ping_timeout.total_seconds()
+            )
+        )
+        pinger._in_flight.add(fut)
+        fut.add_done_callback(functools.partial(
+            self._ping_done, pinger, pinger._generation, service,
+        ))
+
+    def _ping_done(self, pinger, generation, service, fut):
+        pinger._in_flight.discard(fut)
+        self._in_flight[service] -= 1
+        if not self._in_flight[service]:
+            del self._in_flight[service]
+
+        # results which arrive after the pinger was stopped are discarded,
+        # like they are with the task of a MUCPinger
+        if not fut.cancelled() and generation == pinger._generation:
+            pinger._interpret_result(fut)
+
+        waiting = self._waiting.get(service)
+        while waiting and (
+                self.max_in_flight_per_service is None or
+                self._in_flight[service] < self.max_in_flight_per_service):
+            next_pinger, generation = waiting.popitem(last=False)
+            if generation == next_pinger._generation:
+                self._send_ping(next_pinger, service)
+        if not waiting:
+            self._waiting.pop(service, None)
+
+
+class _ScheduledPinger(MUCPinger):
+    def __init__(self, scheduler, *args):
+        super().__init__(*args)
+        self._scheduler = scheduler
+        self._generation = 0
+        self._running = False
+        self._in_flight = set()
+
+    def start(self):
+        self._logger.debug("%s: request to start scheduled pinger",
+                           self.ping_address)
+        self.stop()
+        self._running = True
+        self._scheduler._schedule_ping(
+            self,
+            random.random() * self._scheduler.spread.total_seconds(),
+        )
+
+    def stop(self):
+        if not self._running:
+            return
+        self._logger.debug("%s: request to stop scheduled pinger",
+                           self.ping_address)
+        self._running = False
+        # invalidates the entries in the schedule and the waiting queues
+        self._generation += 1
+        for fut in list(self._in_flight):
+            fut.cancel()
+        self._in_flight.clear()
+
+
 class MUCMonitor:
     """
     :param ping_address: Address to send pings to. Can be changed later with
@@ -311,6 +528,15 @@ class MUCMonitor:
     :param on_exited: Called when the pinger detects that the user is not in
         the room anymore.
     :param loop: Event loop to use (defaults to the current event loop)
+    :param scheduler: Scheduler to send the pings with.
+    :type scheduler: :class:`MUCPingScheduler` or :data:`None`
+
+    If `scheduler` is :data:`None`, a :class:`MUCPinger` with its own task is
+    used to send pings.
+
+    .. versionchanged:: 0.12
+
+        The `scheduler` argument was added.
 
     .. automethod:: enable
 
@@ -342,7 +568,8 @@ class MUCMonitor:
                  on_fresh,
                  on_exited,
                  logger,
-                 loop=None):
+                 loop=None,
+                 scheduler=None):
         loop = loop or asyncio.get_event_loop()
         super().__init__()
         self._client = client
@@ -364,14 +591,22 @@ class MUCMonitor:
             self._soft_limit_tripped
         )
         self._logger = logger
-        self._pinger = MUCPinger(
-            ping_address,
-            client,
-            self._pinger_fresh_detected,
-            self._pinger_exited_detected,
-            logger,
-            loop,
-        )
+        if scheduler is None:
+            self._pinger = MUCPinger(
+                ping_address,
+                client,
+                self._pinger_fresh_detected,
+                self._pinger_exited_detected,
+                logger,
+                loop,
+            )
+        else:
+            self._pinger = scheduler.create_pinger(
+                ping_address,
+                self._pinger_fresh_detected,
+                self._pinger_exited_detected,
+                logger,
+            )
 
         self.ping_address = ping_address
 
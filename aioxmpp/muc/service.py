@@ -20,15 +20,20 @@
 #
 ########################################################################
 import asyncio
+import collections
+import collections.abc
 import functools
+import heapq
+import itertools
 import uuid
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 
 import aioxmpp.callbacks
 import aioxmpp.disco
 import aioxmpp.forms
+import aioxmpp.misc
 import aioxmpp.service
 import aioxmpp.stanza
 import aioxmpp.structs
@@ -159,6 +164,8 @@ class Occupant(aioxmpp.im.conversation.AbstractConversationMember):
        The current role of the occupant within the room. This may be
        :data:`None` with faulty MUC implementations.
 
+    .. autoattribute:: direct_full_jid
+
     """
 
     def __init__(self,
@@ -168,13 +175,15 @@ class Occupant(aioxmpp.im.conversation.AbstractConversationMember):
                  presence_status={},
                  affiliation=None,
                  role=None,
-                 jid=None):
+                 jid=None,
+                 full_jid=None):
         super().__init__(occupantjid, is_self)
         self.presence_state = presence_state
         self.presence_status = aioxmpp.structs.LanguageMap(presence_status)
         self.affiliation = affiliation
         self.role = role
         self._direct_jid = jid
+        self._direct_full_jid = full_jid
         if jid is None:
             self._uid = b"urn:uuid:" + uuid.uuid4().bytes
         else:
@@ -196,6 +205,18 @@ class Occupant(aioxmpp.im.conversation.AbstractConversationMember):
         """
         return self._direct_jid
 
+    @property
+    def direct_full_jid(self):
+        """
+        The real :class:`~aioxmpp.JID` of the occupant as announced by the
+        MUC service, including the resource if the service sent one.
+
+        This is :data:`None` if the real JID is not known.
+
+        .. versionadded:: 0.12
+        """
+        return self._direct_full_jid
+
     @property
     def nick(self):
         """
@@ -231,10 +252,12 @@ class Occupant(aioxmpp.im.conversation.AbstractConversationMember):
             else:
                 role = None
             jid = None
+            full_jid = None
         else:
             affiliation = item.affiliation
             role = item.role
             jid = item.bare_jid
+            full_jid = item.jid
 
         return cls(
             occupantjid=presence.from_,
@@ -244,6 +267,7 @@ class Occupant(aioxmpp.im.conversation.AbstractConversationMember):
             affiliation=affiliation,
             role=role,
             jid=jid,
+            full_jid=full_jid,
         )
 
     def update(self, other):
@@ -257,6 +281,8 @@ class Occupant(aioxmpp.im.conversation.AbstractConversationMember):
         if self._direct_jid is None and other.direct_jid is not None:
             self._set_uid_from_direct_jid(other.direct_jid)
         self._direct_jid = other.direct_jid or self._direct_jid
+        self._direct_full_jid = (other.direct_full_jid or
+                                 self._direct_full_jid)
 
     def __repr__(self):
         return "<{}.{} occupantjid={!r} uid={!r} jid={!r}>".format(
@@ -268,6 +294,152 @@ class Occupant(aioxmpp.im.conversation.AbstractConversationMember):
         )
 
 
+class _OccupantTable(collections.abc.MutableMapping):
+    """
+    Mapping from occupant JIDs to :class:`Occupant` instances, with secondary
+    indexes by nickname, real JID, role and affiliation.
+
+    Occupants must be re-indexed with :meth:`reindex` after their attributes
+    have changed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._by_jid = {}
+        self._by_nick = {}
+        # (attribute, value) -> set of Occupant
+        self._index = {}
+        # Occupant -> keys under which it is currently indexed
+        self._keys = {}
+
+    @staticmethod
+    def _index_keys(occupant):
+        keys = {
+            ("role", occupant.role),
+            ("affiliation", occupant.affiliation),
+        }
+        if occupant.direct_jid is not None:
+            keys.add(("direct_jid", occupant.direct_jid))
+        if occupant.direct_full_jid is not None:
+            keys.add(("direct_jid", occupant.direct_full_jid))
+        return frozenset(keys)
+
+    def __getitem__(self, jid):
+        return self._by_jid[jid]
+
+    def __setitem__(self, jid, occupant):
+        try:
+            old = self._by_jid[jid]
+        except KeyError:
+            pass
+        else:
+            self._drop(old)
+        self._by_jid[jid] = occupant
+        self._by_nick[jid.resource] = occupant
+        self.reindex(occupant)
+
+    def __delitem__(self, jid):
+        occupant = self._by_jid.pop(jid)
+        self._drop(occupant)
+        if self._by_nick.get(jid.resource) is occupant:
+            del self._by_nick[jid.resource]
+
+    def __iter__(self):
+        return iter(self._by_jid)
+
+    def __len__(self):
+        return len(self._by_jid)
+
+    def _drop(self, occupant):
+        for key in self._keys.pop(occupant, ()):
+            occupants = self._index[key]
+            occupants.discard(occupant)
+            if not occupants:
+                del self._index[key]
+
+    def reindex(self, occupant):
+        old_keys = self._keys.get(occupant, frozenset())
+        new_keys = self._index_keys(occupant)
+        if old_keys == new_keys:
+            return
+
+        for key in old_keys - new_keys:
+            occupants = self._index[key]
+            occupants.discard(occupant)
+            if not occupants:
+                del self._index[key]
+
+        for key in new_keys - old_keys:
+            self._index.setdefault(key, set()).add(occupant)
+
+        self._keys[occupant] = new_keys
+
+    def get_by_nick(self, nick):
+        return self._by_nick.get(nick)
+
+    def find(self, criteria):
+        candidates = [
+            self._index.get(key, frozenset())
+            for key in criteria
+        ]
+        if not candidates:
+            return set(self._by_jid.values())
+
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for occupants in candidates[1:]:
+            result &= occupants
+        return result
+
+
+class OccupantBatch(collections.namedtuple(
+        "OccupantBatch",
+        [
+            "joined",
+            "changed",
+            "left",
+        ])):
+    """
+    Net occupant changes collected by a :class:`Room` in coalescing mode.
+
+    .. attribute:: joined
+
+       List of :class:`Occupant` objects which joined the room.
+
+    .. attribute:: changed
+
+       List of :class:`Occupant` objects which stayed in the room and whose
+       presence, role or affiliation changed.
+
+    .. attribute:: left
+
+       List of :class:`Occupant` objects which left the room.
+
+    .. seealso::
+
+       :attr:`Room.muc_coalescing_window`
+
+    .. versionadded:: 0.12
+    """
+
+
+class _PendingOccupantChanges:
+    __slots__ = ("joined", "leave_kwargs", "initial", "signals")
+
+    def __init__(self, occupant, joined):
+        self.joined = joined
+        self.leave_kwargs = None
+        self.initial = (
+            occupant.presence_state,
+            aioxmpp.structs.LanguageMap(occupant.presence_status),
+            occupant.role,
+            occupant.affiliation,
+        )
+        # signal -> (args, kwargs) of the most recent emission, in order of
+        # first emission
+        self.signals = collections.OrderedDict()
+
+
 class RoomState(Enum):
     """
     Enumeration which describes the state a :class:`~.muc.Room` is in.
@@ -401,6 +573,12 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
 
     .. autoattribute:: muc_subject_setter
 
+    Looking up occupants:
+
+    .. automethod:: muc_get_occupant
+
+    .. automethod:: muc_find_occupants
+
     .. attribute:: muc_autorejoin
 
        A boolean flag indicating whether this MUC is supposed to be
@@ -413,6 +591,65 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
        :data:`None`, this can be cleared after :meth:`on_enter` has been
        emitted.
 
+    .. attribute:: muc_coalescing_window
+
+       Time window to collect occupant changes in before emitting signals, as
+       :class:`datetime.timedelta`, or :data:`None` (the default) to emit the
+       signals for each presence stanza right away.
+
+       When a window is set, :attr:`members` and the :class:`Occupant`
+       objects are still updated immediately, but :meth:`on_join`,
+       :meth:`on_leave`, :meth:`on_presence_changed`,
+       :meth:`on_muc_role_changed` and :meth:`on_muc_affiliation_changed` are
+       deferred for occupants other than the local one. At the end of the
+       window only the net changes are emitted, followed by
+       :meth:`on_muc_occupant_batch`: an occupant which joins and leaves
+       within the window causes no signals at all, an occupant which leaves
+       only causes :meth:`on_leave`, and a change signal is only emitted
+       (once, with the most recent arguments) if the respective value differs
+       from the one at the start of the window.
+
+       While a window is set, the presence burst received while joining is
+       collected until the room is entered (independent of the length of the
+       window) and emitted right before :meth:`on_muc_enter`. Without a
+       window, :meth:`on_join` is emitted for each occupant of the burst as
+       its presence arrives. Pending changes are also emitted before nickname
+       changes and before the room is suspended or exited.
+
+       .. versionadded:: 0.12
+
+    .. automethod:: muc_flush_occupant_batch
+
+    .. attribute:: muc_max_seen_ids
+
+       The number of :xep:`359` stanza IDs and origin IDs of received
+       messages which are remembered to drop duplicate messages (for example
+       from the history replayed on a rejoin). Defaults to 256.
+
+       Only stanza IDs assigned by the room itself are used. Duplicate
+       messages are dropped before any signal is emitted.
+
+       .. versionadded:: 0.12
+
+    .. autoattribute:: muc_last_stanza_id
+
+    .. attribute:: muc_join_priority
+
+       The priority with which the room is (re-)joined when
+       :attr:`MUCClient.join_concurrency` limits the number of concurrent
+       joins. Rooms with a higher priority are joined first. This is
+       initialised from the `priority` argument to :meth:`MUCClient.join`.
+
+       .. versionadded:: 0.12
+
+    .. attribute:: muc_join_latency
+
+       The time which passed between sending the most recent join presence
+       and entering the room, as :class:`datetime.timedelta`, or :data:`None`
+       if the room has not been entered yet.
+
+       .. versionadded:: 0.12
+
     The following methods and properties provide interaction with the MUC
     itself:
 
@@ -645,6 +882,20 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
 
             The `muc_status_codes` argument was added.
 
+    .. signal:: on_muc_occupant_batch(batch)
+
+        Emits in coalescing mode after the deferred signals for a batch have
+        been emitted.
+
+        :param batch: The net changes of the batch.
+        :type batch: :class:`~.OccupantBatch`
+
+        .. seealso::
+
+            :attr:`muc_coalescing_window`
+
+        .. versionadded:: 0.12
+
     .. signal:: on_muc_suspend()
 
         Emits when the stream used by this MUC gets destroyed (see
@@ -880,6 +1131,7 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
     # other occupant state events
     on_muc_affiliation_changed = aioxmpp.callbacks.Signal()
     on_muc_role_changed = aioxmpp.callbacks.Signal()
+    on_muc_occupant_batch = aioxmpp.callbacks.Signal()
 
     # approval requests
     on_muc_role_request = aioxmpp.callbacks.Signal()
@@ -887,7 +1139,7 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
     def __init__(self, service, mucjid):
         super().__init__(service)
         self._mucjid = mucjid
-        self._occupant_info = {}
+        self._occupant_info = _OccupantTable()
         self._subject = aioxmpp.structs.LanguageMap()
         self._subject_setter = None
         self._joined = False
@@ -901,6 +1153,15 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
         self._service_member = ServiceMember(mucjid)
         self.muc_autorejoin = False
         self.muc_password = None
+        self.muc_coalescing_window = None
+        self.muc_join_priority = 0
+        self.muc_join_latency = None
+        self.muc_max_seen_ids = 256
+        self._muc_pending = collections.OrderedDict()
+        self._muc_flush_handle = None
+        self._muc_last_seen = None
+        self._muc_last_stanza_id = None
+        self._muc_seen_ids = collections.OrderedDict()
         self._monitor = self_ping.MUCMonitor(
             mucjid,
             service.client,
@@ -908,12 +1169,26 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
             self._monitor_fresh,
             self._monitor_exited,
             self._service.logger.getChild("MUCMonitor"),
+            scheduler=self._service.self_ping_scheduler,
         )
 
     @property
     def service(self):
         return self._service
 
+    @property
+    def muc_last_stanza_id(self):
+        """
+        The most recent :xep:`359` stanza ID assigned by the room to a
+        received message, or :data:`None`.
+
+        This can be used to catch up on missed messages using a message
+        archive.
+
+        .. versionadded:: 0.12
+        """
+        return self._muc_last_stanza_id
+
     @property
     def muc_state(self):
         """
@@ -997,6 +1272,68 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
         items += list(self._occupant_info.values())
         return items
 
+    def muc_get_occupant(self, nick):
+        """
+        Return the occupant with the given nickname.
+
+        :param nick: The nickname to look up.
+        :type nick: :class:`str`
+        :return: The occupant or :data:`None` if there is no occupant with
+            that nickname.
+        :rtype: :class:`Occupant` or :data:`None`
+
+        The local occupant (:attr:`me`) is included in the lookup.
+
+        .. versionadded:: 0.12
+        """
+        if (self._this_occupant is not None and
+                self._this_occupant.nick == nick):
+            return self._this_occupant
+        return self._occupant_info.get_by_nick(nick)
+
+    def muc_find_occupants(self, *,
+                           direct_jid=None,
+                           role=None,
+                           affiliation=None):
+        """
+        Return the occupants matching all of the given criteria.
+
+        :param direct_jid: Only return occupants with this real JID. If the
+            JID is bare, it is compared against :attr:`Occupant.direct_jid`,
+            otherwise against :attr:`Occupant.direct_full_jid`.
+        :type direct_jid: :class:`aioxmpp.JID`
+        :param role: Only return occupants with this role.
+        :type role: :class:`str`
+        :param affiliation: Only return occupants with this affiliation.
+        :type affiliation: :class:`str`
+        :return: The matching occupants.
+        :rtype: :class:`set` of :class:`Occupant`
+
+        Criteria which are not given are not checked. The local occupant
+        (:attr:`me`) is included in the result if it matches.
+
+        The lookup uses indexes which are maintained as occupant presence
+        arrives, so its cost depends on the number of matching occupants
+        instead of the size of the room.
+
+        .. versionadded:: 0.12
+        """
+        criteria = []
+        if direct_jid is not None:
+            criteria.append(("direct_jid", direct_jid))
+        if role is not None:
+            criteria.append(("role", role))
+        if affiliation is not None:
+            criteria.append(("affiliation", affiliation))
+
+        result = self._occupant_info.find(criteria)
+
+        me = self._this_occupant
+        if (me is not None and
+                _OccupantTable._index_keys(me).issuperset(criteria)):
+            result.add(me)
+        return result
+
     @property
     def service_member(self):
         """
@@ -1055,11 +1392,85 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
         "ping_interval",
     )
 
+    def _schedule_occupant_flush(self):
+        if self._muc_flush_handle is None and self._active:
+            self._muc_flush_handle = asyncio.get_event_loop().call_later(
+                self.muc_coalescing_window.total_seconds(),
+                self.muc_flush_occupant_batch,
+            )
+
+    def _pending_changes(self, occupant, joined=False):
+        try:
+            return self._muc_pending[occupant]
+        except KeyError:
+            pending = _PendingOccupantChanges(occupant, joined)
+            self._muc_pending[occupant] = pending
+            self._schedule_occupant_flush()
+            return pending
+
+    def muc_flush_occupant_batch(self):
+        """
+        Emit the signals for the occupant changes collected so far in
+        coalescing mode.
+
+        This does nothing if there are no pending changes.
+
+        .. seealso::
+
+            :attr:`muc_coalescing_window`
+
+        .. versionadded:: 0.12
+        """
+        if self._muc_flush_handle is not None:
+            self._muc_flush_handle.cancel()
+            self._muc_flush_handle = None
+
+        pending, self._muc_pending = \
+            self._muc_pending, collections.OrderedDict()
+
+        batch = OccupantBatch([], [], [])
+        for occupant, changes in pending.items():
+            if changes.leave_kwargs is not None:
+                if not changes.joined:
+                    batch.left.append(occupant)
+                    self.on_leave(occupant, **changes.leave_kwargs)
+                continue
+
+            if changes.joined:
+                batch.joined.append(occupant)
+                self.on_join(occupant)
+                continue
+
+            state, status, role, affiliation = changes.initial
+            current = {
+                self.on_presence_changed: (
+                    (occupant.presence_state, occupant.presence_status) !=
+                    (state, status)
+                ),
+                self.on_muc_role_changed: occupant.role != role,
+                self.on_muc_affiliation_changed: (
+                    occupant.affiliation != affiliation
+                ),
+            }
+
+            changed = False
+            for signal, (args, kwargs) in changes.signals.items():
+                if current[signal]:
+                    changed = True
+                    signal(*args, **kwargs)
+
+            if changed:
+                batch.changed.append(occupant)
+
+        if any(batch):
+            self.on_muc_occupant_batch(batch)
+
     def _enter_active_state(self):
         self._state = RoomState.ACTIVE
         self._history_replay_occupants.clear()
 
     def _suspend(self):
+        self.muc_flush_occupant_batch()
         self._monitor.disable()
         self.on_muc_suspend()
         self._active = False
@@ -1069,6 +1480,7 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
     def _disconnect(self):
         if not self._joined:
             return
+        self.muc_flush_occupant_batch()
         self._monitor.disable()
         self.on_exit(
             muc_leave_mode=LeaveMode.DISCONNECTED
@@ -1080,7 +1492,8 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
 
     def _resume(self):
         self._this_occupant = None
-        self._occupant_info = {}
+        self._occupant_info = _OccupantTable()
+        self._muc_pending.clear()
         self._active = False
         self._state = RoomState.JOIN_PRESENCE
         self.on_muc_resume()
@@ -1161,6 +1574,23 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
         self._monitor.enable()
         self._monitor.reset()
 
+        if not sent:
+            if self._muc_check_duplicate(message):
+                self._service.logger.debug(
+                    "%s: dropping duplicate message %r",
+                    self._mucjid,
+                    message,
+                )
+                return
+
+            try:
+                # history is requested based on the server clock if possible
+                stamp = message.xep0203_delay[0].stamp
+            except (IndexError, AttributeError):
+                self._muc_last_seen = datetime.utcnow()
+            else:
+                self._muc_last_seen = stamp.replace(tzinfo=None)
+
         if self._state == RoomState.HISTORY and not message.xep0203_delay:
             # WORKAROUND: prosody#1053; AFFECTS: <= 0.9.12, <= 0.10
             self._service.logger.debug(
@@ -1241,6 +1671,29 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
                 tracker=tracker,
             )
 
+    def _muc_check_duplicate(self, message):
+        keys = [
+            ("stanza-id", stanza_id.id_)
+            for stanza_id in message.xep0359_stanza_ids
+            # only the room itself is trusted to assign stanza ids here
+            if stanza_id.by == self._mucjid and stanza_id.id_
+        ]
+        if message.xep0359_origin_id is not None:
+            keys.append(("origin-id", message.from_,
+                         message.xep0359_origin_id.id_))
+
+        if any(key in self._muc_seen_ids for key in keys):
+            return True
+
+        for key in keys:
+            self._muc_seen_ids[key] = True
+            if key[0] == "stanza-id":
+                self._muc_last_stanza_id = key[1]
+        while len(self._muc_seen_ids) > self.muc_max_seen_ids:
+            self._muc_seen_ids.popitem(last=False)
+
+        return False
+
     def _diff_presence(self, stanza, info, existing):
         if (not info.presence_state.available and
                 muc_xso.StatusCode.NICKNAME_CHANGE in
@@ -1323,7 +1776,18 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
             ))
 
         if to_emit:
+            if (self.muc_coalescing_window is not None and
+                    not existing.is_self):
+                pending = self._pending_changes(existing)
+                existing.update(info)
+                self._occupant_info.reindex(existing)
+                for signal, args, kwargs in to_emit:
+                    pending.signals[signal] = (args, kwargs)
+                return result
+
             existing.update(info)
+            if not existing.is_self:
+                self._occupant_info.reindex(existing)
             for signal, args, kwargs in to_emit:
                 signal(*args, **kwargs)
 
@@ -1349,6 +1813,7 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
             self._joined = True
             self._active = True
             self._state = RoomState.HISTORY
+            self.muc_flush_occupant_batch()
             self.on_muc_enter(
                 stanza, info,
                 muc_status_codes=frozenset(
@@ -1377,6 +1842,7 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
                                        self._mucjid,
                                        reason)
             existing.update(info)
+            self.muc_flush_occupant_batch()
             self._monitor.disable()
             self.on_exit(muc_leave_mode=mode,
                          muc_actor=actor,
@@ -1429,7 +1895,10 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
                 )
                 return
             self._occupant_info[info.conversation_jid] = info
-            self.on_join(info)
+            if self.muc_coalescing_window is not None:
+                self._pending_changes(info, joined=True)
+            else:
+                self.on_join(info)
             return
 
         mode, data = self._diff_presence(stanza, info, existing)
@@ -1441,17 +1910,21 @@ class Room(aioxmpp.im.conversation.AbstractConversation):
                 resource=new_nick
             )
             self._occupant_info[existing.conversation_jid] = existing
+            self.muc_flush_occupant_batch()
             self.on_nick_changed(existing, old_nick, new_nick)
         elif mode == _OccupantDiffClass.LEFT:
             mode, actor, reason = data
             existing.update(info)
-            self.on_leave(
-                existing,
+            leave_kwargs = dict(
                 muc_leave_mode=mode,
                 muc_actor=actor,
                 muc_reason=reason,
                 muc_status_codes=stanza.xep0045_muc_user.status_codes
             )
+            if self.muc_coalescing_window is not None:
+                self._pending_changes(existing).leave_kwargs = leave_kwargs
+            else:
+                self.on_leave(existing, **leave_kwargs)
             del self._occupant_info[existing.conversation_jid]
 
     def _handle_role_request(self, form):
@@ -1886,6 +2359,43 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
 
     .. automethod:: join
 
+    .. attribute:: join_concurrency
+
+       The maximum number of joins which may be in flight at the same time,
+       or :data:`None` (the default) to send all join presences right away.
+
+       When many rooms are joined at once (for example when the stream is
+       re-established with many rooms set to autorejoin), the join presences
+       are queued and sent as earlier joins complete, in order of
+       :attr:`Room.muc_join_priority` (highest first) and, within the same
+       priority, in the order in which the joins were requested. This
+       avoids flooding the server with join presences and occupant lists.
+
+       .. versionadded:: 0.12
+
+    .. attribute:: self_ping_scheduler
+
+       The :class:`~.self_ping.MUCPingScheduler` which schedules the
+       :xep:`410` self-pings of all rooms joined through this service.
+       Its attributes can be used to tune how the pings are spread over time
+       and how many may be in flight per MUC service.
+
+       .. versionadded:: 0.12
+
+    .. signal:: on_muc_join_progress(completed, total)
+
+       Emits whenever a queued join completes, successfully or not.
+
+       :param completed: The number of joins completed so far.
+       :type completed: :class:`int`
+       :param total: The number of joins which were requested since no join
+           was last in progress.
+       :type total: :class:`int`
+
+       The counters are reset once all joins have completed.
+
+       .. versionadded:: 0.12
+
     Manage rooms:
 
     .. automethod:: get_room_config
@@ -1973,6 +2483,7 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
     ]
 
     on_muc_invitation = aioxmpp.callbacks.Signal()
+    on_muc_join_progress = aioxmpp.callbacks.Signal()
 
     direct_invite_feature = aioxmpp.disco.register_feature(
         namespaces.xep0249_conference,
@@ -1983,6 +2494,66 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
 
         self._pending_mucs = {}
         self._joined_mucs = {}
+        self.join_concurrency = None
+        self._join_queue = []
+        self._join_seq = itertools.count()
+        self._joins_queued = set()
+        self._joins_in_flight = {}
+        self._joins_completed = 0
+        self._joins_total = 0
+        self.self_ping_scheduler = self_ping.MUCPingScheduler(
+            client,
+            self.logger.getChild("MUCPingScheduler"),
+        )
+
+    def _schedule_join(self, room):
+        if room.jid in self._joins_queued:
+            return
+        self._joins_queued.add(room.jid)
+        self._joins_total += 1
+        heapq.heappush(
+            self._join_queue,
+            (-room.muc_join_priority, next(self._join_seq), room.jid),
+        )
+
+    def _pump_joins(self):
+        while (self._join_queue and
+               (self.join_concurrency is None or
+                len(self._joins_in_flight) < self.join_concurrency)):
+            *_, mucjid = heapq.heappop(self._join_queue)
+            if mucjid not in self._joins_queued:
+                # the join was aborted while it was queued
+                continue
+            muc, fut, nick, history = self._pending_mucs[mucjid]
+            self.logger.debug("%s: sending join presence", mucjid)
+            self._joins_in_flight[mucjid] = \
+                asyncio.get_event_loop().time()
+            self._send_join_presence(mucjid, history, nick, muc.muc_password)
+
+    def _join_finished(self, mucjid):
+        try:
+            self._joins_queued.remove(mucjid)
+        except KeyError:
+            return None
+        started = self._joins_in_flight.pop(mucjid, None)
+
+        self._joins_completed += 1
+        completed, total = self._joins_completed, self._joins_total
+        if not self._joins_queued:
+            self._joins_completed = 0
+            self._joins_total = 0
+            self._join_queue.clear()
+
+        self.on_muc_join_progress(completed, total)
+        self._pump_joins()
+        return started
+
+    def _reset_joins(self):
+        self._join_queue.clear()
+        self._joins_queued.clear()
+        self._joins_in_flight.clear()
+        self._joins_completed = 0
+        self._joins_total = 0
 
     def _send_join_presence(self, mucjid, history, nick, password):
         presence = aioxmpp.stanza.Presence()
@@ -2001,8 +2572,8 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
             if muc.muc_joined:
                 self.logger.debug("%s: resuming", muc.jid)
                 muc._resume()
-            self.logger.debug("%s: sending join presence", muc.jid)
-            self._send_join_presence(muc.jid, history, nick, muc.muc_password)
+            self._schedule_join(muc)
+        self._pump_joins()
 
     @aioxmpp.service.depsignal(aioxmpp.Client, "on_stream_destroyed")
     def _stream_destroyed(self):
@@ -2010,6 +2581,8 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
             "stream destroyed, preparing autorejoin and cleaning up the others"
         )
 
+        self._reset_joins()
+
         new_pending = {}
         for muc, fut, *more in self._pending_mucs.values():
             if not muc.muc_autorejoin:
@@ -2034,10 +2607,16 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
                     muc.jid
                 )
                 muc._suspend()
+                # since is inclusive, so the last message we have seen is
+                # replayed; only go back to it if the room assigns stanza
+                # ids which let us drop that duplicate
+                if (muc._muc_last_stanza_id is not None and
+                        muc._muc_last_seen is not None):
+                    since = muc._muc_last_seen
+                else:
+                    since = datetime.utcnow()
                 self._pending_mucs[muc.jid] = (
-                    muc, None, muc.me.nick, muc_xso.History(
-                        since=datetime.utcnow()
-                    )
+                    muc, None, muc.me.nick, muc_xso.History(since=since)
                 )
             else:
                 self.logger.debug(
@@ -2061,6 +2640,7 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
                 del self._pending_mucs[mucjid]
             except KeyError:
                 pass
+            self._join_finished(mucjid)
             unjoin = aioxmpp.stanza.Presence(
                 to=mucjid,
                 type_=aioxmpp.structs.PresenceType.UNAVAILABLE,
@@ -2077,6 +2657,11 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
         else:
             self.logger.debug("%s: pending -> joined",
                               mucjid)
+            started = self._join_finished(mucjid)
+            if started is not None:
+                pending.muc_join_latency = timedelta(
+                    seconds=asyncio.get_event_loop().time() - started
+                )
             if fut is not None:
                 fut.set_result(None)
             self._joined_mucs[mucjid] = pending
@@ -2100,6 +2685,7 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
         except KeyError:
             pass
         else:
+            self._join_finished(mucjid)
             fut.set_exception(stanza.error.to_exception())
 
     @aioxmpp.service.depfilter(
@@ -2205,6 +2791,7 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
             del self._joined_mucs[muc.jid]
         except KeyError:
             _, fut, *_ = self._pending_mucs.pop(muc.jid)
+            self._join_finished(muc.jid)
             if not fut.done():
                 fut.set_result(None)
 
@@ -2245,6 +2832,7 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
             return self._pending_mucs[mucjid][0]
 
     async def _shutdown(self):
+        self._reset_joins()
         for muc, fut, *_ in self._pending_mucs.values():
             muc._disconnect()
             fut.set_exception(ConnectionError())
@@ -2255,7 +2843,7 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
         self._joined_mucs.clear()
 
     def join(self, mucjid, nick, *,
-             password=None, history=None, autorejoin=True):
+             password=None, history=None, autorejoin=True, priority=0):
         """
         Join a multi-user chat and create a conversation for it.
 
@@ -2270,6 +2858,9 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
         :param autorejoin: Flag to indicate that the MUC should be
             automatically rejoined after a disconnect.
         :type autorejoin: :class:`bool`
+        :param priority: Priority of the join if the number of concurrent
+            joins is limited (see :attr:`join_concurrency`).
+        :type priority: :class:`int`
         :raises ValueError: if the MUC JID is invalid.
         :return: The :term:`Conversation` and a future on the join.
         :rtype: tuple of :class:`~.Room` and :class:`asyncio.Future`.
@@ -2309,11 +2900,21 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
 
         If `autorejoin` is true, the MUC will be re-joined after the stream has
         been destroyed and re-established. In that case, the service will
-        request history since the stream destruction and ignore the `history`
-        object passed here.
+        request history since the last message received from the MUC if the
+        MUC assigns :xep:`359` stanza IDs (which are used to drop the replayed
+        copy of that message), or since the stream destruction otherwise, and
+        ignore the `history` object passed here.
 
         If the stream is currently not established, the join is deferred until
-        the stream is established.
+        the stream is established. If :attr:`join_concurrency` is set, the
+        join may also be deferred until other joins have completed; rooms with
+        a higher `priority` are joined first.
+
+        .. versionchanged:: 0.12
+
+            The `priority` argument was added. Automatic rejoins of MUCs
+            which assign stanza IDs now request the history since the last
+            received message.
         """
         if history is not None and not isinstance(history, muc_xso.History):
             raise TypeError("history must be {!s}, got {!r}".format(
@@ -2342,6 +2943,7 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
         room = Room(self, mucjid)
         room.muc_autorejoin = autorejoin
         room.muc_password = password
+        room.muc_join_priority = priority
         room.on_exit.connect(
             functools.partial(
                 self._muc_exited,
@@ -2361,7 +2963,8 @@ class MUCClient(aioxmpp.im.conversation.AbstractConversationService,
         self._pending_mucs[mucjid] = room, fut, nick, history
 
         if self.client.established:
-            self._send_join_presence(mucjid, history, nick, password)
+            self._schedule_join(room)
+            self._pump_joins()
 
         self.on_conversation_new(room)
         self.dependencies[
@@ -58,10 +58,14 @@ Utilities
 
 .. autoclass:: UseConnected
 
+.. autoclass:: SummonProfile
+
 """
 import asyncio
+import collections
 import contextlib
 import logging
+import time
 import warnings
 
 from datetime import timedelta
@@ -86,6 +90,7 @@ from . import (
     structs,
     security_layer,
     dispatcher,
+    service,
     presence as mod_presence,
 )
 
@@ -93,6 +98,100 @@ from . import (
 logger = logging.getLogger(__name__)
 
 
+class SummonProfile(collections.namedtuple(
+        "SummonProfile",
+        [
+            "service",
+            "duration",
+            "handlers",
+            "stub",
+        ])):
+    """
+    Cost of summoning a single service, as recorded by :class:`Client` if
+    :attr:`Client.profile_services` is enabled.
+
+    .. attribute:: service
+
+       The :class:`~aioxmpp.service.Service` class which was summoned.
+
+    .. attribute:: duration
+
+       The :class:`datetime.timedelta` spent in the constructor of the
+       service, including the registration of its handlers, but excluding the
+       time spent summoning its dependencies.
+
+    .. attribute:: handlers
+
+       The number of handlers and descriptors the service registered.
+
+    .. attribute:: stub
+
+       True if this entry records the registration of a routing stub by
+       :meth:`Client.summon_lazily` instead of the instantiation of the
+       service itself.
+
+    .. versionadded:: 0.12
+    """
+
+
+# handler registrations which only route stanzas to the service; those can be
+# served by a stub until the first stanza matches. The values are the
+# dependencies the registration needs.
+_ROUTING_HANDLERS = {
+    service._apply_iq_handler: (),
+    service._apply_presence_handler: (),
+    dispatcher._apply_message_handler: (
+        dispatcher.SimpleMessageDispatcher,
+    ),
+    dispatcher._apply_presence_handler: (
+        dispatcher.SimplePresenceDispatcher,
+    ),
+}
+
+
+class _LazyServiceStub:
+    """
+    Stand-in for a service instance which registers the stanza handlers of the
+    service and summons the real service when the first stanza arrives.
+    """
+
+    def __init__(self, client, class_, dependencies):
+        super().__init__()
+        self.client = client
+        self.service_class = class_
+        self.dependencies = dependencies
+        self.service_order_index = None
+        self._context = contextlib.ExitStack()
+
+    def _make_forwarder(self, func):
+        def forward(*args, **kwargs):
+            instance = self.client.summon(self.service_class)
+            return func.__get__(instance, self.service_class)(
+                *args, **kwargs
+            )
+        return forward
+
+    def register(self):
+        try:
+            for (handler_cm, additional_args), func, kwargs in \
+                    self.service_class.SERVICE_HANDLERS:
+                self._context.enter_context(
+                    handler_cm(
+                        self,
+                        self.client.stream,
+                        self._make_forwarder(func),
+                        *additional_args,
+                        **kwargs
+                    )
+                )
+        except:  # NOQA
+            self._context.close()
+            raise
+
+    def close(self):
+        self._context.close()
+
+
 async def lookup_addresses(loop, jid):
     addresses = await network.find_xmpp_host_addr(
         loop,
@@ -424,6 +523,11 @@ class Client:
             standardised connection options
         max_inital_attempts (:class:`int`): Maximum number of initial
             connection attempts before giving up.
+        pipeline_bootstrap (:class:`bool`): Run the
+            :meth:`before_stream_established` coroutines concurrently (see
+            :attr:`pipeline_bootstrap`).
+        profile_services (:class:`bool`): Record the cost of summoning
+            services (see :attr:`profile_services`).
         loop (:class:`asyncio.BaseEventLoop` or :data:`None`): Override the
             :mod:`asyncio` event loop to use.
         logger (:class:`logging.Logger` or :data:`None`): Override the logger
@@ -540,6 +644,34 @@ class Client:
     .. autoattribute:: resumption_timeout
         :annotation: = None
 
+    .. attribute:: pipeline_bootstrap
+       :annotation: = False
+
+       If true, the coroutines connected to :meth:`before_stream_established`
+       are run concurrently (using
+       :meth:`~.callbacks.SyncAdHocSignal.fire_concurrently`) instead of one
+       after the other. This pipelines the post-bind bootstrap (roster
+       request, initial presence, carbons, blocklist, …) so that the stream
+       becomes ready after roughly one round-trip instead of one round-trip
+       per service.
+
+       The coroutines are still *started* in the order in which they were
+       connected, but they may complete in any order. Services which depend
+       on another service having *finished* its bootstrap must not rely on
+       the ordering while this is enabled.
+
+       .. versionadded:: 0.12
+
+    .. attribute:: time_to_ready
+       :annotation: = None
+
+       The :class:`datetime.timedelta` between the start of the most recent
+       connection attempt and the point where the stream was ready for use
+       (that is, right before :meth:`on_stream_established` fired or the
+       stream was resumed). :data:`None` if the stream has never been ready.
+
+       .. versionadded:: 0.12
+
     Connection information:
 
     .. autoattribute:: established
@@ -695,6 +827,26 @@ class Client:
 
     .. automethod:: summon
 
+    .. automethod:: summon_lazily
+
+    .. attribute:: profile_services
+       :annotation: = False
+
+       If true, the cost of each service instantiation (and routing stub
+       registration, see :meth:`summon_lazily`) is recorded in
+       :attr:`service_profile`. Enabling this after services have been
+       summoned only records the services summoned afterwards.
+
+       .. versionadded:: 0.12
+
+    .. attribute:: service_profile
+
+       List of :class:`~aioxmpp.node.SummonProfile` entries, in the order in
+       which the services were instantiated. Only filled while
+       :attr:`profile_services` is true.
+
+       .. versionadded:: 0.12
+
     Miscellaneous:
 
     .. attribute:: logger
@@ -725,6 +877,8 @@ class Client:
                  negotiation_timeout=timedelta(seconds=60),
                  max_initial_attempts=4,
                  override_peer=[],
+                 pipeline_bootstrap=False,
+                 profile_services=False,
                  loop=None,
                  logger=None):
         super().__init__()
@@ -750,6 +904,9 @@ class Client:
         self._nattempt = 0
 
         self._services = {}
+        self._lazy_services = {}
+        self.profile_services = profile_services
+        self.service_profile = []
 
         self.stream_features = None
 
@@ -761,6 +918,9 @@ class Client:
         self.established_event = asyncio.Event()
         self._max_initial_attempts = max_initial_attempts
         self._resumption_timeout = None
+        self.pipeline_bootstrap = pipeline_bootstrap
+        self.time_to_ready = None
+        self._attempt_started = None
 
         self.on_stopped.logger = self.logger.getChild("on_stopped")
         self.on_failure.logger = self.logger.getChild("on_failure")
@@ -915,8 +1075,12 @@ class Client:
 
         self.established_event.set()
 
-        await self.before_stream_established()
+        if self.pipeline_bootstrap:
+            await self.before_stream_established.fire_concurrently()
+        else:
+            await self.before_stream_established()
 
+        self._record_time_to_ready()
         self.on_stream_established()
 
         return features, resumed
@@ -935,8 +1099,19 @@ class Client:
         self.stream.local_jid = result.jid.bare()
         self.logger.info("bound to jid: %s", self._local_jid)
 
+    def _record_time_to_ready(self):
+        if self._attempt_started is None:
+            return
+        self.time_to_ready = timedelta(
+            seconds=self._loop.time() - self._attempt_started
+        )
+        self._attempt_started = None
+        self.logger.debug("stream ready after %.3fs",
+                          self.time_to_ready.total_seconds())
+
     async def _main_impl(self):
         failure_future = self._failure_future
+        self._attempt_started = self._loop.time()
 
         override_peer = []
         if self.stream.sm_enabled:
@@ -964,6 +1139,9 @@ class Client:
                 xmlstream,
                 features)
 
+            if sm_resumed:
+                self._record_time_to_ready()
+
             if self._is_suspended:
                 self.on_stream_resumed()
             self._is_suspended = False
@@ -1073,14 +1251,27 @@ class Client:
                 for depclass in class_.PATCHED_ORDER_AFTER
             }
 
+            stub = self._lazy_services.pop(class_, None)
+            if stub is not None:
+                # the service registers the very same handlers
+                stub.close()
+
             service_order_index = len(self._services)
 
+            t0 = time.perf_counter()
             instance = class_(
                 self,
                 logger_base=self.logger,
                 dependencies=dependencies,
                 service_order_index=service_order_index,
             )
+            if self.profile_services:
+                self.service_profile.append(SummonProfile(
+                    class_,
+                    timedelta(seconds=time.perf_counter() - t0),
+                    len(class_.SERVICE_HANDLERS),
+                    False,
+                ))
             self._services[class_] = instance
             return instance
 
@@ -1097,6 +1288,70 @@ class Client:
         """
         return self._summon(class_, set())
 
+    def summon_lazily(self, class_):
+        """
+        Arrange for a :class:`~aioxmpp.service.Service` to be summoned when
+        the first stanza for it arrives.
+
+        :param class_: The service class to summon lazily.
+        :raises ValueError: if the service uses handlers which cannot be
+            routed by a stub.
+
+        Instead of instantiating the service (and its dependencies), only a
+        lightweight routing stub is registered for the IQ, message and
+        presence handlers of the service. When one of them matches a stanza,
+        the service is summoned as with :meth:`summon` (replacing the stub)
+        and the stanza is passed on to it.
+
+        Only services whose handlers are all stanza handlers
+        (:func:`~aioxmpp.service.iq_handler`,
+        :func:`~aioxmpp.dispatcher.message_handler` and
+        :func:`~aioxmpp.dispatcher.presence_handler`) can be summoned lazily:
+        filters, signal handlers and descriptors need to be in place from the
+        start to work correctly.
+
+        If the service is already summoned or a stub is already registered,
+        this does nothing. Summoning the service explicitly (or as a
+        dependency of another service) removes the stub.
+
+        .. versionadded:: 0.12
+        """
+        if class_ in self._services or class_ in self._lazy_services:
+            return
+
+        required_deps = set()
+        for item in class_.SERVICE_HANDLERS:
+            if isinstance(item, service.Descriptor):
+                raise ValueError(
+                    "{!r} uses descriptor {!r} and cannot be summoned "
+                    "lazily".format(class_, item)
+                )
+            (handler_cm, _), func, _ = item
+            try:
+                required_deps.update(_ROUTING_HANDLERS[handler_cm])
+            except KeyError:
+                raise ValueError(
+                    "{!r} uses a non-stanza handler for {!r} and cannot be "
+                    "summoned lazily".format(class_, func)
+                ) from None
+
+        dependencies = {
+            depclass: self.summon(depclass)
+            for depclass in required_deps
+        }
+
+        t0 = time.perf_counter()
+        stub = _LazyServiceStub(self, class_, dependencies)
+        stub.register()
+        if self.profile_services:
+            self.service_profile.append(SummonProfile(
+                class_,
+                timedelta(seconds=time.perf_counter() - t0),
+                len(class_.SERVICE_HANDLERS),
+                True,
+            ))
+        self._lazy_services[class_] = stub
+
     # properties
 
     @property
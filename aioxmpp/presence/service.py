@@ -20,14 +20,95 @@
 #
 ########################################################################
 import asyncio
+import collections
 import numbers
 
 import aioxmpp.callbacks
 import aioxmpp.service
+import aioxmpp.stanza
 import aioxmpp.structs
 import aioxmpp.xso.model
 
 
+class _CompactPresence:
+    """
+    Compact representation of an available presence stanza, as stored by
+    :class:`PresenceClient` in compact storage mode.
+    """
+
+    __slots__ = ("from_", "show", "priority", "status", "payloads")
+
+    def __init__(self, stanza, retained_descriptors):
+        self.from_ = stanza.from_
+        self.show = stanza.show
+        self.priority = stanza.priority
+        self.status = dict(stanza.status) or None
+
+        payloads = []
+        for descriptor in retained_descriptors:
+            value = descriptor.__get__(stanza, type(stanza))
+            if value:
+                payloads.append((descriptor, value))
+        self.payloads = tuple(payloads) or None
+
+    def to_stanza(self):
+        stanza = aioxmpp.stanza.Presence(
+            type_=aioxmpp.structs.PresenceType.AVAILABLE,
+            show=self.show,
+            from_=self.from_,
+        )
+        stanza.priority = self.priority
+        if self.status is not None:
+            stanza.status.update(self.status)
+        if self.payloads is not None:
+            for descriptor, value in self.payloads:
+                descriptor.__set__(stanza, value)
+        return stanza
+
+
+def _to_stanza(record):
+    if isinstance(record, _CompactPresence):
+        return record.to_stanza()
+    return record
+
+
+def _rank(record):
+    return (
+        record.priority,
+        aioxmpp.structs.PresenceState(True, record.show),
+    )
+
+
+class PresenceBatch(collections.namedtuple(
+        "PresenceBatch",
+        [
+            "available",
+            "changed",
+            "unavailable",
+        ])):
+    """
+    Net presence changes collected by :class:`~aioxmpp.PresenceClient` in
+    coalescing mode.
+
+    .. attribute:: available
+
+       Mapping of full JIDs which became available to the last presence stanza
+       received from them.
+
+    .. attribute:: changed
+
+       Mapping of full JIDs which were and still are available, but sent new
+       presence, to the last presence stanza received from them.
+
+    .. attribute:: unavailable
+
+       Mapping of full JIDs which became unavailable to the stanza which made
+       them unavailable.
+
+    .. versionadded:: 0.12
+    """
+
+
 class PresenceClient(aioxmpp.service.Service):
     """
     The presence service tracks all incoming presence information (this does
@@ -55,6 +136,12 @@ class PresenceClient(aioxmpp.service.Service):
 
     .. automethod:: get_stanza
 
+    Storage of presence information:
+
+    .. autoattribute:: compact_storage
+
+    .. autoattribute:: retained_payloads
+
     On presence changes of peers, signals are emitted:
 
     .. signal:: on_bare_available(stanza)
@@ -95,6 +182,20 @@ class PresenceClient(aioxmpp.service.Service):
     The three signals :meth:`on_available`,  :meth:`on_changed` and
     :meth:`on_unavailable` never fire for the same stanza.
 
+    Coalescing presence bursts:
+
+    .. autoattribute:: coalescing_window
+
+    .. automethod:: flush_presence_batch
+
+    .. signal:: on_presence_batch(batch)
+
+       Fires in coalescing mode after the signals above have been emitted for
+       a batch, with a :class:`~aioxmpp.presence.PresenceBatch` describing all
+       the net changes of the batch.
+
+       .. versionadded:: 0.12
+
     .. versionadded:: 0.4
 
     .. versionchanged:: 0.8
@@ -115,10 +216,243 @@ class PresenceClient(aioxmpp.service.Service):
     on_changed = aioxmpp.callbacks.Signal()
     on_unavailable = aioxmpp.callbacks.Signal()
 
+    on_presence_batch = aioxmpp.callbacks.Signal()
+
     def __init__(self, client, **kwargs):
         super().__init__(client, **kwargs)
 
         self._presences = {}
+        # maps bare JIDs to (rank, resource) of the most available resource
+        self._most_available = {}
+        self._compact_storage = False
+        self._retained_payloads = frozenset()
+        self._retained_descriptors = ()
+        self._coalescing_window = None
+        # full JID -> [was_available, last stanza]
+        self._pending = {}
+        # bare JID -> [was_available, last stanza]
+        self._pending_bare = {}
+        self._flush_handle = None
+
+    async def _shutdown(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await super()._shutdown()
+
+    @property
+    def coalescing_window(self):
+        """
+        Time window to collect presence changes in before emitting signals, as
+        :class:`datetime.timedelta`, or :data:`None` (the default) to emit the
+        signals for each stanza right away.
+
+        When a window is set, the presence information accessible through
+        :meth:`get_stanza` and the other methods is still updated immediately,
+        but :meth:`on_bare_available`, :meth:`on_available`,
+        :meth:`on_changed`, :meth:`on_unavailable` and
+        :meth:`on_bare_unavailable` are deferred. The first change after a
+        batch was emitted starts a new window. At the end of the window, the
+        changes are collapsed per full JID and only the net changes are
+        emitted (carrying the last stanza received), followed by
+        :meth:`on_presence_batch`. For example, a resource which becomes
+        available and unavailable again within the window does not cause any
+        signal, and a resource which changes its presence several times only
+        causes a single :meth:`on_changed`.
+
+        Use :meth:`flush_presence_batch` to end a window early, for example
+        when the application knows that an initial presence burst is
+        complete. Setting the window to :data:`None` flushes pending changes.
+
+        .. versionadded:: 0.12
+        """
+        return self._coalescing_window
+
+    @coalescing_window.setter
+    def coalescing_window(self, value):
+        self._coalescing_window = value
+        if value is None:
+            self.flush_presence_batch()
+
+    def _schedule_flush(self):
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_event_loop().call_later(
+                self._coalescing_window.total_seconds(),
+                self.flush_presence_batch,
+            )
+
+    def _emit(self, signal, full_jid, st):
+        if self._coalescing_window is None:
+            signal(full_jid, st)
+            return
+
+        try:
+            pending = self._pending[full_jid]
+        except KeyError:
+            self._pending[full_jid] = [signal is not self.on_available, st]
+        else:
+            pending[1] = st
+        self._schedule_flush()
+
+    def _emit_bare(self, signal, st):
+        if self._coalescing_window is None:
+            signal(st)
+            return
+
+        bare = st.from_.bare()
+        try:
+            pending = self._pending_bare[bare]
+        except KeyError:
+            self._pending_bare[bare] = [
+                signal is self.on_bare_unavailable,
+                st,
+            ]
+        else:
+            pending[1] = st
+        self._schedule_flush()
+
+    def _is_available(self, peer_jid):
+        try:
+            record = self._presences[peer_jid.bare()][peer_jid.resource]
+        except KeyError:
+            return False
+        return (isinstance(record, _CompactPresence) or
+                record.type_ == aioxmpp.structs.PresenceType.AVAILABLE)
+
+    def flush_presence_batch(self):
+        """
+        Emit the signals for the presence changes collected so far in
+        coalescing mode and start a new window.
+
+        This does nothing if there are no pending changes.
+
+        .. seealso::
+
+           :attr:`coalescing_window`
+
+        .. versionadded:: 0.12
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, {}
+        pending_bare, self._pending_bare = self._pending_bare, {}
+
+        by_bare = collections.OrderedDict(
+            (bare, []) for bare in pending_bare
+        )
+        for full_jid, (was_available, st) in pending.items():
+            by_bare.setdefault(full_jid.bare(), []).append(
+                (full_jid, was_available, st)
+            )
+
+        batch = PresenceBatch({}, {}, {})
+        for bare, entries in by_bare.items():
+            bare_available = None
+            try:
+                bare_was_available, bare_st = pending_bare[bare]
+            except KeyError:
+                pass
+            else:
+                if bare_was_available != (bare in self._most_available):
+                    bare_available = not bare_was_available
+
+            if bare_available is True:
+                self.on_bare_available(bare_st)
+
+            for full_jid, was_available, st in entries:
+                if self._is_available(full_jid):
+                    if was_available:
+                        batch.changed[full_jid] = st
+                        self.on_changed(full_jid, st)
+                    else:
+                        batch.available[full_jid] = st
+                        self.on_available(full_jid, st)
+                elif was_available:
+                    batch.unavailable[full_jid] = st
+                    self.on_unavailable(full_jid, st)
+
+            if bare_available is False:
+                self.on_bare_unavailable(bare_st)
+
+        if any(batch):
+            self.on_presence_batch(batch)
+
+    @property
+    def compact_storage(self):
+        """
+        Whether to store only a compact record of each available presence.
+
+        By default, the complete :class:`aioxmpp.Presence` stanza is kept for
+        each resource, including all payloads (such as entity capabilities,
+        avatar hashes or MUC information). With many contacts, this takes up
+        a lot of memory.
+
+        If :attr:`compact_storage` is true, only the sender, the
+        :attr:`~aioxmpp.Presence.show`, :attr:`~aioxmpp.Presence.priority`
+        and :attr:`~aioxmpp.Presence.status` of available presences, plus the
+        payloads listed in :attr:`retained_payloads`, are kept. The stanzas
+        returned by :meth:`get_stanza`, :meth:`get_peer_resources` and
+        :meth:`get_most_available_stanza` are then rebuilt from that record
+        on each call: they are fresh objects and lack all other attributes
+        and children of the original stanza. Error presences are always
+        stored in full.
+
+        Enabling compact storage converts the presences stored so far.
+        Disabling it affects only presences received afterwards.
+
+        The signals always carry the original stanza.
+
+        .. versionadded:: 0.12
+        """
+        return self._compact_storage
+
+    @compact_storage.setter
+    def compact_storage(self, value):
+        value = bool(value)
+        convert = value and not self._compact_storage
+        self._compact_storage = value
+        if convert:
+            for dest_dict in self._presences.values():
+                for resource, st in dest_dict.items():
+                    if resource is not None:
+                        dest_dict[resource] = self._make_record(st)
+
+    @property
+    def retained_payloads(self):
+        """
+        The set of payload classes retained in :attr:`compact_storage` mode.
+
+        Each class must be registered as child of :class:`aioxmpp.Presence`
+        (for example :class:`aioxmpp.entitycaps.xso.Caps115`); otherwise,
+        :class:`ValueError` is raised on assignment. Changes only affect
+        presences received afterwards.
+
+        .. versionadded:: 0.12
+        """
+        return self._retained_payloads
+
+    @retained_payloads.setter
+    def retained_payloads(self, value):
+        value = frozenset(value)
+        descriptors = []
+        for cls in value:
+            try:
+                descriptors.append(aioxmpp.stanza.Presence.CHILD_MAP[cls.TAG])
+            except (KeyError, AttributeError):
+                raise ValueError(
+                    "{!r} is not a registered presence payload".format(cls)
+                ) from None
+        self._retained_payloads = value
+        self._retained_descriptors = tuple(descriptors)
+
+    def _make_record(self, st):
+        if (not self._compact_storage or
+                isinstance(st, _CompactPresence) or
+                st.type_ != aioxmpp.structs.PresenceType.AVAILABLE):
+            return st
+        return _CompactPresence(st, self._retained_descriptors)
 
     def get_most_available_stanza(self, peer_jid):
         """
@@ -131,19 +465,58 @@ class PresenceClient(aioxmpp.service.Service):
         :return: The presence stanza of the most available resource or
                  :data:`None` if there is no available resource.
 
-        The "most available" resource is the one whose presence state orderest
-        highest according to :class:`~aioxmpp.PresenceState`.
+        The "most available" resource is the one with the highest priority;
+        among resources with the same priority, it is the one whose presence
+        state orders highest according to :class:`~aioxmpp.PresenceState`.
 
         If there is no available resource for a given `peer_jid`, :data:`None`
         is returned.
+
+        .. versionchanged:: 0.12
+
+           The priority of the resources is taken into account. The most
+           available resource is tracked as presences arrive, so that this
+           lookup does not depend on the number of resources.
         """
-        presences = sorted(
-            self.get_peer_resources(peer_jid).items(),
-            key=lambda item: aioxmpp.structs.PresenceState.from_stanza(item[1])
-        )
-        if not presences:
+        try:
+            _, resource = self._most_available[peer_jid]
+        except KeyError:
             return None
-        return presences[-1][1]
+        return _to_stanza(self._presences[peer_jid][resource])
+
+    def _rescan_most_available(self, bare):
+        best = None
+        for resource, record in self._presences.get(bare, {}).items():
+            if resource is None:
+                continue
+            rank = _rank(record)
+            if best is None or rank >= best[0]:
+                best = rank, resource
+
+        if best is None:
+            self._most_available.pop(bare, None)
+        else:
+            self._most_available[bare] = best
+
+    def _update_most_available(self, bare, resource, record):
+        if resource is None:
+            # presence from the bare JID is not a resource, see
+            # get_peer_resources
+            return
+
+        rank = _rank(record)
+        try:
+            best_rank, best_resource = self._most_available[bare]
+        except KeyError:
+            self._most_available[bare] = rank, resource
+            return
+
+        if rank >= best_rank:
+            self._most_available[bare] = rank, resource
+        elif best_resource == resource:
+            # the most available resource got less available, someone else
+            # may be on top now
+            self._rescan_most_available(bare)
 
     def get_peer_resources(self, peer_jid):
         """
@@ -155,11 +528,14 @@ class PresenceClient(aioxmpp.service.Service):
         returned mapping is empty.
         """
         try:
-            d = dict(self._presences[peer_jid])
-            d.pop(None, None)
-            return d
+            presences = self._presences[peer_jid]
         except KeyError:
             return {}
+        return {
+            resource: _to_stanza(record)
+            for resource, record in presences.items()
+            if resource is not None
+        }
 
     def get_stanza(self, peer_jid):
         """
@@ -171,7 +547,9 @@ class PresenceClient(aioxmpp.service.Service):
         is returned.
         """
         try:
-            return self._presences[peer_jid.bare()][peer_jid.resource]
+            return _to_stanza(
+                self._presences[peer_jid.bare()][peer_jid.resource]
+            )
         except KeyError:
             pass
         try:
@@ -206,10 +584,12 @@ class PresenceClient(aioxmpp.service.Service):
                 return
             dest_dict.pop(None, None)
             if resource in dest_dict:
-                self.on_unavailable(st.from_, st)
+                self._emit(self.on_unavailable, st.from_, st)
                 if len(dest_dict) == 1:
-                    self.on_bare_unavailable(st)
+                    self._emit_bare(self.on_bare_unavailable, st)
                 del dest_dict[resource]
+                if self._most_available[bare][1] == resource:
+                    self._rescan_most_available(bare)
         elif st.type_ == aioxmpp.structs.PresenceType.ERROR:
             try:
                 dest_dict = self._presences[bare]
@@ -217,23 +597,27 @@ class PresenceClient(aioxmpp.service.Service):
                 pass
             else:
                 for resource in dest_dict.keys():
-                    self.on_unavailable(st.from_.replace(resource=resource),
-                                        st)
-                self.on_bare_unavailable(st)
+                    self._emit(self.on_unavailable,
+                               st.from_.replace(resource=resource),
+                               st)
+                self._emit_bare(self.on_bare_unavailable, st)
             self._presences[bare] = {None: st}
+            self._most_available.pop(bare, None)
         else:
             dest_dict = self._presences.setdefault(bare, {})
             dest_dict.pop(None, None)
             bare_became_available = not dest_dict
             resource_became_available = resource not in dest_dict
-            dest_dict[resource] = st
+            record = self._make_record(st)
+            dest_dict[resource] = record
+            self._update_most_available(bare, resource, record)
 
             if bare_became_available:
-                self.on_bare_available(st)
+                self._emit_bare(self.on_bare_available, st)
             if resource_became_available:
-                self.on_available(st.from_, st)
+                self._emit(self.on_available, st.from_, st)
             else:
-                self.on_changed(st.from_, st)
+                self._emit(self.on_changed, st.from_, st)
 
 
 class PresenceServer(aioxmpp.service.Service):
@@ -20,9 +20,17 @@
 #
 ########################################################################
 import asyncio
+import collections
+import copy
+import functools
 
+from datetime import timedelta
+
+import aioxmpp.cache
 import aioxmpp.callbacks
 import aioxmpp.disco
+import aioxmpp.errors
+import aioxmpp.rsm
 import aioxmpp.service
 import aioxmpp.stanza
 import aioxmpp.structs
@@ -30,6 +38,45 @@ import aioxmpp.structs
 from . import xso as pubsub_xso
 
 
+class _PagedItems:
+    def __init__(self, paginator, get_elements):
+        super().__init__()
+        self._paginator = paginator
+        self._get_elements = get_elements
+        self._buffer = collections.deque()
+        self._last_cursor = paginator.last_cursor
+
+    @property
+    def last_cursor(self):
+        return self._last_cursor
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._buffer:
+            page = await self._paginator.__anext__()
+            self._buffer.extend(self._get_elements(page))
+
+        self._last_cursor, element = self._buffer.popleft()
+        return element
+
+    def close(self):
+        self._paginator.close()
+        self._buffer.clear()
+
+
+class _NodeItems:
+    __slots__ = ("items", "complete")
+
+    def __init__(self):
+        # maps item IDs to (timestamp, item) tuples, least recent first
+        self.items = collections.OrderedDict()
+        # timestamp of the last full listing, None if the listing is not known
+        # to be complete
+        self.complete = None
+
+
 class PubSubClient(aioxmpp.service.Service):
     """
     Client service implementing a Publish-Subscribe client. By loading it into
@@ -49,6 +96,7 @@ class PubSubClient(aioxmpp.service.Service):
           get_default_config
           get_items
           get_items_by_id
+          iter_items
           get_subscription_config
           get_subscriptions
           set_subscription_config
@@ -65,7 +113,9 @@ class PubSubClient(aioxmpp.service.Service):
 
           notify
           publish
+          publish_many
           retract
+          retract_many
 
     Owner use cases:
        .. autosummary::
@@ -107,6 +157,31 @@ class PubSubClient(aioxmpp.service.Service):
 
     .. automethod:: get_items_by_id
 
+    .. automethod:: iter_items
+
+    Caching items:
+
+    Items are cached per node in a local, bounded cache. The cache is filled
+    by the responses to :meth:`get_items` and :meth:`get_items_by_id`, by
+    notifications about published items and by :meth:`publish`. Retractions,
+    purges and deletions (both by notification and through this service)
+    remove the affected items from the cache. The cache is cleared when the
+    stream is destroyed, since notifications may have been missed.
+
+    By default, the getters always query the service. To answer them from the
+    cache, pass `cached_only` or `max_age`.
+
+    .. autoattribute:: item_cache_size
+
+    .. attribute:: max_cached_items_per_node
+
+       Maximum number of items cached for a single node. When it is exceeded,
+       the least recently updated items are dropped. Defaults to 256.
+
+    .. versionadded:: 0.12
+
+       The item cache.
+
     Publishing and retracting items:
 
     .. automethod:: notify
@@ -115,6 +190,20 @@ class PubSubClient(aioxmpp.service.Service):
 
     .. automethod:: retract
 
+    Publishing and retracting many items:
+
+    .. automethod:: publish_many
+
+    .. automethod:: retract_many
+
+    .. attribute:: RETRY_CONDITIONS
+
+       Error conditions after which :meth:`publish_many` and
+       :meth:`retract_many` retry a request. Errors of type ``wait`` are
+       always retried.
+
+       .. versionadded:: 0.12
+
     Manage nodes:
 
     .. automethod:: change_node_affiliations
@@ -207,6 +296,10 @@ class PubSubClient(aioxmpp.service.Service):
         aioxmpp.DiscoClient,
     ]
 
+    RETRY_CONDITIONS = frozenset([
+        aioxmpp.errors.ErrorCondition.RESOURCE_CONSTRAINT,
+    ])
+
     on_item_published = aioxmpp.callbacks.Signal()
     on_item_retracted = aioxmpp.callbacks.Signal()
     on_node_deleted = aioxmpp.callbacks.Signal()
@@ -216,6 +309,103 @@ class PubSubClient(aioxmpp.service.Service):
     def __init__(self, client, **kwargs):
         super().__init__(client, **kwargs)
         self._disco = self.dependencies[aioxmpp.DiscoClient]
+        self._item_cache = aioxmpp.cache.LRUDict()
+        self._item_cache.maxsize = 128
+        self.max_cached_items_per_node = 256
+
+    @property
+    def item_cache_size(self):
+        """
+        Maximum number of nodes for which items are cached. Least recently
+        used nodes are evicted first. Defaults to 128.
+
+        .. versionadded:: 0.12
+        """
+        return self._item_cache.maxsize
+
+    @item_cache_size.setter
+    def item_cache_size(self, value):
+        self._item_cache.maxsize = value
+
+    @aioxmpp.service.depsignal(aioxmpp.Client, "on_stream_destroyed")
+    def _clear_item_cache(self):
+        self._item_cache.clear()
+
+    def _get_node_items(self, jid, node, create=False):
+        try:
+            return self._item_cache[jid, node]
+        except KeyError:
+            if not create:
+                return None
+            entry = _NodeItems()
+            self._item_cache[jid, node] = entry
+            return entry
+
+    def _is_fresh(self, timestamp, max_age):
+        if max_age is None:
+            return True
+        return (asyncio.get_event_loop().time() - timestamp <=
+                max_age.total_seconds())
+
+    def _cache_items(self, jid, node, items, complete=False):
+        # items are copied on the way in and out (see _make_items_response),
+        # so that callers cannot modify cached items
+        entry = self._get_node_items(jid, node, create=True)
+        now = asyncio.get_event_loop().time()
+        if complete:
+            entry.items.clear()
+
+        for item in items:
+            if item.id_ is None:
+                continue
+            if item.id_ not in entry.items:
+                # the node may have dropped older items to make room
+                entry.complete = None
+            entry.items[item.id_] = now, copy.deepcopy(item)
+            entry.items.move_to_end(item.id_)
+
+        trimmed = False
+        while len(entry.items) > self.max_cached_items_per_node:
+            entry.items.popitem(last=False)
+            trimmed = True
+
+        if trimmed:
+            entry.complete = None
+        elif complete:
+            entry.complete = now
+
+    def _uncache_item(self, jid, node, id_, *, changed=False):
+        entry = self._get_node_items(jid, node)
+        if entry is None:
+            return
+        entry.items.pop(id_, None)
+        if changed:
+            entry.complete = None
+
+    def _uncache_node(self, jid, node):
+        self._item_cache.pop((jid, node), None)
+
+    def _cache_purged(self, jid, node):
+        entry = self._get_node_items(jid, node, create=True)
+        entry.items.clear()
+        entry.complete = asyncio.get_event_loop().time()
+
+    def _cache_event_item(self, jid, node, event_item):
+        if (event_item.registered_payload is None and
+                len(event_item.unregistered_payload) == 0):
+            # notification without payload: we only know that it changed
+            self._uncache_item(jid, node, event_item.id_, changed=True)
+            return
+
+        item = pubsub_xso.Item(event_item.id_)
+        item.registered_payload = event_item.registered_payload
+        item.unregistered_payload[:] = event_item.unregistered_payload
+        self._cache_items(jid, node, [item])
+
+    def _make_items_response(self, node, items):
+        response = pubsub_xso.Request(pubsub_xso.Items(node))
+        response.payload.items = [copy.deepcopy(item) for item in items]
+        return response
 
     @aioxmpp.service.inbound_message_filter
     def filter_inbound_message(self, msg):
@@ -225,6 +415,7 @@ class PubSubClient(aioxmpp.service.Service):
             if isinstance(payload, pubsub_xso.EventItems):
                 for item in payload.items:
                     node = item.node or payload.node
+                    self._cache_event_item(msg.from_, node, item)
                     self.on_item_published(
                         msg.from_,
                         node,
@@ -233,6 +424,7 @@ class PubSubClient(aioxmpp.service.Service):
                     )
                 for retract in payload.retracts:
                     node = payload.node
+                    self._uncache_item(msg.from_, node, retract.id_)
                     self.on_item_retracted(
                         msg.from_,
                         node,
@@ -240,12 +432,15 @@ class PubSubClient(aioxmpp.service.Service):
                         message=msg,
                     )
             elif isinstance(payload, pubsub_xso.EventDelete):
+                self._uncache_node(msg.from_, payload.node)
                 self.on_node_deleted(
                     msg.from_,
                     payload.node,
                     redirect_uri=payload.redirect_uri,
                     message=msg,
                 )
+            elif isinstance(payload, pubsub_xso.EventPurge):
+                self._cache_purged(msg.from_, payload.node)
 
         elif (msg.xep0060_request is not None and
               msg.xep0060_request.payload is not None):
@@ -550,7 +745,8 @@ class PubSubClient(aioxmpp.service.Service):
 
         await self.client.send(iq)
 
-    async def get_items(self, jid, node, *, max_items=None):
+    async def get_items(self, jid, node, *, max_items=None,
+                        cached_only=False, max_age=None):
         """
         Request the most recent items from a node.
 
@@ -560,7 +756,13 @@ class PubSubClient(aioxmpp.service.Service):
         :type node: :class:`str`
         :param max_items: Number of items to return at most.
         :type max_items: :class:`int` or :data:`None`
+        :param cached_only: Only answer from the item cache.
+        :type cached_only: :class:`bool`
+        :param max_age: Maximum age of a cached answer.
+        :type max_age: :class:`datetime.timedelta` or :data:`None`
         :raises aioxmpp.errors.XMPPError: as returned by the service
+        :raises KeyError: if `cached_only` is true and the cache cannot
+            answer the request
         :return: The response from the server.
         :rtype: :class:`.xso.Request`.
 
@@ -570,16 +772,48 @@ class PubSubClient(aioxmpp.service.Service):
 
         Return the :class:`.xso.Request` object, which has a
         :class:`~.xso.Items` :attr:`~.xso.Request.payload`.
+
+        If `cached_only` is true or `max_age` is not :data:`None`, the request
+        is answered from the item cache if the complete list of items of the
+        node is known and was fetched at most `max_age` ago (any age is
+        acceptable if `max_age` is :data:`None`). If `max_items` is given, the
+        cache is only used if it holds no more than `max_items` items. If the
+        cache cannot answer the request, the service is queried, unless
+        `cached_only` is true, in which case :class:`KeyError` is raised.
+
+        .. versionchanged:: 0.12
+
+           The `cached_only` and `max_age` arguments were added.
         """
 
+        if cached_only or max_age is not None:
+            entry = self._get_node_items(jid, node)
+            if (entry is not None and
+                    entry.complete is not None and
+                    self._is_fresh(entry.complete, max_age) and
+                    (max_items is None or len(entry.items) <= max_items)):
+                return self._make_items_response(
+                    node,
+                    [item for _, item in entry.items.values()]
+                )
+            if cached_only:
+                raise KeyError((jid, node))
+
         iq = aioxmpp.stanza.IQ(to=jid, type_=aioxmpp.structs.IQType.GET)
         iq.payload = pubsub_xso.Request(
             pubsub_xso.Items(node, max_items=max_items)
         )
 
-        return await self.client.send(iq)
+        response = await self.client.send(iq)
+        if response is not None and response.payload is not None:
+            # a response paged with RSM may hold only part of the items
+            self._cache_items(jid, node, response.payload.items,
+                              complete=(max_items is None and
+                                        response.rsm is None))
+        return response
 
-    async def get_items_by_id(self, jid, node, ids):
+    async def get_items_by_id(self, jid, node, ids, *,
+                              cached_only=False, max_age=None):
         """
         Request specific items by their IDs from a node.
 
@@ -589,7 +823,13 @@ class PubSubClient(aioxmpp.service.Service):
         :type node: :class:`str`
         :param ids: The item IDs to return.
         :type ids: :class:`~collections.abc.Iterable` of :class:`str`
+        :param cached_only: Only answer from the item cache.
+        :type cached_only: :class:`bool`
+        :param max_age: Maximum age of cached items.
+        :type max_age: :class:`datetime.timedelta` or :data:`None`
         :raises aioxmpp.errors.XMPPError: as returned by the service
+        :raises KeyError: if `cached_only` is true and not all items are in
+            the cache
         :return: The response from the service
         :rtype: :class:`.xso.Request`
 
@@ -600,8 +840,56 @@ class PubSubClient(aioxmpp.service.Service):
 
         Return the :class:`.xso.Request` object, which has a
         :class:`~.xso.Items` :attr:`~.xso.Request.payload`.
+
+        If `cached_only` is true or `max_age` is not :data:`None`, items which
+        are in the item cache and were updated at most `max_age` ago are
+        taken from the cache (any age is acceptable if `max_age` is
+        :data:`None`). Only the remaining items are requested from the
+        service; the returned :class:`.xso.Request` then combines both in the
+        order of `ids`. If `cached_only` is true and any item is missing from
+        the cache, :class:`KeyError` is raised instead.
+
+        .. versionchanged:: 0.12
+
+           The `cached_only` and `max_age` arguments were added.
         """
 
+        if not cached_only and max_age is None:
+            return await self._request_items_by_id(jid, node, ids)
+
+        ids = list(ids)
+        if not ids:
+            raise ValueError("ids must not be empty")
+
+        entry = self._get_node_items(jid, node)
+        cached = {}
+        if entry is not None:
+            for id_ in ids:
+                try:
+                    timestamp, item = entry.items[id_]
+                except KeyError:
+                    continue
+                if self._is_fresh(timestamp, max_age):
+                    cached[id_] = item
+
+        missing = [id_ for id_ in ids if id_ not in cached]
+        if missing:
+            if cached_only:
+                raise KeyError(missing[0])
+
+            response = await self._request_items_by_id(jid, node, missing)
+            if not cached:
+                return response
+
+            for item in response.payload.items:
+                cached[item.id_] = item
+
+        return self._make_items_response(
+            node,
+            [cached[id_] for id_ in ids if id_ in cached]
+        )
+
+    async def _request_items_by_id(self, jid, node, ids):
         iq = aioxmpp.stanza.IQ(to=jid, type_=aioxmpp.structs.IQType.GET)
         iq.payload = pubsub_xso.Request(
             pubsub_xso.Items(node)
@@ -615,7 +903,89 @@ class PubSubClient(aioxmpp.service.Service):
         if not iq.payload.payload.items:
             raise ValueError("ids must not be empty")
 
-        return await self.client.send(iq)
+        response = await self.client.send(iq)
+        if response is not None and response.payload is not None:
+            self._cache_items(jid, node, response.payload.items)
+        return response
+
+    def iter_items(self, jid, node, *, page_size=None, after=None,
+                   max_pages=2, timeout=None, payloads=True):
+        """
+        Iterate over all items of a node, page by page.
+
+        :param jid: Address of the PubSub service.
+        :type jid: :class:`aioxmpp.JID`
+        :param node: Name of the PubSub node to query.
+        :type node: :class:`str`
+        :param page_size: Number of items to request per page, or
+            :data:`None` to let the service decide.
+        :type page_size: :class:`int` or :data:`None`
+        :param after: Resume after the item with this ID.
+        :type after: :class:`str` or :data:`None`
+        :param max_pages: Maximum number of pages to buffer.
+        :type max_pages: :class:`int`
+        :param timeout: Timeout for each request.
+        :type timeout: :class:`float` or :data:`None`
+        :param payloads: If false, only the item IDs are retrieved.
+        :type payloads: :class:`bool`
+        :return: An asynchronous iterator over the items.
+
+        The items are requested using :xep:`59` Result Set Management with a
+        :class:`aioxmpp.rsm.Paginator`, so that only a bounded number of
+        pages is kept in memory and the next page is requested while the
+        current one is processed. The service must support RSM for the node;
+        otherwise, only the first page is returned.
+
+        If `payloads` is true, the iterator yields :class:`.xso.Item`
+        objects. Otherwise, the items are discovered using
+        :xep:`30` (as specified in :xep:`60`) instead, which does not
+        transfer the payloads at all, and the iterator yields the item IDs as
+        :class:`str`. This is useful to compare the contents of a node with a
+        local copy.
+
+        The returned iterator has a ``last_cursor`` attribute, which holds
+        the ID of the most recently yielded item and can be passed as `after`
+        to resume. Calling its ``close()`` method cancels any outstanding
+        requests.
+
+        Errors returned by the service are raised from the iterator.
+
+        .. versionadded:: 0.12
+        """
+
+        if payloads:
+            def make_request(result_set):
+                iq = aioxmpp.stanza.IQ(to=jid,
+                                       type_=aioxmpp.structs.IQType.GET)
+                iq.payload = pubsub_xso.Request(pubsub_xso.Items(node))
+                iq.payload.rsm = result_set
+                return iq
+
+            def get_elements(response):
+                return [(item.id_, item) for item in response.payload.items]
+        else:
+            def make_request(result_set):
+                iq = aioxmpp.stanza.IQ(to=jid,
+                                       type_=aioxmpp.structs.IQType.GET)
+                iq.payload = aioxmpp.disco.xso.ItemsQuery(node=node)
+                iq.payload.rsm = result_set
+                return iq
+
+            def get_elements(response):
+                return [(item.name, item.name) for item in response.items]
+
+        return _PagedItems(
+            aioxmpp.rsm.Paginator(
+                self.client,
+                make_request,
+                lambda response: response.rsm,
+                page_size=page_size,
+                after=after,
+                max_pages=max_pages,
+                timeout=timeout,
+            ),
+            get_elements,
+        )
 
     async def get_subscriptions(self, jid, node=None):
         """
@@ -687,6 +1057,17 @@ class PubSubClient(aioxmpp.service.Service):
         does not inform us; this is unfortunately common).
         """
 
+        if publish_options is not None:
+            features = await self.get_features(jid)
+            if pubsub_xso.Feature.PUBLISH_OPTIONS not in features:
+                raise RuntimeError(
+                    "publish-options given, but not supported by server"
+                )
+
+        return await self._publish(jid, node, payload, id_, publish_options)
+
+    async def _publish(self, jid, node, payload, id_, publish_options):
+        # the caller is responsible for checking support for publish_options
         publish = pubsub_xso.Publish()
         publish.node = node
 
@@ -702,19 +1083,19 @@ class PubSubClient(aioxmpp.service.Service):
         )
 
         if publish_options is not None:
-            features = await self.get_features(jid)
-            if pubsub_xso.Feature.PUBLISH_OPTIONS not in features:
-                raise RuntimeError(
-                    "publish-options given, but not supported by server"
-                )
-
             iq.payload.publish_options = pubsub_xso.PublishOptions()
             iq.payload.publish_options.data = publish_options
 
         response = await self.client.send(iq)
 
         if response is not None and response.payload.item is not None:
-            return response.payload.item.id_ or id_
+            id_ = response.payload.item.id_ or id_
+
+        if payload is not None and id_ is not None:
+            cached = pubsub_xso.Item(id_)
+            cached.registered_payload = payload
+            self._cache_items(jid, node, [cached])
+
         return id_
 
     async def notify(self, jid, node):
@@ -766,6 +1147,169 @@ class PubSubClient(aioxmpp.service.Service):
         )
 
         await self.client.send(iq)
+        self._uncache_item(jid, node, id_)
+
+    def _is_retryable(self, exc):
+        return (isinstance(exc, aioxmpp.errors.XMPPWaitError) or
+                exc.condition in self.RETRY_CONDITIONS)
+
+    async def _send_with_retry(self, make_request, max_retries, retry_delay):
+        delay = retry_delay.total_seconds()
+        for attempt in range(max_retries + 1):
+            try:
+                return await make_request()
+            except aioxmpp.errors.XMPPError as exc:
+                if attempt >= max_retries or not self._is_retryable(exc):
+                    raise
+            await asyncio.sleep(delay * 2 ** attempt)
+
+    async def _pipeline(self, requests, window, max_retries, retry_delay):
+        if window < 1:
+            raise ValueError("window must be positive")
+
+        requests = list(requests)
+        results = [None] * len(requests)
+        queue = iter(enumerate(requests))
+
+        async def worker():
+            for i, make_request in queue:
+                try:
+                    results[i] = await self._send_with_retry(
+                        make_request,
+                        max_retries,
+                        retry_delay,
+                    )
+                except aioxmpp.errors.XMPPError as exc:
+                    results[i] = exc
+
+        workers = [
+            asyncio.ensure_future(worker())
+            for _ in range(min(window, len(requests)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        except:  # NOQA
+            for fut in workers:
+                fut.cancel()
+            raise
+
+        return results
+
+    async def publish_many(self, jid, node, items, *,
+                           publish_options=None,
+                           window=8,
+                           max_retries=3,
+                           retry_delay=timedelta(seconds=0.5)):
+        """
+        Publish many items to a node, with several requests in flight.
+
+        :param jid: Address of the PubSub service.
+        :type jid: :class:`aioxmpp.JID`
+        :param node: Name of the PubSub node to publish to.
+        :type node: :class:`str`
+        :param items: The items to publish.
+        :type items: :class:`~collections.abc.Iterable` of pairs of item ID
+            (:class:`str` or :data:`None`) and payload
+            (:class:`aioxmpp.xso.XSO`)
+        :param publish_options: A data form with the options for the publish
+            requests
+        :type publish_options: :class:`aioxmpp.forms.Data`
+        :param window: Maximum number of requests in flight.
+        :type window: :class:`int`
+        :param max_retries: Maximum number of retries per item.
+        :type max_retries: :class:`int`
+        :param retry_delay: Delay before the first retry.
+        :type retry_delay: :class:`datetime.timedelta`
+        :raises RuntimeError: if `publish_options` is not :data:`None` but
+            the service does not support `publish_options`
+        :return: The result for each item, in the order of `items`.
+        :rtype: :class:`list`
+
+        Each item is published as with :meth:`publish`, but up to `window`
+        requests are sent without waiting for the previous responses. This
+        avoids paying a full round trip per item without flooding the
+        service. Support for `publish_options` is checked only once, before
+        the first request is sent.
+
+        If publishing an item fails with an error of type ``wait`` or with
+        one of the :attr:`RETRY_CONDITIONS`, the request is retried up to
+        `max_retries` times. The delay before a retry starts at `retry_delay`
+        and doubles with each attempt.
+
+        The returned list holds, for each item, either the item ID as
+        returned by :meth:`publish` or the :class:`~.errors.XMPPError` which
+        made publishing the item fail. Other exceptions (for example, if the
+        stream is destroyed) abort all outstanding requests and are
+        re-raised.
+
+        .. versionadded:: 0.12
+        """
+
+        if publish_options is not None:
+            features = await self.get_features(jid)
+            if pubsub_xso.Feature.PUBLISH_OPTIONS not in features:
+                raise RuntimeError(
+                    "publish-options given, but not supported by server"
+                )
+
+        return await self._pipeline(
+            [
+                functools.partial(
+                    self._publish, jid, node, payload, id_, publish_options,
+                )
+                for id_, payload in items
+            ],
+            window,
+            max_retries,
+            retry_delay,
+        )
+
+    async def retract_many(self, jid, node, ids, *,
+                           notify=False,
+                           window=8,
+                           max_retries=3,
+                           retry_delay=timedelta(seconds=0.5)):
+        """
+        Retract many items from a node, with several requests in flight.
+
+        :param jid: Address of the PubSub service.
+        :type jid: :class:`aioxmpp.JID`
+        :param node: Name of the PubSub node to retract from.
+        :type node: :class:`str`
+        :param ids: The IDs of the items to retract.
+        :type ids: :class:`~collections.abc.Iterable` of :class:`str`
+        :param notify: Flag indicating whether subscribers shall be notified
+            about the retractions.
+        :type notify: :class:`bool`
+        :param window: Maximum number of requests in flight.
+        :type window: :class:`int`
+        :param max_retries: Maximum number of retries per item.
+        :type max_retries: :class:`int`
+        :param retry_delay: Delay before the first retry.
+        :type retry_delay: :class:`datetime.timedelta`
+        :return: The result for each item, in the order of `ids`.
+        :rtype: :class:`list`
+
+        Each item is retracted as with :meth:`retract`. Pipelining, retries
+        and error handling work as described for :meth:`publish_many`. The
+        returned list holds :data:`None` for each item which was retracted
+        successfully and the :class:`~.errors.XMPPError` otherwise.
+
+        .. versionadded:: 0.12
+        """
+
+        return await self._pipeline(
+            [
+                functools.partial(
+                    self.retract, jid, node, id_,
+                    notify=notify,
+                )
+                for id_ in ids
+            ],
+            window,
+            max_retries,
+            retry_delay,
+        )
 
     async def create(self, jid, node=None):
         """
@@ -831,6 +1375,7 @@ class PubSubClient(aioxmpp.service.Service):
         )
 
         await self.client.send(iq)
+        self._uncache_node(jid, node)
 
     async def get_nodes(self, jid, node=None):
         """
@@ -1020,3 +1565,4 @@ class PubSubClient(aioxmpp.service.Service):
         )
 
         await self.client.send(iq)
+        self._cache_purged(jid, node)
@@ -20,6 +20,7 @@
 #
 ########################################################################
 import aioxmpp.forms
+import aioxmpp.rsm.xso as rsm_xso
 import aioxmpp.stanza
 import aioxmpp.xso as xso
 
@@ -481,6 +482,13 @@ class Request(xso.XSO):
        available here. If they are used without another payload, the
        :attr:`payload` attribute is :data:`None`.
 
+    .. attribute:: rsm
+
+       The :class:`~.rsm.xso.ResultSetMetadata` used to page through the
+       :class:`Items` of a node, or :data:`None`.
+
+       .. versionadded:: 0.12
+
     """
     TAG = (namespaces.xep0060, "pubsub")
 
@@ -509,6 +517,10 @@ class Request(xso.XSO):
         PublishOptions,
     ])
 
+    rsm = xso.Child([
+        rsm_xso.ResultSetMetadata,
+    ])
+
     def __init__(self, payload=None):
         super().__init__()
         self.payload = payload
@@ -42,6 +42,23 @@ This subpackage provides :class:`.RosterClient`, a service to interact with
 
 .. autoclass:: Item
 
+.. autoclass:: RosterDiff
+
+Persistent roster storage
+=========================
+
+.. versionadded:: 0.12
+
+Roster stores can be attached to :attr:`aioxmpp.RosterClient.store` to keep
+the roster (and its version) on disk, updated incrementally with each roster
+push.
+
+.. autoclass:: AbstractRosterStore
+
+.. autoclass:: SQLiteRosterStore
+
+.. autoclass:: LogRosterStore
+
 .. module:: aioxmpp.roster.xso
 
 .. currentmodule:: aioxmpp.roster.xso
@@ -64,5 +81,10 @@ versioning:
 .. autoclass:: RosterVersioningFeature()
 """
 
-from .service import RosterClient, Item  # NOQA: F401
+from .service import RosterClient, Item, RosterDiff  # NOQA: F401
+from .store import (  # NOQA: F401
+    AbstractRosterStore,
+    SQLiteRosterStore,
+    LogRosterStore,
+)
 Service = RosterClient  # NOQA
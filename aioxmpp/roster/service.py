@@ -20,6 +20,7 @@
 #
 ########################################################################
 import asyncio
+import collections
 import logging
 
 import aioxmpp.service
@@ -38,6 +39,15 @@ logger = logging.getLogger(__name__)
 _Sentinel = object()
 
 
+def _index_keys(item):
+    return frozenset([
+        ("subscription", item.subscription),
+        ("ask", item.ask),
+        ("approved", bool(item.approved)),
+        ("domain", item.jid.domain),
+    ])
+
+
 class Item:
     """
     Represent an entry in the roster. These entries are mutable, see the
@@ -168,6 +178,49 @@ class Item:
         self.groups = set(data.get("groups", []))
 
 
+class RosterDiff(collections.namedtuple(
+        "RosterDiff",
+        [
+            "added",
+            "changed",
+            "removed",
+            "groups_added",
+            "groups_removed",
+        ])):
+    """
+    Net changes of the roster in a batch, as emitted by
+    :meth:`aioxmpp.RosterClient.on_roster_batch_changed`.
+
+    .. attribute:: added
+
+       :class:`set` of :class:`Item` instances which were added to the roster.
+
+    .. attribute:: changed
+
+       :class:`set` of :class:`Item` instances which were in the roster
+       before and whose attributes changed.
+
+    .. attribute:: removed
+
+       :class:`set` of :class:`Item` instances which were removed from the
+       roster.
+
+    .. attribute:: groups_added
+
+       :class:`set` of the names of groups which were added.
+
+    .. attribute:: groups_removed
+
+       :class:`set` of the names of groups which were removed.
+
+    An entry which is added and removed again within a batch does not show up
+    at all. If an entry is removed and re-added within a batch, the old
+    :class:`Item` is in :attr:`removed` and the new one in :attr:`added`.
+
+    .. versionadded:: 0.12
+    """
+
+
 class RosterClient(aioxmpp.service.Service):
     """
     A roster client :class:`aioxmpp.service.Service`.
@@ -193,6 +246,10 @@ class RosterClient(aioxmpp.service.Service):
        At no point one can observe empty :class:`set` instances in this
        dictionary.
 
+    Querying the roster:
+
+    .. automethod:: find_items
+
     The :class:`Item` instances stay the same, as long as they represent the
     identical roster entry on the remote side. That is, if the name or
     subscription state are changed in the server side roster, the :class:`Item`
@@ -309,6 +366,43 @@ class RosterClient(aioxmpp.service.Service):
 
         .. versionadded:: 0.9
 
+    .. signal:: on_roster_batch_changed(diff)
+
+        Fires after a batch of roster changes has been applied.
+
+        :param diff: The net changes of the batch.
+        :type diff: :class:`~aioxmpp.roster.RosterDiff`
+
+        The signals above still fire for each individual change. This signal
+        fires once per batch, so that consumers which only need to refresh
+        their view of the roster can avoid doing so for each entry. It does
+        not fire if the batch had no net effect.
+
+        By default, each roster push is a batch and the initial roster is a
+        batch. See :attr:`batch_window` to aggregate bursts of roster pushes.
+
+        .. versionadded:: 0.12
+
+    .. attribute:: batch_window
+
+       Time window to aggregate roster pushes in, as
+       :class:`datetime.timedelta`, or :data:`None` (the default) to treat
+       each push as a separate batch.
+
+       When set, the first push after a batch has been emitted starts a new
+       window. When the window ends, :meth:`on_roster_batch_changed` fires
+       once for all pushes received within the window, and the changes are
+       written to the :attr:`store` in a single call. Roster pushes are still
+       applied to :attr:`items` and :attr:`groups` right away.
+
+       Deferring the write to the store is safe with roster versioning: if the
+       pending changes are lost, the store still holds the previous version,
+       and the server will re-send the changes.
+
+       .. versionadded:: 0.12
+
+    .. automethod:: flush_roster_batch
+
     Modifying roster contents:
 
     .. automethod:: set_entry
@@ -372,6 +466,11 @@ class RosterClient(aioxmpp.service.Service):
     services won’t delete roster contents between two connections on the same
     :class:`.Client` instance.
 
+    Alternatively, a persistent store can be attached, which is kept up to
+    date incrementally:
+
+    .. autoattribute:: store
+
     .. versionchanged:: 0.8
 
        This class was formerly known as :class:`aioxmpp.roster.Service`. It
@@ -394,6 +493,8 @@ class RosterClient(aioxmpp.service.Service):
     on_group_added = callbacks.Signal()
     on_group_removed = callbacks.Signal()
 
+    on_roster_batch_changed = callbacks.Signal()
+
     on_subscribed = callbacks.Signal()
     on_subscribe = callbacks.Signal()
     on_unsubscribed = callbacks.Signal()
@@ -408,17 +509,256 @@ class RosterClient(aioxmpp.service.Service):
 
         self.__roster_lock = asyncio.Lock()
 
-        self.items = {}
-        self.groups = {}
+        self._items = {}
+        self._groups = {}
+        # (attribute, value) -> set of Item
+        self._index = {}
+        # jid -> keys under which the item is currently indexed
+        self._index_keys = {}
         self.version = None
+        self._store = None
+        self._store_loaded = True
+        self.batch_window = None
+        # jid -> (Item or None, exported Item or None) at the start of the
+        # batch
+        self._batch_entries = collections.OrderedDict()
+        # group -> whether the group existed at the start of the batch
+        self._batch_groups = collections.OrderedDict()
+        self._batch_handle = None
+
+    async def _shutdown(self):
+        self.flush_roster_batch()
+        await super()._shutdown()
+
+    @property
+    def items(self):
+        self._load_from_store()
+        return self._items
+
+    @property
+    def groups(self):
+        self._load_from_store()
+        return self._groups
+
+    @property
+    def store(self):
+        """
+        The :class:`~aioxmpp.roster.AbstractRosterStore` used to persist the
+        roster, or :data:`None` (the default).
+
+        When a store is set, the roster version is read from it right away,
+        while the items are only loaded when they are first needed (for
+        example on the first access to :attr:`items` or when the first roster
+        push arrives). No events are fired for the loaded items. The store
+        replaces the current roster contents, so it should be set before the
+        stream is established.
+
+        Each roster push is then written through to the store, together with
+        the new roster version, so that only the changed items are written. A
+        full roster received from the server replaces the store contents.
+        This allows to use roster versioning without exporting the whole
+        roster with :meth:`export_as_json`.
+
+        .. versionadded:: 0.12
+        """
+        return self._store
+
+    @store.setter
+    def store(self, store):
+        self._store = store
+        if store is None:
+            self._store_loaded = True
+            return
+
+        self.version = store.get_version()
+        self._items = {}
+        self._groups = {}
+        self._index = {}
+        self._index_keys = {}
+        self._store_loaded = False
+
+    def _load_from_store(self):
+        if self._store_loaded:
+            return
+        self._store_loaded = True
+
+        for jid, data in self._store.load_items():
+            item = Item(jid)
+            item.update_from_json(data)
+            self._items[jid] = item
+            self._index_item(item)
+            for group in item.groups:
+                self._groups.setdefault(group, set()).add(item)
+
+    def _index_item(self, item):
+        old_keys = self._index_keys.get(item.jid, frozenset())
+        new_keys = _index_keys(item)
+        if old_keys == new_keys:
+            return
+
+        for key in old_keys - new_keys:
+            items = self._index[key]
+            items.discard(item)
+            if not items:
+                del self._index[key]
+
+        for key in new_keys - old_keys:
+            self._index.setdefault(key, set()).add(item)
+
+        self._index_keys[item.jid] = new_keys
+
+    def _unindex_item(self, item):
+        for key in self._index_keys.pop(item.jid, ()):
+            items = self._index[key]
+            items.discard(item)
+            if not items:
+                del self._index[key]
+
+    def find_items(self, *,
+                   subscription=_Sentinel,
+                   ask=_Sentinel,
+                   approved=_Sentinel,
+                   domain=_Sentinel,
+                   groups=()):
+        """
+        Return the roster items matching all of the given criteria.
+
+        :param subscription: Only return items with this
+            :attr:`Item.subscription`.
+        :type subscription: :class:`str`
+        :param ask: Only return items with this :attr:`Item.ask` (which may
+            be :data:`None`).
+        :type ask: :class:`str` or :data:`None`
+        :param approved: Only return items with this :attr:`Item.approved`.
+        :type approved: :class:`bool`
+        :param domain: Only return items whose :attr:`Item.jid` has this
+            domain.
+        :type domain: :class:`str`
+        :param groups: Only return items which are in all of these groups.
+        :type groups: iterable of :class:`str`
+        :return: The matching items.
+        :rtype: :class:`set` of :class:`Item`
+
+        Criteria which are not given are not checked. The lookup uses indexes
+        which are maintained as the roster changes, so its cost depends on the
+        number of matching items instead of the size of the roster. For
+        example, to find all pending outbound subscription requests, use
+        ``find_items(ask="subscribe")``.
+
+        .. versionadded:: 0.12
+        """
+        self._load_from_store()
+
+        candidates = []
+        for attr, value in [("subscription", subscription),
+                            ("ask", ask),
+                            ("approved", approved),
+                            ("domain", domain)]:
+            if value is _Sentinel:
+                continue
+            if attr == "approved":
+                value = bool(value)
+            candidates.append(self._index.get((attr, value), frozenset()))
+
+        for group in groups:
+            candidates.append(self._groups.get(group, frozenset()))
+
+        if not candidates:
+            return set(self._items.values())
+
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for items in candidates[1:]:
+            if not result:
+                break
+            result &= items
+        return result
+
+    def _note_entry(self, jid):
+        if jid in self._batch_entries:
+            return
+        item = self.items.get(jid)
+        self._batch_entries[jid] = (
+            item,
+            item.export_as_json() if item is not None else None,
+        )
+
+    def _note_group(self, group):
+        if group not in self._batch_groups:
+            self._batch_groups[group] = group in self.groups
+
+    def _end_push(self):
+        if self.batch_window is None:
+            self.flush_roster_batch()
+        elif self._batch_handle is None:
+            self._batch_handle = asyncio.get_event_loop().call_later(
+                self.batch_window.total_seconds(),
+                self.flush_roster_batch,
+            )
+
+    def flush_roster_batch(self):
+        """
+        End the current batch of roster changes.
+
+        The pending changes are written to the :attr:`store` and
+        :meth:`on_roster_batch_changed` is emitted. This does nothing if
+        there are no pending changes.
+
+        .. versionadded:: 0.12
+        """
+        if self._batch_handle is not None:
+            self._batch_handle.cancel()
+            self._batch_handle = None
+        self._flush_batch(True)
+
+    def _flush_batch(self, write_to_store):
+        entries, self._batch_entries = \
+            self._batch_entries, collections.OrderedDict()
+        groups, self._batch_groups = \
+            self._batch_groups, collections.OrderedDict()
+
+        if write_to_store and self._store is not None and entries:
+            updated = {}
+            removed = []
+            for jid in entries:
+                try:
+                    updated[jid] = self._items[jid].export_as_json()
+                except KeyError:
+                    removed.append(jid)
+            self._store.apply(self.version, updated, removed)
+
+        diff = RosterDiff(set(), set(), set(), set(), set())
+        for jid, (original, original_data) in entries.items():
+            item = self._items.get(jid)
+            if original is not None and item is not original:
+                diff.removed.add(original)
+            if item is None:
+                continue
+            if item is not original:
+                diff.added.add(item)
+            elif item.export_as_json() != original_data:
+                diff.changed.add(item)
+
+        for group, existed in groups.items():
+            exists = group in self._groups
+            if exists and not existed:
+                diff.groups_added.add(group)
+            elif existed and not exists:
+                diff.groups_removed.add(group)
+
+        if any(diff):
+            self.on_roster_batch_changed(diff)
 
     def _update_entry(self, xso_item):
+        self._note_entry(xso_item.jid)
         try:
             stored_item = self.items[xso_item.jid]
         except KeyError:
             stored_item = Item.from_xso_item(xso_item)
             self.items[xso_item.jid] = stored_item
+            self._index_item(stored_item)
             for group in stored_item.groups:
+                self._note_group(group)
                 try:
                     group_members = self.groups[group]
                 except KeyError:
@@ -441,6 +781,7 @@ class RosterClient(aioxmpp.service.Service):
         old_groups = set(stored_item.groups)
 
         stored_item.update_from_xso_item(xso_item)
+        self._index_item(stored_item)
 
         new_groups = set(stored_item.groups)
 
@@ -451,6 +792,7 @@ class RosterClient(aioxmpp.service.Service):
             cb(stored_item)
 
         for group in added_to_groups:
+            self._note_group(group)
             try:
                 group_members = self.groups[group]
             except KeyError:
@@ -460,6 +802,7 @@ class RosterClient(aioxmpp.service.Service):
             self.on_entry_added_to_group(stored_item, group)
 
         for group in removed_from_groups:
+            self._note_group(group)
             groupset = self.groups[group]
             groupset.remove(stored_item)
             if not groupset:
@@ -479,17 +822,20 @@ class RosterClient(aioxmpp.service.Service):
         async with self.__roster_lock:
             for item in request.items:
                 if item.subscription == "remove":
+                    self._note_entry(item.jid)
                     try:
                         old_item = self.items.pop(item.jid)
                     except KeyError:
                         pass
                     else:
+                        self._unindex_item(old_item)
                         self._remove_from_groups(old_item, old_item.groups)
                         self.on_entry_removed(old_item)
                 else:
                     self._update_entry(item)
 
             self.version = request.ver
+            self._end_push()
 
     @aioxmpp.dispatcher.presence_handler(
         aioxmpp.structs.PresenceType.SUBSCRIBE,
@@ -517,6 +863,7 @@ class RosterClient(aioxmpp.service.Service):
 
     def _remove_from_groups(self, item_to_remove, groups):
         for group in groups:
+            self._note_group(group)
             try:
                 group_members = self.groups[group]
             except KeyError:
@@ -531,6 +878,8 @@ class RosterClient(aioxmpp.service.Service):
         iq.payload = roster_xso.Query()
 
         async with self.__roster_lock:
+            self.flush_roster_batch()
+
             logger.debug("requesting initial roster")
             if self.client.stream_features.has_feature(
                     roster_xso.RosterVersioningFeature):
@@ -558,7 +907,9 @@ class RosterClient(aioxmpp.service.Service):
             logger.debug("jids dropped: %r", removed_jids)
 
             for removed_jid in removed_jids:
+                self._note_entry(removed_jid)
                 old_item = self.items.pop(removed_jid)
+                self._unindex_item(old_item)
                 self._remove_from_groups(old_item, old_item.groups)
                 self.on_entry_removed(old_item)
 
@@ -566,6 +917,16 @@ class RosterClient(aioxmpp.service.Service):
             for item in response.items:
                 self._update_entry(item)
 
+            if self._store is not None:
+                self._store.replace(
+                    self.version,
+                    {
+                        jid: item.export_as_json()
+                        for jid, item in self.items.items()
+                    },
+                )
+            self._flush_batch(False)
+
             self.on_initial_roster_received()
             return True
 
@@ -593,19 +954,38 @@ class RosterClient(aioxmpp.service.Service):
         Also, no data is transferred to the server; this method is intended to
         be used for roster versioning. See below (in the docs of
         :class:`Service`).
+
+        .. versionchanged:: 0.12
+
+           If a :attr:`store` is set, its contents are replaced, too.
         """
+        self.flush_roster_batch()
+
         self.version = data.get("ver", None)
 
+        self._store_loaded = True
         self.items.clear()
         self.groups.clear()
+        self._index.clear()
+        self._index_keys.clear()
         for jid, data in data.get("items", {}).items():
             jid = structs.JID.fromstr(jid)
             item = Item(jid)
             item.update_from_json(data)
             self.items[jid] = item
+            self._index_item(item)
             for group in item.groups:
                 self.groups.setdefault(group, set()).add(item)
 
+        if self._store is not None:
+            self._store.replace(
+                self.version,
+                {
+                    jid: item.export_as_json()
+                    for jid, item in self.items.items()
+                },
+            )
+
     async def set_entry(self, jid, *,
                   name=_Sentinel,
                   add_to_groups=frozenset(),
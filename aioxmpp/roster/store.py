@@ -0,0 +1,325 @@
+########################################################################
+# File name: store.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import abc
+import json
+import os
+import sqlite3
+import tempfile
+
+import aioxmpp.structs as structs
+
+
+class AbstractRosterStore(metaclass=abc.ABCMeta):
+    """
+    Abstract base class for persistent roster storage.
+
+    A roster store holds the roster items together with the roster version
+    (see :rfc:`6121`, section 2.6). It is attached to a
+    :class:`~aioxmpp.RosterClient` via :attr:`~aioxmpp.RosterClient.store`,
+    which then writes each roster push through to the store and loads the
+    stored roster on first use.
+
+    Items are exchanged in the format produced by
+    :meth:`aioxmpp.roster.Item.export_as_json`.
+
+    .. automethod:: get_version
+
+    .. automethod:: load_items
+
+    .. automethod:: apply
+
+    .. automethod:: replace
+
+    .. automethod:: close
+
+    .. versionadded:: 0.12
+    """
+
+    @abc.abstractmethod
+    def get_version(self):
+        """
+        Return the stored roster version.
+
+        :rtype: :class:`str` or :data:`None`
+
+        :data:`None` is returned if the store is empty or if the stored roster
+        has no version.
+        """
+
+    @abc.abstractmethod
+    def load_items(self):
+        """
+        Return the stored roster items.
+
+        :return: The stored items.
+        :rtype: iterable of pairs of :class:`~aioxmpp.JID` and :class:`dict`
+        """
+
+    @abc.abstractmethod
+    def apply(self, ver, updated, removed):
+        """
+        Apply a roster change.
+
+        :param ver: The roster version after the change.
+        :type ver: :class:`str` or :data:`None`
+        :param updated: Items which were added or modified.
+        :type updated: :class:`~collections.abc.Mapping` from
+            :class:`~aioxmpp.JID` to :class:`dict`
+        :param removed: JIDs of the items which were removed.
+        :type removed: iterable of :class:`~aioxmpp.JID`
+
+        The change and the new version must be persisted atomically: after a
+        crash, the store must either contain the state before or the state
+        after the change.
+        """
+
+    @abc.abstractmethod
+    def replace(self, ver, items):
+        """
+        Replace the whole stored roster.
+
+        :param ver: The new roster version.
+        :type ver: :class:`str` or :data:`None`
+        :param items: The new items.
+        :type items: :class:`~collections.abc.Mapping` from
+            :class:`~aioxmpp.JID` to :class:`dict`
+
+        The same atomicity requirements as for :meth:`apply` hold.
+        """
+
+    def close(self):
+        """
+        Release any resources held by the store.
+
+        The default implementation does nothing.
+        """
+
+
+class SQLiteRosterStore(AbstractRosterStore):
+    """
+    Roster store backed by an SQLite database.
+
+    :param path: Path to the database file.
+    :type path: :class:`str` or :class:`pathlib.Path`
+
+    The database is opened (and created, if needed) on first use. Each call
+    to :meth:`apply` or :meth:`replace` runs in a single transaction, which
+    writes the changed rows and the new version.
+
+    .. versionadded:: 0.12
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self._path = str(path)
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self._path)
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS roster_meta "
+                    "(key TEXT PRIMARY KEY, value TEXT)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS roster_items "
+                    "(jid TEXT PRIMARY KEY, data TEXT NOT NULL)"
+                )
+            self._conn = conn
+        return self._conn
+
+    def get_version(self):
+        row = self._connect().execute(
+            "SELECT value FROM roster_meta WHERE key = 'ver'"
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0]
+
+    def load_items(self):
+        for jid, data in self._connect().execute(
+                "SELECT jid, data FROM roster_items"):
+            yield structs.JID.fromstr(jid), json.loads(data)
+
+    def _write(self, conn, ver, updated, removed):
+        conn.executemany(
+            "INSERT OR REPLACE INTO roster_items (jid, data) VALUES (?, ?)",
+            ((str(jid), json.dumps(data)) for jid, data in updated.items())
+        )
+        conn.executemany(
+            "DELETE FROM roster_items WHERE jid = ?",
+            ((str(jid),) for jid in removed)
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO roster_meta (key, value) "
+            "VALUES ('ver', ?)",
+            (ver,)
+        )
+
+    def apply(self, ver, updated, removed):
+        conn = self._connect()
+        with conn:
+            self._write(conn, ver, updated, removed)
+
+    def replace(self, ver, items):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM roster_items")
+            self._write(conn, ver, items, ())
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class LogRosterStore(AbstractRosterStore):
+    """
+    Roster store backed by an append-only log file.
+
+    :param path: Path to the log file.
+    :type path: :class:`str` or :class:`pathlib.Path`
+    :param compact_after: Number of records after which the log is compacted.
+    :type compact_after: :class:`int`
+
+    Each change is appended to the file as a single line of JSON, which
+    carries the new version, and is flushed to disk before :meth:`apply`
+    returns. An incomplete last line (for example, after a crash while
+    writing) is ignored when reading and cut off before the next write.
+
+    When more than `compact_after` records have been written, the log is
+    replaced by a single snapshot record. The snapshot is written to a
+    temporary file which then replaces the log atomically.
+
+    .. versionadded:: 0.12
+    """
+
+    def __init__(self, path, *, compact_after=1000):
+        super().__init__()
+        self._path = str(path)
+        self._compact_after = compact_after
+        self._replayed = None
+        self._nrecords = None
+        self._valid_size = None
+
+    def _replay(self):
+        ver = None
+        items = {}
+        nrecords = 0
+        valid_size = 0
+
+        try:
+            f = open(self._path, "rb")
+        except FileNotFoundError:
+            return ver, items, nrecords, valid_size
+
+        with f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    break
+
+                if "replace" in record:
+                    items = record["replace"]
+                else:
+                    items.update(record.get("set", {}))
+                    for jid in record.get("remove", []):
+                        items.pop(jid, None)
+                ver = record["ver"]
+                nrecords += 1
+                valid_size += len(line)
+
+        return ver, items, nrecords, valid_size
+
+    def _load(self):
+        if self._replayed is None:
+            self._replayed = self._replay()
+            _, _, self._nrecords, self._valid_size = self._replayed
+        return self._replayed
+
+    def get_version(self):
+        return self._load()[0]
+
+    def load_items(self):
+        _, items, _, _ = self._load()
+        # the replayed state is not needed anymore once the items have been
+        # handed out; the log itself is the source of truth
+        self._replayed = None
+        for jid, data in items.items():
+            yield structs.JID.fromstr(jid), data
+
+    def _append(self, record):
+        if self._nrecords is None:
+            self._load()
+            self._replayed = None
+
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with open(self._path, "ab") as f:
+            if f.tell() != self._valid_size:
+                f.truncate(self._valid_size)
+                f.seek(self._valid_size)
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._valid_size += len(line)
+        self._nrecords += 1
+
+    def _write_snapshot(self, ver, items):
+        dirname = os.path.dirname(os.path.abspath(self._path))
+        line = (json.dumps({"ver": ver, "replace": items}) + "\n").encode(
+            "utf-8"
+        )
+        with tempfile.NamedTemporaryFile(dir=dirname,
+                                         delete=False) as tmpf:
+            try:
+                tmpf.write(line)
+                tmpf.flush()
+                os.fsync(tmpf.fileno())
+            except:  # NOQA
+                os.unlink(tmpf.name)
+                raise
+        os.replace(tmpf.name, self._path)
+        self._nrecords = 1
+        self._valid_size = len(line)
+        self._replayed = None
+
+    def apply(self, ver, updated, removed):
+        self._append({
+            "ver": ver,
+            "set": {str(jid): data for jid, data in updated.items()},
+            "remove": [str(jid) for jid in removed],
+        })
+
+        if self._nrecords > self._compact_after:
+            ver, items, _, _ = self._replay()
+            self._write_snapshot(ver, items)
+
+    def replace(self, ver, items):
+        self._write_snapshot(
+            ver,
+            {str(jid): data for jid, data in items.items()},
+        )
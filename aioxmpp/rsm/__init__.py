@@ -29,6 +29,13 @@ Management).
 
 .. versionadded:: 0.8
 
+Paging
+======
+
+.. currentmodule:: aioxmpp.rsm
+
+.. autoclass:: Paginator
+
 .. currentmodule:: aioxmpp.rsm.xso
 
 .. module:: aioxmpp.rsm.xso
@@ -46,3 +53,5 @@ XSO
 
 .. autoclass:: Last
 """
+
+from .paginator import Paginator  # NOQA: F401
@@ -0,0 +1,214 @@
+########################################################################
+# File name: paginator.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import asyncio
+import collections
+
+from . import xso as rsm_xso
+
+
+class Paginator:
+    """
+    Page through a :xep:`59` result set with prefetching.
+
+    :param client: The client to send the requests with.
+    :type client: :class:`aioxmpp.Client`
+    :param make_request: Build the request for a page.
+    :type make_request: function taking a
+        :class:`~.xso.ResultSetMetadata` and returning an
+        :class:`aioxmpp.IQ`
+    :param get_result_set: Extract the result set metadata from a response.
+    :type get_result_set: function taking the response payload and
+        returning a :class:`~.xso.ResultSetMetadata` or :data:`None`
+    :param page_size: The number of elements to request per page, or
+        :data:`None` to let the peer decide.
+    :type page_size: :class:`int` or :data:`None`
+    :param after: Resume after the element with this identifier.
+    :type after: :class:`str` or :data:`None`
+    :param index: Page by index, starting at this index. Requires
+        `page_size`.
+    :type index: :class:`int` or :data:`None`
+    :param max_in_flight: The maximum number of requests to have in flight.
+    :type max_in_flight: :class:`int`
+    :param max_pages: The maximum number of pages which are requested or
+        received, but not consumed yet.
+    :type max_pages: :class:`int`
+    :param timeout: Timeout for each request.
+    :type timeout: :class:`float` or :data:`None`
+
+    The paginator is an asynchronous iterator over the response payloads, one
+    per page, in order. `make_request` is called with the
+    :class:`~.xso.ResultSetMetadata` for each page and must return a fresh
+    IQ carrying it; `get_result_set` is called with each response payload.
+
+    The next page is requested as soon as the previous response has arrived,
+    while the consumer processes the current page. At most `max_pages` pages
+    are buffered, so the memory use is bounded even if the consumer is
+    slow.
+
+    By default, pages are requested by the identifier of the last element of
+    the previous page. That is strictly sequential and `max_in_flight` has
+    no effect. If `index` is given instead, pages are requested by index. As
+    soon as a response has told the total number of elements, up to
+    `max_in_flight` pages are requested concurrently.
+
+    Iteration ends after an empty page or, when paging by index, at the end
+    of the result set. If a request fails, the other requests are cancelled
+    and the exception is re-raised from the iterator.
+
+    .. autoattribute:: last_cursor
+
+    .. automethod:: close
+
+    .. versionadded:: 0.12
+    """
+
+    def __init__(self, client, make_request, get_result_set, *,
+                 page_size=None, after=None, index=None,
+                 max_in_flight=1, max_pages=2, timeout=None):
+        if after is not None and index is not None:
+            raise ValueError("after and index are mutually exclusive")
+        if index is not None and not page_size:
+            raise ValueError("paging by index requires a page_size")
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be positive")
+        if max_pages <= 0:
+            raise ValueError("max_pages must be positive")
+
+        self._client = client
+        self._make_request = make_request
+        self._get_result_set = get_result_set
+        self._page_size = page_size
+        self._max_in_flight = max_in_flight
+        self._max_pages = max_pages
+        self._timeout = timeout
+
+        self._by_index = index is not None
+        self._next_index = index
+        self._count = None
+        self._pages = collections.deque()
+        self._in_flight = 0
+        self._last_cursor = after
+        self._exhausted = False
+
+        if after is not None:
+            self._next_request = rsm_xso.ResultSetMetadata()
+            self._next_request.after = rsm_xso.After(after)
+            self._next_request.max_ = page_size
+        elif self._by_index:
+            self._next_request = None
+        else:
+            self._next_request = rsm_xso.ResultSetMetadata.limit(page_size)
+
+    @property
+    def last_cursor(self):
+        """
+        The identifier of the last element of the most recently consumed page
+        (or the `after` argument if no page has been consumed yet).
+
+        Pass this as `after` to a new :class:`Paginator` to resume.
+        """
+        return self._last_cursor
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self._fill()
+        if not self._pages:
+            raise StopAsyncIteration
+
+        fut = self._pages.popleft()
+        try:
+            payload = await fut
+        except:  # NOQA
+            self.close()
+            raise
+
+        result_set = self._get_result_set(payload)
+        if result_set is not None and result_set.last is not None:
+            self._last_cursor = result_set.last.value
+
+        self._fill()
+        return payload
+
+    def _can_send(self):
+        if self._exhausted or self._in_flight >= self._max_in_flight:
+            return False
+        if self._by_index:
+            if self._count is None:
+                # without a total, each page tells whether there is another
+                return self._in_flight == 0
+            return self._next_index < self._count
+        return self._next_request is not None
+
+    def _fill(self):
+        while len(self._pages) < self._max_pages and self._can_send():
+            if self._by_index:
+                request = rsm_xso.ResultSetMetadata.fetch_page(
+                    self._next_index,
+                    self._page_size,
+                )
+                self._next_index += self._page_size
+            else:
+                request = self._next_request
+                self._next_request = None
+
+            fut = asyncio.ensure_future(self._client.send(
+                self._make_request(request),
+                timeout=self._timeout,
+            ))
+            self._in_flight += 1
+            fut.add_done_callback(self._page_done)
+            self._pages.append(fut)
+
+    def _page_done(self, fut):
+        self._in_flight -= 1
+        if fut.cancelled() or fut.exception() is not None:
+            self._exhausted = True
+            return
+
+        result_set = self._get_result_set(fut.result())
+        if (result_set is None or result_set.first is None or
+                result_set.last is None):
+            # empty page or no paging support at the peer
+            self._exhausted = True
+            return
+
+        if self._by_index:
+            if result_set.count is not None:
+                self._count = result_set.count
+        else:
+            self._next_request = result_set.next_page(self._page_size)
+
+        self._fill()
+
+    def close(self):
+        """
+        Stop paging.
+
+        All running requests are cancelled and buffered pages are dropped.
+        """
+        self._exhausted = True
+        for fut in self._pages:
+            if not fut.done():
+                fut.cancel()
+        self._pages.clear()
@@ -33,17 +33,37 @@ It provides an XMPP adaptor for :mod:`aiosasl`.
 
 The XSOs for SASL authentication can be found in :mod:`aioxmpp.nonza`.
 
+SCRAM key caching
+=================
+
+.. autoclass:: SCRAMKeyCache
+
+.. autoclass:: SCRAMKeys
+
+.. autoclass:: CachingSCRAM
+
 """
 
 import asyncio
+import base64
+import collections
+import functools
+import hashlib
+import hmac
 import logging
+import random
 
 import aiosasl
+import aiosasl.stringprep
+import aiosasl.utils
 
 from . import protocol, nonza
+from .cache import LRUDict
 
 logger = logging.getLogger(__name__)
 
+_system_random = random.SystemRandom()
+
 
 class SASLXMPPInterface(aiosasl.SASLInterface):
     def __init__(self, xmlstream):
@@ -105,3 +125,416 @@ class SASLXMPPInterface(aiosasl.SASLInterface):
                 text="unexpected non-failure after abort: "
                 "{}".format(self._state)
             )
+
+
+class SCRAMKeys(collections.namedtuple("SCRAMKeys",
+                                       ["client_key", "server_key"])):
+    """
+    The keys derived from a password for a specific SCRAM exchange.
+
+    .. attribute:: client_key
+
+       The ``ClientKey`` as per :rfc:`5802`, as :class:`bytes`.
+
+    .. attribute:: server_key
+
+       The ``ServerKey`` as per :rfc:`5802`, as :class:`bytes`.
+
+    .. warning::
+
+       The ``ClientKey`` is sufficient to authenticate as the user against
+       the server which issued the salt. Protect it like the password.
+    """
+
+    @classmethod
+    def derive(cls, hashfun_name, password, salt, iteration_count):
+        """
+        Derive the keys from a password.
+
+        :param hashfun_name: Name of the hash function (as understood by
+            :func:`hashlib.new`).
+        :type hashfun_name: :class:`str`
+        :param password: The SASLprep'd and UTF-8 encoded password.
+        :type password: :class:`bytes`
+        :param salt: The salt sent by the server.
+        :type salt: :class:`bytes`
+        :param iteration_count: The iteration count sent by the server.
+        :type iteration_count: :class:`int`
+        :rtype: :class:`SCRAMKeys`
+
+        This runs PBKDF2 and thus takes a considerable amount of time.
+        """
+        hashfun_factory = functools.partial(hashlib.new, hashfun_name)
+        salted_password = hashlib.pbkdf2_hmac(
+            hashfun_name,
+            password,
+            salt,
+            iteration_count,
+        )
+        return cls(
+            hmac.new(salted_password, b"Client Key",
+                     hashfun_factory).digest(),
+            hmac.new(salted_password, b"Server Key",
+                     hashfun_factory).digest(),
+        )
+
+
+class SCRAMKeyCache:
+    """
+    Cache for keys derived from passwords in SCRAM authentication.
+
+    :param maxsize: Maximum number of cached keys.
+    :type maxsize: :class:`int` or :data:`None`
+    :param executor: Executor to run the key derivation in.
+    :type executor: :class:`concurrent.futures.Executor` or :data:`None`
+
+    The key derivation in SCRAM uses PBKDF2 with at least thousands of
+    iterations, which blocks for a noticeable amount of time. This cache
+    stores the derived :class:`SCRAMKeys` keyed by the bare JID, the SCRAM
+    mechanism, the salt and the iteration count. As long as the server does
+    not change the salt or the iteration count, the derivation is only done
+    once per account.
+
+    The derivation is run in `executor` (the default executor of the event
+    loop if :data:`None`). Concurrent derivations for the same key and
+    password are only run once.
+
+    Use it by passing it as `scram_key_cache` to
+    :class:`~aioxmpp.security_layer.PasswordSASLProvider` (or
+    :func:`aioxmpp.make_security_layer`).
+
+    The cache can be exported and imported with :meth:`export_as_json` and
+    :meth:`import_from_json`. This allows to store the derived keys instead
+    of the plaintext password: if the keys for an exchange are known, the
+    password is not requested from the password provider at all.
+
+    .. warning::
+
+       The exported data allows to authenticate as the respective users
+       against the servers which issued the salts. It must be protected like
+       the passwords themselves (but it does not reveal the passwords and
+       cannot be used against other servers).
+
+    .. autoattribute:: maxsize
+
+    .. automethod:: get_keys
+
+    .. automethod:: invalidate
+
+    .. automethod:: clear
+
+    .. automethod:: export_as_json
+
+    .. automethod:: import_from_json
+    """
+
+    def __init__(self, *, maxsize=128, executor=None):
+        super().__init__()
+        self._keys = LRUDict()
+        self._keys.maxsize = maxsize
+        self._pending = {}
+        self.executor = executor
+
+    @property
+    def maxsize(self):
+        """
+        Maximum number of cached keys. See
+        :attr:`aioxmpp.cache.LRUDict.maxsize` for details.
+        """
+        return self._keys.maxsize
+
+    @maxsize.setter
+    def maxsize(self, value):
+        self._keys.maxsize = value
+
+    @staticmethod
+    def _make_key(jid, mechanism, salt, iteration_count):
+        return (str(jid), mechanism, salt, iteration_count)
+
+    def lookup(self, jid, mechanism, salt, iteration_count):
+        """
+        Return the cached keys or :data:`None`.
+
+        :param jid: The bare JID of the account.
+        :type jid: :class:`aioxmpp.JID`
+        :param mechanism: The SCRAM mechanism name.
+        :type mechanism: :class:`str`
+        :param salt: The salt sent by the server.
+        :type salt: :class:`bytes`
+        :param iteration_count: The iteration count sent by the server.
+        :type iteration_count: :class:`int`
+        :rtype: :class:`SCRAMKeys` or :data:`None`
+        """
+        return self._keys.get(
+            self._make_key(jid, mechanism, salt, iteration_count)
+        )
+
+    async def get_keys(self, jid, mechanism, hashfun_name,
+                       password, salt, iteration_count):
+        """
+        Return the keys for a SCRAM exchange, deriving them if needed.
+
+        :param password: The SASLprep'd and UTF-8 encoded password.
+        :type password: :class:`bytes`
+        :rtype: :class:`SCRAMKeys`
+
+        The other arguments are as for :meth:`lookup` and
+        :meth:`SCRAMKeys.derive`.
+        """
+        key = self._make_key(jid, mechanism, salt, iteration_count)
+        try:
+            return self._keys[key]
+        except KeyError:
+            pass
+
+        pending_key = key + (password,)
+        try:
+            fut = self._pending[pending_key]
+        except KeyError:
+            fut = asyncio.get_event_loop().run_in_executor(
+                self.executor,
+                SCRAMKeys.derive,
+                hashfun_name,
+                password,
+                salt,
+                iteration_count,
+            )
+            self._pending[pending_key] = fut
+            fut.add_done_callback(functools.partial(
+                self._derivation_done,
+                key,
+                pending_key,
+            ))
+
+        # shield the derivation from cancellation, another login may be
+        # waiting for it
+        return await asyncio.shield(fut)
+
+    def _derivation_done(self, key, pending_key, fut):
+        del self._pending[pending_key]
+        if fut.cancelled() or fut.exception() is not None:
+            return
+        self._keys[key] = fut.result()
+
+    def invalidate(self, jid, mechanism, salt, iteration_count):
+        """
+        Remove the keys for the given exchange from the cache, if any.
+        """
+        self._keys.pop(
+            self._make_key(jid, mechanism, salt, iteration_count),
+            None,
+        )
+
+    def clear(self):
+        """
+        Remove all keys from the cache.
+        """
+        self._keys.clear()
+
+    def export_as_json(self):
+        """
+        Export the cached keys as JSON-compatible list.
+        """
+        return [
+            {
+                "jid": jid,
+                "mechanism": mechanism,
+                "salt": base64.b64encode(salt).decode("ascii"),
+                "iteration_count": iteration_count,
+                "client_key": base64.b64encode(
+                    keys.client_key).decode("ascii"),
+                "server_key": base64.b64encode(
+                    keys.server_key).decode("ascii"),
+            }
+            for (jid, mechanism, salt, iteration_count), keys
+            in self._keys.items()
+        ]
+
+    def import_from_json(self, data):
+        """
+        Import keys from the JSON-compatible list `data`, as returned by
+        :meth:`export_as_json`.
+        """
+        for entry in data:
+            key = self._make_key(
+                entry["jid"],
+                entry["mechanism"],
+                base64.b64decode(entry["salt"]),
+                entry["iteration_count"],
+            )
+            self._keys[key] = SCRAMKeys(
+                base64.b64decode(entry["client_key"]),
+                base64.b64decode(entry["server_key"]),
+            )
+
+
+class CachingSCRAM(aiosasl.SCRAM):
+    """
+    The SCRAM mechanism, using a :class:`SCRAMKeyCache` for key derivation.
+
+    :param jid: The bare JID which authenticates.
+    :type jid: :class:`aioxmpp.JID`
+    :param password_provider: Coroutine function returning the password.
+    :param key_cache: The cache to use.
+    :type key_cache: :class:`SCRAMKeyCache`
+
+    Unlike :class:`aiosasl.SCRAM`, the password is only requested from
+    `password_provider` (which is called without arguments) if the keys for
+    the exchange are not in the `key_cache`. The username is taken from the
+    localpart of `jid`.
+
+    If the server rejects the authentication, the keys used are removed from
+    the cache.
+
+    .. note::
+
+       :class:`aiosasl.SCRAM` derives the keys inline and offers no hook to
+       replace that step. :meth:`authenticate` therefore follows the exchange
+       of aiosasl 0.5 and relies on its gs2 header and channel binding
+       helpers, which is why aioxmpp requires aiosasl 0.5.x.
+    """
+
+    def __init__(self, jid, password_provider, key_cache, **kwargs):
+        super().__init__(None, **kwargs)
+        self._jid = jid
+        self._password_provider = password_provider
+        self._key_cache = key_cache
+
+    async def _get_keys(self, mechanism, hashfun_name, salt,
+                        iteration_count):
+        keys = self._key_cache.lookup(
+            self._jid, mechanism, salt, iteration_count,
+        )
+        if keys is not None:
+            return keys
+
+        password = await self._password_provider()
+        encoded_password = aiosasl.stringprep.saslprep(
+            password
+        ).encode("utf-8")
+
+        return await self._key_cache.get_keys(
+            self._jid,
+            mechanism,
+            hashfun_name,
+            encoded_password,
+            salt,
+            iteration_count,
+        )
+
+    async def authenticate(self, sm, token):
+        mechanism, info, = token
+        logger.info("attempting %s mechanism (using %s hashfun, cached)",
+                    mechanism,
+                    info)
+
+        hashfun_factory = functools.partial(hashlib.new, info.hashfun_name)
+
+        gs2_header = self._get_gs2_header()
+        encoded_username = aiosasl.stringprep.saslprep(
+            self._jid.localpart,
+            allow_unassigned=True,
+        ).encode("utf-8")
+
+        our_nonce = base64.b64encode(
+            _system_random.getrandbits(
+                self.nonce_length * 8
+            ).to_bytes(
+                self.nonce_length, "little"
+            )
+        )
+
+        auth_message = b"n=" + encoded_username + b",r=" + our_nonce
+        state, payload = await sm.initiate(
+            mechanism,
+            gs2_header + auth_message)
+
+        if state != aiosasl.SASLState.CHALLENGE or payload is None:
+            await sm.abort()
+            raise aiosasl.SASLFailure(
+                None,
+                text="protocol violation: expected challenge with payload")
+
+        auth_message += b"," + payload
+
+        parsed_payload = dict(self.parse_message(payload))
+
+        try:
+            iteration_count = int(parsed_payload[b"i"])
+            nonce = parsed_payload[b"r"]
+            salt = base64.b64decode(parsed_payload[b"s"])
+        except (ValueError, KeyError):
+            await sm.abort()
+            raise aiosasl.SASLFailure(
+                None,
+                text="malformed server message: {!r}".format(payload),
+            )
+
+        if not nonce.startswith(our_nonce):
+            await sm.abort()
+            raise aiosasl.SASLFailure(
+                None,
+                text="server nonce doesn't fit our nonce")
+
+        if (self.enforce_minimum_iteration_count and
+                iteration_count < info.minimum_iteration_count):
+            raise aiosasl.SASLFailure(
+                None,
+                text="minimum iteration count for {} violated "
+                "({} is less than {})".format(
+                    mechanism,
+                    iteration_count,
+                    info.minimum_iteration_count,
+                )
+            )
+
+        keys = await self._get_keys(mechanism, info.hashfun_name,
+                                    salt, iteration_count)
+
+        stored_key = hashfun_factory(keys.client_key).digest()
+
+        reply = b"c=" + base64.b64encode(self._get_cb_data()) + b",r=" + nonce
+
+        auth_message += b"," + reply
+
+        client_proof = aiosasl.utils.xor_bytes(
+            hmac.new(
+                stored_key,
+                auth_message,
+                hashfun_factory).digest(),
+            keys.client_key)
+
+        try:
+            state, payload = await sm.response(
+                reply + b",p=" + base64.b64encode(client_proof)
+            )
+        except aiosasl.SASLFailure as err:
+            self._key_cache.invalidate(self._jid, mechanism,
+                                       salt, iteration_count)
+            raise err.promote_to_authentication_failure() from None
+
+        # this is the pseudo-challenge for the server signature
+        # we have to reply with the empty string!
+        if state != aiosasl.SASLState.CHALLENGE:
+            raise aiosasl.SASLFailure(
+                "malformed-request",
+                text="SCRAM protocol violation")
+
+        state, dummy_payload = await sm.response(b"")
+        if state != aiosasl.SASLState.SUCCESS or dummy_payload is not None:
+            raise aiosasl.SASLFailure(
+                None,
+                "SASL protocol violation")
+
+        server_signature = hmac.new(
+            keys.server_key,
+            auth_message,
+            hashfun_factory).digest()
+
+        parsed_payload = dict(self.parse_message(payload or b""))
+
+        if base64.b64decode(parsed_payload[b"v"]) != server_signature:
+            raise aiosasl.SASLFailure(
+                None,
+                "authentication successful, but server signature invalid",
+            )
@@ -38,7 +38,7 @@ for example using :class:`aioxmpp.Client`.
 
 .. autofunction:: tls_with_password_based_authentication(password_provider, [ssl_context_factory], [max_auth_attempts=3])
 
-.. autoclass:: SecurityLayer(ssl_context_factory, certificate_verifier_factory, tls_required, sasl_providers)
+.. autoclass:: SecurityLayer(ssl_context_factory, certificate_verifier_factory, tls_required, sasl_providers, [tls_session_cache=None])
 
 .. autofunction:: negotiate_sasl
 
@@ -894,6 +894,9 @@ class PasswordSASLProvider(SASLProvider):
     :param max_auth_attempts: Maximum number of authentication attempts with a
                               single mechansim.
     :type max_auth_attempts: positive :class:`int`
+    :param scram_key_cache: Cache for the keys derived in SCRAM.
+    :type scram_key_cache: :class:`aioxmpp.sasl.SCRAMKeyCache` or
+                           :data:`None`
 
     `password_provider` must be a coroutine taking two arguments, a JID and an
     integer number. The first argument is the JID which is trying to
@@ -908,30 +911,44 @@ class PasswordSASLProvider(SASLProvider):
     successfully before. In any case, :class:`aiosasl.SCRAM` is used. If TLS
     has been negotiated, :class:`aiosasl.PLAIN` is also supported.
 
+    If `scram_key_cache` is given, :class:`aioxmpp.sasl.CachingSCRAM` is used
+    instead of :class:`aiosasl.SCRAM`. The expensive key derivation is then
+    run outside the event loop and only once per account, salt and iteration
+    count. If the keys are cached, `password_provider` is not called for
+    SCRAM at all.
+
     .. seealso::
 
        :class:`SASLProvider`
           for the public interface of this class.
+
+    .. versionchanged:: 0.12
+
+       The `scram_key_cache` argument was added.
     """
 
     def __init__(self, password_provider, *,
-                 max_auth_attempts=3, **kwargs):
+                 max_auth_attempts=3, scram_key_cache=None, **kwargs):
         super().__init__(**kwargs)
         self._password_provider = password_provider
         self._max_auth_attempts = max_auth_attempts
+        self._scram_key_cache = scram_key_cache
 
     async def execute(self, client_jid, features, xmlstream, tls_transport):
         client_jid = client_jid.bare()
 
         password_signalled_abort = False
+        password_requested = False
         nattempt = 0
         cached_credentials = None
 
         async def credential_provider():
-            nonlocal password_signalled_abort, nattempt, cached_credentials
+            nonlocal password_signalled_abort, password_requested, \
+                cached_credentials
             if cached_credentials is not None:
                 return client_jid.localpart, cached_credentials
 
+            password_requested = True
             password = await self._password_provider(client_jid, nattempt)
             if password is None:
                 password_signalled_abort = True
@@ -941,8 +958,14 @@ class PasswordSASLProvider(SASLProvider):
             cached_credentials = password
             return client_jid.localpart, password
 
+        async def password_provider():
+            _, password = await credential_provider()
+            return password
+
         classes = [
             aiosasl.SCRAM
+            if self._scram_key_cache is None
+            else sasl.CachingSCRAM
         ]
         if tls_transport is not None:
             classes.append(aiosasl.PLAIN)
@@ -955,9 +978,22 @@ class PasswordSASLProvider(SASLProvider):
             if mechanism_class is None:
                 return False
 
-            mechanism = mechanism_class(credential_provider)
+            if mechanism_class is sasl.CachingSCRAM:
+                mechanism = mechanism_class(
+                    client_jid,
+                    password_provider,
+                    self._scram_key_cache,
+                )
+            else:
+                mechanism = mechanism_class(credential_provider)
             last_auth_error = None
-            for nattempt in range(self._max_auth_attempts):
+            nattempt = 0
+            # an attempt which failed with cached SCRAM keys, without asking
+            # for the password, is retried once without counting it; the
+            # stale keys have been evicted by then
+            free_retry = mechanism_class is sasl.CachingSCRAM
+            while nattempt < self._max_auth_attempts:
+                password_requested = False
                 try:
                     mechanism_worked = await self._execute(
                         intf, mechanism, token)
@@ -968,6 +1004,10 @@ class PasswordSASLProvider(SASLProvider):
                     last_auth_error = err
                     # allow the user to re-try
                     cached_credentials = None
+                    if password_requested or not free_retry:
+                        nattempt += 1
+                    else:
+                        free_retry = False
                     continue
                 else:
                     break
@@ -1045,6 +1085,7 @@ class SecurityLayer(collections.namedtuple(
             "certificate_verifier_factory",
             "tls_required",
             "sasl_providers",
+            "tls_session_cache",
         ])):
     """
     A security layer defines the security properties used for an XML stream.
@@ -1095,9 +1136,20 @@ class SecurityLayer(collections.namedtuple(
        A sequence of :class:`SASLProvider` instances. As SASL providers are
        stateless, it is not necessary to create new providers for each
        connection.
+
+    .. attribute:: tls_session_cache
+
+       Either :data:`None` or a :class:`aioxmpp.connector.TLSSessionCache`
+       which the connectors use to resume TLS sessions across reconnects.
+       Defaults to :data:`None`.
+
+       .. versionadded:: 0.12
     """
 
 
+SecurityLayer.__new__.__defaults__ = (None,)
+
+
 def default_verify_callback(conn, x509, errno, errdepth, returncode):
     return errno == 0
 
@@ -1297,7 +1349,9 @@ def make(
         post_handshake_deferred_failure=None,
         anonymous=False,
         ssl_context_factory=default_ssl_context,
-        no_verify=False):
+        no_verify=False,
+        tls_session_cache=None,
+        scram_key_cache=None):
     """
     Construct a :class:`SecurityLayer`. Depending on the arguments passed,
     different features are enabled or disabled.
@@ -1334,6 +1388,10 @@ def make(
         no_verify (:class:`bool`): *Disable* all certificate verification.
             Usage is **strongly discouraged** outside controlled test
             environments. See below for alternatives.
+        tls_session_cache (:class:`~aioxmpp.connector.TLSSessionCache`):
+            Cache to resume TLS sessions across reconnects.
+        scram_key_cache (:class:`~aioxmpp.sasl.SCRAMKeyCache`):
+            Cache for the keys derived during SCRAM authentication.
 
     Raises:
 
@@ -1437,6 +1495,10 @@ def make(
     .. versionadded:: 0.11
 
         Support for `ssl_context_factory`.
+
+    .. versionadded:: 0.12
+
+        Support for `tls_session_cache` and `scram_key_cache`.
     """
 
     if isinstance(password_provider, str):
@@ -1486,6 +1548,7 @@ def make(
         sasl_providers.append(
             PasswordSASLProvider(
                 password_provider,
+                scram_key_cache=scram_key_cache,
             ),
         )
 
@@ -1494,4 +1557,5 @@ def make(
         certificate_verifier_factory,
         True,
         tuple(sasl_providers),
+        tls_session_cache,
     )
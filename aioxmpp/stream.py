@@ -206,7 +206,6 @@ from . import (
     callbacks,
     protocol,
     structs,
-    ping,
 )
 
 
@@ -1796,6 +1795,9 @@ class StanzaStream:
             req = nonza.SMRequest()
             xmlstream.send_xso(req)
         else:
+            # aioxmpp.ping pulls in the service framework, which depends on
+            # this module; import it only when it is actually needed
+            from . import ping
             iq = stanza.IQ(
                 type_=structs.IQType.GET,
                 payload=ping.Ping()
@@ -60,7 +60,6 @@ import time
 import types
 
 import aioxmpp.callbacks
-import aioxmpp.errors
 
 import lxml.etree as etree
 
@@ -318,6 +317,9 @@ async def gather_reraise_multi(*fut_or_coros, message="gather_reraise_multi"):
         else:
             results.append(fut.result())
     if exceptions:
+        # imported here to avoid an import cycle: aioxmpp.errors needs the
+        # namespaces defined in this module
+        import aioxmpp.errors
         raise aioxmpp.errors.GatherError(message, exceptions)
     return results
 
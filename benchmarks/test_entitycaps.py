@@ -0,0 +1,295 @@
+########################################################################
+# File name: test_entitycaps.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import asyncio
+import io
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+import aioxmpp
+import aioxmpp.disco as disco
+import aioxmpp.entitycaps.caps115 as caps115
+import aioxmpp.entitycaps.caps390 as caps390
+import aioxmpp.entitycaps.service as entitycaps_service
+import aioxmpp.entitycaps.store as caps_store
+import aioxmpp.xml
+
+from aioxmpp.benchtest import times, timed, record
+from aioxmpp.testutils import make_connected_client, run_coroutine
+
+
+def make_entry(i):
+    features = "".join(
+        '<feature var="urn:example:feature:{}"/>'.format(j)
+        for j in range(i % 7, i % 7 + 30)
+    )
+    return (
+        '<?xml version="1.0"?>'
+        '<query xmlns="http://jabber.org/protocol/disco#info">'
+        '<identity category="client" type="pc" name="Client {}"/>'
+        '{}</query>'.format(i, features)
+    ).encode("utf-8")
+
+
+class TestCapsDatabase(unittest.TestCase):
+    KEY = "aioxmpp.entitycaps", "Cache"
+
+    NENTRIES = 2000
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmpdir.name)
+        self.keys = [
+            caps115.Key("sha-1", "http://client{}.example#ver".format(i))
+            for i in range(self.NENTRIES)
+        ]
+        self.store = caps_store.SQLiteCapsStore(self.path / "caps.sqlite")
+        self.store.put_many(
+            (key.path.as_posix(), make_entry(i))
+            for i, key in enumerate(self.keys)
+        )
+        self.store.export_directory(self.path / "db")
+        self.store.close()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    @times(5)
+    def test_lookup_all_from_directory(self):
+        key = self.KEY + ("lookup_all", "directory",
+                          "{}_entries".format(self.NENTRIES))
+
+        with timed() as t:
+            cache = entitycaps_service.Cache()
+            cache.set_user_db_path(self.path / "db")
+            for k in self.keys:
+                cache.lookup_in_database(k)
+
+        record(key, t.elapsed, "s")
+
+    @times(5)
+    def test_lookup_all_from_preloaded_store(self):
+        key = self.KEY + ("lookup_all", "SQLiteCapsStore",
+                          "{}_entries".format(self.NENTRIES))
+
+        with timed() as t:
+            cache = entitycaps_service.Cache()
+            self.store = caps_store.SQLiteCapsStore(
+                self.path / "caps.sqlite"
+            )
+            cache.set_user_db_store(self.store)
+            for k in self.keys:
+                cache.lookup_in_database(k)
+
+        record(key, t.elapsed, "s")
+
+    @times(5)
+    def test_repeated_lookup_from_directory(self):
+        key = self.KEY + ("repeated_lookup", "directory")
+
+        cache = entitycaps_service.Cache()
+        cache.set_user_db_path(self.path / "db")
+        cache.lookup_in_database(self.keys[0])
+
+        with timed() as t:
+            for _ in range(100):
+                cache.lookup_in_database(self.keys[0])
+
+        record(key, t.elapsed / 100, "s")
+
+    @times(5)
+    def test_repeated_lookup_from_store(self):
+        key = self.KEY + ("repeated_lookup", "SQLiteCapsStore")
+
+        cache = entitycaps_service.Cache()
+        self.store = caps_store.SQLiteCapsStore(self.path / "caps.sqlite")
+        cache.set_user_db_store(self.store)
+        cache.lookup_in_database(self.keys[0])
+
+        with timed() as t:
+            for _ in range(100):
+                cache.lookup_in_database(self.keys[0])
+
+        record(key, t.elapsed / 100, "s")
+
+    @times(5)
+    def test_add_entries_to_directory(self):
+        key = self.KEY + ("add_entries", "directory", "200_entries")
+        entry = aioxmpp.xml.read_single_xso(io.BytesIO(make_entry(0)),
+                                            disco.xso.InfoQuery)
+
+        with timed() as t:
+            for i in range(200):
+                entitycaps_service.writeback(
+                    self.path / "new" / self.keys[i].path,
+                    entry.captured_events,
+                )
+
+        record(key, t.elapsed, "s")
+
+    @times(5)
+    def test_add_entries_to_store(self):
+        key = self.KEY + ("add_entries", "SQLiteCapsStore", "200_entries")
+        entry = aioxmpp.xml.read_single_xso(io.BytesIO(make_entry(0)),
+                                            disco.xso.InfoQuery)
+
+        cache = entitycaps_service.Cache()
+        self.store = caps_store.SQLiteCapsStore(self.path / "new.sqlite")
+        cache.set_user_db_store(self.store)
+
+        with timed() as t:
+            for i in range(200):
+                cache.add_cache_entry(self.keys[i], entry)
+            run_coroutine(cache._flush_store_writes())
+
+        record(key, t.elapsed, "s")
+
+
+class TestFeatureIndex(unittest.TestCase):
+    KEY = "aioxmpp.entitycaps", "EntityCapsService"
+
+    NENTITIES = 2000
+
+    def setUp(self):
+        disco_server = unittest.mock.Mock()
+        disco_server.on_info_changed.context_connect = \
+            unittest.mock.MagicMock()
+        self.s = entitycaps_service.EntityCapsService(
+            make_connected_client(),
+            dependencies={
+                disco.DiscoClient: unittest.mock.Mock(),
+                disco.DiscoServer: disco_server,
+            }
+        )
+        self.s.xep390_support = False
+
+        keys = [
+            caps115.Key("sha-1", "http://client{}.example#ver".format(i))
+            for i in range(7)
+        ]
+        for i, key in enumerate(keys):
+            self.s.cache.add_cache_entry(
+                key,
+                aioxmpp.xml.read_single_xso(io.BytesIO(make_entry(i)),
+                                            disco.xso.InfoQuery),
+            )
+
+        with unittest.mock.patch.object(
+                caps115.Implementation, "extract_keys") as extract_keys:
+            for i in range(self.NENTITIES):
+                extract_keys.return_value = [keys[i % len(keys)]]
+                self.s.handle_inbound_presence(aioxmpp.Presence(
+                    type_=aioxmpp.PresenceType.AVAILABLE,
+                    from_=aioxmpp.JID.fromstr(
+                        "user{}@server.example/res".format(i)
+                    ),
+                ))
+
+    @times(5)
+    def test_get_entities_with_feature(self):
+        key = self.KEY + ("get_entities_with_feature",
+                          "{}_entities".format(self.NENTITIES))
+
+        with timed() as t:
+            result = self.s.get_entities_with_feature(
+                "urn:example:feature:3"
+            )
+
+        # feature 3 is announced by the first four of the seven keys
+        self.assertEqual(
+            len(result),
+            sum(1 for i in range(self.NENTITIES) if i % 7 <= 3),
+        )
+        record(key, t.elapsed, "s")
+
+
+class TestHashing(unittest.TestCase):
+    KEY = "aioxmpp.entitycaps", "hashing"
+
+    NSERVICES = 40
+
+    def setUp(self):
+        self.info = aioxmpp.xml.read_single_xso(io.BytesIO(make_entry(0)),
+                                                disco.xso.InfoQuery)
+        self.key115, = caps115.Implementation("http://x").calculate_keys(
+            self.info
+        )
+        self.key390 = caps390.Key(
+            "sha-256",
+            caps390._calculate_hash(
+                "sha-256",
+                caps390._build_hash_input(self.info),
+            ),
+        )
+
+    @times(5)
+    def test_verify_cold(self):
+        key = self.KEY + ("verify", "cold")
+
+        with timed() as t:
+            for _ in range(100):
+                caps115._hash_inputs.clear()
+                caps390._hash_inputs.clear()
+                self.assertTrue(self.key115.verify(self.info))
+                self.assertTrue(self.key390.verify(self.info))
+
+        record(key, t.elapsed / 100, "s")
+
+    @times(5)
+    def test_verify_memoised(self):
+        key = self.KEY + ("verify", "memoised")
+
+        with timed() as t:
+            for _ in range(100):
+                self.assertTrue(self.key115.verify(self.info))
+                self.assertTrue(self.key390.verify(self.info))
+
+        record(key, t.elapsed / 100, "s")
+
+    @times(5)
+    def test_startup_with_many_services(self):
+        key = self.KEY + ("startup", "{}_services".format(self.NSERVICES))
+
+        cc = make_connected_client()
+        disco_server = disco.DiscoServer(cc)
+        caps = entitycaps_service.EntityCapsService(
+            cc,
+            dependencies={
+                disco.DiscoClient: unittest.mock.Mock(),
+                disco.DiscoServer: disco_server,
+            }
+        )
+        caps_changed = unittest.mock.Mock(return_value=None)
+        caps.on_ver_changed.connect(caps_changed)
+
+        with timed() as t:
+            for i in range(self.NSERVICES):
+                for j in range(3):
+                    disco_server.register_feature(
+                        "urn:example:service:{}:{}".format(i, j)
+                    )
+            run_coroutine(asyncio.sleep(0))
+
+        self.assertEqual(len(caps_changed.mock_calls), 1)
+        record(key, t.elapsed, "s")
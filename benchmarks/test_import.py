@@ -0,0 +1,98 @@
+########################################################################
+# File name: test_import.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import re
+import subprocess
+import sys
+import unittest
+
+from aioxmpp.benchtest import times, record
+
+
+_IMPORTTIME_RE = re.compile(
+    r"^import time:\s+(?P<self>\d+)\s+\|\s+(?P<cumulative>\d+)\s+\|"
+    r"(?P<indent>\s*)(?P<module>\S+)$"
+)
+
+
+def importtime(statement):
+    """
+    Run `statement` in a fresh interpreter with ``-X importtime`` and return
+    a mapping of module names to their cumulative import time in seconds.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+
+    result = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match is None:
+            continue
+        result[match.group("module")] = \
+            int(match.group("cumulative")) / 1e6
+    return result
+
+
+@unittest.skipIf(sys.version_info < (3, 7),
+                 "-X importtime requires Python 3.7")
+class TestImport(unittest.TestCase):
+    KEY = "aioxmpp", "import"
+
+    # modules which must not be loaded by a plain ``import aioxmpp``; if
+    # one of them shows up, something made the top-level namespace eager
+    # again
+    DEFERRED_MODULES = [
+        "aioxmpp.xso",
+        "aioxmpp.stanza",
+        "aioxmpp.stream",
+        "aioxmpp.node",
+        "aioxmpp.service",
+    ]
+
+    @times(10)
+    def test_import_aioxmpp(self):
+        timings = importtime("import aioxmpp")
+
+        for module in self.DEFERRED_MODULES:
+            self.assertNotIn(module, timings)
+
+        record(self.KEY + ("aioxmpp",), timings["aioxmpp"], "s")
+
+    @times(10)
+    def test_import_jid(self):
+        timings = importtime("from aioxmpp import JID")
+
+        self.assertNotIn("aioxmpp.xso", timings)
+
+        record(self.KEY + ("JID",), timings["aioxmpp.structs"], "s")
+
+    @times(10)
+    def test_import_client(self):
+        timings = importtime("from aioxmpp import Client")
+
+        record(self.KEY + ("Client",),
+               timings["aioxmpp.node"] + timings["aioxmpp"],
+               "s")
@@ -0,0 +1,107 @@
+########################################################################
+# File name: test_muc.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import unittest
+import unittest.mock
+
+import aioxmpp
+import aioxmpp.muc.service as muc_service
+import aioxmpp.muc.xso as muc_xso
+
+from aioxmpp.benchtest import times, timed, record
+
+
+TEST_MUC_JID = aioxmpp.JID.fromstr("coven@chat.shakespeare.lit")
+
+
+def make_occupant_presence(nick, jid, role, affiliation, status_codes=()):
+    presence = aioxmpp.Presence(
+        type_=aioxmpp.PresenceType.AVAILABLE,
+        from_=TEST_MUC_JID.replace(resource=nick),
+    )
+    presence.xep0045_muc_user = muc_xso.UserExt(
+        items=[
+            muc_xso.UserItem(affiliation=affiliation,
+                             role=role,
+                             jid=jid),
+        ],
+        status_codes=set(status_codes),
+    )
+    return presence
+
+
+class TestRoomOccupants(unittest.TestCase):
+    KEY = "aioxmpp.muc", "Room"
+
+    NOCCUPANTS = 10000
+
+    def setUp(self):
+        self.room = muc_service.Room(unittest.mock.Mock(), TEST_MUC_JID)
+        self.room._inbound_muc_user_presence(make_occupant_presence(
+            "me",
+            aioxmpp.JID.fromstr("me@shakespeare.lit/bot"),
+            "moderator",
+            "owner",
+            status_codes={110},
+        ))
+        for i in range(self.NOCCUPANTS):
+            self.room._inbound_muc_user_presence(make_occupant_presence(
+                "nick{}".format(i),
+                aioxmpp.JID.fromstr(
+                    "user{}@shakespeare.lit/res".format(i)
+                ),
+                "moderator" if i % 100 == 0 else "participant",
+                "member" if i % 3 == 0 else "none",
+            ))
+        self.target = aioxmpp.JID.fromstr(
+            "user{}@shakespeare.lit".format(self.NOCCUPANTS // 2)
+        )
+
+    @times(100)
+    def test_scan_by_direct_jid(self):
+        key = self.KEY + ("find_by_direct_jid", "scan",
+                          "{}_occupants".format(self.NOCCUPANTS))
+
+        with timed() as t:
+            [occupant for occupant in self.room.members
+             if occupant.direct_jid == self.target]
+
+        record(key, t.elapsed, "s")
+
+    @times(100)
+    def test_muc_find_occupants_by_direct_jid(self):
+        key = self.KEY + ("find_by_direct_jid", "muc_find_occupants",
+                          "{}_occupants".format(self.NOCCUPANTS))
+
+        with timed() as t:
+            self.room.muc_find_occupants(direct_jid=self.target)
+
+        record(key, t.elapsed, "s")
+
+    @times(100)
+    def test_muc_find_occupants_by_role(self):
+        key = self.KEY + ("find_by_role", "muc_find_occupants",
+                          "{}_occupants".format(self.NOCCUPANTS))
+
+        with timed() as t:
+            self.room.muc_find_occupants(role="moderator")
+
+        record(key, t.elapsed, "s")
@@ -0,0 +1,168 @@
+########################################################################
+# File name: test_node.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import asyncio
+import contextlib
+import unittest
+import unittest.mock
+
+import aioxmpp
+import aioxmpp.callbacks
+import aioxmpp.disco.xso
+import aioxmpp.nonza
+import aioxmpp.rfc6120
+
+from aioxmpp.benchtest import times, record
+from aioxmpp.testutils import run_coroutine
+
+
+TEST_JID = aioxmpp.JID.fromstr("foo@server.example/res")
+TEST_SERVER = aioxmpp.JID.fromstr("server.example")
+
+
+class StubServerStream:
+    """
+    Stand-in for a :class:`aioxmpp.protocol.XMLStream` connected to a server
+    which answers each IQ request after a fixed round-trip time.
+
+    Resource binding is answered with the bound JID, all other requests
+    with an empty result of the same payload type.
+    """
+
+    on_closing = aioxmpp.callbacks.Signal()
+    on_deadtime_soft_limit_tripped = aioxmpp.callbacks.Signal()
+
+    def __init__(self, rtt, *, loop=None):
+        super().__init__()
+        self.rtt = rtt
+        self.loop = loop or asyncio.get_event_loop()
+        self.stanza_parser = aioxmpp.xso.XSOParser()
+        self.error_handler = None
+        self.deadtime_soft_limit = None
+        self.deadtime_hard_limit = None
+        self._error_futures = []
+
+    def _reply(self, request):
+        if isinstance(request.payload, aioxmpp.rfc6120.Bind):
+            payload = aioxmpp.rfc6120.Bind(jid=TEST_JID)
+        else:
+            payload = type(request.payload)()
+
+        response = aioxmpp.IQ(
+            type_=aioxmpp.IQType.RESULT,
+            from_=request.to,
+            to=TEST_JID,
+            id_=request.id_,
+            payload=payload,
+        )
+        self.stanza_parser.get_class_map()[aioxmpp.IQ](response)
+
+    def send_xso(self, obj):
+        if (isinstance(obj, aioxmpp.IQ) and
+                obj.type_ in (aioxmpp.IQType.GET, aioxmpp.IQType.SET)):
+            self.loop.call_later(self.rtt, self._reply, obj)
+
+    def _closed(self):
+        exc = ConnectionError("not connected")
+        for fut in self._error_futures:
+            if not fut.done():
+                fut.set_exception(exc)
+        self.on_closing(None)
+
+    def close(self):
+        self.loop.call_soon(self._closed)
+
+    def abort(self):
+        self.close()
+
+    async def close_and_wait(self):
+        self.close()
+        await asyncio.sleep(0)
+
+    def error_future(self):
+        fut = asyncio.Future()
+        self._error_futures.append(fut)
+        return fut
+
+    def can_starttls(self):
+        return False
+
+    @contextlib.contextmanager
+    def mute(self):
+        yield
+
+
+class TestClientBootstrap(unittest.TestCase):
+    KEY = "aioxmpp.node", "Client", "time_to_ready"
+
+    # roster, initial presence, carbons, blocklist
+    NSERVICES = 4
+    RTT = 0.005
+
+    async def _connect_xmlstream(self, *args, **kwargs):
+        features = aioxmpp.nonza.StreamFeatures()
+        features[...] = aioxmpp.rfc6120.BindFeature()
+        return None, StubServerStream(self.RTT), features
+
+    async def _bootstrap_service(self):
+        await self.client.send(aioxmpp.IQ(
+            type_=aioxmpp.IQType.GET,
+            to=TEST_SERVER,
+            payload=aioxmpp.disco.xso.InfoQuery(),
+        ))
+
+    def _time_to_ready(self, pipeline_bootstrap):
+        self.client = aioxmpp.Client(
+            TEST_JID,
+            object(),
+            pipeline_bootstrap=pipeline_bootstrap,
+        )
+        for _ in range(self.NSERVICES):
+            self.client.before_stream_established.connect(
+                self._bootstrap_service
+            )
+
+        ready = asyncio.Future()
+        self.client.on_stream_established.connect(
+            ready,
+            self.client.on_stream_established.AUTO_FUTURE,
+        )
+
+        with unittest.mock.patch("aioxmpp.node.connect_xmlstream",
+                                 self._connect_xmlstream):
+            self.client.start()
+            try:
+                run_coroutine(ready)
+            finally:
+                self.client.stop()
+                run_coroutine(asyncio.sleep(self.RTT * 2))
+
+        return self.client.time_to_ready.total_seconds()
+
+    @times(20)
+    def test_sequential(self):
+        record(self.KEY + ("sequential",),
+               self._time_to_ready(False), "s")
+
+    @times(20)
+    def test_pipelined(self):
+        record(self.KEY + ("pipelined",),
+               self._time_to_ready(True), "s")
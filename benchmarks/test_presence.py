@@ -0,0 +1,105 @@
+########################################################################
+# File name: test_presence.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import random
+import unittest
+
+import aioxmpp
+import aioxmpp.dispatcher
+import aioxmpp.presence.service as presence_service
+
+from aioxmpp.benchtest import times, timed, record
+from aioxmpp.testutils import make_connected_client
+
+
+SHOWS = [
+    aioxmpp.PresenceShow.NONE,
+    aioxmpp.PresenceShow.AWAY,
+    aioxmpp.PresenceShow.XA,
+    aioxmpp.PresenceShow.DND,
+    aioxmpp.PresenceShow.CHAT,
+]
+
+
+def make_presence_client():
+    cc = make_connected_client()
+    return presence_service.PresenceClient(cc, dependencies={
+        aioxmpp.dispatcher.SimplePresenceDispatcher:
+            aioxmpp.dispatcher.SimplePresenceDispatcher(cc),
+    })
+
+
+def make_presence(rng, bare, resource):
+    st = aioxmpp.Presence(
+        type_=aioxmpp.PresenceType.AVAILABLE,
+        show=rng.choice(SHOWS),
+        from_=bare.replace(resource=resource),
+    )
+    st.priority = rng.randint(-5, 20)
+    return st
+
+
+class TestPresenceClient(unittest.TestCase):
+    KEY = "aioxmpp.presence", "PresenceClient"
+
+    NCONTACTS = 100
+    NRESOURCES = 50
+
+    def setUp(self):
+        self.rng = random.Random(1)
+        self.s = make_presence_client()
+        self.contacts = [
+            aioxmpp.JID.fromstr("contact{}@server.example".format(i))
+            for i in range(self.NCONTACTS)
+        ]
+        for bare in self.contacts:
+            for i in range(self.NRESOURCES):
+                self.s.handle_presence(
+                    make_presence(self.rng, bare, "res{}".format(i))
+                )
+
+    @times(100)
+    def test_get_most_available_stanza(self):
+        key = self.KEY + ("get_most_available_stanza",
+                          "{}_resources".format(self.NRESOURCES))
+
+        with timed() as t:
+            for bare in self.contacts:
+                self.s.get_most_available_stanza(bare)
+
+        record(key, t.elapsed / len(self.contacts), "s")
+
+    @times(100)
+    def test_handle_presence(self):
+        key = self.KEY + ("handle_presence",
+                          "{}_resources".format(self.NRESOURCES))
+
+        stanzas = [
+            make_presence(self.rng, bare,
+                          "res{}".format(self.rng.randrange(self.NRESOURCES)))
+            for bare in self.contacts
+        ]
+
+        with timed() as t:
+            for st in stanzas:
+                self.s.handle_presence(st)
+
+        record(key, t.elapsed / len(stanzas), "s")
@@ -0,0 +1,186 @@
+########################################################################
+# File name: test_roster.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import json
+import pathlib
+import tempfile
+import unittest
+
+import aioxmpp
+import aioxmpp.dispatcher
+import aioxmpp.roster.service as roster_service
+import aioxmpp.roster.store as roster_store
+import aioxmpp.roster.xso as roster_xso
+
+from aioxmpp.benchtest import times, timed, record
+from aioxmpp.testutils import make_connected_client, run_coroutine
+
+
+def make_roster_client():
+    cc = make_connected_client()
+    return roster_service.RosterClient(cc, dependencies={
+        aioxmpp.dispatcher.SimplePresenceDispatcher:
+            aioxmpp.dispatcher.SimplePresenceDispatcher(cc),
+    })
+
+
+def make_push(jid, name, ver):
+    return aioxmpp.IQ(
+        type_=aioxmpp.IQType.SET,
+        payload=roster_xso.Query(
+            items=[roster_xso.Item(jid=jid, name=name)],
+            ver=ver,
+        )
+    )
+
+
+class TestRosterPersistence(unittest.TestCase):
+    KEY = "aioxmpp.roster", "RosterClient"
+
+    NITEMS = 5000
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmpdir.name)
+        self.jids = [
+            aioxmpp.JID.fromstr("contact{}@server.example".format(i))
+            for i in range(self.NITEMS)
+        ]
+        self.s = make_roster_client()
+        self.s.import_from_json({
+            "items": {
+                str(jid): {"subscription": "both", "groups": ["contacts"]}
+                for jid in self.jids
+            },
+            "ver": "initial",
+        })
+
+    def tearDown(self):
+        if self.s.store is not None:
+            self.s.store.close()
+        self.tmpdir.cleanup()
+
+    def _push(self, i):
+        run_coroutine(self.s.handle_roster_push(
+            make_push(self.jids[i % self.NITEMS], str(i), "v{}".format(i))
+        ))
+
+    @times(20)
+    def test_push_with_full_json_export(self):
+        key = self.KEY + ("push_persist", "export_as_json",
+                          "{}_items".format(self.NITEMS))
+
+        with timed() as t:
+            for i in range(10):
+                self._push(i)
+                with (self.path / "roster.json").open("w") as f:
+                    json.dump(self.s.export_as_json(), f)
+
+        record(key, t.elapsed / 10, "s")
+
+    def _bench_store(self, name, store):
+        key = self.KEY + ("push_persist", name,
+                          "{}_items".format(self.NITEMS))
+
+        self.s.store = store
+        self.s.import_from_json(self.s.export_as_json())
+
+        with timed() as t:
+            for i in range(10):
+                self._push(i)
+
+        record(key, t.elapsed / 10, "s")
+
+    @times(20)
+    def test_push_with_sqlite_store(self):
+        self._bench_store(
+            "SQLiteRosterStore",
+            roster_store.SQLiteRosterStore(self.path / "roster.sqlite"),
+        )
+
+    @times(20)
+    def test_push_with_log_store(self):
+        self._bench_store(
+            "LogRosterStore",
+            roster_store.LogRosterStore(self.path / "roster.log"),
+        )
+
+    @times(20)
+    def test_lazy_startup_from_store(self):
+        key = self.KEY + ("startup", "SQLiteRosterStore",
+                          "{}_items".format(self.NITEMS))
+
+        path = self.path / "startup.sqlite"
+        self.s.store = roster_store.SQLiteRosterStore(path)
+        self.s.import_from_json(self.s.export_as_json())
+        self.s.store.close()
+
+        s = make_roster_client()
+        with timed() as t:
+            s.store = roster_store.SQLiteRosterStore(path)
+            s.version
+        s.store.close()
+
+        record(key, t.elapsed, "s")
+
+
+class TestRosterQueries(unittest.TestCase):
+    KEY = "aioxmpp.roster", "RosterClient"
+
+    NITEMS = 5000
+
+    def setUp(self):
+        self.s = make_roster_client()
+        subscriptions = ["none", "to", "from", "both"]
+        self.s.import_from_json({
+            "items": {
+                "contact{}@server{}.example".format(i, i % 10): {
+                    "subscription": subscriptions[i % 4],
+                    "groups": ["group{}".format(i % 7),
+                               "group{}".format(i % 11)],
+                }
+                for i in range(self.NITEMS)
+            },
+        })
+
+    @times(100)
+    def test_scan(self):
+        key = self.KEY + ("query", "scan", "{}_items".format(self.NITEMS))
+
+        with timed() as t:
+            {
+                item for item in self.s.items.values()
+                if item.subscription == "from" and
+                {"group1", "group2"} <= item.groups
+            }
+
+        record(key, t.elapsed, "s")
+
+    @times(100)
+    def test_find_items(self):
+        key = self.KEY + ("query", "find_items",
+                          "{}_items".format(self.NITEMS))
+
+        with timed() as t:
+            self.s.find_items(subscription="from",
+                              groups=["group1", "group2"])
+
+        record(key, t.elapsed, "s")
@@ -39,7 +39,8 @@ if sys.version_info < (3, 5):
     lxml_constraint += ",<4.4"
 
 install_requires = [
-    'aiosasl>=0.3',  # need 0.2+ for LGPLv3
+    # CachingSCRAM follows SCRAM.authenticate of the 0.5 series
+    'aiosasl>=0.5,<0.6',
     'aioopenssl>=0.1',
     'babel~=2.3',
     'dnspython~=1.0',
@@ -24,6 +24,7 @@ import logging
 import unittest.mock
 
 import aioxmpp
+import aioxmpp.blocking
 
 from aioxmpp.utils import namespaces
 
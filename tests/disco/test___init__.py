@@ -23,6 +23,7 @@ import unittest
 
 import aioxmpp
 import aioxmpp.disco as disco
+import aioxmpp.disco.crawler as disco_crawler
 import aioxmpp.disco.service as disco_service
 import aioxmpp.disco.xso as disco_xso
 
@@ -44,3 +45,13 @@ class TestExports(unittest.TestCase):
 
     def test_StaticNode(self):
         self.assertIs(disco.StaticNode, disco_service.StaticNode)
+
+    def test_CacheEntryStatistics(self):
+        self.assertIs(disco.CacheEntryStatistics,
+                      disco_service.CacheEntryStatistics)
+
+    def test_DiscoCrawler(self):
+        self.assertIs(disco.DiscoCrawler, disco_crawler.DiscoCrawler)
+
+    def test_CrawlResult(self):
+        self.assertIs(disco.CrawlResult, disco_crawler.CrawlResult)
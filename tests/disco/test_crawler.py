@@ -0,0 +1,272 @@
+########################################################################
+# File name: test_crawler.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import asyncio
+import unittest
+
+import aioxmpp
+import aioxmpp.disco.crawler as crawler
+import aioxmpp.disco.xso as disco_xso
+import aioxmpp.errors as errors
+
+from aioxmpp.testutils import run_coroutine
+
+
+SERVER = aioxmpp.JID.fromstr("server.example")
+MUC = aioxmpp.JID.fromstr("conference.server.example")
+PUBSUB = aioxmpp.JID.fromstr("pubsub.server.example")
+UPLOAD = aioxmpp.JID.fromstr("upload.server.example")
+BROKEN = aioxmpp.JID.fromstr("broken.server.example")
+ROOM = aioxmpp.JID.fromstr("room@conference.server.example")
+
+
+class FakeDisco:
+    """
+    Answer disco queries from a static tree, with a little latency, and keep
+    track of the concurrency.
+    """
+
+    def __init__(self, infos, items):
+        self.infos = infos
+        self.items = items
+        self.queries = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _respond(self, table, jid, node):
+        self.queries.append((table, jid, node))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            for _ in range(3):
+                await asyncio.sleep(0)
+            try:
+                result = getattr(self, table)[jid, node]
+            except KeyError:
+                raise errors.XMPPCancelError(
+                    errors.ErrorCondition.ITEM_NOT_FOUND
+                )
+            if isinstance(result, asyncio.Future):
+                result = await result
+            if isinstance(result, BaseException):
+                raise result
+            return result
+        finally:
+            self.in_flight -= 1
+
+    async def query_info(self, jid, *, node=None):
+        return await self._respond("infos", jid, node)
+
+    async def query_items(self, jid, *, node=None):
+        return await self._respond("items", jid, node)
+
+
+def make_items(*items):
+    return disco_xso.ItemsQuery(items=[
+        disco_xso.Item(jid, node=node)
+        for jid, node in items
+    ])
+
+
+def collect(crawl):
+    async def collect():
+        results = []
+        async for result in crawl:
+            results.append(result)
+        return results
+    return run_coroutine(collect())
+
+
+class TestDiscoCrawler(unittest.TestCase):
+    def setUp(self):
+        self.infos = {
+            (SERVER, None): disco_xso.InfoQuery(features=["urn:x:server"]),
+            (MUC, None): disco_xso.InfoQuery(features=["urn:x:muc"]),
+            (PUBSUB, None): disco_xso.InfoQuery(features=["urn:x:pubsub"]),
+            (UPLOAD, None): disco_xso.InfoQuery(features=["urn:x:upload"]),
+            (ROOM, None): disco_xso.InfoQuery(features=["urn:x:room"]),
+        }
+        self.items = {
+            (SERVER, None): make_items(
+                (MUC, None),
+                (PUBSUB, None),
+                (UPLOAD, None),
+                (BROKEN, None),
+                (SERVER, "some-node"),
+                (MUC, None),
+            ),
+            (MUC, None): make_items((ROOM, None)),
+            (PUBSUB, None): make_items((PUBSUB, "news")),
+            (UPLOAD, None): make_items((SERVER, None)),
+        }
+        self.disco = FakeDisco(self.infos, self.items)
+
+    def test_crawls_one_level_by_default(self):
+        results = collect(crawler.DiscoCrawler(self.disco, SERVER))
+
+        self.assertCountEqual(
+            [(r.jid, r.node, r.depth) for r in results],
+            [
+                (SERVER, None, 0),
+                (MUC, None, 1),
+                (PUBSUB, None, 1),
+                (UPLOAD, None, 1),
+                (BROKEN, None, 1),
+            ]
+        )
+
+        by_jid = {r.jid: r for r in results}
+        self.assertIs(by_jid[SERVER].info, self.infos[SERVER, None])
+        self.assertIs(by_jid[SERVER].items, self.items[SERVER, None])
+        self.assertIs(by_jid[MUC].info, self.infos[MUC, None])
+        self.assertIsNone(by_jid[MUC].items)
+        self.assertIsNone(by_jid[MUC].error)
+
+        self.assertNotIn(("items", MUC, None), self.disco.queries)
+
+    def test_reports_errors_and_continues(self):
+        results = collect(crawler.DiscoCrawler(self.disco, SERVER))
+
+        broken, = [r for r in results if r.jid == BROKEN]
+        self.assertIsNone(broken.info)
+        self.assertIsInstance(broken.error, errors.XMPPCancelError)
+        self.assertEqual(broken.error.condition,
+                         errors.ErrorCondition.ITEM_NOT_FOUND)
+
+    def test_reports_items_errors(self):
+        exc = errors.XMPPWaitError(
+            errors.ErrorCondition.RESOURCE_CONSTRAINT
+        )
+        self.items[SERVER, None] = exc
+
+        result, = collect(crawler.DiscoCrawler(self.disco, SERVER))
+
+        self.assertIs(result.info, self.infos[SERVER, None])
+        self.assertIsNone(result.error)
+        self.assertIsNone(result.items)
+        self.assertIs(result.items_error, exc)
+
+    def test_reports_timeouts_and_continues(self):
+        info_timeout = asyncio.TimeoutError()
+        items_timeout = asyncio.TimeoutError()
+        self.infos[MUC, None] = info_timeout
+        self.items[PUBSUB, None] = items_timeout
+
+        results = collect(crawler.DiscoCrawler(self.disco, SERVER,
+                                               max_depth=2))
+
+        by_jid = {(r.jid, r.node): r for r in results}
+        self.assertIsNone(by_jid[MUC, None].info)
+        self.assertIs(by_jid[MUC, None].error, info_timeout)
+        self.assertIsNone(by_jid[PUBSUB, None].items)
+        self.assertIs(by_jid[PUBSUB, None].items_error, items_timeout)
+        self.assertIn((UPLOAD, None), by_jid)
+        self.assertIn((ROOM, None), by_jid)
+
+    def test_follows_items_up_to_max_depth(self):
+        results = collect(crawler.DiscoCrawler(self.disco, SERVER,
+                                               max_depth=2))
+
+        self.assertIn((ROOM, None, 2),
+                      [(r.jid, r.node, r.depth) for r in results])
+        self.assertNotIn(("items", ROOM, None), self.disco.queries)
+
+    def test_max_depth_zero_only_queries_root_info(self):
+        results = collect(crawler.DiscoCrawler(self.disco, SERVER,
+                                               max_depth=0))
+
+        self.assertEqual(len(results), 1)
+        self.assertIsNone(results[0].items)
+        self.assertSequenceEqual(self.disco.queries,
+                                 [("infos", SERVER, None)])
+
+    def test_queries_each_entity_once(self):
+        collect(crawler.DiscoCrawler(self.disco, SERVER, max_depth=3))
+
+        self.assertEqual(len(self.disco.queries),
+                         len(set(self.disco.queries)))
+
+    def test_follows_nodes_if_requested(self):
+        results = collect(crawler.DiscoCrawler(self.disco, SERVER,
+                                               max_depth=2,
+                                               follow_nodes=True))
+
+        keys = [(r.jid, r.node) for r in results]
+        self.assertIn((SERVER, "some-node"), keys)
+        self.assertIn((PUBSUB, "news"), keys)
+
+    def test_starts_at_node(self):
+        results = collect(crawler.DiscoCrawler(self.disco, PUBSUB,
+                                               node="news",
+                                               max_depth=0))
+
+        self.assertEqual((results[0].jid, results[0].node),
+                         (PUBSUB, "news"))
+
+    def test_limits_concurrency(self):
+        for i in range(20):
+            jid = aioxmpp.JID.fromstr("c{}.server.example".format(i))
+            self.items[SERVER, None].items.append(disco_xso.Item(jid))
+            self.infos[jid, None] = disco_xso.InfoQuery()
+
+        results = collect(crawler.DiscoCrawler(self.disco, SERVER,
+                                               max_in_flight=3))
+
+        self.assertEqual(len(results), 25)
+        self.assertEqual(self.disco.max_in_flight, 3)
+
+    def test_rejects_non_positive_max_in_flight(self):
+        with self.assertRaises(ValueError):
+            crawler.DiscoCrawler(self.disco, SERVER, max_in_flight=0)
+
+    def test_streams_results(self):
+        crawl = crawler.DiscoCrawler(self.disco, SERVER)
+
+        first = run_coroutine(crawl.__anext__())
+
+        self.assertEqual(first.jid, SERVER)
+        self.assertEqual(len(self.disco.queries), 2)
+
+    def test_reraises_other_exceptions_and_cancels(self):
+        self.infos[MUC, None] = ConnectionError()
+        crawl = crawler.DiscoCrawler(self.disco, SERVER)
+
+        with self.assertRaises(ConnectionError):
+            collect(crawl)
+
+        self.assertFalse(crawl._running)
+        with self.assertRaises(StopAsyncIteration):
+            run_coroutine(crawl.__anext__())
+
+    def test_close_cancels_running_queries(self):
+        self.infos[MUC, None] = asyncio.Future()
+        crawl = crawler.DiscoCrawler(self.disco, SERVER)
+        run_coroutine(crawl.__anext__())
+        run_coroutine(crawl.__anext__())
+        running = set(crawl._running)
+        self.assertEqual(len(running), 1)
+
+        crawl.close()
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertTrue(all(task.cancelled() for task in running))
+        with self.assertRaises(StopAsyncIteration):
+            run_coroutine(crawl.__anext__())
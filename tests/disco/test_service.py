@@ -24,12 +24,15 @@ import contextlib
 import unittest
 import sys
 
+from datetime import timedelta
+
 import aioxmpp.service as service
 import aioxmpp.disco.service as disco_service
 import aioxmpp.disco.xso as disco_xso
 import aioxmpp.stanza as stanza
 import aioxmpp.structs as structs
 import aioxmpp.errors as errors
+import aioxmpp.utils
 
 from aioxmpp.utils import namespaces
 
@@ -1901,6 +1904,220 @@ class TestDiscoClient(unittest.TestCase):
 
         self.assertIs(ctx.exception, exc)
 
+    def test_cache_lifetime_defaults(self):
+        self.assertIsNone(self.s.cache_ttl)
+        self.assertEqual(self.s.negative_cache_ttl, timedelta(minutes=5))
+        self.assertFalse(self.s.keep_cache_on_reconnect)
+
+    def test_query_info_result_expires_after_cache_ttl(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.cache_ttl = timedelta(seconds=60)
+        loop = asyncio.get_event_loop()
+
+        with contextlib.ExitStack() as stack:
+            send_and_decode = stack.enter_context(unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()))
+            time = stack.enter_context(
+                unittest.mock.patch.object(loop, "time")
+            )
+            time.return_value = 100.0
+            send_and_decode.return_value = unittest.mock.sentinel.result1
+
+            run_coroutine(self.s.query_info(to))
+
+            time.return_value = 159.0
+            self.assertIs(run_coroutine(self.s.query_info(to)),
+                          unittest.mock.sentinel.result1)
+
+            time.return_value = 160.0
+            send_and_decode.return_value = unittest.mock.sentinel.result2
+            self.assertIs(run_coroutine(self.s.query_info(to)),
+                          unittest.mock.sentinel.result2)
+
+        self.assertEqual(len(send_and_decode.mock_calls), 2)
+
+    def test_query_items_result_expires_after_cache_ttl(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.cache_ttl = timedelta(seconds=60)
+        loop = asyncio.get_event_loop()
+
+        with unittest.mock.patch.object(loop, "time") as time:
+            time.return_value = 100.0
+            run_coroutine(self.s.query_items(to))
+            run_coroutine(self.s.query_items(to))
+            self.assertEqual(len(self.cc.send.mock_calls), 1)
+
+            time.return_value = 160.0
+            run_coroutine(self.s.query_items(to))
+            self.assertEqual(len(self.cc.send.mock_calls), 2)
+
+    def test_query_info_caches_item_not_found(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        loop = asyncio.get_event_loop()
+
+        with contextlib.ExitStack() as stack:
+            send_and_decode = stack.enter_context(unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()))
+            time = stack.enter_context(
+                unittest.mock.patch.object(loop, "time")
+            )
+            time.return_value = 100.0
+            send_and_decode.side_effect = errors.XMPPCancelError(
+                condition=errors.ErrorCondition.ITEM_NOT_FOUND
+            )
+
+            for _ in range(2):
+                with self.assertRaises(errors.XMPPCancelError):
+                    run_coroutine(self.s.query_info(to, node="foo"))
+
+            self.assertEqual(len(send_and_decode.mock_calls), 1)
+            self.assertTrue(
+                self.s.get_info_cache_statistics(to, "foo").negative
+            )
+
+            time.return_value = 400.0
+            send_and_decode.side_effect = None
+            send_and_decode.return_value = unittest.mock.sentinel.result
+            self.assertIs(run_coroutine(self.s.query_info(to, node="foo")),
+                          unittest.mock.sentinel.result)
+
+        self.assertEqual(len(send_and_decode.mock_calls), 2)
+
+    def test_query_items_caches_service_unavailable(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.cc.send.side_effect = errors.XMPPCancelError(
+            condition=errors.ErrorCondition.SERVICE_UNAVAILABLE
+        )
+
+        for _ in range(2):
+            with self.assertRaises(errors.XMPPCancelError):
+                run_coroutine(self.s.query_items(to))
+
+        self.assertEqual(len(self.cc.send.mock_calls), 1)
+
+    def test_errors_are_not_cached_without_negative_cache_ttl(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.negative_cache_ttl = None
+        self.cc.send.side_effect = errors.XMPPCancelError(
+            condition=errors.ErrorCondition.SERVICE_UNAVAILABLE
+        )
+
+        for _ in range(2):
+            with self.assertRaises(errors.XMPPCancelError):
+                run_coroutine(self.s.query_items(to))
+
+        self.assertEqual(len(self.cc.send.mock_calls), 2)
+
+    def test_keep_cache_on_reconnect(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        other = structs.JID.fromstr("user@foo.example/res2")
+        self.s.keep_cache_on_reconnect = True
+
+        with unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()) as send_and_decode:
+            send_and_decode.return_value = unittest.mock.sentinel.result
+            run_coroutine(self.s.query_info(to))
+        items_result = run_coroutine(self.s.query_items(to))
+
+        pending = asyncio.Future()
+        self.s.set_info_future(other, None, pending)
+
+        self.cc.on_stream_destroyed()
+
+        self.assertTrue(pending.cancelled())
+        self.assertIsNone(self.s.get_info_cache_statistics(other))
+
+        self.assertIs(run_coroutine(self.s.query_info(to)),
+                      unittest.mock.sentinel.result)
+        self.assertIs(run_coroutine(self.s.query_items(to)), items_result)
+        self.assertEqual(len(send_and_decode.mock_calls), 1)
+        self.assertEqual(len(self.cc.send.mock_calls), 1)
+
+    def test_cache_statistics(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        loop = asyncio.get_event_loop()
+
+        self.assertIsNone(self.s.get_info_cache_statistics(to))
+        self.assertIsNone(self.s.get_items_cache_statistics(to, "foo"))
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()))
+            time = stack.enter_context(
+                unittest.mock.patch.object(loop, "time")
+            )
+            time.return_value = 100.0
+            run_coroutine(self.s.query_info(to))
+            time.return_value = 110.0
+            run_coroutine(self.s.query_info(to))
+            run_coroutine(self.s.query_info(to))
+            run_coroutine(self.s.query_items(to, node="foo"))
+
+        stats = self.s.get_info_cache_statistics(to)
+        self.assertIsInstance(stats, disco_service.CacheEntryStatistics)
+        self.assertEqual(stats.created, 100.0)
+        self.assertEqual(stats.completed, 100.0)
+        self.assertEqual(stats.hits, 2)
+        self.assertFalse(stats.negative)
+
+        stats = self.s.get_items_cache_statistics(to, "foo")
+        self.assertEqual(stats.created, 110.0)
+        self.assertEqual(stats.hits, 0)
+
+    def test_set_info_future_is_subject_to_cache_ttl(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.cache_ttl = timedelta(seconds=60)
+        loop = asyncio.get_event_loop()
+
+        with contextlib.ExitStack() as stack:
+            send_and_decode = stack.enter_context(unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()))
+            time = stack.enter_context(
+                unittest.mock.patch.object(loop, "time")
+            )
+            time.return_value = 100.0
+            send_and_decode.return_value = unittest.mock.sentinel.fresh
+            self.s.set_info_cache(to, None, unittest.mock.sentinel.primed)
+            run_coroutine(asyncio.sleep(0))
+
+            self.assertIs(run_coroutine(self.s.query_info(to)),
+                          unittest.mock.sentinel.primed)
+
+            time.return_value = 200.0
+            self.assertIs(run_coroutine(self.s.query_info(to)),
+                          unittest.mock.sentinel.fresh)
+
+    def test_set_info_future_does_not_start_lazy_task(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        coro = CoroutineMock()
+        coro.return_value = unittest.mock.sentinel.result
+        fut = aioxmpp.utils.LazyTask(coro, to)
+
+        self.s.set_info_future(to, None, fut)
+        run_coroutine(asyncio.sleep(0))
+
+        coro.assert_not_called()
+        self.assertIsNotNone(self.s.get_info_cache_statistics(to))
+
+        self.assertIs(run_coroutine(self.s.query_info(to)),
+                      unittest.mock.sentinel.result)
+        coro.assert_called_once_with(to)
+        run_coroutine(asyncio.sleep(0))
+
+        stats = self.s.get_info_cache_statistics(to)
+        self.assertIsNotNone(stats.completed)
+        self.assertEqual(stats.hits, 1)
+
 
 class Testmount_as_node(unittest.TestCase):
     def setUp(self):
@@ -23,6 +23,7 @@ import unittest
 
 import aioxmpp.entitycaps
 import aioxmpp.entitycaps.service
+import aioxmpp.entitycaps.store
 import aioxmpp.entitycaps.xso
 
 
@@ -36,3 +37,5 @@ class TestExports(unittest.TestCase):
                       aioxmpp.entitycaps.service.EntityCapsService)
         self.assertIs(aioxmpp.EntityCapsService,
                       aioxmpp.entitycaps.service.EntityCapsService)
+        self.assertIs(aioxmpp.entitycaps.SQLiteCapsStore,
+                      aioxmpp.entitycaps.store.SQLiteCapsStore)
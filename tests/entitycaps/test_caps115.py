@@ -442,10 +442,12 @@ class Testbuild_forms_string(unittest.TestCase):
         )
 
 
-class Testhash_query(unittest.TestCase):
+class Test_build_hash_input(unittest.TestCase):
     def test_impl(self):
-        self.maxDiff = None
         base = unittest.mock.Mock()
+        base.build_identities_string.return_value = b"i<"
+        base.build_features_string.return_value = b"f<"
+        base.build_forms_string.return_value = b"x<"
 
         with contextlib.ExitStack() as stack:
             stack.enter_context(unittest.mock.patch(
@@ -463,6 +465,80 @@ class Testhash_query(unittest.TestCase):
                 new=base.build_forms_string,
             ))
 
+            result = caps115._build_hash_input(base.query)
+
+        self.assertSequenceEqual(
+            base.mock_calls,
+            [
+                unittest.mock.call.build_identities_string(
+                    base.query.identities,
+                ),
+                unittest.mock.call.build_features_string(
+                    base.query.features
+                ),
+                unittest.mock.call.build_forms_string(
+                    base.query.exts
+                ),
+            ]
+        )
+
+        self.assertEqual(result, b"i<f<x<")
+
+
+class Test_get_hash_input(unittest.TestCase):
+    def setUp(self):
+        caps115._hash_inputs.clear()
+
+    def tearDown(self):
+        caps115._hash_inputs.clear()
+
+    def test_memoises_by_structure(self):
+        info1 = disco.xso.InfoQuery(features=("urn:a", "urn:b"))
+        info2 = disco.xso.InfoQuery(features=("urn:b", "urn:a"))
+
+        with unittest.mock.patch(
+                "aioxmpp.entitycaps.caps115._build_hash_input",
+                wraps=caps115._build_hash_input) as _build_hash_input:
+            result1 = caps115._get_hash_input(info1)
+            result2 = caps115._get_hash_input(info2)
+
+        _build_hash_input.assert_called_once_with(info1)
+        self.assertIs(result1, result2)
+
+    def test_distinguishes_structure(self):
+        info1 = disco.xso.InfoQuery(features=("urn:a",))
+        info2 = disco.xso.InfoQuery(features=("urn:a",))
+        info2.identities.append(disco.xso.Identity(category="client",
+                                                   type_="pc"))
+
+        self.assertNotEqual(caps115._get_hash_input(info1),
+                            caps115._get_hash_input(info2))
+
+    def test_does_not_memoise_errors(self):
+        info = disco.xso.InfoQuery()
+        info.identities.append(disco.xso.Identity(category="client",
+                                                  type_="pc"))
+        info.identities.append(disco.xso.Identity(category="client",
+                                                  type_="pc"))
+
+        for _ in range(2):
+            with self.assertRaisesRegex(ValueError, "duplicate identity"):
+                caps115._get_hash_input(info)
+
+        self.assertEqual(len(caps115._hash_inputs), 0)
+
+
+class Testhash_query(unittest.TestCase):
+    def test_impl(self):
+        self.maxDiff = None
+        base = unittest.mock.Mock()
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(unittest.mock.patch(
+                "aioxmpp.entitycaps.caps115._get_hash_input",
+                new=base._get_hash_input,
+            ))
+
             stack.enter_context(unittest.mock.patch(
                 "hashlib.new",
                 new=base.hashlib_new,
@@ -483,23 +559,9 @@ class Testhash_query(unittest.TestCase):
             calls,
             [
                 unittest.mock.call.hashlib_new(base.algo),
-                unittest.mock.call.build_identities_string(
-                    base.query.identities,
-                ),
-                unittest.mock.call.hashlib_new().update(
-                    base.build_identities_string()
-                ),
-                unittest.mock.call.build_features_string(
-                    base.query.features
-                ),
-                unittest.mock.call.hashlib_new().update(
-                    base.build_features_string()
-                ),
-                unittest.mock.call.build_forms_string(
-                    base.query.exts
-                ),
+                unittest.mock.call._get_hash_input(base.query),
                 unittest.mock.call.hashlib_new().update(
-                    base.build_forms_string()
+                    base._get_hash_input()
                 ),
                 unittest.mock.call.hashlib_new().digest(),
                 unittest.mock.call.base64_b64encode(
@@ -242,6 +242,21 @@ class Test_get_hash_input(unittest.TestCase):
             b'\x1d\x1c'
         )
 
+    def test_memoises_by_structure(self):
+        caps390._hash_inputs.clear()
+        info = aioxmpp.disco.xso.InfoQuery(features=TEST_SMALL.features)
+        info.identities.extend(TEST_SMALL.identities)
+
+        with unittest.mock.patch(
+                "aioxmpp.entitycaps.caps390._build_hash_input",
+                wraps=caps390._build_hash_input) as _build_hash_input:
+            result1 = caps390._get_hash_input(TEST_SMALL)
+            result2 = caps390._get_hash_input(info)
+
+        _build_hash_input.assert_called_once_with(TEST_SMALL)
+        self.assertIs(result1, result2)
+        caps390._hash_inputs.clear()
+
 
 class Test_calculate_hash(unittest.TestCase):
     def test_uses_and_hash_from_algo(self):
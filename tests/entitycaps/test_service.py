@@ -27,15 +27,21 @@ import tempfile
 import unittest
 import unittest.mock
 
+from datetime import timedelta
+
 import aioxmpp.disco as disco
+import aioxmpp.errors
 import aioxmpp.service as service
 import aioxmpp.stanza as stanza
+import aioxmpp.stream
 import aioxmpp.structs as structs
 import aioxmpp.xml
 
 from aioxmpp.utils import namespaces
 
+import aioxmpp.entitycaps.caps115 as caps115
 import aioxmpp.entitycaps.service as entitycaps_service
+import aioxmpp.entitycaps.store as caps_store
 
 from aioxmpp.testutils import (
     make_connected_client,
@@ -96,6 +102,8 @@ class TestCache(unittest.TestCase):
         base.p = unittest.mock.MagicMock()
         self.c.set_system_db_path(base.p)
 
+        base.read_single_xso.return_value = disco.xso.InfoQuery()
+
         with contextlib.ExitStack() as stack:
             stack.enter_context(unittest.mock.patch(
                 "aioxmpp.xml.read_single_xso",
@@ -126,6 +134,37 @@ class TestCache(unittest.TestCase):
             base.read_single_xso()
         )
 
+    def test_system_db_path_hit_is_kept_in_memory(self):
+        base = unittest.mock.Mock()
+        base.p = unittest.mock.MagicMock()
+        base.read_single_xso.return_value = disco.xso.InfoQuery()
+        self.c.set_system_db_path(base.p)
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(unittest.mock.patch(
+                "aioxmpp.xml.read_single_xso",
+                new=base.read_single_xso
+            ))
+
+            result = self.c.lookup_in_database(base.key)
+            self.assertIs(self.c.lookup_in_memory(base.key), result)
+            self.assertIs(self.c.lookup_in_database(base.key), result)
+
+        base.read_single_xso.assert_called_once_with(
+            base.p.__truediv__().open(),
+            disco.xso.InfoQuery,
+        )
+
+    def test_lookup_in_memory_does_not_read_databases(self):
+        base = unittest.mock.Mock()
+        base.p = unittest.mock.MagicMock()
+        self.c.set_system_db_path(base.p)
+
+        with self.assertRaises(KeyError):
+            self.c.lookup_in_memory(base.key)
+
+        base.p.__truediv__.assert_not_called()
+
     def test_user_db_path_used_in_lookup_as_fallback(self):
         base = unittest.mock.Mock()
         base.p = unittest.mock.MagicMock()
@@ -136,6 +175,8 @@ class TestCache(unittest.TestCase):
         base.p.__truediv__().open.side_effect = FileNotFoundError()
         base.mock_calls.clear()
 
+        base.read_single_xso.return_value = disco.xso.InfoQuery()
+
         with contextlib.ExitStack() as stack:
             stack.enter_context(unittest.mock.patch(
                 "aioxmpp.xml.read_single_xso",
@@ -174,6 +215,8 @@ class TestCache(unittest.TestCase):
         base.userp = unittest.mock.MagicMock()
         self.c.set_user_db_path(base.userp)
 
+        base.read_single_xso.return_value = disco.xso.InfoQuery()
+
         with contextlib.ExitStack() as stack:
             stack.enter_context(unittest.mock.patch(
                 "aioxmpp.xml.read_single_xso",
@@ -488,6 +531,208 @@ class TestCache(unittest.TestCase):
 
             self.assertTrue((p / key.path).is_file())
 
+    def _store_key(self):
+        return caps115.Key(
+            TEST_DB_ENTRY_HASH,
+            "{}#{}".format(TEST_DB_ENTRY_NODE_BARE, TEST_DB_ENTRY_VER),
+        )
+
+    def test_user_db_store_used_in_lookup_and_memoised(self):
+        key = self._store_key()
+        with tempfile.TemporaryDirectory() as tempdir:
+            store = caps_store.SQLiteCapsStore(
+                pathlib.Path(tempdir) / "caps.sqlite"
+            )
+            store.put_many([(
+                key.path.as_posix(),
+                entitycaps_service._serialize_events(
+                    TEST_DB_ENTRY.captured_events
+                ),
+            )])
+            self.c.set_user_db_store(store)
+            store.close()
+
+            result = self.c.lookup_in_database(key)
+
+        self.assertIsInstance(result, disco.xso.InfoQuery)
+        self.assertSequenceEqual(result.features, TEST_DB_ENTRY.features)
+        self.assertTrue(key.verify(result))
+        self.assertIs(self.c.lookup_in_database(key), result)
+
+    def test_set_db_store_preloads_by_default(self):
+        store = unittest.mock.Mock()
+        self.c.set_user_db_store(store)
+        store.preload.assert_called_once_with()
+
+        store = unittest.mock.Mock()
+        self.c.set_system_db_store(store, preload=False)
+        store.preload.assert_not_called()
+
+    def test_system_db_store_takes_precedence_over_user_db_store(self):
+        key = self._store_key()
+        base = unittest.mock.Mock()
+        base.system.get.return_value = b"<query/>"
+        self.c.set_system_db_store(base.system, preload=False)
+        self.c.set_user_db_store(base.user, preload=False)
+
+        with unittest.mock.patch(
+                "aioxmpp.xml.read_single_xso") as read_single_xso:
+            result = self.c.lookup_in_database(key)
+
+        base.system.get.assert_called_once_with(key.path.as_posix())
+        base.user.get.assert_not_called()
+        self.assertEqual(result, read_single_xso())
+
+    def test_lookup_falls_back_to_user_db_store(self):
+        key = self._store_key()
+        base = unittest.mock.Mock()
+        base.system.get.side_effect = KeyError()
+        base.user.get.return_value = b"<query/>"
+        self.c.set_system_db_store(base.system, preload=False)
+        self.c.set_user_db_store(base.user, preload=False)
+
+        with unittest.mock.patch("aioxmpp.xml.read_single_xso"):
+            self.c.lookup_in_database(key)
+
+        base.user.get.assert_called_once_with(key.path.as_posix())
+
+    def test_add_cache_entry_batches_writes_to_user_db_store(self):
+        store = unittest.mock.Mock()
+        self.c.set_user_db_store(store, preload=False)
+
+        q = disco.xso.InfoQuery()
+        q.captured_events = [
+            ("start", q.TAG[0], q.TAG[1], {}),
+            ("end",)
+        ]
+        key1 = caps115.Key("sha-1", "http://a.example#foo")
+        key2 = caps115.Key("sha-1", "http://b.example#bar")
+
+        with contextlib.ExitStack() as stack:
+            run_in_executor = stack.enter_context(unittest.mock.patch.object(
+                asyncio.get_event_loop(),
+                "run_in_executor"
+            ))
+
+            async_ = stack.enter_context(unittest.mock.patch(
+                "asyncio.ensure_future"
+            ))
+
+            self.c.add_cache_entry(key1, q)
+            self.c.add_cache_entry(key2, q)
+            run_in_executor.assert_not_called()
+
+            run_coroutine(asyncio.sleep(0))
+
+        store.put_many.assert_not_called()
+        run_in_executor.assert_called_once_with(
+            None,
+            store.put_many,
+            unittest.mock.ANY,
+        )
+        (_, _, entries), _ = run_in_executor.call_args
+        async_.assert_called_once_with(run_in_executor())
+        data = entitycaps_service._serialize_events(q.captured_events)
+        self.assertDictEqual(
+            dict(entries),
+            {
+                key1.path.as_posix(): data,
+                key2.path.as_posix(): data,
+            }
+        )
+
+    def test_user_db_store_round_trip(self):
+        key = self._store_key()
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = pathlib.Path(tempdir) / "caps.sqlite"
+            store = caps_store.SQLiteCapsStore(path)
+            self.c.set_user_db_store(store)
+            self.c.add_cache_entry(key, TEST_DB_ENTRY)
+            run_coroutine(self.c._flush_store_writes())
+            store.close()
+
+            c = entitycaps_service.Cache()
+            store = caps_store.SQLiteCapsStore(path)
+            c.set_user_db_store(store)
+            store.close()
+            result = c.lookup_in_database(key)
+
+        self.assertTrue(key.verify(result))
+
+    def _entry(self, *features):
+        q = disco.xso.InfoQuery(features=features)
+        q.captured_events = []
+        return q
+
+    def test_memory_defaults(self):
+        self.assertEqual(self.c.max_memory_entries, 4096)
+        self.assertEqual(self.c.negative_ttl, timedelta(minutes=10))
+
+    def test_memory_overlay_evicts_least_recently_used(self):
+        self.c.max_memory_entries = 2
+        key1, key2, key3 = (
+            caps115.Key("sha-1", "http://{}.example#v".format(i))
+            for i in range(3)
+        )
+        self.c.add_cache_entry(key1, self._entry("a"))
+        self.c.add_cache_entry(key2, self._entry("b"))
+        self.c.lookup_in_database(key1)
+        self.c.add_cache_entry(key3, self._entry("c"))
+
+        self.assertEqual(self.c.lookup_in_database(key1).features, {"a"})
+        self.assertEqual(self.c.lookup_in_database(key3).features, {"c"})
+        with self.assertRaises(KeyError):
+            self.c.lookup_in_database(key2)
+
+    def test_entries_with_same_content_are_shared(self):
+        key1 = caps115.Key("sha-1", "http://a.example#v")
+        key2 = caps115.Key("sha-1", "http://b.example#v")
+        key3 = caps115.Key("sha-1", "http://c.example#v")
+
+        self.c.add_cache_entry(key1, self._entry("a", "b"))
+        self.c.add_cache_entry(key2, self._entry("b", "a"))
+        self.c.add_cache_entry(key3, self._entry("c"))
+
+        self.assertIs(self.c.lookup_in_database(key1),
+                      self.c.lookup_in_database(key2))
+        self.assertIsNot(self.c.lookup_in_database(key1),
+                         self.c.lookup_in_database(key3))
+
+    def test_negative_cache_entry_expires(self):
+        loop = asyncio.get_event_loop()
+        with unittest.mock.patch.object(loop, "time") as time:
+            time.return_value = 100.0
+            self.c.add_negative_cache_entry(unittest.mock.sentinel.key)
+
+            time.return_value = 699.0
+            self.assertTrue(
+                self.c.has_negative_cache_entry(unittest.mock.sentinel.key)
+            )
+            self.assertFalse(
+                self.c.has_negative_cache_entry(unittest.mock.sentinel.other)
+            )
+
+            time.return_value = 700.0
+            self.assertFalse(
+                self.c.has_negative_cache_entry(unittest.mock.sentinel.key)
+            )
+
+    def test_negative_cache_is_bounded(self):
+        self.c.max_memory_entries = 2
+        for key in ["k1", "k2", "k3"]:
+            self.c.add_negative_cache_entry(key)
+
+        self.assertFalse(self.c.has_negative_cache_entry("k1"))
+        self.assertTrue(self.c.has_negative_cache_entry("k2"))
+        self.assertTrue(self.c.has_negative_cache_entry("k3"))
+
+    def test_add_cache_entry_clears_negative_cache_entry(self):
+        key = caps115.Key("sha-1", "http://a.example#v")
+        self.c.add_negative_cache_entry(key)
+        self.c.add_cache_entry(key, self._entry("a"))
+        self.assertFalse(self.c.has_negative_cache_entry(key))
+
 
 class TestService(unittest.TestCase):
     def setUp(self):
@@ -1131,6 +1376,295 @@ class TestService(unittest.TestCase):
 
         self.assertIs(result, unittest.mock.sentinel.query_result)
 
+    def test_query_and_cache_remembers_hash_mismatch(self):
+        key = unittest.mock.Mock()
+        key.verify.return_value = False
+        self.disco_client.query_info.side_effect = None
+        self.disco_client.query_info.return_value = TEST_DB_ENTRY
+        fut = asyncio.Future()
+
+        run_coroutine(self.s.query_and_cache(TEST_FROM, key, fut))
+
+        self.assertIsInstance(fut.exception(), ValueError)
+        self.assertTrue(self.s.cache.has_negative_cache_entry(key))
+
+    def test_query_and_cache_remembers_and_forwards_query_errors(self):
+        key = unittest.mock.Mock()
+        exc = aioxmpp.errors.XMPPCancelError(
+            aioxmpp.ErrorCondition.ITEM_NOT_FOUND,
+        )
+        self.disco_client.query_info.side_effect = exc
+        fut = asyncio.Future()
+
+        with self.assertRaises(aioxmpp.errors.XMPPCancelError):
+            run_coroutine(self.s.query_and_cache(TEST_FROM, key, fut))
+
+        self.assertIsInstance(fut.exception(), ValueError)
+        self.assertIs(fut.exception().__cause__, exc)
+        self.assertTrue(self.s.cache.has_negative_cache_entry(key))
+
+    def test_query_error_does_not_fail_concurrent_lookups(self):
+        key = caps115.Key("sha-1", "http://a.example#foo")
+        exc = aioxmpp.errors.XMPPCancelError(
+            aioxmpp.ErrorCondition.ITEM_NOT_FOUND,
+        )
+        self.disco_client.query_info.side_effect = exc
+        fut = self.s.cache.create_query_future(key)
+
+        lookup = asyncio.ensure_future(self.s.cache.lookup(key))
+        run_coroutine(asyncio.sleep(0))
+
+        with self.assertRaises(aioxmpp.errors.XMPPCancelError):
+            run_coroutine(self.s.query_and_cache(TEST_FROM, key, fut))
+
+        # the other entity falls through to querying itself
+        with self.assertRaises(KeyError):
+            run_coroutine(lookup)
+
+    def test_handle_inbound_presence_skips_negative_keys(self):
+        presence = unittest.mock.Mock(spec=aioxmpp.Presence)
+        self.impl115.extract_keys.return_value = iter([
+            unittest.mock.sentinel.key1,
+        ])
+        self.impl390.extract_keys.return_value = iter([
+            unittest.mock.sentinel.key2,
+        ])
+        self.s.cache.add_negative_cache_entry(unittest.mock.sentinel.key2)
+
+        with contextlib.ExitStack() as stack:
+            LazyTask = stack.enter_context(
+                unittest.mock.patch("aioxmpp.utils.LazyTask")
+            )
+
+            lookup_info = stack.enter_context(
+                unittest.mock.patch.object(self.s, "lookup_info")
+            )
+
+            self.s.handle_inbound_presence(presence)
+
+        LazyTask.assert_called_once_with(
+            lookup_info,
+            presence.from_,
+            [unittest.mock.sentinel.key1],
+        )
+
+    def test_handle_inbound_presence_does_not_prime_with_negative_keys(self):
+        presence = unittest.mock.Mock(spec=aioxmpp.Presence)
+        self.impl115.extract_keys.return_value = iter([
+            unittest.mock.sentinel.key1,
+        ])
+        self.s.cache.add_negative_cache_entry(unittest.mock.sentinel.key1)
+
+        self.s.handle_inbound_presence(presence)
+
+        self.disco_client.set_info_future.assert_not_called()
+
+    def test_lookup_info_queries_without_node_if_all_keys_failed(self):
+        self.s.cache.add_negative_cache_entry(unittest.mock.sentinel.key1)
+        self.disco_client.query_info.side_effect = None
+        self.disco_client.query_info.return_value = \
+            unittest.mock.sentinel.result
+
+        result = run_coroutine(self.s.lookup_info(
+            TEST_FROM,
+            [unittest.mock.sentinel.key1],
+        ))
+
+        self.disco_client.query_info.assert_called_once_with(
+            TEST_FROM,
+            require_fresh=True,
+            no_cache=True,
+        )
+        self.assertIs(result, unittest.mock.sentinel.result)
+
+    def _available(self, jid, *keys):
+        self.impl115.extract_keys.return_value = list(keys)
+        self.s.handle_inbound_presence(aioxmpp.Presence(
+            type_=structs.PresenceType.AVAILABLE,
+            from_=jid,
+        ))
+
+    def _info(self, *features):
+        return disco.xso.InfoQuery(features=features)
+
+    def test__clear_index_is_depsignal_handler(self):
+        self.assertTrue(aioxmpp.service.is_depsignal_handler(
+            aioxmpp.stream.StanzaStream,
+            "on_stream_destroyed",
+            entitycaps_service.EntityCapsService._clear_index,
+        ))
+
+    def test_index_is_empty_initially(self):
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:x"), set())
+        self.assertIsNone(self.s.get_known_features(TEST_FROM))
+
+    def test_index_uses_cached_info_on_available_presence(self):
+        key = caps115.Key("sha-1", "http://a.example#v")
+        self.s.cache.add_cache_entry(key, self._info("urn:x", "urn:y"))
+
+        self._available(TEST_FROM, key)
+
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:x"),
+                            {TEST_FROM})
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:z"),
+                            set())
+        self.assertEqual(self.s.get_known_features(TEST_FROM),
+                         frozenset({"urn:x", "urn:y"}))
+        self.disco_client.query_info.assert_not_called()
+
+    def test_index_picks_up_info_from_query(self):
+        key = unittest.mock.Mock()
+        key.verify.return_value = True
+        self.disco_client.query_info.side_effect = None
+        self.disco_client.query_info.return_value = self._info("urn:x")
+
+        self._available(TEST_FROM, key)
+        self.assertIsNone(self.s.get_known_features(TEST_FROM))
+
+        run_coroutine(self.s.lookup_info(TEST_FROM, [key]))
+
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:x"),
+                            {TEST_FROM})
+
+    def test_index_ignores_info_which_does_not_verify(self):
+        key = unittest.mock.Mock()
+        key.verify.return_value = False
+        self.disco_client.query_info.side_effect = None
+        self.disco_client.query_info.return_value = self._info("urn:x")
+
+        self._available(TEST_FROM, key)
+        run_coroutine(self.s.lookup_info(TEST_FROM, [key]))
+
+        self.assertIsNone(self.s.get_known_features(TEST_FROM))
+
+    def test_index_ignores_info_of_keys_nobody_uses(self):
+        key = caps115.Key("sha-1", "http://a.example#v")
+        self.s.cache.add_cache_entry(key, self._info("urn:x"))
+
+        run_coroutine(self.s.lookup_info(TEST_FROM, [key]))
+
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:x"),
+                            set())
+
+    def test_index_drops_entity_on_unavailable_presence(self):
+        key = caps115.Key("sha-1", "http://a.example#v")
+        other = TEST_FROM.replace(resource="r2")
+        self.s.cache.add_cache_entry(key, self._info("urn:x"))
+        self._available(TEST_FROM, key)
+        self._available(other, key)
+
+        self.s.handle_inbound_presence(aioxmpp.Presence(
+            type_=structs.PresenceType.UNAVAILABLE,
+            from_=TEST_FROM,
+        ))
+
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:x"),
+                            {other})
+        self.assertIsNone(self.s.get_known_features(TEST_FROM))
+
+        self.s.handle_inbound_presence(aioxmpp.Presence(
+            type_=structs.PresenceType.UNAVAILABLE,
+            from_=other,
+        ))
+
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:x"),
+                            set())
+        self.assertFalse(self.s._index_key_jids)
+        self.assertFalse(self.s._index_key_features)
+        self.assertFalse(self.s._index_feature_keys)
+
+    def test_index_follows_changed_capabilities(self):
+        key1 = caps115.Key("sha-1", "http://a.example#v1")
+        key2 = caps115.Key("sha-1", "http://a.example#v2")
+        self.s.cache.add_cache_entry(key1, self._info("urn:x"))
+        self.s.cache.add_cache_entry(key2, self._info("urn:y"))
+
+        self._available(TEST_FROM, key1)
+        self._available(TEST_FROM, key2)
+
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:x"),
+                            set())
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:y"),
+                            {TEST_FROM})
+
+        self._available(TEST_FROM)
+
+        self.assertIsNone(self.s.get_known_features(TEST_FROM))
+
+    def test_index_shares_identical_feature_sets(self):
+        key1 = caps115.Key("sha-1", "http://a.example#v")
+        key2 = caps115.Key("sha-1", "http://b.example#v")
+        other = TEST_FROM.replace(resource="r2")
+        self.s.cache.add_cache_entry(key1, self._info("urn:x", "urn:y"))
+        self.s.cache.add_cache_entry(key2, self._info("urn:y", "urn:x"))
+
+        self._available(TEST_FROM, key1)
+        self._available(other, key2)
+
+        self.assertIs(self.s.get_known_features(TEST_FROM),
+                      self.s.get_known_features(other))
+
+    def test_index_skips_unchanged_keys(self):
+        key = caps115.Key("sha-1", "http://a.example#v")
+        self.s.cache.add_cache_entry(key, self._info("urn:x"))
+        self._available(TEST_FROM, key)
+
+        with unittest.mock.patch.object(
+                self.s.cache, "lookup_in_memory") as lookup_in_memory:
+            self._available(TEST_FROM, key)
+
+        lookup_in_memory.assert_not_called()
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:x"),
+                            {TEST_FROM})
+
+    def test_index_defers_database_lookups(self):
+        key = caps115.Key("sha-1", "http://a.example#v")
+        info = self._info("urn:x")
+
+        with unittest.mock.patch.object(
+                self.s.cache, "lookup_in_database") as lookup_in_database:
+            lookup_in_database.return_value = info
+
+            self._available(TEST_FROM, key)
+            self._available(TEST_FROM.replace(resource="r2"), key)
+            lookup_in_database.assert_not_called()
+            self.assertIsNone(self.s.get_known_features(TEST_FROM))
+
+            run_coroutine(asyncio.sleep(0))
+
+        lookup_in_database.assert_called_once_with(key)
+        self.assertEqual(self.s.get_known_features(TEST_FROM),
+                         frozenset({"urn:x"}))
+
+    def test_index_logs_database_errors(self):
+        key = caps115.Key("sha-1", "http://a.example#v")
+
+        with contextlib.ExitStack() as stack:
+            lookup_in_database = stack.enter_context(
+                unittest.mock.patch.object(
+                    self.s.cache, "lookup_in_database",
+                )
+            )
+            lookup_in_database.side_effect = OSError()
+
+            self._available(TEST_FROM, key)
+
+            with self.assertLogs(self.s.logger, "WARNING"):
+                run_coroutine(asyncio.sleep(0))
+
+        self.assertIsNone(self.s.get_known_features(TEST_FROM))
+
+    def test_index_is_cleared_on_stream_destruction(self):
+        key = caps115.Key("sha-1", "http://a.example#v")
+        self.s.cache.add_cache_entry(key, self._info("urn:x"))
+        self._available(TEST_FROM, key)
+
+        self.s._clear_index(None)
+
+        self.assertSetEqual(self.s.get_entities_with_feature("urn:x"),
+                            set())
+        self.assertIsNone(self.s.get_known_features(TEST_FROM))
+
     def test_update_hash(self):
         base = unittest.mock.Mock()
 
@@ -1824,6 +2358,55 @@ class TestService(unittest.TestCase):
             self.s.update_hash
         )
 
+    def test__info_changed_coalesces_until_update_hash(self):
+        with contextlib.ExitStack() as stack:
+            get_event_loop = stack.enter_context(unittest.mock.patch(
+                "asyncio.get_event_loop"
+            ))
+
+            self.s._info_changed()
+            self.s._info_changed()
+            self.s._info_changed()
+
+            get_event_loop().call_soon.assert_called_once_with(
+                self.s.update_hash
+            )
+            handle = get_event_loop().call_soon.return_value
+
+            self.s.update_hash()
+            handle.cancel.assert_called_once_with()
+
+            self.s._info_changed()
+
+        self.assertEqual(get_event_loop().call_soon.call_count, 2)
+
+    def test_burst_of_feature_registrations_emits_on_ver_changed_once(self):
+        on_ver_changed = unittest.mock.Mock(return_value=None)
+        self.s.on_ver_changed.connect(on_ver_changed)
+
+        with unittest.mock.patch.object(
+                self.s, "update_hash",
+                wraps=self.s.update_hash) as update_hash:
+            for i in range(20):
+                self.disco_server.iter_features.return_value.append(
+                    "urn:example:{}".format(i)
+                )
+                self.s._info_changed()
+
+            run_coroutine(asyncio.sleep(0))
+
+        update_hash.assert_called_once_with()
+        on_ver_changed.assert_called_once_with()
+
+    def test_shutdown_cancels_pending_update_hash(self):
+        with unittest.mock.patch("asyncio.get_event_loop") as get_event_loop:
+            self.s._info_changed()
+
+        run_coroutine(self.s.shutdown())
+
+        handle = get_event_loop().call_soon.return_value
+        handle.cancel.assert_called_once_with()
+
     def test_handle_outbound_presence_inserts_keys(self):
         base = unittest.mock.Mock()
         self.impl115.calculate_keys.return_value = iter([
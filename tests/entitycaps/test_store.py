@@ -0,0 +1,116 @@
+########################################################################
+# File name: test_store.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import pathlib
+import tempfile
+import threading
+import unittest
+
+import aioxmpp.entitycaps.store as caps_store
+
+
+class TestSQLiteCapsStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.tmpdir.name)
+        self.store = caps_store.SQLiteCapsStore(self.root / "caps.sqlite")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def _reopen(self):
+        self.store.close()
+        self.store = caps_store.SQLiteCapsStore(self.root / "caps.sqlite")
+
+    def test_empty(self):
+        self.assertEqual(len(self.store), 0)
+        with self.assertRaises(KeyError):
+            self.store.get("hashes/foo.xml")
+
+    def test_put_many_and_get(self):
+        self.store.put_many([
+            ("hashes/a.xml", b"<a/>"),
+            ("hashes/b.xml", b"<b/>"),
+        ])
+        self._reopen()
+
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store.get("hashes/a.xml"), b"<a/>")
+        self.assertEqual(self.store.get("hashes/b.xml"), b"<b/>")
+
+    def test_put_many_replaces_existing_entries(self):
+        self.store.put_many([("hashes/a.xml", b"<a/>")])
+        self.store.put_many([("hashes/a.xml", b"<b/>")])
+
+        self.assertEqual(self.store.get("hashes/a.xml"), b"<b/>")
+
+    def test_preload_answers_from_memory(self):
+        self.store.put_many([("hashes/a.xml", b"<a/>")])
+        self._reopen()
+        self.store.preload()
+        self.store.close()
+
+        self.assertEqual(self.store.get("hashes/a.xml"), b"<a/>")
+        with self.assertRaises(KeyError):
+            self.store.get("hashes/b.xml")
+        self.assertEqual(len(self.store), 1)
+
+    def test_put_many_updates_preloaded_entries(self):
+        self.store.preload()
+        self.store.put_many([("hashes/a.xml", b"<a/>")])
+        self.assertEqual(self.store.get("hashes/a.xml"), b"<a/>")
+
+    def test_put_many_from_other_thread(self):
+        self.assertEqual(len(self.store), 0)
+
+        thread = threading.Thread(
+            target=self.store.put_many,
+            args=([("hashes/a.xml", b"<a/>")],),
+        )
+        thread.start()
+        thread.join()
+
+        self.assertEqual(self.store.get("hashes/a.xml"), b"<a/>")
+
+    def test_import_and_export_directory(self):
+        src = self.root / "src"
+        (src / "hashes").mkdir(parents=True)
+        (src / "caps2" / "sha-256" / "ab").mkdir(parents=True)
+        (src / "hashes" / "a.xml").write_bytes(b"<a/>")
+        (src / "caps2" / "sha-256" / "ab" / "b.xml").write_bytes(b"<b/>")
+        (src / "README").write_bytes(b"not an entry")
+
+        self.assertEqual(self.store.import_directory(src), 2)
+        self.assertEqual(self.store.get("caps2/sha-256/ab/b.xml"), b"<b/>")
+
+        dest = self.root / "dest"
+        self.assertEqual(self.store.export_directory(dest), 2)
+        self.assertEqual((dest / "hashes" / "a.xml").read_bytes(), b"<a/>")
+        self.assertEqual(
+            (dest / "caps2" / "sha-256" / "ab" / "b.xml").read_bytes(),
+            b"<b/>",
+        )
+
+    def test_compact_keeps_entries(self):
+        self.store.put_many([("hashes/a.xml", b"<a/>")])
+        self.store.compact()
+        self.assertEqual(self.store.get("hashes/a.xml"), b"<a/>")
@@ -0,0 +1,109 @@
+########################################################################
+# File name: test_sid.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import unittest
+
+import aioxmpp
+import aioxmpp.misc as misc_xso
+import aioxmpp.xso as xso
+
+from aioxmpp.utils import namespaces
+
+
+class TestNamespaces(unittest.TestCase):
+    def test_namespace(self):
+        self.assertEqual(
+            namespaces.xep0359_sid,
+            "urn:xmpp:sid:0"
+        )
+
+
+class TestStanzaID(unittest.TestCase):
+    def test_is_xso(self):
+        self.assertTrue(issubclass(
+            misc_xso.StanzaID,
+            xso.XSO,
+        ))
+
+    def test_tag(self):
+        self.assertEqual(
+            misc_xso.StanzaID.TAG,
+            (namespaces.xep0359_sid, "stanza-id"),
+        )
+
+    def test_id_attr(self):
+        self.assertIsInstance(misc_xso.StanzaID.id_, xso.Attr)
+        self.assertEqual(misc_xso.StanzaID.id_.tag, (None, "id"))
+
+    def test_by_attr(self):
+        self.assertIsInstance(misc_xso.StanzaID.by, xso.Attr)
+        self.assertEqual(misc_xso.StanzaID.by.tag, (None, "by"))
+        self.assertIsInstance(misc_xso.StanzaID.by.type_, xso.JID)
+
+    def test_init(self):
+        sid = misc_xso.StanzaID("foo", aioxmpp.JID.fromstr("room@muc.test"))
+        self.assertEqual(sid.id_, "foo")
+        self.assertEqual(sid.by, aioxmpp.JID.fromstr("room@muc.test"))
+
+    def test_message_attribute(self):
+        self.assertIsInstance(
+            aioxmpp.Message.xep0359_stanza_ids,
+            xso.ChildList,
+        )
+        self.assertSetEqual(
+            aioxmpp.Message.xep0359_stanza_ids._classes,
+            {
+                misc_xso.StanzaID,
+            }
+        )
+
+
+class TestOriginID(unittest.TestCase):
+    def test_is_xso(self):
+        self.assertTrue(issubclass(
+            misc_xso.OriginID,
+            xso.XSO,
+        ))
+
+    def test_tag(self):
+        self.assertEqual(
+            misc_xso.OriginID.TAG,
+            (namespaces.xep0359_sid, "origin-id"),
+        )
+
+    def test_id_attr(self):
+        self.assertIsInstance(misc_xso.OriginID.id_, xso.Attr)
+        self.assertEqual(misc_xso.OriginID.id_.tag, (None, "id"))
+
+    def test_init(self):
+        self.assertEqual(misc_xso.OriginID("foo").id_, "foo")
+
+    def test_message_attribute(self):
+        self.assertIsInstance(
+            aioxmpp.Message.xep0359_origin_id,
+            xso.Child,
+        )
+        self.assertSetEqual(
+            aioxmpp.Message.xep0359_origin_id._classes,
+            {
+                misc_xso.OriginID,
+            }
+        )
@@ -41,6 +41,12 @@ from aioxmpp.testutils import (
 )
 
 
+TEST_ADDRESS1 = aioxmpp.JID.fromstr("a@muc.example/nick")
+TEST_ADDRESS2 = aioxmpp.JID.fromstr("b@muc.example/nick")
+TEST_ADDRESS3 = aioxmpp.JID.fromstr("c@muc.example/nick")
+TEST_OTHER_SERVICE_ADDRESS = aioxmpp.JID.fromstr("a@chat.example/nick")
+
+
 class Test_apply_jitter(unittest.TestCase):
     def test_uses_and_scales_random_upper_end(self):
         v = random.random() * 100
@@ -760,6 +766,185 @@ class TestMUCPinger(unittest.TestCase):
             self.p.ping_timeout = 1.
 
 
+class TestMUCPingScheduler(unittest.TestCase):
+    def setUp(self):
+        self.cc = make_connected_client()
+        self.cc.suspended = False
+        self.listener = unittest.mock.Mock()
+        self.loop = unittest.mock.Mock(["time", "call_at"])
+        self.loop.time.return_value = 100.0
+        self.logger = logging.getLogger(".".join([type(self).__module__,
+                                                  type(self).__qualname__]))
+        self.s = self_ping.MUCPingScheduler(self.cc, self.logger,
+                                            loop=self.loop)
+        self.pings = []
+
+        def ping(client, address):
+            fut = asyncio.Future()
+            self.pings.append((address, fut))
+            return fut
+
+        self.ping_patch = unittest.mock.patch(
+            "aioxmpp.ping.ping",
+            new=ping,
+        )
+        self.ping_patch.start()
+
+    def tearDown(self):
+        self.ping_patch.stop()
+        for _, fut in self.pings:
+            fut.cancel()
+        run_coroutine(asyncio.sleep(0))
+
+    def _pinger(self, address, name):
+        return self.s.create_pinger(
+            address,
+            getattr(self.listener, name).on_fresh,
+            getattr(self.listener, name).on_exited,
+            self.logger,
+        )
+
+    def _run_due(self, at):
+        self.loop.time.return_value = at
+        self.s._run_due()
+        run_coroutine(asyncio.sleep(0))
+
+    def test_defaults(self):
+        self.assertEqual(self.s.spread, timedelta(seconds=10))
+        self.assertEqual(self.s.max_in_flight_per_service, 4)
+
+    def test_create_pinger_returns_MUCPinger(self):
+        p = self._pinger(TEST_ADDRESS1, "p1")
+        self.assertIsInstance(p, self_ping.MUCPinger)
+        self.assertEqual(p.ping_address, TEST_ADDRESS1)
+
+    def test_start_delays_first_ping_randomly_within_spread(self):
+        p = self._pinger(TEST_ADDRESS1, "p1")
+
+        with unittest.mock.patch("random.random", return_value=0.25):
+            p.start()
+
+        self.loop.call_at.assert_called_once_with(102.5, self.s._run_due)
+        self.assertSequenceEqual(self.pings, [])
+
+    def test_sends_ping_when_due_and_reschedules(self):
+        p = self._pinger(TEST_ADDRESS1, "p1")
+        p.ping_interval = timedelta(seconds=60)
+        self.s.spread = timedelta()
+        p.start()
+
+        with unittest.mock.patch("aioxmpp.muc.self_ping._apply_jitter",
+                                 new=lambda v, amplitude: v):
+            self._run_due(100.0)
+
+        self.assertEqual([address for address, _ in self.pings],
+                         [TEST_ADDRESS1])
+        self.loop.call_at.assert_called_with(160.0, self.s._run_due)
+
+    def test_interprets_ping_results(self):
+        p = self._pinger(TEST_ADDRESS1, "p1")
+        self.s.spread = timedelta()
+        p.start()
+        self._run_due(100.0)
+
+        self.pings[0][1].set_result(None)
+        run_coroutine(asyncio.sleep(0))
+
+        self.listener.p1.on_fresh.assert_called_once_with()
+
+    def test_omits_pings_while_suspended(self):
+        p = self._pinger(TEST_ADDRESS1, "p1")
+        self.s.spread = timedelta()
+        p.start()
+        self.cc.suspended = True
+        self._run_due(100.0)
+
+        self.assertSequenceEqual(self.pings, [])
+
+    def test_limits_pings_in_flight_per_service(self):
+        self.s.spread = timedelta()
+        self.s.max_in_flight_per_service = 2
+        p1 = self._pinger(TEST_ADDRESS1, "p1")
+        p2 = self._pinger(TEST_ADDRESS2, "p2")
+        p3 = self._pinger(TEST_ADDRESS3, "p3")
+        p4 = self._pinger(TEST_OTHER_SERVICE_ADDRESS, "p4")
+        for p in [p1, p2, p3, p4]:
+            p.start()
+
+        self._run_due(100.0)
+
+        self.assertEqual(
+            [address for address, _ in self.pings],
+            [TEST_ADDRESS1, TEST_ADDRESS2, TEST_OTHER_SERVICE_ADDRESS],
+        )
+
+        self.pings[0][1].set_result(None)
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertEqual(
+            [address for address, _ in self.pings],
+            [TEST_ADDRESS1, TEST_ADDRESS2, TEST_OTHER_SERVICE_ADDRESS,
+             TEST_ADDRESS3],
+        )
+
+    def test_does_not_queue_waiting_pinger_twice(self):
+        self.s.spread = timedelta()
+        self.s.max_in_flight_per_service = 1
+        p1 = self._pinger(TEST_ADDRESS1, "p1")
+        p2 = self._pinger(TEST_ADDRESS2, "p2")
+        for p in [p1, p2]:
+            p.ping_interval = timedelta(seconds=60)
+            p.ping_timeout = timedelta(seconds=600)
+            p.start()
+
+        with unittest.mock.patch("aioxmpp.muc.self_ping._apply_jitter",
+                                 new=lambda v, amplitude: v):
+            for at in [100.0, 160.0, 220.0]:
+                self._run_due(at)
+
+        self.assertEqual([address for address, _ in self.pings],
+                         [TEST_ADDRESS1])
+
+        for i in range(3):
+            self.pings[i][1].set_result(None)
+            run_coroutine(asyncio.sleep(0))
+
+        self.assertEqual([address for address, _ in self.pings],
+                         [TEST_ADDRESS1, TEST_ADDRESS2, TEST_ADDRESS1])
+
+    def test_stop_cancels_pings_and_discards_results(self):
+        self.s.spread = timedelta()
+        p = self._pinger(TEST_ADDRESS1, "p1")
+        p.start()
+        self._run_due(100.0)
+
+        _, fut = self.pings[0]
+        p.stop()
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertTrue(fut.cancelled())
+        self.listener.p1.on_fresh.assert_not_called()
+
+        self._run_due(1000.0)
+        self.assertEqual(len(self.pings), 1)
+
+    def test_stop_drops_deferred_pings(self):
+        self.s.spread = timedelta()
+        self.s.max_in_flight_per_service = 1
+        p1 = self._pinger(TEST_ADDRESS1, "p1")
+        p2 = self._pinger(TEST_ADDRESS2, "p2")
+        p1.start()
+        p2.start()
+        self._run_due(100.0)
+
+        p2.stop()
+        self.pings[0][1].set_result(None)
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertEqual([address for address, _ in self.pings],
+                         [TEST_ADDRESS1])
+
+
 class TestMUCMonitor(unittest.TestCase):
     def setUp(self):
         self.monitor = unittest.mock.Mock(spec=aioxmpp.utils.AlivenessMonitor)
@@ -1104,3 +1289,27 @@ class TestMUCMonitor(unittest.TestCase):
     def test_rejects_float_for_hard_timeout(self):
         with self.assertRaises(TypeError):
             self.m.hard_timeout = 1.
+
+    def test_uses_pinger_from_scheduler(self):
+        scheduler = unittest.mock.Mock(spec=self_ping.MUCPingScheduler)
+
+        with unittest.mock.patch(
+                "aioxmpp.muc.self_ping.MUCPinger") as MUCPinger:
+            m = self_ping.MUCMonitor(
+                unittest.mock.sentinel.ping_address,
+                self.cc,
+                self.listener.on_stale,
+                self.listener.on_fresh,
+                self.listener.on_exited,
+                logger=self.logger,
+                scheduler=scheduler,
+            )
+
+        MUCPinger.assert_not_called()
+        scheduler.create_pinger.assert_called_once_with(
+            unittest.mock.sentinel.ping_address,
+            m._pinger_fresh_detected,
+            m._pinger_exited_detected,
+            self.logger,
+        )
+        self.assertEqual(m._pinger, scheduler.create_pinger())
@@ -27,6 +27,8 @@ import uuid
 
 from datetime import datetime, timedelta
 
+import pytz
+
 import aioxmpp
 import aioxmpp.callbacks
 import aioxmpp.errors
@@ -285,6 +287,37 @@ class TestOccupant(unittest.TestCase):
         self.assertEqual(occ.direct_jid, TEST_ENTITY_JID.bare())
         self.assertEqual(occ.is_self, unittest.mock.sentinel.is_self)
 
+    def test_from_presence_keeps_direct_full_jid(self):
+        presence = aioxmpp.stanza.Presence(
+            from_=TEST_MUC_JID.replace(resource="secondwitch"),
+            type_=aioxmpp.structs.PresenceType.AVAILABLE,
+        )
+
+        presence.xep0045_muc_user = muc_xso.UserExt(
+            items=[
+                muc_xso.UserItem(
+                    affiliation="owner",
+                    role="moderator",
+                    jid=TEST_ENTITY_JID
+                )
+            ]
+        )
+
+        occ = muc_service.Occupant.from_presence(
+            presence,
+            unittest.mock.sentinel.is_self
+        )
+
+        self.assertEqual(occ.direct_jid, TEST_ENTITY_JID.bare())
+        self.assertEqual(occ.direct_full_jid, TEST_ENTITY_JID)
+
+    def test_direct_full_jid_defaults_to_None(self):
+        occ = muc_service.Occupant(
+            TEST_MUC_JID.replace(resource="firstwitch"),
+            False,
+        )
+        self.assertIsNone(occ.direct_full_jid)
+
     def test_update_raises_for_different_occupantjids(self):
         presence = aioxmpp.stanza.Presence(
             from_=TEST_MUC_JID.replace(resource="secondwitch"),
@@ -622,6 +655,7 @@ class TestRoom(unittest.TestCase):
             self.jmuc._monitor_fresh,
             self.jmuc._monitor_exited,
             self.base.service.logger.getChild(),
+            scheduler=self.base.service.self_ping_scheduler,
         )
 
         for ev in ["on_enter", "on_exit", "on_muc_suspend", "on_muc_resume",
@@ -4798,6 +4832,461 @@ class TestRoom(unittest.TestCase):
             presence.from_,
         )
 
+    def _occupant_presence(self, nick, *,
+                           type_=aioxmpp.structs.PresenceType.AVAILABLE,
+                           show=aioxmpp.PresenceShow.NONE,
+                           role="participant",
+                           status_codes=()):
+        presence = aioxmpp.stanza.Presence(
+            type_=type_,
+            show=show,
+            from_=TEST_MUC_JID.replace(resource=nick),
+        )
+        presence.xep0045_muc_user = muc_xso.UserExt(
+            items=[
+                muc_xso.UserItem(affiliation="member",
+                                 role=role),
+            ],
+            status_codes=set(status_codes),
+        )
+        return presence
+
+    def _enter_coalescing(self):
+        self.jmuc.muc_coalescing_window = timedelta(seconds=60)
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("thirdwitch", status_codes={110})
+        )
+        self.base.mock_calls.clear()
+        self.listener.reset_mock()
+
+    def test_muc_coalescing_window_defaults_to_None(self):
+        self.assertIsNone(self.jmuc.muc_coalescing_window)
+
+    def test_coalescing_collects_join_burst_until_enter(self):
+        self.jmuc.muc_coalescing_window = timedelta(seconds=60)
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("firstwitch")
+        )
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("secondwitch")
+        )
+
+        self.assertSequenceEqual(self.base.mock_calls, [])
+        first, second = self.jmuc.members
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("thirdwitch", status_codes={110})
+        )
+
+        self.assertSequenceEqual(
+            self.base.mock_calls[:3],
+            [
+                unittest.mock.call.on_join(first),
+                unittest.mock.call.on_join(second),
+                unittest.mock.call.on_muc_enter(
+                    unittest.mock.ANY,
+                    self.jmuc.me,
+                    muc_status_codes=frozenset({110}),
+                ),
+            ]
+        )
+        self.listener.on_muc_occupant_batch.assert_called_once_with(
+            muc_service.OccupantBatch([first, second], [], [])
+        )
+
+    def test_coalescing_defers_and_collapses_changes(self):
+        self._enter_coalescing()
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("firstwitch")
+        )
+        self.jmuc.muc_flush_occupant_batch()
+        first = self.jmuc.members[1]
+        self.base.mock_calls.clear()
+        self.listener.reset_mock()
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("firstwitch",
+                                    show=aioxmpp.PresenceShow.AWAY)
+        )
+        presence = self._occupant_presence("firstwitch",
+                                           show=aioxmpp.PresenceShow.DND,
+                                           role="moderator")
+        self.jmuc._inbound_muc_user_presence(presence)
+
+        self.assertSequenceEqual(self.base.mock_calls, [])
+        self.assertEqual(first.role, "moderator")
+
+        self.jmuc.muc_flush_occupant_batch()
+
+        self.assertSequenceEqual(
+            self.base.mock_calls,
+            [
+                unittest.mock.call.on_presence_changed(first, None, presence),
+                unittest.mock.call.on_muc_role_changed(
+                    presence,
+                    first,
+                    actor=None,
+                    reason=None,
+                    status_codes=set(),
+                ),
+            ]
+        )
+        self.listener.on_muc_occupant_batch.assert_called_once_with(
+            muc_service.OccupantBatch([], [first], [])
+        )
+
+    def test_coalescing_drops_changes_which_were_reverted(self):
+        self._enter_coalescing()
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("firstwitch")
+        )
+        self.jmuc.muc_flush_occupant_batch()
+        self.base.mock_calls.clear()
+        self.listener.reset_mock()
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("firstwitch",
+                                    show=aioxmpp.PresenceShow.AWAY)
+        )
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("firstwitch")
+        )
+        self.jmuc.muc_flush_occupant_batch()
+
+        self.assertSequenceEqual(self.base.mock_calls, [])
+        self.listener.on_muc_occupant_batch.assert_not_called()
+
+    def test_coalescing_drops_join_and_leave_within_window(self):
+        self._enter_coalescing()
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("firstwitch")
+        )
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence(
+                "firstwitch",
+                type_=aioxmpp.structs.PresenceType.UNAVAILABLE,
+                role="none",
+            )
+        )
+        self.jmuc.muc_flush_occupant_batch()
+
+        self.assertSequenceEqual(self.base.mock_calls, [])
+        self.assertSequenceEqual(self.jmuc.members, [self.jmuc.me])
+
+    def test_coalescing_emits_only_leave_for_leaving_occupant(self):
+        self._enter_coalescing()
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("firstwitch")
+        )
+        self.jmuc.muc_flush_occupant_batch()
+        first = self.jmuc.members[1]
+        self.base.mock_calls.clear()
+        self.listener.reset_mock()
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence(
+                "firstwitch",
+                type_=aioxmpp.structs.PresenceType.UNAVAILABLE,
+                role="none",
+            )
+        )
+        self.jmuc.muc_flush_occupant_batch()
+
+        self.assertSequenceEqual(
+            self.base.mock_calls,
+            [
+                unittest.mock.call.on_leave(
+                    first,
+                    muc_leave_mode=muc_service.LeaveMode.NORMAL,
+                    muc_actor=None,
+                    muc_reason=None,
+                    muc_status_codes=set(),
+                ),
+            ]
+        )
+        self.listener.on_muc_occupant_batch.assert_called_once_with(
+            muc_service.OccupantBatch([], [], [first])
+        )
+
+    def test_coalescing_flushes_after_window(self):
+        self._enter_coalescing()
+        self.jmuc.muc_coalescing_window = timedelta(seconds=0.01)
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("firstwitch")
+        )
+        self.assertSequenceEqual(self.base.mock_calls, [])
+
+        run_coroutine(asyncio.sleep(0.05))
+
+        self.base.on_join.assert_called_once_with(self.jmuc.members[1])
+
+    def test_coalescing_flushes_before_suspend(self):
+        self._enter_coalescing()
+
+        self.jmuc._inbound_muc_user_presence(
+            self._occupant_presence("firstwitch")
+        )
+        first = self.jmuc.members[1]
+
+        self.jmuc._suspend()
+
+        self.assertSequenceEqual(
+            self.base.mock_calls,
+            [
+                unittest.mock.call.on_join(first),
+                unittest.mock.call.on_muc_suspend(),
+            ]
+        )
+
+    def _occupant_with_jid(self, nick, jid, *,
+                           role="participant",
+                           affiliation="member",
+                           status_codes=(),
+                           new_nick=None,
+                           type_=aioxmpp.structs.PresenceType.AVAILABLE):
+        presence = aioxmpp.stanza.Presence(
+            type_=type_,
+            from_=TEST_MUC_JID.replace(resource=nick),
+        )
+        presence.xep0045_muc_user = muc_xso.UserExt(
+            items=[
+                muc_xso.UserItem(affiliation=affiliation,
+                                 role=role,
+                                 jid=jid,
+                                 nick=new_nick),
+            ],
+            status_codes=set(status_codes),
+        )
+        return presence
+
+    def _fill_room(self):
+        self.jmuc._inbound_muc_user_presence(self._occupant_with_jid(
+            "firstwitch",
+            aioxmpp.JID.fromstr("crone1@shakespeare.lit/desktop"),
+        ))
+        self.jmuc._inbound_muc_user_presence(self._occupant_with_jid(
+            "secondwitch",
+            aioxmpp.JID.fromstr("crone2@shakespeare.lit/laptop"),
+            role="moderator",
+        ))
+        self.jmuc._inbound_muc_user_presence(self._occupant_with_jid(
+            "thirdwitch",
+            aioxmpp.JID.fromstr("hag66@shakespeare.lit/pda"),
+            role="moderator",
+            affiliation="owner",
+            status_codes={110},
+        ))
+
+    def test_muc_get_occupant(self):
+        self._fill_room()
+
+        first = self.jmuc.muc_get_occupant("firstwitch")
+        self.assertEqual(first.conversation_jid,
+                         TEST_MUC_JID.replace(resource="firstwitch"))
+        self.assertIs(self.jmuc.muc_get_occupant("thirdwitch"),
+                      self.jmuc.me)
+        self.assertIsNone(self.jmuc.muc_get_occupant("fourthwitch"))
+
+    def test_muc_find_occupants(self):
+        self._fill_room()
+        first = self.jmuc.muc_get_occupant("firstwitch")
+        second = self.jmuc.muc_get_occupant("secondwitch")
+        me = self.jmuc.me
+
+        self.assertSetEqual(self.jmuc.muc_find_occupants(),
+                            {first, second, me})
+        self.assertSetEqual(self.jmuc.muc_find_occupants(role="moderator"),
+                            {second, me})
+        self.assertSetEqual(
+            self.jmuc.muc_find_occupants(role="moderator",
+                                         affiliation="member"),
+            {second},
+        )
+        self.assertSetEqual(
+            self.jmuc.muc_find_occupants(
+                direct_jid=aioxmpp.JID.fromstr("crone1@shakespeare.lit"),
+            ),
+            {first},
+        )
+        self.assertSetEqual(
+            self.jmuc.muc_find_occupants(
+                direct_jid=aioxmpp.JID.fromstr(
+                    "crone2@shakespeare.lit/laptop"
+                ),
+            ),
+            {second},
+        )
+        self.assertSetEqual(
+            self.jmuc.muc_find_occupants(
+                direct_jid=aioxmpp.JID.fromstr(
+                    "crone2@shakespeare.lit/other"
+                ),
+            ),
+            set(),
+        )
+        self.assertSetEqual(
+            self.jmuc.muc_find_occupants(affiliation="owner"),
+            {me},
+        )
+
+    def test_occupant_indexes_follow_changes(self):
+        self._fill_room()
+        first = self.jmuc.muc_get_occupant("firstwitch")
+        second = self.jmuc.muc_get_occupant("secondwitch")
+
+        self.jmuc._inbound_muc_user_presence(self._occupant_with_jid(
+            "firstwitch",
+            aioxmpp.JID.fromstr("crone1@shakespeare.lit/desktop"),
+            role="moderator",
+            affiliation="admin",
+        ))
+
+        self.assertSetEqual(
+            self.jmuc.muc_find_occupants(role="participant"),
+            set(),
+        )
+        self.assertSetEqual(
+            self.jmuc.muc_find_occupants(affiliation="admin"),
+            {first},
+        )
+
+        self.jmuc._inbound_muc_user_presence(self._occupant_with_jid(
+            "firstwitch",
+            aioxmpp.JID.fromstr("crone1@shakespeare.lit/desktop"),
+            type_=aioxmpp.structs.PresenceType.UNAVAILABLE,
+            status_codes={303},
+            new_nick="oldhag",
+        ))
+
+        self.assertIsNone(self.jmuc.muc_get_occupant("firstwitch"))
+        self.assertIs(self.jmuc.muc_get_occupant("oldhag"), first)
+        self.assertSetEqual(
+            self.jmuc.muc_find_occupants(affiliation="admin"),
+            {first},
+        )
+
+        self.jmuc._inbound_muc_user_presence(self._occupant_with_jid(
+            "secondwitch",
+            aioxmpp.JID.fromstr("crone2@shakespeare.lit/laptop"),
+            role="none",
+            type_=aioxmpp.structs.PresenceType.UNAVAILABLE,
+        ))
+
+        self.assertIsNone(self.jmuc.muc_get_occupant("secondwitch"))
+        self.assertNotIn(
+            second,
+            self.jmuc.muc_find_occupants(
+                direct_jid=aioxmpp.JID.fromstr("crone2@shakespeare.lit"),
+            )
+        )
+        self.assertSetEqual(
+            self.jmuc.muc_find_occupants(role="moderator",
+                                         affiliation="member"),
+            set(),
+        )
+
+    def _message_with_ids(self, nick="secondwitch", *,
+                          stanza_id=None, by=TEST_MUC_JID, origin_id=None):
+        msg = aioxmpp.stanza.Message(
+            from_=TEST_MUC_JID.replace(resource=nick),
+            type_=aioxmpp.structs.MessageType.GROUPCHAT,
+        )
+        msg.body[None] = "foo"
+        if stanza_id is not None:
+            msg.xep0359_stanza_ids.append(
+                aioxmpp.misc.StanzaID(stanza_id, by)
+            )
+        if origin_id is not None:
+            msg.xep0359_origin_id = aioxmpp.misc.OriginID(origin_id)
+        return msg
+
+    def _receive(self, msg):
+        self.jmuc._handle_message(
+            msg,
+            msg.from_,
+            False,
+            unittest.mock.sentinel.source,
+        )
+
+    def test_muc_max_seen_ids_default(self):
+        self.assertEqual(self.jmuc.muc_max_seen_ids, 256)
+
+    def test_muc_last_stanza_id_initially_None(self):
+        self.assertIsNone(self.jmuc.muc_last_stanza_id)
+
+    def test_drops_message_with_duplicate_stanza_id(self):
+        self._receive(self._message_with_ids(stanza_id="s1"))
+        self._receive(self._message_with_ids(stanza_id="s1"))
+        self._receive(self._message_with_ids(stanza_id="s2"))
+
+        self.assertEqual(len(self.base.on_message.mock_calls), 2)
+        self.assertEqual(self.jmuc.muc_last_stanza_id, "s2")
+
+    def test_ignores_stanza_ids_assigned_by_others(self):
+        other = TEST_MUC_JID.replace(localpart="other")
+        self._receive(self._message_with_ids(stanza_id="s1", by=other))
+        self._receive(self._message_with_ids(stanza_id="s1", by=other))
+
+        self.assertEqual(len(self.base.on_message.mock_calls), 2)
+        self.assertIsNone(self.jmuc.muc_last_stanza_id)
+
+    def test_drops_message_with_duplicate_origin_id_from_same_sender(self):
+        self._receive(self._message_with_ids(origin_id="o1"))
+        self._receive(self._message_with_ids(origin_id="o1"))
+        self._receive(self._message_with_ids("firstwitch", origin_id="o1"))
+
+        self.assertEqual(len(self.base.on_message.mock_calls), 2)
+
+    def test_drops_duplicate_before_topic_change(self):
+        msg = self._message_with_ids(stanza_id="s1")
+        msg.body.clear()
+        msg.subject[None] = "topic"
+        self._receive(msg)
+        self.base.on_topic_changed.reset_mock()
+
+        self._receive(msg)
+
+        self.base.on_topic_changed.assert_not_called()
+
+    def test_does_not_deduplicate_sent_messages(self):
+        msg = self._message_with_ids(stanza_id="s1")
+        self._receive(msg)
+        self.jmuc._handle_message(
+            msg,
+            msg.from_,
+            True,
+            unittest.mock.sentinel.source,
+        )
+
+        self.assertEqual(len(self.base.on_message.mock_calls), 2)
+
+    def test_seen_ids_are_bounded(self):
+        self.jmuc.muc_max_seen_ids = 2
+        for id_ in ["s1", "s2", "s3"]:
+            self._receive(self._message_with_ids(stanza_id=id_))
+        self.assertEqual(len(self.jmuc._muc_seen_ids), 2)
+
+        self._receive(self._message_with_ids(stanza_id="s1"))
+        self._receive(self._message_with_ids(stanza_id="s3"))
+
+        self.assertEqual(len(self.base.on_message.mock_calls), 4)
+
+    def test_last_seen_uses_delay_stamp(self):
+        msg = self._message_with_ids(stanza_id="s1")
+        msg.xep0203_delay.append(aioxmpp.misc.Delay())
+        msg.xep0203_delay[0].stamp = datetime(2020, 1, 1, 12, 0, 0,
+                                              tzinfo=pytz.utc)
+        self._receive(msg)
+
+        self.assertEqual(self.jmuc._muc_last_seen,
+                         datetime(2020, 1, 1, 12, 0, 0))
+
 
 class TestService(unittest.TestCase):
     def test_is_service(self):
@@ -7051,3 +7540,254 @@ class TestService(unittest.TestCase):
         self.assertIsInstance(cycle_history, muc_xso.History)
         self.assertEqual(cycle_history.maxchars, 0)
         self.assertEqual(cycle_history.maxstanzas, 0)
+
+    def _join_presence_targets(self):
+        result = []
+        for _, (stanza,), _ in self.cc.enqueue.mock_calls:
+            if (isinstance(stanza, aioxmpp.stanza.Presence) and
+                    stanza.type_ == aioxmpp.structs.PresenceType.AVAILABLE):
+                result.append(stanza.to.bare())
+        return result
+
+    def _enter(self, mucjid, nick="thirdwitch"):
+        presence = aioxmpp.stanza.Presence(
+            from_=mucjid.replace(resource=nick),
+        )
+        presence.xep0045_muc_user = muc_xso.UserExt(
+            status_codes={110},
+        )
+        self.s._handle_presence(presence, presence.from_, False)
+
+    def test_join_concurrency_defaults_to_None(self):
+        self.assertIsNone(self.s.join_concurrency)
+
+    def test_join_uses_priority_argument(self):
+        room, _ = self.s.join(TEST_MUC_JID, "thirdwitch", priority=10)
+        self.assertEqual(room.muc_join_priority, 10)
+
+    def test_join_concurrency_limits_join_presences_in_flight(self):
+        jid1 = TEST_MUC_JID.replace(localpart="a")
+        jid2 = TEST_MUC_JID.replace(localpart="b")
+        jid3 = TEST_MUC_JID.replace(localpart="c")
+        self.s.join_concurrency = 2
+
+        self.s.join(jid1, "thirdwitch")
+        self.s.join(jid2, "thirdwitch")
+        _, fut3 = self.s.join(jid3, "thirdwitch")
+
+        self.assertSequenceEqual(self._join_presence_targets(), [jid1, jid2])
+
+        self._enter(jid2)
+
+        self.assertSequenceEqual(self._join_presence_targets(),
+                                 [jid1, jid2, jid3])
+        self.listener.on_muc_join_progress.assert_called_once_with(1, 3)
+        self.assertFalse(fut3.done())
+
+    def test_queued_joins_are_sent_by_priority(self):
+        jid1 = TEST_MUC_JID.replace(localpart="a")
+        jid2 = TEST_MUC_JID.replace(localpart="b")
+        jid3 = TEST_MUC_JID.replace(localpart="c")
+        jid4 = TEST_MUC_JID.replace(localpart="d")
+        self.s.join_concurrency = 1
+
+        self.s.join(jid1, "thirdwitch")
+        self.s.join(jid2, "thirdwitch")
+        self.s.join(jid3, "thirdwitch", priority=5)
+        self.s.join(jid4, "thirdwitch")
+
+        self._enter(jid1)
+        self._enter(jid3)
+        self._enter(jid2)
+
+        self.assertSequenceEqual(self._join_presence_targets(),
+                                 [jid1, jid3, jid2, jid4])
+
+    def test_failed_join_frees_slot(self):
+        jid1 = TEST_MUC_JID.replace(localpart="a")
+        jid2 = TEST_MUC_JID.replace(localpart="b")
+        self.s.join_concurrency = 1
+
+        _, fut1 = self.s.join(jid1, "thirdwitch")
+        self.s.join(jid2, "thirdwitch")
+
+        response = aioxmpp.stanza.Presence(
+            from_=jid1,
+            type_=aioxmpp.structs.PresenceType.ERROR)
+        response.error = aioxmpp.stanza.Error()
+        self.s._handle_presence(response, response.from_, False)
+
+        self.assertIsInstance(fut1.exception(), aioxmpp.errors.XMPPCancelError)
+        self.assertSequenceEqual(self._join_presence_targets(), [jid1, jid2])
+        self.listener.on_muc_join_progress.assert_called_once_with(1, 2)
+
+    def test_cancelled_queued_join_is_not_sent(self):
+        jid1 = TEST_MUC_JID.replace(localpart="a")
+        jid2 = TEST_MUC_JID.replace(localpart="b")
+        jid3 = TEST_MUC_JID.replace(localpart="c")
+        self.s.join_concurrency = 1
+
+        self.s.join(jid1, "thirdwitch")
+        _, fut2 = self.s.join(jid2, "thirdwitch")
+        self.s.join(jid3, "thirdwitch")
+
+        fut2.cancel()
+        run_coroutine(asyncio.sleep(0))
+        self.listener.on_muc_join_progress.assert_called_once_with(1, 3)
+
+        self._enter(jid1)
+
+        self.assertSequenceEqual(self._join_presence_targets(), [jid1, jid3])
+
+    def test_join_progress_counters_reset_when_idle(self):
+        jid1 = TEST_MUC_JID.replace(localpart="a")
+        jid2 = TEST_MUC_JID.replace(localpart="b")
+
+        self.s.join(jid1, "thirdwitch")
+        self.s.join(jid2, "thirdwitch")
+        self._enter(jid1)
+        self._enter(jid2)
+
+        self.assertSequenceEqual(
+            self.listener.on_muc_join_progress.mock_calls,
+            [
+                unittest.mock.call(1, 2),
+                unittest.mock.call(2, 2),
+            ]
+        )
+        self.listener.on_muc_join_progress.reset_mock()
+
+        self.s.join(TEST_MUC_JID, "thirdwitch")
+        self._enter(TEST_MUC_JID)
+
+        self.listener.on_muc_join_progress.assert_called_once_with(1, 1)
+
+    def test_join_latency_is_recorded(self):
+        with unittest.mock.patch.object(
+                asyncio.get_event_loop(), "time") as time:
+            time.return_value = 10.0
+            room, _ = self.s.join(TEST_MUC_JID, "thirdwitch")
+            self.assertIsNone(room.muc_join_latency)
+            time.return_value = 10.5
+            self._enter(TEST_MUC_JID)
+
+        self.assertEqual(room.muc_join_latency, timedelta(seconds=0.5))
+
+    def test_stream_loss_requeues_autorejoin_rooms_with_limit(self):
+        jid1 = TEST_MUC_JID.replace(localpart="a")
+        jid2 = TEST_MUC_JID.replace(localpart="b")
+        jid3 = TEST_MUC_JID.replace(localpart="c")
+        self.s.join_concurrency = 1
+
+        self.s.join(jid1, "thirdwitch")
+        self.s.join(jid2, "thirdwitch", priority=-1)
+        self.s.join(jid3, "thirdwitch")
+        self._enter(jid1)
+        self._enter(jid3)
+
+        self.cc.on_stream_destroyed()
+        self.cc.enqueue.mock_calls.clear()
+        self.listener.on_muc_join_progress.reset_mock()
+
+        self.cc.on_stream_established()
+
+        self.assertSequenceEqual(self._join_presence_targets(), [jid1])
+
+        self._enter(jid1)
+        self._enter(jid3)
+
+        self.assertSequenceEqual(self._join_presence_targets(),
+                                 [jid1, jid3, jid2])
+        self.assertSequenceEqual(
+            self.listener.on_muc_join_progress.mock_calls,
+            [
+                unittest.mock.call(1, 3),
+                unittest.mock.call(2, 3),
+            ]
+        )
+
+    def _autorejoin_history_since(self, stanza_id):
+        room, _ = self.s.join(TEST_MUC_JID, "thirdwitch")
+        self._enter(TEST_MUC_JID)
+
+        last_seen = datetime(2020, 1, 1, 12, 0, 0)
+        destroyed = datetime(2020, 1, 1, 13, 0, 0)
+        msg = aioxmpp.Message(
+            type_=aioxmpp.MessageType.GROUPCHAT,
+            from_=TEST_MUC_JID.replace(resource="firstwitch"),
+            to=TEST_ENTITY_JID,
+        )
+        msg.body[None] = "foo"
+        if stanza_id is not None:
+            msg.xep0359_stanza_ids.append(
+                aioxmpp.misc.StanzaID(stanza_id, TEST_MUC_JID)
+            )
+        with unittest.mock.patch(
+                "aioxmpp.muc.service.datetime") as mock_datetime:
+            mock_datetime.utcnow.return_value = last_seen
+            self.s._handle_message(
+                msg, msg.from_, False,
+                im_dispatcher.MessageSource.STREAM,
+            )
+
+            mock_datetime.utcnow.return_value = destroyed
+            self.cc.on_stream_destroyed()
+
+        self.cc.enqueue.mock_calls.clear()
+        self.cc.on_stream_established()
+
+        _, (stanza,), _ = self.cc.enqueue.mock_calls[-1]
+        return stanza.xep0045_muc.history.since, last_seen, destroyed
+
+    def test_autorejoin_requests_history_since_last_message(self):
+        since, last_seen, _ = self._autorejoin_history_since("s1")
+        self.assertEqual(since, last_seen)
+
+    def test_autorejoin_without_stanza_ids_requests_history_since_loss(self):
+        since, _, destroyed = self._autorejoin_history_since(None)
+        self.assertEqual(since, destroyed)
+
+    def test_rejoin_history_replay_skips_seen_messages(self):
+        room, _ = self.s.join(TEST_MUC_JID, "thirdwitch")
+        self._enter(TEST_MUC_JID)
+        on_message = unittest.mock.Mock(return_value=None)
+        room.on_message.connect(on_message)
+
+        stamp = datetime(2020, 1, 1, 12, 0, 0, tzinfo=pytz.utc)
+
+        def make_message(id_, delayed):
+            msg = aioxmpp.Message(
+                type_=aioxmpp.MessageType.GROUPCHAT,
+                from_=TEST_MUC_JID.replace(resource="firstwitch"),
+                to=TEST_ENTITY_JID,
+            )
+            msg.body[None] = id_
+            msg.xep0359_stanza_ids.append(
+                aioxmpp.misc.StanzaID(id_, TEST_MUC_JID)
+            )
+            if delayed:
+                msg.xep0203_delay.append(aioxmpp.misc.Delay())
+                msg.xep0203_delay[0].stamp = stamp
+            return msg
+
+        self.s._handle_message(make_message("s1", True), TEST_MUC_JID,
+                               False, im_dispatcher.MessageSource.STREAM)
+
+        self.cc.on_stream_destroyed()
+        self.cc.enqueue.mock_calls.clear()
+        self.cc.on_stream_established()
+
+        _, (stanza,), _ = self.cc.enqueue.mock_calls[-1]
+        self.assertEqual(stanza.xep0045_muc.history.since,
+                         stamp.replace(tzinfo=None))
+
+        self._enter(TEST_MUC_JID)
+        for id_ in ["s1", "s2"]:
+            self.s._handle_message(make_message(id_, True), TEST_MUC_JID,
+                                   False, im_dispatcher.MessageSource.STREAM)
+
+        self.assertEqual(
+            [msg.body[None] for (msg, *_), _ in on_message.call_args_list],
+            ["s1", "s2"],
+        )
+        self.assertEqual(room.muc_last_stanza_id, "s2")
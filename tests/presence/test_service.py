@@ -19,10 +19,15 @@
 # <http://www.gnu.org/licenses/>.
 #
 ########################################################################
+import asyncio
 import types
 import unittest
 
+from datetime import timedelta
+
 import aioxmpp
+import aioxmpp.avatar.xso
+import aioxmpp.entitycaps.xso
 import aioxmpp.presence.service as presence_service
 import aioxmpp.service as service
 import aioxmpp.stanza as stanza
@@ -233,6 +238,282 @@ class TestPresenceClient(unittest.TestCase):
     def test_get_most_available_stanza_returns_None_for_unavailable_JID(self):
         self.assertIsNone(self.s.get_most_available_stanza(TEST_PEER_JID1))
 
+    def test_get_most_available_stanza_prefers_higher_priority(self):
+        stdnd = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                                show=structs.PresenceShow.DND,
+                                from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(stdnd)
+
+        staway = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                                 show=structs.PresenceShow.AWAY,
+                                 from_=TEST_PEER_JID1.replace(resource="bar"))
+        staway.priority = 10
+        self.s.handle_presence(staway)
+
+        self.assertIs(
+            self.s.get_most_available_stanza(TEST_PEER_JID1),
+            staway
+        )
+
+        stneg = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                                show=structs.PresenceShow.CHAT,
+                                from_=TEST_PEER_JID1.replace(resource="baz"))
+        stneg.priority = -1
+        self.s.handle_presence(stneg)
+
+        self.assertIs(
+            self.s.get_most_available_stanza(TEST_PEER_JID1),
+            staway
+        )
+
+    def test_get_most_available_stanza_tracks_degrading_resource(self):
+        st1 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              from_=TEST_PEER_JID1.replace(resource="foo"))
+        st1.priority = 10
+        self.s.handle_presence(st1)
+
+        st2 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              from_=TEST_PEER_JID1.replace(resource="bar"))
+        st2.priority = 5
+        self.s.handle_presence(st2)
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1), st1)
+
+        st1_new = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                                  from_=st1.from_)
+        st1_new.priority = 1
+        self.s.handle_presence(st1_new)
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1), st2)
+
+        st1_newer = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                                    from_=st1.from_)
+        st1_newer.priority = 6
+        self.s.handle_presence(st1_newer)
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1),
+                      st1_newer)
+
+    def test_get_most_available_stanza_tracks_unavailability(self):
+        st1 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              show=structs.PresenceShow.CHAT,
+                              from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st1)
+
+        st2 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              show=structs.PresenceShow.XA,
+                              from_=TEST_PEER_JID1.replace(resource="bar"))
+        self.s.handle_presence(st2)
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1), st1)
+
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.UNAVAILABLE,
+                            from_=st1.from_)
+        )
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1), st2)
+
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.UNAVAILABLE,
+                            from_=st2.from_)
+        )
+
+        self.assertIsNone(self.s.get_most_available_stanza(TEST_PEER_JID1))
+
+    def test_get_most_available_stanza_is_available_in_signal(self):
+        results = []
+
+        def on_available(full_jid, stanza):
+            results.append(self.s.get_most_available_stanza(full_jid.bare()))
+
+        self.s.on_available.connect(on_available)
+
+        st1 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st1)
+
+        self.assertSequenceEqual(results, [st1])
+
+    def test_get_most_available_stanza_after_error(self):
+        st1 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st1)
+
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.ERROR,
+                            from_=TEST_PEER_JID1)
+        )
+
+        self.assertIsNone(self.s.get_most_available_stanza(TEST_PEER_JID1))
+
+        st2 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              from_=TEST_PEER_JID1.replace(resource="bar"))
+        self.s.handle_presence(st2)
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1), st2)
+
+    def test_get_most_available_stanza_ignores_bare_jid_presence(self):
+        stbare = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                                 from_=TEST_PEER_JID1)
+        stbare.priority = 10
+        self.s.handle_presence(stbare)
+
+        self.assertIsNone(self.s.get_most_available_stanza(TEST_PEER_JID1))
+
+        st1 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st1)
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1), st1)
+
+    def test_get_most_available_stanza_with_compact_storage(self):
+        self.s.compact_storage = True
+
+        st1 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              show=structs.PresenceShow.AWAY,
+                              from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st1)
+        st2 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              show=structs.PresenceShow.CHAT,
+                              from_=TEST_PEER_JID1.replace(resource="bar"))
+        self.s.handle_presence(st2)
+
+        result = self.s.get_most_available_stanza(TEST_PEER_JID1)
+        self.assertEqual(result.from_, st2.from_)
+        self.assertEqual(result.show, structs.PresenceShow.CHAT)
+
+    def test_compact_storage_defaults(self):
+        self.assertFalse(self.s.compact_storage)
+        self.assertEqual(self.s.retained_payloads, frozenset())
+
+    def test_compact_storage_rebuilds_stanza(self):
+        self.s.compact_storage = True
+
+        st = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                             show=structs.PresenceShow.AWAY,
+                             from_=TEST_PEER_JID1.replace(resource="foo"))
+        st.priority = 10
+        st.status[None] = "foo"
+        st.status[structs.LanguageTag.fromstr("de")] = "bar"
+        st.xep0115_caps = aioxmpp.entitycaps.xso.Caps115(
+            "node", "ver", "sha-1"
+        )
+        self.s.handle_presence(st)
+
+        result = self.s.get_stanza(st.from_)
+        self.assertIsNot(result, st)
+        self.assertIsInstance(result, stanza.Presence)
+        self.assertEqual(result.type_, structs.PresenceType.AVAILABLE)
+        self.assertEqual(result.from_, st.from_)
+        self.assertEqual(result.show, structs.PresenceShow.AWAY)
+        self.assertEqual(result.priority, 10)
+        self.assertDictEqual(dict(result.status), dict(st.status))
+        self.assertIsNone(result.xep0115_caps)
+
+        resources = self.s.get_peer_resources(TEST_PEER_JID1)
+        self.assertEqual(set(resources.keys()), {"foo"})
+        self.assertEqual(resources["foo"].show, structs.PresenceShow.AWAY)
+
+        self.assertEqual(
+            self.s.get_most_available_stanza(TEST_PEER_JID1).from_,
+            st.from_,
+        )
+
+    def test_compact_storage_retains_selected_payloads(self):
+        self.s.compact_storage = True
+        self.s.retained_payloads = [aioxmpp.entitycaps.xso.Caps115]
+        self.assertEqual(
+            self.s.retained_payloads,
+            frozenset([aioxmpp.entitycaps.xso.Caps115]),
+        )
+
+        caps = aioxmpp.entitycaps.xso.Caps115("node", "ver", "sha-1")
+        st = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                             from_=TEST_PEER_JID1.replace(resource="foo"))
+        st.xep0115_caps = caps
+        st.xep0153_x = aioxmpp.avatar.xso.VCardTempUpdate("abc")
+        self.s.handle_presence(st)
+
+        result = self.s.get_stanza(st.from_)
+        self.assertIs(result.xep0115_caps, caps)
+        self.assertIsNone(result.xep0153_x)
+
+    def test_retained_payloads_rejects_unregistered_classes(self):
+        class Foo(aioxmpp.xso.XSO):
+            TAG = ("urn:example", "foo")
+
+        with self.assertRaisesRegex(ValueError,
+                                    "not a registered presence payload"):
+            self.s.retained_payloads = [Foo]
+
+        with self.assertRaises(ValueError):
+            self.s.retained_payloads = [object]
+
+        self.assertEqual(self.s.retained_payloads, frozenset())
+
+    def test_compact_storage_keeps_error_stanza(self):
+        self.s.compact_storage = True
+
+        st = stanza.Presence(type_=structs.PresenceType.ERROR,
+                             from_=TEST_PEER_JID1)
+        self.s.handle_presence(st)
+
+        self.assertIs(self.s.get_stanza(TEST_PEER_JID1), st)
+        self.assertIs(
+            self.s.get_stanza(TEST_PEER_JID1.replace(resource="foo")),
+            st,
+        )
+
+    def test_compact_storage_tracks_unavailability(self):
+        self.s.compact_storage = True
+
+        st = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                             from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st)
+
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.UNAVAILABLE,
+                            from_=st.from_)
+        )
+
+        self.assertIsNone(self.s.get_stanza(st.from_))
+        self.assertDictEqual(self.s.get_peer_resources(TEST_PEER_JID1), {})
+
+    def test_enabling_compact_storage_converts_stored_presences(self):
+        st = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                             show=structs.PresenceShow.DND,
+                             from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st)
+        self.assertIs(self.s.get_stanza(st.from_), st)
+
+        self.s.compact_storage = True
+
+        self.assertIsInstance(
+            self.s._presences[TEST_PEER_JID1]["foo"],
+            presence_service._CompactPresence,
+        )
+        result = self.s.get_stanza(st.from_)
+        self.assertIsNot(result, st)
+        self.assertEqual(result.show, structs.PresenceShow.DND)
+
+    def test_signals_carry_original_stanza_in_compact_storage(self):
+        self.s.compact_storage = True
+
+        st = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                             from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st)
+
+        self.listener.on_available.assert_called_once_with(st.from_, st)
+
+    def test_compact_record_uses_slots(self):
+        st = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                             from_=TEST_PEER_JID1.replace(resource="foo"))
+        record = presence_service._CompactPresence(st, ())
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertIsNone(record.status)
+        self.assertIsNone(record.payloads)
+
     def test_handle_presence_emits_available_signals(self):
         base = unittest.mock.Mock()
         base.bare.return_value = False
@@ -444,6 +725,176 @@ class TestPresenceClient(unittest.TestCase):
             base.mock_calls
         )
 
+    def test_coalescing_window_defaults_to_None(self):
+        self.assertIsNone(self.s.coalescing_window)
+
+    def _coalesce(self, seconds=60):
+        self.s.coalescing_window = timedelta(seconds=seconds)
+
+    def test_coalescing_defers_signals_until_flush(self):
+        self._coalesce()
+
+        st = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                             from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st)
+
+        self.assertSequenceEqual(self.listener.mock_calls, [])
+        self.assertEqual(self.s.get_stanza(st.from_), st)
+
+        self.s.flush_presence_batch()
+
+        self.assertSequenceEqual(
+            self.listener.mock_calls,
+            [
+                unittest.mock.call.on_bare_available(st),
+                unittest.mock.call.on_available(st.from_, st),
+                unittest.mock.call.on_presence_batch(
+                    presence_service.PresenceBatch(
+                        {st.from_: st}, {}, {},
+                    )
+                ),
+            ]
+        )
+
+    def test_coalescing_collapses_changes_to_last_stanza(self):
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                            from_=TEST_PEER_JID1.replace(resource="foo"))
+        )
+        self.listener.mock_calls.clear()
+        self._coalesce()
+
+        for show in [structs.PresenceShow.AWAY,
+                     structs.PresenceShow.DND,
+                     structs.PresenceShow.CHAT]:
+            st = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                                 show=show,
+                                 from_=TEST_PEER_JID1.replace(resource="foo"))
+            self.s.handle_presence(st)
+
+        self.s.flush_presence_batch()
+
+        self.assertSequenceEqual(
+            self.listener.mock_calls,
+            [
+                unittest.mock.call.on_changed(st.from_, st),
+                unittest.mock.call.on_presence_batch(
+                    presence_service.PresenceBatch(
+                        {}, {st.from_: st}, {},
+                    )
+                ),
+            ]
+        )
+
+    def test_coalescing_drops_flapping_resource(self):
+        self._coalesce()
+
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                            from_=TEST_PEER_JID1.replace(resource="foo"))
+        )
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.UNAVAILABLE,
+                            from_=TEST_PEER_JID1.replace(resource="foo"))
+        )
+
+        self.s.flush_presence_batch()
+
+        self.assertSequenceEqual(self.listener.mock_calls, [])
+
+    def test_coalescing_reports_unavailable_after_change(self):
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                            from_=TEST_PEER_JID1.replace(resource="foo"))
+        )
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                            from_=TEST_PEER_JID1.replace(resource="bar"))
+        )
+        self.listener.mock_calls.clear()
+        self._coalesce()
+
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                            show=structs.PresenceShow.AWAY,
+                            from_=TEST_PEER_JID1.replace(resource="foo"))
+        )
+        st_foo = stanza.Presence(type_=structs.PresenceType.UNAVAILABLE,
+                                 from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st_foo)
+        st_bar = stanza.Presence(type_=structs.PresenceType.UNAVAILABLE,
+                                 from_=TEST_PEER_JID1.replace(resource="bar"))
+        self.s.handle_presence(st_bar)
+
+        self.s.flush_presence_batch()
+
+        self.assertSequenceEqual(
+            self.listener.mock_calls,
+            [
+                unittest.mock.call.on_unavailable(st_foo.from_, st_foo),
+                unittest.mock.call.on_unavailable(st_bar.from_, st_bar),
+                unittest.mock.call.on_bare_unavailable(st_bar),
+                unittest.mock.call.on_presence_batch(
+                    presence_service.PresenceBatch(
+                        {}, {},
+                        {st_foo.from_: st_foo, st_bar.from_: st_bar},
+                    )
+                ),
+            ]
+        )
+
+    def test_flush_without_pending_changes_is_noop(self):
+        self._coalesce()
+        self.s.flush_presence_batch()
+        self.assertSequenceEqual(self.listener.mock_calls, [])
+
+    def test_coalescing_flushes_after_window(self):
+        self._coalesce(seconds=0.01)
+
+        st = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                             from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st)
+
+        self.assertSequenceEqual(self.listener.mock_calls, [])
+
+        run_coroutine(asyncio.sleep(0.05))
+
+        self.listener.on_available.assert_called_once_with(st.from_, st)
+        self.listener.on_presence_batch.assert_called_once_with(
+            presence_service.PresenceBatch({st.from_: st}, {}, {})
+        )
+
+    def test_disabling_coalescing_flushes(self):
+        self._coalesce()
+
+        st = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                             from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st)
+
+        self.s.coalescing_window = None
+
+        self.listener.on_available.assert_called_once_with(st.from_, st)
+
+        st2 = stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                              show=structs.PresenceShow.AWAY,
+                              from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st2)
+
+        self.listener.on_changed.assert_called_once_with(st2.from_, st2)
+
+    def test_shutdown_cancels_pending_flush(self):
+        self._coalesce(seconds=0.01)
+
+        self.s.handle_presence(
+            stanza.Presence(type_=structs.PresenceType.AVAILABLE,
+                            from_=TEST_PEER_JID1.replace(resource="foo"))
+        )
+
+        run_coroutine(self.s.shutdown())
+        run_coroutine(asyncio.sleep(0.05))
+
+        self.assertSequenceEqual(self.listener.mock_calls, [])
+
     def tearDown(self):
         del self.s
         del self.cc
@@ -19,11 +19,16 @@
 # <http://www.gnu.org/licenses/>.
 #
 ########################################################################
+import asyncio
 import contextlib
 import unittest
 
+from datetime import timedelta
+
 import aioxmpp.disco
+import aioxmpp.errors
 import aioxmpp.forms
+import aioxmpp.rsm.xso
 import aioxmpp.service
 import aioxmpp.stanza
 import aioxmpp.structs
@@ -943,7 +948,7 @@ class TestService(unittest.TestCase):
 
     def test_get_items(self):
         response = pubsub_xso.Request()
-        response.payload = unittest.mock.Mock()
+        response.payload = pubsub_xso.Items("foo")
         self.cc.send.return_value = response
 
         result = run_coroutine(self.s.get_items(
@@ -973,7 +978,7 @@ class TestService(unittest.TestCase):
 
     def test_get_items_max_items(self):
         response = pubsub_xso.Request()
-        response.payload = unittest.mock.Mock()
+        response.payload = pubsub_xso.Items("foo")
         self.cc.send.return_value = response
 
         result = run_coroutine(self.s.get_items(
@@ -1004,7 +1009,7 @@ class TestService(unittest.TestCase):
 
     def test_get_items_by_id(self):
         response = pubsub_xso.Request()
-        response.payload = unittest.mock.Mock()
+        response.payload = pubsub_xso.Items("foo")
         self.cc.send.return_value = response
 
         ids = [
@@ -1065,6 +1070,135 @@ class TestService(unittest.TestCase):
             len(self.cc.send.mock_calls)
         )
 
+    def _paged_responder(self, ids, payloads=True):
+        def send(iq, timeout=None):
+            rsm = iq.payload.rsm
+            start = 0
+            if rsm.after is not None:
+                start = ids.index(rsm.after.value) + 1
+            page = ids[start:start+rsm.max_]
+
+            result_set = aioxmpp.rsm.xso.ResultSetMetadata()
+            result_set.count = len(ids)
+            if page:
+                result_set.first = aioxmpp.rsm.xso.First(page[0])
+                result_set.last = aioxmpp.rsm.xso.Last(page[-1])
+
+            if payloads:
+                response = pubsub_xso.Request(pubsub_xso.Items(
+                    iq.payload.payload.node
+                ))
+                response.payload.items[:] = [
+                    pubsub_xso.Item(id_) for id_ in page
+                ]
+            else:
+                response = aioxmpp.disco.xso.ItemsQuery(
+                    node=iq.payload.node,
+                    items=[
+                        aioxmpp.disco.xso.Item(TEST_TO, name=id_)
+                        for id_ in page
+                    ]
+                )
+            response.rsm = result_set
+            return response
+
+        self.cc.send.side_effect = send
+
+    def _collect(self, iterator):
+        async def collect():
+            return [item async for item in iterator]
+        return run_coroutine(collect())
+
+    def test_iter_items(self):
+        ids = [str(i) for i in range(7)]
+        self._paged_responder(ids)
+
+        iterator = self.s.iter_items(TEST_TO, "foo", page_size=3)
+        self.cc.send.assert_not_called()
+
+        items = self._collect(iterator)
+
+        self.assertSequenceEqual([item.id_ for item in items], ids)
+        for item in items:
+            self.assertIsInstance(item, pubsub_xso.Item)
+        self.assertEqual(iterator.last_cursor, "6")
+
+        # the end of the node is detected by an empty page
+        self.assertEqual(len(self.cc.send.mock_calls), 4)
+        for call in self.cc.send.mock_calls:
+            _, (request_iq, ), _ = call
+            self.assertIsInstance(request_iq, aioxmpp.stanza.IQ)
+            self.assertEqual(request_iq.to, TEST_TO)
+            self.assertEqual(request_iq.type_, aioxmpp.structs.IQType.GET)
+            self.assertIsInstance(request_iq.payload, pubsub_xso.Request)
+            self.assertIsInstance(request_iq.payload.payload,
+                                  pubsub_xso.Items)
+            self.assertEqual(request_iq.payload.payload.node, "foo")
+            self.assertEqual(request_iq.payload.rsm.max_, 3)
+
+    def test_iter_items_resumes_after_cursor(self):
+        ids = [str(i) for i in range(7)]
+        self._paged_responder(ids)
+
+        items = self._collect(
+            self.s.iter_items(TEST_TO, "foo", page_size=3, after="3")
+        )
+
+        self.assertSequenceEqual([item.id_ for item in items],
+                                 ["4", "5", "6"])
+
+        _, (request_iq, ), _ = self.cc.send.mock_calls[0]
+        self.assertEqual(request_iq.payload.rsm.after.value, "3")
+
+    def test_iter_items_tracks_cursor_per_item(self):
+        ids = [str(i) for i in range(5)]
+        self._paged_responder(ids)
+
+        iterator = self.s.iter_items(TEST_TO, "foo", page_size=3,
+                                     after="0")
+        self.assertEqual(iterator.last_cursor, "0")
+
+        item = run_coroutine(iterator.__anext__())
+        self.assertEqual(item.id_, "1")
+        self.assertEqual(iterator.last_cursor, "1")
+
+        iterator.close()
+
+    def test_iter_items_without_payloads_uses_disco_items(self):
+        ids = [str(i) for i in range(5)]
+        self._paged_responder(ids, payloads=False)
+
+        iterator = self.s.iter_items(TEST_TO, "foo", page_size=2,
+                                     payloads=False)
+        result = self._collect(iterator)
+
+        self.assertSequenceEqual(result, ids)
+        self.assertEqual(iterator.last_cursor, "4")
+
+        for call in self.cc.send.mock_calls:
+            _, (request_iq, ), _ = call
+            self.assertIsInstance(request_iq.payload,
+                                  aioxmpp.disco.xso.ItemsQuery)
+            self.assertEqual(request_iq.payload.node, "foo")
+
+    def test_iter_items_passes_timeout(self):
+        self._paged_responder(["a"])
+
+        self._collect(self.s.iter_items(TEST_TO, "foo", page_size=3,
+                                        timeout=10))
+
+        _, _, kwargs = self.cc.send.mock_calls[0]
+        self.assertEqual(kwargs["timeout"], 10)
+
+    def test_iter_items_propagates_errors(self):
+        exc = aioxmpp.errors.XMPPCancelError(
+            aioxmpp.errors.ErrorCondition.ITEM_NOT_FOUND
+        )
+        self.cc.send.side_effect = exc
+
+        with self.assertRaises(aioxmpp.errors.XMPPCancelError):
+            self._collect(self.s.iter_items(TEST_TO, "foo"))
+
     def test_get_subscriptions(self):
         response = pubsub_xso.Request()
         response.payload = unittest.mock.Mock()
@@ -1917,5 +2051,582 @@ class TestService(unittest.TestCase):
         self.assertIsInstance(payload, pubsub_xso.OwnerPurge)
         self.assertEqual(payload.node, "node")
 
+    def _items_response(self, ids, node="foo"):
+        response = pubsub_xso.Request(pubsub_xso.Items(node))
+        response.payload.items = []
+        for id_ in ids:
+            item = pubsub_xso.Item(id_)
+            item.registered_payload = SomePayload()
+            response.payload.items.append(item)
+        return response
+
+    def _event(self, payload):
+        msg = aioxmpp.stanza.Message(
+            type_=aioxmpp.structs.MessageType.NORMAL,
+            from_=TEST_TO,
+        )
+        msg.xep0060_event = pubsub_xso.Event(payload)
+        self.assertIsNone(self.s.filter_inbound_message(msg))
+
+    def _cached_ids(self, node="foo", **kwargs):
+        response = run_coroutine(self.s.get_items(
+            TEST_TO, node, cached_only=True, **kwargs
+        ))
+        return [item.id_ for item in response.payload.items]
+
+    def test_item_cache_size(self):
+        self.assertEqual(self.s.item_cache_size, 128)
+        self.s.item_cache_size = 2
+        self.assertEqual(self.s._item_cache.maxsize, 2)
+
+    def test_get_items_does_not_use_cache_by_default(self):
+        self.cc.send.return_value = self._items_response(["a", "b"])
+
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        self.assertEqual(len(self.cc.send.mock_calls), 2)
+
+    def test_get_items_max_age_uses_complete_listing(self):
+        response = self._items_response(["a", "b"])
+        self.cc.send.return_value = response
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+        self.cc.send.reset_mock()
+
+        result = run_coroutine(self.s.get_items(
+            TEST_TO, "foo",
+            max_age=timedelta(minutes=1),
+        ))
+
+        self.cc.send.assert_not_called()
+        self.assertIsNot(result, response)
+        self.assertIsInstance(result.payload, pubsub_xso.Items)
+        self.assertEqual(result.payload.node, "foo")
+        self.assertSequenceEqual(
+            [item.id_ for item in result.payload.items],
+            ["a", "b"],
+        )
+        for item in result.payload.items:
+            self.assertIsInstance(item.registered_payload, SomePayload)
+
+    def test_cached_items_are_not_shared_with_callers(self):
+        response = self._items_response(["a"])
+        self.cc.send.return_value = response
+        fetched = run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        # modifying the fetched response must not affect the cache
+        fetched.payload.items[0].id_ = "x"
+        fetched.payload.items[0].registered_payload = None
+
+        first = run_coroutine(self.s.get_items(
+            TEST_TO, "foo",
+            cached_only=True,
+        ))
+        item, = first.payload.items
+        self.assertEqual(item.id_, "a")
+        self.assertIsInstance(item.registered_payload, SomePayload)
+
+        # neither must modifying an answer from the cache
+        item.registered_payload = None
+
+        second = run_coroutine(self.s.get_items_by_id(
+            TEST_TO, "foo", ["a"],
+            cached_only=True,
+        ))
+        item2, = second.payload.items
+        self.assertIsNot(item2, item)
+        self.assertIsInstance(item2.registered_payload, SomePayload)
+
+    def test_get_items_max_age_refetches_stale_listing(self):
+        self.cc.send.return_value = self._items_response(["a"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+        self.cc.send.reset_mock()
+
+        loop = asyncio.get_event_loop()
+        with unittest.mock.patch.object(
+                loop, "time",
+                return_value=loop.time() + 120):
+            run_coroutine(self.s.get_items(
+                TEST_TO, "foo",
+                max_age=timedelta(minutes=1),
+            ))
+
+        self.assertEqual(len(self.cc.send.mock_calls), 1)
+
+    def test_get_items_cached_only_raises_KeyError_without_listing(self):
+        with self.assertRaises(KeyError):
+            self._cached_ids()
+        self.cc.send.assert_not_called()
+
+    def test_get_items_with_max_items_does_not_complete_listing(self):
+        self.cc.send.return_value = self._items_response(["a"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo", max_items=1))
+
+        with self.assertRaises(KeyError):
+            self._cached_ids()
+
+    def test_get_items_with_rsm_does_not_complete_listing(self):
+        response = self._items_response(["a"])
+        response.rsm = aioxmpp.rsm.xso.ResultSetMetadata()
+        response.rsm.count = 2
+        self.cc.send.return_value = response
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        with self.assertRaises(KeyError):
+            self._cached_ids()
+
+        result = run_coroutine(self.s.get_items_by_id(
+            TEST_TO, "foo", ["a"],
+            cached_only=True,
+        ))
+        self.assertEqual([item.id_ for item in result.payload.items], ["a"])
+
+    def test_get_items_cached_respects_max_items(self):
+        self.cc.send.return_value = self._items_response(["a", "b"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        self.assertEqual(self._cached_ids(max_items=2), ["a", "b"])
+        with self.assertRaises(KeyError):
+            self._cached_ids(max_items=1)
+
+    def test_publish_notification_fills_cache(self):
+        payload = SomePayload()
+        self._event(pubsub_xso.EventItems(
+            "foo",
+            items=[pubsub_xso.EventItem(payload, id_="a")],
+        ))
+
+        result = run_coroutine(self.s.get_items_by_id(
+            TEST_TO, "foo", ["a"],
+            cached_only=True,
+        ))
+
+        item, = result.payload.items
+        self.assertIsInstance(item, pubsub_xso.Item)
+        self.assertEqual(item.id_, "a")
+        self.assertIsInstance(item.registered_payload, SomePayload)
+        self.assertIsNot(item.registered_payload, payload)
+        self.cc.send.assert_not_called()
+
+    def test_notification_for_new_item_invalidates_listing(self):
+        self.cc.send.return_value = self._items_response(["a"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        self._event(pubsub_xso.EventItems(
+            "foo",
+            items=[pubsub_xso.EventItem(SomePayload(), id_="a")],
+        ))
+        self.assertEqual(self._cached_ids(), ["a"])
+
+        self._event(pubsub_xso.EventItems(
+            "foo",
+            items=[pubsub_xso.EventItem(SomePayload(), id_="b")],
+        ))
+        with self.assertRaises(KeyError):
+            self._cached_ids()
+
+    def test_notification_without_payload_invalidates_item(self):
+        self.cc.send.return_value = self._items_response(["a", "b"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        self._event(pubsub_xso.EventItems(
+            "foo",
+            items=[pubsub_xso.EventItem(None, id_="a")],
+        ))
+
+        with self.assertRaises(KeyError):
+            run_coroutine(self.s.get_items_by_id(
+                TEST_TO, "foo", ["a"],
+                cached_only=True,
+            ))
+        with self.assertRaises(KeyError):
+            self._cached_ids()
+
+    def test_retract_notification_removes_item(self):
+        self.cc.send.return_value = self._items_response(["a", "b"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        self._event(pubsub_xso.EventItems(
+            "foo",
+            retracts=[pubsub_xso.EventRetract("a")],
+        ))
+
+        self.assertEqual(self._cached_ids(), ["b"])
+
+    def test_purge_notification_empties_node(self):
+        self.cc.send.return_value = self._items_response(["a", "b"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        purge = pubsub_xso.EventPurge()
+        purge.node = "foo"
+        self._event(purge)
+
+        self.assertEqual(self._cached_ids(), [])
+
+    def test_delete_notification_drops_node(self):
+        self.cc.send.return_value = self._items_response(["a", "b"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        self._event(pubsub_xso.EventDelete("foo"))
+
+        with self.assertRaises(KeyError):
+            self._cached_ids()
+
+    def test_get_items_by_id_requests_only_missing_items(self):
+        self._event(pubsub_xso.EventItems(
+            "foo",
+            items=[pubsub_xso.EventItem(SomePayload(), id_="a")],
+        ))
+        self.cc.send.return_value = self._items_response(["b"])
+
+        result = run_coroutine(self.s.get_items_by_id(
+            TEST_TO, "foo", ["b", "a", "c"],
+            max_age=timedelta(minutes=1),
+        ))
+
+        _, (request_iq, ), _ = self.cc.send.mock_calls[0]
+        self.assertSequenceEqual(
+            [item.id_ for item in request_iq.payload.payload.items],
+            ["b", "c"],
+        )
+        self.assertSequenceEqual(
+            [item.id_ for item in result.payload.items],
+            ["b", "a"],
+        )
+
+    def test_get_items_by_id_cached_only_raises_KeyError_for_missing(self):
+        self._event(pubsub_xso.EventItems(
+            "foo",
+            items=[pubsub_xso.EventItem(SomePayload(), id_="a")],
+        ))
+
+        with self.assertRaises(KeyError):
+            run_coroutine(self.s.get_items_by_id(
+                TEST_TO, "foo", ["a", "b"],
+                cached_only=True,
+            ))
+        self.cc.send.assert_not_called()
+
+    def test_get_items_by_id_with_cache_rejects_empty_iterable(self):
+        with self.assertRaises(ValueError):
+            run_coroutine(self.s.get_items_by_id(
+                TEST_TO, "foo", [],
+                cached_only=True,
+            ))
+
+    def test_publish_writes_through(self):
+        payload = SomePayload()
+        self.cc.send.return_value = None
+
+        run_coroutine(self.s.publish(TEST_TO, "foo", payload, id_="a"))
+
+        result = run_coroutine(self.s.get_items_by_id(
+            TEST_TO, "foo", ["a"],
+            cached_only=True,
+        ))
+        item, = result.payload.items
+        self.assertIsInstance(item.registered_payload, SomePayload)
+        self.assertIsNot(item.registered_payload, payload)
+
+    def test_publish_without_id_is_not_cached(self):
+        self.cc.send.return_value = None
+
+        run_coroutine(self.s.publish(TEST_TO, "foo", SomePayload()))
+
+        self.assertEqual(len(self.s._item_cache), 0)
+
+    def test_retract_removes_item_from_cache(self):
+        self.cc.send.return_value = self._items_response(["a", "b"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+        self.cc.send.return_value = None
+
+        run_coroutine(self.s.retract(TEST_TO, "foo", "a"))
+
+        self.assertEqual(self._cached_ids(), ["b"])
+
+    def test_purge_and_delete_update_cache(self):
+        self.cc.send.return_value = self._items_response(["a"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+        self.cc.send.return_value = None
+
+        run_coroutine(self.s.purge(TEST_TO, "foo"))
+        self.assertEqual(self._cached_ids(), [])
+
+        run_coroutine(self.s.delete(TEST_TO, "foo"))
+        with self.assertRaises(KeyError):
+            self._cached_ids()
+
+    def test_failed_retract_keeps_cache(self):
+        self.cc.send.return_value = self._items_response(["a"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+        self.cc.send.side_effect = aioxmpp.errors.XMPPCancelError(
+            aioxmpp.errors.ErrorCondition.FORBIDDEN
+        )
+
+        with self.assertRaises(aioxmpp.errors.XMPPCancelError):
+            run_coroutine(self.s.retract(TEST_TO, "foo", "a"))
+
+        self.assertEqual(self._cached_ids(), ["a"])
+
+    def test_cache_evicts_least_recently_used_node(self):
+        self.s.item_cache_size = 1
+        self.cc.send.return_value = self._items_response(["a"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+        self.cc.send.return_value = self._items_response(["b"], node="bar")
+        run_coroutine(self.s.get_items(TEST_TO, "bar"))
+
+        with self.assertRaises(KeyError):
+            self._cached_ids()
+        self.assertEqual(self._cached_ids("bar"), ["b"])
+
+    def test_cache_bounds_items_per_node(self):
+        self.s.max_cached_items_per_node = 2
+        self.cc.send.return_value = self._items_response(["a", "b", "c"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        with self.assertRaises(KeyError):
+            self._cached_ids()
+
+        result = run_coroutine(self.s.get_items_by_id(
+            TEST_TO, "foo", ["b", "c"],
+            cached_only=True,
+        ))
+        self.assertEqual(len(result.payload.items), 2)
+
+    def test_cache_is_cleared_on_stream_destroyed(self):
+        self.assertTrue(aioxmpp.service.is_depsignal_handler(
+            aioxmpp.Client,
+            "on_stream_destroyed",
+            pubsub_service.PubSubClient._clear_item_cache,
+        ))
+
+        self.cc.send.return_value = self._items_response(["a"])
+        run_coroutine(self.s.get_items(TEST_TO, "foo"))
+
+        self.s._clear_item_cache()
+
+        with self.assertRaises(KeyError):
+            self._cached_ids()
+
+    def _pipelined_send(self, failures=None):
+        state = {"in_flight": 0, "max_in_flight": 0, "sent": []}
+        failures = {
+            key: list(excs)
+            for key, excs in (failures or {}).items()
+        }
+
+        async def send(iq):
+            request = iq.payload.payload
+            id_ = request.item.id_
+            state["sent"].append(id_)
+            state["in_flight"] += 1
+            state["max_in_flight"] = max(state["max_in_flight"],
+                                         state["in_flight"])
+            try:
+                await asyncio.sleep(0)
+            finally:
+                state["in_flight"] -= 1
+
+            excs = failures.get(id_)
+            if excs:
+                raise excs.pop(0)
+
+        self.cc.send = send
+        return state
+
+    def test_publish_many_pipelines_within_window(self):
+        state = self._pipelined_send()
+        ids = [str(i) for i in range(10)]
+
+        result = run_coroutine(self.s.publish_many(
+            TEST_TO, "foo",
+            [(id_, SomePayload()) for id_ in ids],
+            window=3,
+        ))
+
+        self.assertSequenceEqual(result, ids)
+        self.assertSequenceEqual(sorted(state["sent"]), ids)
+        self.assertEqual(state["max_in_flight"], 3)
+
+    def test_publish_many_with_empty_iterable(self):
+        self._pipelined_send()
+
+        result = run_coroutine(self.s.publish_many(TEST_TO, "foo", []))
+
+        self.assertSequenceEqual(result, [])
+
+    def test_publish_many_rejects_non_positive_window(self):
+        with self.assertRaisesRegex(ValueError,
+                                    "window must be positive"):
+            run_coroutine(self.s.publish_many(
+                TEST_TO, "foo",
+                [("a", SomePayload())],
+                window=0,
+            ))
+
+    def test_publish_many_returns_errors_per_item(self):
+        exc = aioxmpp.errors.XMPPCancelError(
+            aioxmpp.errors.ErrorCondition.FORBIDDEN
+        )
+        state = self._pipelined_send({"b": [exc]})
+
+        result = run_coroutine(self.s.publish_many(
+            TEST_TO, "foo",
+            [(id_, SomePayload()) for id_ in "abc"],
+        ))
+
+        self.assertSequenceEqual(result, ["a", exc, "c"])
+        self.assertEqual(state["sent"].count("b"), 1)
+
+    def test_publish_many_retries_with_backoff(self):
+        state = self._pipelined_send({
+            "a": [
+                aioxmpp.errors.XMPPCancelError(
+                    aioxmpp.errors.ErrorCondition.RESOURCE_CONSTRAINT
+                ),
+                aioxmpp.errors.XMPPWaitError(
+                    aioxmpp.errors.ErrorCondition.INTERNAL_SERVER_ERROR
+                ),
+            ],
+        })
+
+        delays = []
+        sleep = asyncio.sleep
+
+        async def fake_sleep(delay):
+            delays.append(delay)
+            await sleep(0)
+
+        with unittest.mock.patch("asyncio.sleep", new=fake_sleep):
+            result = run_coroutine(self.s.publish_many(
+                TEST_TO, "foo",
+                [("a", SomePayload())],
+                retry_delay=timedelta(seconds=2),
+            ))
+
+        self.assertSequenceEqual(result, ["a"])
+        self.assertEqual(state["sent"], ["a"] * 3)
+        self.assertSequenceEqual([delay for delay in delays if delay],
+                                 [2, 4])
+
+    def test_publish_many_gives_up_after_max_retries(self):
+        excs = [
+            aioxmpp.errors.XMPPWaitError(
+                aioxmpp.errors.ErrorCondition.RESOURCE_CONSTRAINT
+            )
+            for _ in range(3)
+        ]
+        state = self._pipelined_send({"a": excs})
+
+        result = run_coroutine(self.s.publish_many(
+            TEST_TO, "foo",
+            [("a", SomePayload())],
+            max_retries=2,
+            retry_delay=timedelta(0),
+        ))
+
+        self.assertSequenceEqual(result, [excs[2]])
+        self.assertEqual(state["sent"], ["a"] * 3)
+
+    def test_publish_many_aborts_on_other_exceptions(self):
+        exc = ConnectionError()
+        state = self._pipelined_send({"a": [exc]})
+
+        with self.assertRaises(ConnectionError):
+            run_coroutine(self.s.publish_many(
+                TEST_TO, "foo",
+                [(id_, SomePayload()) for id_ in "abcdef"],
+                window=2,
+            ))
+
+        self.assertLess(len(state["sent"]), 6)
+
+    def test_publish_many_checks_publish_options_up_front(self):
+        state = self._pipelined_send()
+        options = unittest.mock.sentinel.options
+
+        with unittest.mock.patch.object(
+                self.s, "get_features",
+                new=CoroutineMock()) as get_features:
+            get_features.return_value = set()
+
+            with self.assertRaises(RuntimeError):
+                run_coroutine(self.s.publish_many(
+                    TEST_TO, "foo",
+                    [(id_, SomePayload()) for id_ in "abc"],
+                    publish_options=options,
+                ))
+
+        get_features.assert_called_once_with(TEST_TO)
+        self.assertSequenceEqual(state["sent"], [])
+
+    def test_publish_many_checks_publish_options_only_once(self):
+        state = self._pipelined_send({
+            "a": [
+                aioxmpp.errors.XMPPWaitError(
+                    aioxmpp.errors.ErrorCondition.RESOURCE_CONSTRAINT
+                ),
+            ],
+        })
+        options = unittest.mock.sentinel.options
+
+        with unittest.mock.patch.object(
+                self.s, "get_features",
+                new=CoroutineMock()) as get_features:
+            get_features.return_value = {
+                pubsub_xso.Feature.PUBLISH_OPTIONS,
+            }
+
+            result = run_coroutine(self.s.publish_many(
+                TEST_TO, "foo",
+                [(id_, SomePayload()) for id_ in "abc"],
+                publish_options=options,
+                retry_delay=timedelta(0),
+            ))
+
+        self.assertSequenceEqual(result, ["a", "b", "c"])
+        self.assertEqual(state["sent"].count("a"), 2)
+        get_features.assert_called_once_with(TEST_TO)
+
+    def test_retract_many(self):
+        state = self._pipelined_send()
+        ids = [str(i) for i in range(5)]
+
+        sent = []
+        send = self.cc.send
+
+        async def record(iq):
+            sent.append(iq)
+            return await send(iq)
+
+        self.cc.send = record
+
+        result = run_coroutine(self.s.retract_many(
+            TEST_TO, "foo", ids,
+            notify=True,
+            window=2,
+        ))
+
+        self.assertSequenceEqual(result, [None] * 5)
+        self.assertEqual(state["max_in_flight"], 2)
+        for iq in sent:
+            self.assertIsInstance(iq.payload.payload, pubsub_xso.Retract)
+            self.assertEqual(iq.payload.payload.node, "foo")
+            self.assertTrue(iq.payload.payload.notify)
+        self.assertSequenceEqual(
+            sorted(iq.payload.payload.item.id_ for iq in sent),
+            ids,
+        )
+
+    def test_retract_many_returns_errors_per_item(self):
+        exc = aioxmpp.errors.XMPPCancelError(
+            aioxmpp.errors.ErrorCondition.ITEM_NOT_FOUND
+        )
+        self._pipelined_send({"b": [exc]})
+
+        result = run_coroutine(self.s.retract_many(TEST_TO, "foo", "abc"))
+
+        self.assertSequenceEqual(result, [None, exc, None])
+
 
 # foo
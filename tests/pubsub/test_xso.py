@@ -25,6 +25,7 @@ import unittest.mock
 
 import aioxmpp.forms as forms
 import aioxmpp.pubsub.xso as pubsub_xso
+import aioxmpp.rsm.xso as rsm_xso
 import aioxmpp.stanza as stanza
 import aioxmpp.structs as structs
 import aioxmpp.xso as xso
@@ -1132,6 +1133,18 @@ class TestRequest(unittest.TestCase):
             }
         )
 
+    def test_rsm(self):
+        self.assertIsInstance(
+            pubsub_xso.Request.rsm,
+            xso.Child
+        )
+        self.assertSetEqual(
+            pubsub_xso.Request.rsm._classes,
+            {
+                rsm_xso.ResultSetMetadata
+            }
+        )
+
     def test_is_registered_iq_payload(self):
         self.assertIn(
             pubsub_xso.Request,
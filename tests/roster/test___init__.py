@@ -25,6 +25,7 @@ import aioxmpp
 import aioxmpp.roster as roster
 import aioxmpp.roster.xso as roster_xso
 import aioxmpp.roster.service as roster_service
+import aioxmpp.roster.store as roster_store
 
 
 class TestExports(unittest.TestCase):
@@ -40,3 +41,14 @@ class TestExports(unittest.TestCase):
 
     def test_Item(self):
         self.assertIs(roster.Item, roster_service.Item)
+
+    def test_stores(self):
+        self.assertIs(roster.AbstractRosterStore,
+                      roster_store.AbstractRosterStore)
+        self.assertIs(roster.SQLiteRosterStore,
+                      roster_store.SQLiteRosterStore)
+        self.assertIs(roster.LogRosterStore,
+                      roster_store.LogRosterStore)
+
+    def test_RosterDiff(self):
+        self.assertIs(roster.RosterDiff, roster_service.RosterDiff)
@@ -23,9 +23,12 @@ import asyncio
 import contextlib
 import unittest
 
+from datetime import timedelta
+
 import aioxmpp.dispatcher
 import aioxmpp.errors as errors
 import aioxmpp.roster.service as roster_service
+import aioxmpp.roster.store as roster_store
 import aioxmpp.roster.xso as roster_xso
 import aioxmpp.service as service
 import aioxmpp.stanza as stanza
@@ -1658,3 +1661,384 @@ class TestService(unittest.TestCase):
             self.s.items,
             "initial roster processing lost a race against roster push"
         )
+
+    def test_store_defaults_to_None(self):
+        self.assertIsNone(self.s.store)
+
+    def test_setting_store_reads_version_and_loads_items_lazily(self):
+        store = unittest.mock.Mock(spec=roster_store.AbstractRosterStore)
+        store.get_version.return_value = "stored-ver"
+        store.load_items.return_value = [
+            (TEST_JID, {"subscription": "both", "groups": ["a", "b"]}),
+        ]
+
+        self.s.store = store
+
+        self.assertIs(self.s.store, store)
+        self.assertEqual(self.s.version, "stored-ver")
+        store.load_items.assert_not_called()
+
+        self.assertSetEqual(set(self.s.items), {TEST_JID})
+        item = self.s.items[TEST_JID]
+        self.assertEqual(item.subscription, "both")
+        self.assertSetEqual(set(self.s.groups), {"a", "b"})
+        self.assertSetEqual(self.s.groups["a"], {item})
+
+        store.load_items.assert_called_once_with()
+        self.assertSequenceEqual(self.listener.mock_calls, [])
+
+    def test_handle_roster_push_writes_changes_to_store(self):
+        store = unittest.mock.Mock(spec=roster_store.AbstractRosterStore)
+        store.get_version.return_value = None
+        store.load_items.return_value = [
+            (self.user1, {"subscription": "none"}),
+            (self.user2, {"subscription": "both"}),
+        ]
+        self.s.store = store
+
+        iq = stanza.IQ(
+            type_=structs.IQType.SET,
+            payload=roster_xso.Query(
+                items=[
+                    roster_xso.Item(
+                        jid=TEST_JID.replace(localpart="other"),
+                        subscription="remove",
+                    ),
+                    roster_xso.Item(
+                        jid=self.user1,
+                        name="foo",
+                    ),
+                    roster_xso.Item(
+                        jid=self.user2,
+                        subscription="remove",
+                    ),
+                ],
+                ver="newver",
+            )
+        )
+
+        run_coroutine(self.s.handle_roster_push(iq))
+
+        store.apply.assert_called_once_with(
+            "newver",
+            {self.user1: {"subscription": "none", "name": "foo"}},
+            [TEST_JID.replace(localpart="other"), self.user2],
+        )
+
+    def test_full_roster_replaces_store(self):
+        store = unittest.mock.Mock(spec=roster_store.AbstractRosterStore)
+        store.get_version.return_value = "oldver"
+        store.load_items.return_value = []
+        self.s.store = store
+
+        self.cc.send.return_value = roster_xso.Query(
+            items=[
+                roster_xso.Item(
+                    jid=self.user1,
+                    subscription="to",
+                ),
+            ],
+            ver="newver",
+        )
+
+        run_coroutine(self.cc.before_stream_established())
+
+        store.replace.assert_called_once_with(
+            "newver",
+            {self.user1: {"subscription": "to"}},
+        )
+
+    def test_incremental_initial_roster_does_not_load_store(self):
+        store = unittest.mock.Mock(spec=roster_store.AbstractRosterStore)
+        store.get_version.return_value = "oldver"
+        self.s.store = store
+
+        self.cc.stream_features[...] = roster_xso.RosterVersioningFeature()
+        self.cc.send.return_value = None
+
+        run_coroutine(self.cc.before_stream_established())
+
+        _, (iq, ), _ = self.cc.send.mock_calls[-1]
+        self.assertEqual(iq.payload.ver, "oldver")
+        store.load_items.assert_not_called()
+        store.replace.assert_not_called()
+
+    def test_import_from_json_replaces_store(self):
+        store = unittest.mock.Mock(spec=roster_store.AbstractRosterStore)
+        store.get_version.return_value = None
+        self.s.store = store
+
+        self.s.import_from_json({
+            "items": {
+                str(TEST_JID): {"subscription": "from"},
+            },
+            "ver": "jsonver",
+        })
+
+        store.load_items.assert_not_called()
+        store.replace.assert_called_once_with(
+            "jsonver",
+            {TEST_JID: {"subscription": "from"}},
+        )
+        self.assertSetEqual(set(self.s.items), {TEST_JID})
+
+    def test_find_items_without_criteria_returns_all_items(self):
+        self.assertSetEqual(
+            self.s.find_items(),
+            set(self.s.items.values()),
+        )
+
+    def test_find_items_by_attributes(self):
+        item1 = self.s.items[self.user1]
+        item2 = self.s.items[self.user2]
+
+        self.assertSetEqual(self.s.find_items(subscription="both"), {item2})
+        self.assertSetEqual(self.s.find_items(subscription="from"), set())
+        self.assertSetEqual(self.s.find_items(ask=None), {item1, item2})
+        self.assertSetEqual(self.s.find_items(approved=False),
+                            {item1, item2})
+        self.assertSetEqual(self.s.find_items(domain="foo.example"),
+                            {item1})
+
+    def test_find_items_by_group_intersection(self):
+        item1 = self.s.items[self.user1]
+        item2 = self.s.items[self.user2]
+
+        self.assertSetEqual(self.s.find_items(groups=["group1"]),
+                            {item1, item2})
+        self.assertSetEqual(self.s.find_items(groups=["group1", "group2"]),
+                            {item2})
+        self.assertSetEqual(self.s.find_items(groups=["group2", "group3"]),
+                            set())
+        self.assertSetEqual(
+            self.s.find_items(groups=["group1"], subscription="none"),
+            {item1},
+        )
+
+    def test_find_items_follows_roster_pushes(self):
+        iq = stanza.IQ(
+            type_=structs.IQType.SET,
+            payload=roster_xso.Query(
+                items=[
+                    roster_xso.Item(
+                        jid=self.user1,
+                        subscription="from",
+                        ask="subscribe",
+                        approved=True,
+                    ),
+                    roster_xso.Item(
+                        jid=self.user2,
+                        subscription="remove",
+                    ),
+                ],
+                ver="foobarbaz",
+            )
+        )
+        run_coroutine(self.s.handle_roster_push(iq))
+
+        item1 = self.s.items[self.user1]
+
+        self.assertSetEqual(self.s.find_items(subscription="none"), set())
+        self.assertSetEqual(self.s.find_items(subscription="from"), {item1})
+        self.assertSetEqual(self.s.find_items(subscription="both"), set())
+        self.assertSetEqual(self.s.find_items(ask="subscribe"), {item1})
+        self.assertSetEqual(self.s.find_items(approved=True), {item1})
+        self.assertSetEqual(self.s.find_items(domain="bar.example"), set())
+        self.assertSetEqual(self.s.find_items(groups=["group1"]), set())
+
+    def test_find_items_follows_initial_roster_removals(self):
+        self.cc.send.return_value = roster_xso.Query(
+            items=[
+                roster_xso.Item(jid=self.user1),
+            ],
+            ver="foobarbaz",
+        )
+        run_coroutine(self.cc.before_stream_established())
+
+        self.assertSetEqual(self.s.find_items(domain="bar.example"), set())
+        self.assertSetEqual(self.s.find_items(subscription="both"), set())
+
+    def test_find_items_after_import_from_json(self):
+        self.s.import_from_json({
+            "items": {
+                str(TEST_JID): {"subscription": "to", "ask": "subscribe"},
+            },
+        })
+
+        item = self.s.items[TEST_JID]
+        self.assertSetEqual(self.s.find_items(subscription="to"), {item})
+        self.assertSetEqual(self.s.find_items(ask="subscribe"), {item})
+        self.assertSetEqual(self.s.find_items(subscription="both"), set())
+
+    def test_find_items_loads_store(self):
+        store = unittest.mock.Mock(spec=roster_store.AbstractRosterStore)
+        store.get_version.return_value = None
+        store.load_items.return_value = [
+            (TEST_JID, {"subscription": "from"}),
+        ]
+        self.s.store = store
+
+        self.assertSetEqual(
+            self.s.find_items(subscription="from"),
+            {self.s.items[TEST_JID]},
+        )
+        self.assertSetEqual(self.s.find_items(subscription="both"), set())
+
+    def _push(self, *items, ver="foobarbaz"):
+        run_coroutine(self.s.handle_roster_push(stanza.IQ(
+            type_=structs.IQType.SET,
+            payload=roster_xso.Query(items=list(items), ver=ver),
+        )))
+
+    def _user1(self, **kwargs):
+        return roster_xso.Item(
+            jid=self.user1,
+            groups=[
+                roster_xso.Group(name="group1"),
+                roster_xso.Group(name="group3"),
+            ],
+            **kwargs
+        )
+
+    def test_batch_window_defaults_to_None(self):
+        self.assertIsNone(self.s.batch_window)
+
+    def test_initial_roster_emits_batch(self):
+        cc = make_connected_client()
+        cc.send.return_value = self.cc.send.return_value
+        s = roster_service.RosterClient(cc, dependencies={
+            aioxmpp.dispatcher.SimplePresenceDispatcher:
+                aioxmpp.dispatcher.SimplePresenceDispatcher(cc),
+        })
+        listener = make_listener(s)
+
+        run_coroutine(cc.before_stream_established())
+
+        listener.on_roster_batch_changed.assert_called_once_with(
+            roster_service.RosterDiff(
+                set(s.items.values()),
+                set(),
+                set(),
+                {"group1", "group2", "group3"},
+                set(),
+            )
+        )
+
+    def test_each_push_emits_batch_without_window(self):
+        item1 = self.s.items[self.user1]
+        item2 = self.s.items[self.user2]
+
+        self._push(
+            self._user1(name="foo"),
+            roster_xso.Item(jid=self.user2, subscription="remove"),
+            roster_xso.Item(
+                jid=TEST_JID.replace(localpart="new"),
+                groups=[roster_xso.Group(name="group4")],
+            ),
+        )
+
+        new_item = self.s.items[TEST_JID.replace(localpart="new")]
+
+        self.listener.on_roster_batch_changed.assert_called_once_with(
+            roster_service.RosterDiff(
+                {new_item},
+                {item1},
+                {item2},
+                {"group4"},
+                {"group2"},
+            )
+        )
+        # per-entry signals are still emitted
+        self.listener.on_entry_name_changed.assert_called_once_with(item1)
+        self.listener.on_entry_removed.assert_called_once_with(item2)
+        self.listener.on_entry_added.assert_called_once_with(new_item)
+
+    def test_push_without_net_change_does_not_emit_batch(self):
+        self._push(self._user1())
+
+        self.listener.on_roster_batch_changed.assert_not_called()
+
+    def test_batch_window_aggregates_pushes(self):
+        self.s.batch_window = timedelta(seconds=60)
+        item1 = self.s.items[self.user1]
+
+        self._push(self._user1(name="a"), ver="v1")
+        self._push(self._user1(name="b"), ver="v2")
+        other = TEST_JID.replace(localpart="other")
+        self._push(roster_xso.Item(jid=other), ver="v3")
+        self._push(roster_xso.Item(jid=other, subscription="remove"),
+                   ver="v4")
+
+        self.listener.on_roster_batch_changed.assert_not_called()
+        self.assertEqual(item1.name, "b")
+
+        self.s.flush_roster_batch()
+
+        self.listener.on_roster_batch_changed.assert_called_once_with(
+            roster_service.RosterDiff(set(), {item1}, set(), set(), set())
+        )
+
+    def test_batch_window_flushes_after_timeout(self):
+        self.s.batch_window = timedelta(seconds=0.01)
+        item1 = self.s.items[self.user1]
+
+        self._push(self._user1(name="a"))
+        self.listener.on_roster_batch_changed.assert_not_called()
+
+        run_coroutine(asyncio.sleep(0.05))
+
+        self.listener.on_roster_batch_changed.assert_called_once_with(
+            roster_service.RosterDiff(set(), {item1}, set(), set(), set())
+        )
+
+    def test_batch_reports_readded_entry_as_removed_and_added(self):
+        self.s.batch_window = timedelta(seconds=60)
+        old_item = self.s.items[self.user1]
+
+        self._push(roster_xso.Item(jid=self.user1, subscription="remove"))
+        self._push(self._user1())
+        new_item = self.s.items[self.user1]
+        self.s.flush_roster_batch()
+
+        self.listener.on_roster_batch_changed.assert_called_once_with(
+            roster_service.RosterDiff(
+                {new_item}, set(), {old_item}, set(), set(),
+            )
+        )
+
+    def test_batch_window_writes_store_once(self):
+        store = unittest.mock.Mock(spec=roster_store.AbstractRosterStore)
+        store.get_version.return_value = "foobar"
+        store.load_items.return_value = [
+            (self.user1, {"subscription": "none"}),
+            (self.user2, {"subscription": "both"}),
+        ]
+        self.s.store = store
+        self.s.batch_window = timedelta(seconds=60)
+
+        self._push(self._user1(name="a"), ver="v1")
+        self._push(roster_xso.Item(jid=self.user2, subscription="remove"),
+                   ver="v2")
+
+        store.apply.assert_not_called()
+
+        self.s.flush_roster_batch()
+
+        store.apply.assert_called_once_with(
+            "v2",
+            {self.user1: {"subscription": "none", "name": "a",
+                          "groups": ["group1", "group3"]}},
+            [self.user2],
+        )
+
+    def test_shutdown_flushes_batch(self):
+        self.s.batch_window = timedelta(seconds=60)
+
+        self._push(self._user1(name="a"))
+        run_coroutine(self.s.shutdown())
+
+        self.listener.on_roster_batch_changed.assert_called_once_with(
+            roster_service.RosterDiff(
+                set(), {self.s.items[self.user1]}, set(), set(), set(),
+            )
+        )
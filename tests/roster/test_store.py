@@ -0,0 +1,182 @@
+########################################################################
+# File name: test_store.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import os
+import pathlib
+import tempfile
+import unittest
+
+import aioxmpp.roster.store as roster_store
+import aioxmpp.structs as structs
+
+
+TEST_JID1 = structs.JID.fromstr("romeo@montague.example")
+TEST_JID2 = structs.JID.fromstr("juliet@capulet.example")
+TEST_JID3 = structs.JID.fromstr("nurse@capulet.example")
+
+
+class TestAbstractRosterStore(unittest.TestCase):
+    def test_is_abstract(self):
+        with self.assertRaises(TypeError):
+            roster_store.AbstractRosterStore()
+
+
+class StoreTestMixin:
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmpdir.name) / "roster"
+        self.store = self._make_store()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def _reopen(self):
+        self.store.close()
+        self.store = self._make_store()
+
+    def test_is_roster_store(self):
+        self.assertIsInstance(self.store, roster_store.AbstractRosterStore)
+
+    def test_empty(self):
+        self.assertIsNone(self.store.get_version())
+        self.assertSequenceEqual(list(self.store.load_items()), [])
+
+    def test_replace(self):
+        self.store.replace("v1", {
+            TEST_JID1: {"subscription": "both"},
+            TEST_JID2: {"subscription": "none", "name": "Juliet"},
+        })
+        self._reopen()
+
+        self.assertEqual(self.store.get_version(), "v1")
+        self.assertDictEqual(
+            dict(self.store.load_items()),
+            {
+                TEST_JID1: {"subscription": "both"},
+                TEST_JID2: {"subscription": "none", "name": "Juliet"},
+            }
+        )
+
+    def test_apply_updates_and_removes_incrementally(self):
+        self.store.replace("v1", {
+            TEST_JID1: {"subscription": "both"},
+            TEST_JID2: {"subscription": "none"},
+        })
+        self.store.apply(
+            "v2",
+            {
+                TEST_JID2: {"subscription": "to"},
+                TEST_JID3: {"subscription": "none", "groups": ["staff"]},
+            },
+            [TEST_JID1],
+        )
+        self._reopen()
+
+        self.assertEqual(self.store.get_version(), "v2")
+        self.assertDictEqual(
+            dict(self.store.load_items()),
+            {
+                TEST_JID2: {"subscription": "to"},
+                TEST_JID3: {"subscription": "none", "groups": ["staff"]},
+            }
+        )
+
+    def test_apply_removing_unknown_jid_is_not_an_error(self):
+        self.store.apply("v1", {}, [TEST_JID1])
+        self.assertEqual(self.store.get_version(), "v1")
+        self.assertSequenceEqual(list(self.store.load_items()), [])
+
+    def test_replace_drops_previous_items(self):
+        self.store.replace("v1", {TEST_JID1: {"subscription": "both"}})
+        self.store.replace(None, {TEST_JID2: {"subscription": "none"}})
+        self._reopen()
+
+        self.assertIsNone(self.store.get_version())
+        self.assertDictEqual(
+            dict(self.store.load_items()),
+            {TEST_JID2: {"subscription": "none"}},
+        )
+
+
+class TestSQLiteRosterStore(StoreTestMixin, unittest.TestCase):
+    def _make_store(self):
+        return roster_store.SQLiteRosterStore(self.path)
+
+
+class TestLogRosterStore(StoreTestMixin, unittest.TestCase):
+    def _make_store(self, **kwargs):
+        return roster_store.LogRosterStore(self.path, **kwargs)
+
+    def test_apply_appends_to_log(self):
+        self.store.replace("v1", {TEST_JID1: {"subscription": "both"}})
+        size = os.path.getsize(str(self.path))
+
+        self.store.apply("v2", {TEST_JID2: {"subscription": "none"}}, [])
+
+        with self.path.open("rb") as f:
+            f.seek(size)
+            self.assertEqual(len(f.read().splitlines()), 1)
+
+    def test_ignores_and_truncates_torn_last_record(self):
+        self.store.replace("v1", {TEST_JID1: {"subscription": "both"}})
+        with self.path.open("ab") as f:
+            f.write(b'{"ver": "v2", "set": {"juliet@cap')
+        self._reopen()
+
+        self.assertEqual(self.store.get_version(), "v1")
+        self.assertDictEqual(
+            dict(self.store.load_items()),
+            {TEST_JID1: {"subscription": "both"}},
+        )
+
+        self.store.apply("v3", {TEST_JID3: {"subscription": "none"}}, [])
+        self._reopen()
+
+        self.assertEqual(self.store.get_version(), "v3")
+        self.assertDictEqual(
+            dict(self.store.load_items()),
+            {
+                TEST_JID1: {"subscription": "both"},
+                TEST_JID3: {"subscription": "none"},
+            }
+        )
+
+    def test_compacts_log(self):
+        self.store.close()
+        self.store = self._make_store(compact_after=3)
+
+        for i in range(5):
+            self.store.apply(
+                "v{}".format(i),
+                {TEST_JID1: {"subscription": "none", "name": str(i)}},
+                [],
+            )
+
+        with self.path.open("rb") as f:
+            self.assertLessEqual(len(f.read().splitlines()), 3)
+
+        self._reopen()
+        self.assertEqual(self.store.get_version(), "v4")
+        self.assertDictEqual(
+            dict(self.store.load_items()),
+            {TEST_JID1: {"subscription": "none", "name": "4"}},
+        )
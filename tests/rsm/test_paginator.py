@@ -0,0 +1,215 @@
+########################################################################
+# File name: test_paginator.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import asyncio
+import unittest
+
+import aioxmpp.errors as errors
+import aioxmpp.rsm as rsm
+import aioxmpp.rsm.paginator as paginator
+import aioxmpp.rsm.xso as rsm_xso
+
+from aioxmpp.testutils import run_coroutine
+
+
+class Page:
+    def __init__(self, items, result_set):
+        self.items = items
+        self.rsm = result_set
+
+
+class FakeResponder:
+    """
+    Stand-in for a client talking to an entity which serves a list of
+    elements with RSM.
+    """
+
+    def __init__(self, nitems, *, with_count=True, default_max=10):
+        self.elements = ["e{:03d}".format(i) for i in range(nitems)]
+        self.with_count = with_count
+        self.default_max = default_max
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_at = None
+
+    async def send(self, request, timeout=None):
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            for _ in range(3):
+                await asyncio.sleep(0)
+            return self._answer(request)
+        finally:
+            self.in_flight -= 1
+
+    def _answer(self, request):
+        if request.index is not None:
+            start = request.index
+        elif request.after is not None:
+            start = self.elements.index(request.after.value) + 1
+        else:
+            start = 0
+
+        if start == self.fail_at:
+            raise errors.XMPPCancelError(
+                errors.ErrorCondition.INTERNAL_SERVER_ERROR
+            )
+
+        max_ = request.max_ if request.max_ is not None else self.default_max
+        items = self.elements[start:start+max_]
+
+        result_set = rsm_xso.ResultSetMetadata()
+        if self.with_count:
+            result_set.count = len(self.elements)
+        if items:
+            result_set.first = rsm_xso.First(items[0])
+            result_set.first.index = start
+            result_set.last = rsm_xso.Last(items[-1])
+        return Page(items, result_set)
+
+
+def collect(pages):
+    async def collect():
+        result = []
+        async for page in pages:
+            result.extend(page.items)
+        return result
+    return run_coroutine(collect())
+
+
+class TestPaginator(unittest.TestCase):
+    def setUp(self):
+        self.responder = FakeResponder(25)
+
+    def _paginator(self, **kwargs):
+        return paginator.Paginator(
+            self.responder,
+            lambda result_set: result_set,
+            lambda page: page.rsm,
+            **kwargs
+        )
+
+    def test_is_exported(self):
+        self.assertIs(rsm.Paginator, paginator.Paginator)
+
+    def test_pages_through_all_elements_by_cursor(self):
+        result = collect(self._paginator(page_size=10))
+
+        self.assertSequenceEqual(result, self.responder.elements)
+        self.assertSequenceEqual(
+            [(r.after and r.after.value, r.max_)
+             for r in self.responder.requests],
+            [
+                (None, 10),
+                ("e009", 10),
+                ("e019", 10),
+                ("e024", 10),
+            ]
+        )
+
+    def test_lets_peer_choose_page_size(self):
+        result = collect(self._paginator())
+
+        self.assertSequenceEqual(result, self.responder.elements)
+        self.assertIsNone(self.responder.requests[0].max_)
+
+    def test_resumes_after_cursor(self):
+        pages = self._paginator(page_size=10)
+
+        async def first_page():
+            return await pages.__anext__()
+
+        run_coroutine(first_page())
+        pages.close()
+        self.assertEqual(pages.last_cursor, "e009")
+
+        self.responder.requests.clear()
+        result = collect(self._paginator(page_size=10,
+                                         after=pages.last_cursor))
+
+        self.assertSequenceEqual(result, self.responder.elements[10:])
+        self.assertEqual(self.responder.requests[0].after.value, "e009")
+
+    def test_prefetches_next_page(self):
+        pages = self._paginator(page_size=10)
+
+        run_coroutine(pages.__anext__())
+        self.assertEqual(len(self.responder.requests), 2)
+
+        run_coroutine(asyncio.sleep(0.01))
+        self.assertEqual(len(self.responder.requests), 3)
+
+    def test_buffers_at_most_max_pages(self):
+        pages = self._paginator(page_size=5, max_pages=2)
+
+        run_coroutine(pages.__anext__())
+        run_coroutine(asyncio.sleep(0.01))
+
+        # one page consumed, two buffered
+        self.assertEqual(len(self.responder.requests), 3)
+
+    def test_pages_by_index_concurrently(self):
+        result = collect(self._paginator(page_size=3, index=0,
+                                         max_in_flight=3, max_pages=4))
+
+        self.assertSequenceEqual(result, self.responder.elements)
+        self.assertEqual(self.responder.max_in_flight, 3)
+        self.assertEqual(len(self.responder.requests), 9)
+
+    def test_pages_by_index_sequentially_without_count(self):
+        self.responder.with_count = False
+
+        result = collect(self._paginator(page_size=10, index=5,
+                                         max_in_flight=3))
+
+        self.assertSequenceEqual(result, self.responder.elements[5:])
+        self.assertEqual(self.responder.max_in_flight, 1)
+
+    def test_stops_on_empty_result(self):
+        self.responder.elements.clear()
+
+        result = collect(self._paginator(page_size=10))
+
+        self.assertSequenceEqual(result, [])
+        self.assertEqual(len(self.responder.requests), 1)
+
+    def test_reraises_error_and_cancels(self):
+        self.responder.fail_at = 12
+        pages = self._paginator(page_size=3, index=0, max_in_flight=3,
+                                max_pages=6)
+
+        with self.assertRaises(errors.XMPPCancelError):
+            collect(pages)
+
+        with self.assertRaises(StopAsyncIteration):
+            run_coroutine(pages.__anext__())
+
+    def test_rejects_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self._paginator(after="x", index=0, page_size=1)
+        with self.assertRaises(ValueError):
+            self._paginator(index=0)
+        with self.assertRaises(ValueError):
+            self._paginator(max_in_flight=0)
+        with self.assertRaises(ValueError):
+            self._paginator(max_pages=0)
@@ -1153,6 +1153,113 @@ class TestSyncAdHocSignal(unittest.TestCase):
             calls
         )
 
+    def test_fire_concurrently(self):
+        coro = CoroutineMock()
+        coro.return_value = True
+
+        signal = SyncAdHocSignal()
+        signal.connect(coro)
+
+        run_coroutine(signal.fire_concurrently(1, 2, foo="bar"))
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call(1, 2, foo="bar"),
+            ],
+            coro.mock_calls
+        )
+
+    def test_fire_concurrently_without_connections(self):
+        signal = SyncAdHocSignal()
+        run_coroutine(signal.fire_concurrently())
+
+    def test_fire_concurrently_removes_on_false_result(self):
+        coro1 = CoroutineMock()
+        coro1.return_value = False
+        coro2 = CoroutineMock()
+        coro2.return_value = True
+
+        signal = SyncAdHocSignal()
+        signal.connect(coro1)
+        signal.connect(coro2)
+
+        run_coroutine(signal.fire_concurrently("foo"))
+        run_coroutine(signal.fire_concurrently("bar"))
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call("foo"),
+            ],
+            coro1.mock_calls
+        )
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call("foo"),
+                unittest.mock.call("bar"),
+            ],
+            coro2.mock_calls
+        )
+
+    def test_fire_concurrently_starts_in_order_and_interleaves(self):
+        calls = []
+        events = [asyncio.Event() for i in range(3)]
+
+        def make_coro(i):
+            async def coro():
+                calls.append(("start", i))
+                # wait for the next coroutine to finish; this dead-locks
+                # unless the coroutines run concurrently
+                if i < len(events) - 1:
+                    await events[i+1].wait()
+                events[i].set()
+                calls.append(("end", i))
+                return True
+            return coro
+
+        signal = SyncAdHocSignal()
+        for i in range(3):
+            signal.connect(make_coro(i))
+
+        run_coroutine(signal.fire_concurrently())
+
+        self.assertSequenceEqual(
+            [
+                ("start", 0),
+                ("start", 1),
+                ("start", 2),
+                ("end", 2),
+                ("end", 1),
+                ("end", 0),
+            ],
+            calls
+        )
+
+    def test_fire_concurrently_cancels_others_and_reraises(self):
+        cancelled = False
+
+        async def blocker():
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            return True
+
+        async def failer():
+            raise ValueError("foo")
+
+        signal = SyncAdHocSignal()
+        signal.connect(blocker)
+        signal.connect(failer)
+
+        with self.assertRaisesRegex(ValueError, "foo"):
+            run_coroutine(signal.fire_concurrently())
+
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertTrue(cancelled)
+
     def test_context_connect(self):
         signal = SyncAdHocSignal()
 
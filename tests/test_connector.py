@@ -21,13 +21,22 @@
 ########################################################################
 import asyncio
 import contextlib
+import datetime
 import logging
+import os
+import ssl
+import tempfile
 import unittest
 import unittest.mock
 
+from datetime import timedelta
+
+import OpenSSL.SSL
+
 import aioxmpp.connector as connector
 import aioxmpp.errors as errors
 import aioxmpp.nonza as nonza
+import aioxmpp.ssl_transport
 
 from aioxmpp.utils import namespaces
 
@@ -75,6 +84,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
             base.protocol,
         )
         base.metadata.tls_required = True
+        base.metadata.tls_session_cache = None
         base.XMLStream.return_value = base.protocol
         base.XMLStream.side_effect = capture_future
         base.Future.return_value = features_future
@@ -230,6 +240,174 @@ class TestSTARTTLSConnector(unittest.TestCase):
             timedelta(),
         )
 
+    def _run_starttls_with_session_cache(self, starttls_exc=None,
+                                         setup_context_exc=None):
+        features = nonza.StreamFeatures()
+        features[...] = nonza.StartTLSFeature()
+
+        features_future = asyncio.Future()
+        features_future.set_result(features)
+
+        base = self.base = unittest.mock.Mock()
+        base.protocol.starttls = CoroutineMock()
+        base.protocol.starttls.side_effect = starttls_exc
+        base.create_starttls_connection = CoroutineMock()
+        base.create_starttls_connection.return_value = (
+            unittest.mock.sentinel.transport,
+            base.protocol,
+        )
+        base.metadata.tls_required = True
+        base.metadata.tls_session_cache.acquire.return_value = \
+            unittest.mock.sentinel.ssl_context
+        base.XMLStream.return_value = base.protocol
+        base.Future.return_value = features_future
+        base.send_and_wait_for = CoroutineMock()
+        base.send_and_wait_for.return_value = unittest.mock.Mock(
+            spec=nonza.StartTLSProceed,
+        )
+        base.certificate_verifier.pre_handshake = CoroutineMock()
+        base.certificate_verifier.setup_context.side_effect = \
+            setup_context_exc
+        base.metadata.certificate_verifier_factory.return_value = \
+            base.certificate_verifier
+        base.reset_stream_and_get_features = CoroutineMock()
+        base.reset_stream_and_get_features.return_value = \
+            unittest.mock.sentinel.reset
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(unittest.mock.patch(
+                "asyncio.Future",
+                new=base.Future,
+            ))
+            stack.enter_context(unittest.mock.patch(
+                "aioxmpp.ssl_transport.create_starttls_connection",
+                new=base.create_starttls_connection,
+            ))
+            stack.enter_context(unittest.mock.patch(
+                "aioxmpp.protocol.XMLStream",
+                new=base.XMLStream,
+            ))
+            stack.enter_context(unittest.mock.patch(
+                "aioxmpp.protocol.send_and_wait_for",
+                new=base.send_and_wait_for,
+            ))
+            stack.enter_context(unittest.mock.patch(
+                "aioxmpp.protocol.reset_stream_and_get_features",
+                new=base.reset_stream_and_get_features,
+            ))
+
+            result = run_coroutine(self.c.connect(
+                unittest.mock.sentinel.loop,
+                base.metadata,
+                "münchen.example",
+                unittest.mock.sentinel.host,
+                unittest.mock.sentinel.port,
+                10,
+            ))
+
+        return base, result
+
+    def test_connect_uses_tls_session_cache(self):
+        base, result = self._run_starttls_with_session_cache()
+
+        key = (
+            unittest.mock.sentinel.host,
+            unittest.mock.sentinel.port,
+            "xn--mnchen-3ya.example",
+        )
+
+        self.assertSequenceEqual(
+            base.metadata.tls_session_cache.mock_calls,
+            [
+                unittest.mock.call.acquire(
+                    key,
+                    base.metadata.ssl_context_factory,
+                ),
+                unittest.mock.call.release(
+                    key,
+                    unittest.mock.sentinel.ssl_context,
+                ),
+            ]
+        )
+
+        base.metadata.ssl_context_factory.assert_not_called()
+        base.certificate_verifier.setup_context.assert_called_once_with(
+            unittest.mock.sentinel.ssl_context,
+            unittest.mock.sentinel.transport,
+        )
+        base.protocol.starttls.assert_called_once_with(
+            ssl_context=unittest.mock.sentinel.ssl_context,
+            post_handshake_callback=base.certificate_verifier.post_handshake,
+        )
+
+        self.assertEqual(
+            result,
+            (
+                unittest.mock.sentinel.transport,
+                base.protocol,
+                unittest.mock.sentinel.reset,
+            )
+        )
+
+    def test_connect_releases_tls_session_cache_entry_on_failure(self):
+        class FooException(Exception):
+            pass
+
+        with self.assertRaises(FooException):
+            self._run_starttls_with_session_cache(FooException())
+
+        key = (
+            unittest.mock.sentinel.host,
+            unittest.mock.sentinel.port,
+            "xn--mnchen-3ya.example",
+        )
+
+        self.assertSequenceEqual(
+            self.base.metadata.tls_session_cache.mock_calls,
+            [
+                unittest.mock.call.acquire(
+                    key,
+                    self.base.metadata.ssl_context_factory,
+                ),
+                unittest.mock.call.release(
+                    key,
+                    unittest.mock.sentinel.ssl_context,
+                    failed=True,
+                ),
+            ]
+        )
+
+    def test_connect_releases_tls_session_cache_entry_if_setup_fails(self):
+        class FooException(Exception):
+            pass
+
+        with self.assertRaises(FooException):
+            self._run_starttls_with_session_cache(
+                setup_context_exc=FooException()
+            )
+
+        key = (
+            unittest.mock.sentinel.host,
+            unittest.mock.sentinel.port,
+            "xn--mnchen-3ya.example",
+        )
+
+        self.assertSequenceEqual(
+            self.base.metadata.tls_session_cache.mock_calls,
+            [
+                unittest.mock.call.acquire(
+                    key,
+                    self.base.metadata.ssl_context_factory,
+                ),
+                unittest.mock.call.release(
+                    key,
+                    unittest.mock.sentinel.ssl_context,
+                    failed=True,
+                ),
+            ]
+        )
+        self.base.protocol.starttls.assert_not_called()
+
     def test_abort_xmlstream_if_connect_fails(self):
         captured_features_future = None
 
@@ -360,6 +538,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
             base.protocol,
         )
         base.metadata.tls_required = True
+        base.metadata.tls_session_cache = None
         base.XMLStream.return_value = base.protocol
         base.XMLStream.side_effect = capture_future
         base.Future.return_value = features_future
@@ -526,6 +705,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
             base.protocol,
         )
         base.metadata.tls_required = True
+        base.metadata.tls_session_cache = None
         base.XMLStream.return_value = base.protocol
         base.XMLStream.side_effect = capture_future
         base.Future.return_value = features_future
@@ -670,6 +850,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
             base.protocol,
         )
         base.metadata.tls_required = True
+        base.metadata.tls_session_cache = None
         base.XMLStream.return_value = base.protocol
         base.XMLStream.side_effect = capture_future
         base.Future.return_value = features_future
@@ -809,6 +990,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
             base.protocol,
         )
         base.metadata.tls_required = False
+        base.metadata.tls_session_cache = None
         base.XMLStream.return_value = base.protocol
         base.XMLStream.side_effect = capture_future
         base.Future.return_value = features_future
@@ -919,6 +1101,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
             base.protocol,
         )
         base.metadata.tls_required = True
+        base.metadata.tls_session_cache = None
         base.XMLStream.return_value = base.protocol
         base.XMLStream.side_effect = capture_future
         base.Future.return_value = features_future
@@ -1064,6 +1247,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
             base.protocol,
         )
         base.metadata.tls_required = False
+        base.metadata.tls_session_cache = None
         base.XMLStream.return_value = base.protocol
         base.XMLStream.side_effect = capture_future
         base.Future.return_value = features_future
@@ -1218,6 +1402,7 @@ class TestXMPPOverTLSConnector(unittest.TestCase):
             base.protocol,
         )
         base.metadata.tls_required = True
+        base.metadata.tls_session_cache = None
         base.XMLStream.return_value = base.protocol
         base.XMLStream.side_effect = capture_future
         base.Future.return_value = features_future
@@ -1308,7 +1493,8 @@ class TestXMPPOverTLSConnector(unittest.TestCase):
                 unittest.mock.call._context_factory_factory(
                     base_logger.getChild.return_value,
                     base.metadata,
-                    base.certificate_verifier
+                    base.certificate_verifier,
+                    None,
                 ),
                 unittest.mock.call.create_starttls_connection(
                     unittest.mock.sentinel.loop,
@@ -1443,6 +1629,155 @@ class TestXMPPOverTLSConnector(unittest.TestCase):
             ]
         )
 
+    def test_context_factory_uses_passed_ssl_context(self):
+        base = unittest.mock.Mock()
+
+        ssl_context_factory = self.c._context_factory_factory(
+            unittest.mock.sentinel.logger,
+            base.metadata,
+            base.certificate_verifier,
+            base.ssl_context,
+        )
+
+        ssl_context = ssl_context_factory(
+            unittest.mock.sentinel.passed_transport)
+
+        self.assertSequenceEqual(
+            base.mock_calls,
+            [
+                unittest.mock.call.ssl_context.set_alpn_protos(
+                    [b"xmpp-client"]
+                ),
+                unittest.mock.call.certificate_verifier.setup_context(
+                    base.ssl_context,
+                    unittest.mock.sentinel.passed_transport,
+                ),
+            ]
+        )
+
+        self.assertEqual(ssl_context, base.ssl_context)
+
+    def _run_connect_with_session_cache(self, connect_exc=None):
+        features_future = asyncio.Future()
+        features_future.set_result(
+            unittest.mock.sentinel.features
+        )
+
+        base = self.base = unittest.mock.Mock()
+        base.create_starttls_connection = CoroutineMock()
+        base.create_starttls_connection.return_value = (
+            unittest.mock.sentinel.transport,
+            base.protocol,
+        )
+        base.create_starttls_connection.side_effect = connect_exc
+        base.metadata.tls_required = True
+        base.metadata.tls_session_cache.acquire.return_value = \
+            unittest.mock.sentinel.ssl_context
+        base.XMLStream.return_value = base.protocol
+        base.Future.return_value = features_future
+        base.certificate_verifier.pre_handshake = CoroutineMock()
+        base.metadata.certificate_verifier_factory.return_value = \
+            base.certificate_verifier
+        base._context_factory_factory.return_value = \
+            unittest.mock.sentinel.ssl_context_factory
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(unittest.mock.patch(
+                "asyncio.Future",
+                new=base.Future,
+            ))
+            stack.enter_context(unittest.mock.patch(
+                "aioxmpp.ssl_transport.create_starttls_connection",
+                new=base.create_starttls_connection,
+            ))
+            stack.enter_context(unittest.mock.patch(
+                "aioxmpp.protocol.XMLStream",
+                new=base.XMLStream,
+            ))
+            stack.enter_context(unittest.mock.patch.object(
+                self.c,
+                "_context_factory_factory",
+                new=base._context_factory_factory,
+            ))
+
+            return run_coroutine(self.c.connect(
+                unittest.mock.sentinel.loop,
+                base.metadata,
+                "münchen.example",
+                unittest.mock.sentinel.host,
+                unittest.mock.sentinel.port,
+                10,
+            ))
+
+    def test_connect_uses_tls_session_cache(self):
+        result = self._run_connect_with_session_cache()
+        base = self.base
+
+        key = (
+            unittest.mock.sentinel.host,
+            unittest.mock.sentinel.port,
+            "xn--mnchen-3ya.example",
+        )
+
+        self.assertSequenceEqual(
+            base.metadata.tls_session_cache.mock_calls,
+            [
+                unittest.mock.call.acquire(
+                    key,
+                    base.metadata.ssl_context_factory,
+                ),
+                unittest.mock.call.release(
+                    key,
+                    unittest.mock.sentinel.ssl_context,
+                ),
+            ]
+        )
+
+        base._context_factory_factory.assert_called_once_with(
+            unittest.mock.ANY,
+            base.metadata,
+            base.certificate_verifier,
+            unittest.mock.sentinel.ssl_context,
+        )
+
+        self.assertEqual(
+            result,
+            (
+                unittest.mock.sentinel.transport,
+                base.protocol,
+                unittest.mock.sentinel.features,
+            )
+        )
+
+    def test_connect_releases_tls_session_cache_entry_on_failure(self):
+        class FooException(Exception):
+            pass
+
+        with self.assertRaises(FooException):
+            self._run_connect_with_session_cache(FooException())
+
+        key = (
+            unittest.mock.sentinel.host,
+            unittest.mock.sentinel.port,
+            "xn--mnchen-3ya.example",
+        )
+
+        self.assertSequenceEqual(
+            self.base.metadata.tls_session_cache.mock_calls,
+            [
+                unittest.mock.call.acquire(
+                    key,
+                    self.base.metadata.ssl_context_factory,
+                ),
+                unittest.mock.call.release(
+                    key,
+                    unittest.mock.sentinel.ssl_context,
+                    failed=True,
+                ),
+            ]
+        )
+        self.base.protocol.abort.assert_called_once_with()
+
     def test_abort_XMLStream_when_connect_raises(self):
         captured_features_future = None
 
@@ -1461,6 +1796,7 @@ class TestXMPPOverTLSConnector(unittest.TestCase):
         base.create_starttls_connection = CoroutineMock()
         base.create_starttls_connection.side_effect = Exception()
         base.metadata.tls_required = True
+        base.metadata.tls_session_cache = None
         base.XMLStream.return_value = base.protocol
         base.XMLStream.side_effect = capture_future
         base.Future.return_value = features_future
@@ -1547,3 +1883,293 @@ class TestXMPPOverTLSConnector(unittest.TestCase):
                 unittest.mock.call.protocol.abort()
             ]
         )
+
+
+def _make_self_signed_certificate(tmpdir):
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.utcnow()
+    cert = x509.CertificateBuilder().subject_name(
+        name
+    ).issuer_name(
+        name
+    ).public_key(
+        key.public_key()
+    ).serial_number(
+        x509.random_serial_number()
+    ).not_valid_before(
+        now - datetime.timedelta(days=1)
+    ).not_valid_after(
+        now + datetime.timedelta(days=1)
+    ).sign(key, hashes.SHA256())
+
+    certfile = os.path.join(tmpdir, "cert.pem")
+    keyfile = os.path.join(tmpdir, "key.pem")
+    with open(certfile, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(keyfile, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    return certfile, keyfile
+
+
+class TestTLSSessionCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = connector.TLSSessionCache()
+        self.factory = unittest.mock.Mock()
+        self.factory.side_effect = lambda: unittest.mock.Mock()
+
+    def tearDown(self):
+        del self.cache
+
+    def _complete_handshake(self, ctx, session):
+        (info_callback,), _ = ctx.set_info_callback.call_args
+        conn = unittest.mock.Mock()
+        conn.get_session.return_value = session
+        info_callback(conn, OpenSSL.SSL.SSL_CB_HANDSHAKE_START, 1)
+        info_callback(conn, OpenSSL.SSL.SSL_CB_HANDSHAKE_DONE, 1)
+        return info_callback, conn
+
+    def test_defaults(self):
+        self.assertEqual(self.cache.maxsize, 128)
+        self.assertEqual(self.cache.max_age, timedelta(hours=1))
+        self.assertEqual(self.cache.offered, 0)
+        self.assertEqual(self.cache.misses, 0)
+        self.assertIsNone(self.cache.offer_rate)
+
+    def test_init_kwargs(self):
+        cache = connector.TLSSessionCache(
+            maxsize=2,
+            max_age=timedelta(minutes=2),
+        )
+        self.assertEqual(cache.maxsize, 2)
+        self.assertEqual(cache.max_age, timedelta(minutes=2))
+
+    def test_acquire_creates_context_on_miss(self):
+        self.factory.side_effect = None
+        ctx = self.cache.acquire("key", self.factory)
+        self.factory.assert_called_once_with()
+        self.assertEqual(ctx, self.factory.return_value)
+        ctx.set_info_callback.assert_called_once_with(unittest.mock.ANY)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.offered, 0)
+
+    def test_acquire_without_session_is_miss(self):
+        ctx1 = self.cache.acquire("key", self.factory)
+        self.cache.release("key", ctx1)
+        ctx2 = self.cache.acquire("key", self.factory)
+        self.assertIsNot(ctx1, ctx2)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_acquire_reuses_context_with_session(self):
+        ctx1 = self.cache.acquire("key", self.factory)
+        self._complete_handshake(ctx1, unittest.mock.sentinel.session)
+        self.cache.release("key", ctx1)
+
+        ctx2 = self.cache.acquire("key", self.factory)
+        self.assertIs(ctx1, ctx2)
+        self.assertEqual(self.factory.call_count, 1)
+        self.assertEqual(self.cache.offered, 1)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.offer_rate, 0.5)
+
+    def test_info_callback_offers_session_on_handshake_start(self):
+        ctx = self.cache.acquire("key", self.factory)
+        info_callback, _ = self._complete_handshake(
+            ctx,
+            unittest.mock.sentinel.session,
+        )
+
+        conn = unittest.mock.Mock()
+        info_callback(conn, OpenSSL.SSL.SSL_CB_HANDSHAKE_START, 1)
+        conn.set_session.assert_called_once_with(
+            unittest.mock.sentinel.session,
+        )
+
+    def test_info_callback_does_not_offer_session_to_established(self):
+        ctx = self.cache.acquire("key", self.factory)
+        info_callback, conn = self._complete_handshake(
+            ctx,
+            unittest.mock.sentinel.session,
+        )
+
+        conn.set_session.reset_mock()
+        info_callback(conn, OpenSSL.SSL.SSL_CB_HANDSHAKE_START, 1)
+        conn.set_session.assert_not_called()
+
+    def test_info_callback_picks_up_post_handshake_sessions(self):
+        ctx = self.cache.acquire("key", self.factory)
+        info_callback, conn = self._complete_handshake(
+            ctx,
+            unittest.mock.sentinel.session,
+        )
+
+        conn.get_session.return_value = unittest.mock.sentinel.ticket
+        info_callback(conn, OpenSSL.SSL.SSL_CB_CONNECT_LOOP, 1)
+
+        other_conn = unittest.mock.Mock()
+        info_callback(other_conn, OpenSSL.SSL.SSL_CB_HANDSHAKE_START, 1)
+        other_conn.set_session.assert_called_once_with(
+            unittest.mock.sentinel.ticket,
+        )
+
+    def test_info_callback_ignores_loop_during_handshake(self):
+        ctx = self.cache.acquire("key", self.factory)
+        (info_callback,), _ = ctx.set_info_callback.call_args
+
+        conn = unittest.mock.Mock()
+        info_callback(conn, OpenSSL.SSL.SSL_CB_HANDSHAKE_START, 1)
+        info_callback(conn, OpenSSL.SSL.SSL_CB_CONNECT_LOOP, 1)
+        conn.get_session.assert_not_called()
+
+    def test_acquire_returns_fresh_context_while_in_use(self):
+        ctx1 = self.cache.acquire("key", self.factory)
+        self._complete_handshake(ctx1, unittest.mock.sentinel.session)
+        self.cache.release("key", ctx1)
+
+        ctx2 = self.cache.acquire("key", self.factory)
+        ctx3 = self.cache.acquire("key", self.factory)
+        self.assertIs(ctx1, ctx2)
+        self.assertIsNot(ctx2, ctx3)
+        ctx3.set_info_callback.assert_not_called()
+
+        # releasing the uncached context must not release the lease
+        self.cache.release("key", ctx3)
+        ctx4 = self.cache.acquire("key", self.factory)
+        self.assertIsNot(ctx4, ctx1)
+
+    def test_release_with_failure_discards_session(self):
+        ctx1 = self.cache.acquire("key", self.factory)
+        self._complete_handshake(ctx1, unittest.mock.sentinel.session)
+        self.cache.release("key", ctx1, failed=True)
+
+        ctx2 = self.cache.acquire("key", self.factory)
+        self.assertIsNot(ctx1, ctx2)
+
+    def test_expiry(self):
+        with unittest.mock.patch("time.monotonic") as monotonic:
+            monotonic.return_value = 100
+            ctx1 = self.cache.acquire("key", self.factory)
+            self._complete_handshake(ctx1, unittest.mock.sentinel.session)
+            self.cache.release("key", ctx1)
+
+            monotonic.return_value = 100 + 3599
+            self.assertIs(self.cache.acquire("key", self.factory), ctx1)
+            self.cache.release("key", ctx1)
+
+            monotonic.return_value = 100 + 3601
+            self.assertIsNot(self.cache.acquire("key", self.factory), ctx1)
+
+    def test_maxsize(self):
+        self.cache.maxsize = 1
+
+        ctx1 = self.cache.acquire("key1", self.factory)
+        self._complete_handshake(ctx1, unittest.mock.sentinel.session)
+        self.cache.release("key1", ctx1)
+
+        ctx2 = self.cache.acquire("key2", self.factory)
+        self._complete_handshake(ctx2, unittest.mock.sentinel.session)
+        self.cache.release("key2", ctx2)
+
+        self.assertIsNot(self.cache.acquire("key1", self.factory), ctx1)
+
+    def test_clear(self):
+        ctx1 = self.cache.acquire("key", self.factory)
+        self._complete_handshake(ctx1, unittest.mock.sentinel.session)
+        self.cache.release("key", ctx1)
+
+        self.cache.clear()
+
+        self.assertIsNot(self.cache.acquire("key", self.factory), ctx1)
+        self.assertEqual(self.cache.misses, 2)
+
+
+class TestTLSSessionCacheResumption(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        certfile, keyfile = _make_self_signed_certificate(self.tmpdir.name)
+        self.server_ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.server_ctx.load_cert_chain(certfile, keyfile)
+        self.reused = []
+
+        async def handle(reader, writer):
+            self.reused.append(
+                writer.get_extra_info("ssl_object").session_reused
+            )
+            writer.write(b"hello")
+            await writer.drain()
+            await reader.read()
+            writer.close()
+
+        self.server = run_coroutine(asyncio.start_server(
+            handle,
+            "127.0.0.1", 0,
+            ssl=self.server_ctx,
+        ))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.cache = connector.TLSSessionCache()
+
+    def tearDown(self):
+        self.server.close()
+        run_coroutine(self.server.wait_closed())
+        self.tmpdir.cleanup()
+
+    def _new_context(self):
+        ctx = OpenSSL.SSL.Context(OpenSSL.SSL.TLS_METHOD)
+        ctx.set_verify(OpenSSL.SSL.VERIFY_NONE, lambda *args: True)
+        return ctx
+
+    async def _connect(self):
+        key = ("127.0.0.1", self.port, "localhost")
+        ssl_context = None
+        received = asyncio.Future()
+
+        class Protocol(asyncio.Protocol):
+            def data_received(self, data):
+                if not received.done():
+                    received.set_result(data)
+
+        def ssl_context_factory(transport):
+            nonlocal ssl_context
+            ssl_context = self.cache.acquire(key, self._new_context)
+            return ssl_context
+
+        transport, _ = await aioxmpp.ssl_transport.create_starttls_connection(
+            asyncio.get_event_loop(),
+            Protocol,
+            host="127.0.0.1",
+            port=self.port,
+            peer_hostname="127.0.0.1",
+            server_hostname="localhost",
+            ssl_context_factory=ssl_context_factory,
+            use_starttls=False,
+        )
+        self.cache.release(key, ssl_context)
+        self.assertEqual(await received, b"hello")
+        transport.close()
+
+    def _test_resumption(self, maximum_version):
+        self.server_ctx.maximum_version = maximum_version
+
+        for i in range(3):
+            run_coroutine(self._connect())
+
+        self.assertSequenceEqual(self.reused, [False, True, True])
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.offered, 2)
+
+    def test_resumption_tls12(self):
+        self._test_resumption(ssl.TLSVersion.TLSv1_2)
+
+    def test_resumption_tls13(self):
+        if not ssl.HAS_TLSv1_3:
+            self.skipTest("TLS 1.3 not supported by the ssl module")
+        self._test_resumption(ssl.TLSVersion.TLSv1_3)
@@ -0,0 +1,72 @@
+########################################################################
+# File name: test_init.py
+# This file is part of: aioxmpp
+#
+# LICENSE
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+########################################################################
+import subprocess
+import sys
+import unittest
+
+import aioxmpp
+
+
+class TestLazyNamespace(unittest.TestCase):
+    def test_lazy_attributes_resolve_to_submodule_objects(self):
+        import aioxmpp.node
+        import aioxmpp.security_layer
+        import aioxmpp.structs
+
+        self.assertIs(aioxmpp.Client, aioxmpp.node.Client)
+        self.assertIs(aioxmpp.JID, aioxmpp.structs.JID)
+        self.assertIs(aioxmpp.make_security_layer,
+                      aioxmpp.security_layer.make)
+
+    def test_all_lazy_attributes_resolve(self):
+        for name in aioxmpp._LAZY_ATTRIBUTES:
+            self.assertIsNotNone(getattr(aioxmpp, name))
+
+    def test_dir_includes_lazy_attributes(self):
+        names = dir(aioxmpp)
+        for name in aioxmpp._LAZY_ATTRIBUTES:
+            self.assertIn(name, names)
+
+    def test_submodules_are_reachable_as_attributes(self):
+        import aioxmpp.disco.xso
+        self.assertIs(aioxmpp.disco.xso, sys.modules["aioxmpp.disco.xso"])
+        self.assertIs(aioxmpp.httpupload, sys.modules["aioxmpp.httpupload"])
+
+    def test_unknown_attribute_raises_AttributeError(self):
+        with self.assertRaisesRegex(AttributeError,
+                                    "has no attribute 'fnord'"):
+            aioxmpp.fnord
+
+        with self.assertRaises(AttributeError):
+            aioxmpp._private
+
+    @unittest.skipIf(sys.version_info < (3, 7),
+                     "module __getattr__ requires Python 3.7")
+    def test_import_does_not_load_submodules(self):
+        code = "\n".join([
+            "import sys, aioxmpp",
+            "assert 'aioxmpp.xso' not in sys.modules",
+            "assert 'aioxmpp.node' not in sys.modules",
+            "aioxmpp.Client",
+            "assert 'aioxmpp.node' in sys.modules",
+        ])
+        subprocess.run([sys.executable, "-c", code], check=True)
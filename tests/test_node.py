@@ -45,6 +45,7 @@ import aioxmpp.stanza as stanza
 import aioxmpp.rfc3921 as rfc3921
 import aioxmpp.rfc6120 as rfc6120
 import aioxmpp.service as service
+import aioxmpp.xso as xso
 
 from aioxmpp.utils import namespaces
 
@@ -60,6 +61,11 @@ from aioxmpp.testutils import (
 )
 
 
+@stanza.IQ.as_payload_class
+class FakeIQPayload(xso.XSO):
+    TAG = ("urn:example:test", "payload")
+
+
 class Testdiscover_connectors(unittest.TestCase):
     def setUp(self):
         self.hosts = [
@@ -1838,6 +1844,9 @@ class TestClient(xmltestutils.XMLTestCase):
             aioxmpp.dispatcher.SimplePresenceDispatcher,
         )
 
+        self.assertFalse(client.pipeline_bootstrap)
+        self.assertIsNone(client.time_to_ready)
+
         self.assertIsInstance(client.established_event, asyncio.Event)
 
         with self.assertRaises(AttributeError):
@@ -3658,6 +3667,235 @@ class TestClient(xmltestutils.XMLTestCase):
             ),
         ]))
 
+    def test_pipeline_bootstrap_runs_before_stream_established_concurrently(
+            self):
+        self.client.pipeline_bootstrap = True
+        first_started = asyncio.Event()
+        calls = []
+
+        async def coro1():
+            calls.append("coro1")
+            first_started.set()
+            return True
+
+        async def coro2():
+            calls.append("coro2")
+            # this would dead-lock if the coroutines were run in sequence
+            await first_started.wait()
+            return True
+
+        self.client.before_stream_established.connect(coro2)
+        self.client.before_stream_established.connect(coro1)
+
+        self.client.start()
+
+        run_coroutine(self.xmlstream.run_test(self.resource_binding))
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertSequenceEqual(calls, ["coro2", "coro1"])
+        self.established_rec.assert_called_once_with()
+
+    def test_sequential_bootstrap_by_default(self):
+        with unittest.mock.patch.object(
+                self.client.before_stream_established,
+                "fire_concurrently") as fire_concurrently:
+            self.client.start()
+            run_coroutine(self.xmlstream.run_test(self.resource_binding))
+            run_coroutine(asyncio.sleep(0))
+
+        fire_concurrently.assert_not_called()
+        self.established_rec.assert_called_once_with()
+
+    def test_time_to_ready_is_recorded(self):
+        def check():
+            self.assertIsInstance(self.client.time_to_ready, timedelta)
+            self.assertGreaterEqual(
+                self.client.time_to_ready,
+                timedelta(0),
+            )
+
+        self.established_rec.side_effect = check
+
+        self.assertIsNone(self.client.time_to_ready)
+
+        self.client.start()
+        run_coroutine(self.xmlstream.run_test(self.resource_binding))
+        run_coroutine(asyncio.sleep(0))
+
+        self.established_rec.assert_called_once_with()
+        self.assertIsNotNone(self.client.time_to_ready)
+
+    def test_profile_services_disabled_by_default(self):
+        class Svc1(service.Service):
+            pass
+
+        self.assertFalse(self.client.profile_services)
+        self.client.summon(Svc1)
+        self.assertSequenceEqual(self.client.service_profile, [])
+
+    def test_profile_services_records_summons(self):
+        class Svc1(service.Service):
+            @service.iq_handler(structs.IQType.GET, FakeIQPayload)
+            async def handle_iq(self, iq):
+                pass
+
+        class Svc2(service.Service):
+            ORDER_AFTER = [Svc1]
+
+        self.client.profile_services = True
+        self.client.summon(Svc2)
+
+        self.assertSequenceEqual(
+            [
+                (Svc1, 1, False),
+                (Svc2, 0, False),
+            ],
+            [
+                (entry.service, entry.handlers, entry.stub)
+                for entry in self.client.service_profile
+            ]
+        )
+
+        for entry in self.client.service_profile:
+            self.assertIsInstance(entry, node.SummonProfile)
+            self.assertIsInstance(entry.duration, timedelta)
+
+        # summoning again is free and not recorded
+        self.client.summon(Svc2)
+        self.assertEqual(len(self.client.service_profile), 2)
+
+    def test_summon_lazily_registers_stub_and_summons_on_first_iq(self):
+        svc_init = unittest.mock.Mock()
+        handled = unittest.mock.Mock()
+
+        class Svc1(service.Service):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                svc_init(*args, **kwargs)
+
+            @service.iq_handler(structs.IQType.GET, FakeIQPayload)
+            async def handle_iq(self, iq):
+                handled(self, iq)
+
+        self.client.summon_lazily(Svc1)
+        svc_init.assert_not_called()
+
+        cb, with_send_reply = self.client.stream._iq_request_map[
+            structs.IQType.GET, FakeIQPayload
+        ]
+        self.assertFalse(with_send_reply)
+
+        iq = stanza.IQ(structs.IQType.GET, payload=FakeIQPayload())
+        run_coroutine(cb(iq))
+
+        svc_init.assert_called_once_with(
+            self.client,
+            logger_base=unittest.mock.ANY,
+            dependencies={},
+            service_order_index=unittest.mock.ANY,
+        )
+        instance = self.client.summon(Svc1)
+        handled.assert_called_once_with(instance, iq)
+
+        # the real service took over the registration
+        cb, _ = self.client.stream._iq_request_map[
+            structs.IQType.GET, FakeIQPayload
+        ]
+        run_coroutine(cb(iq))
+        self.assertEqual(len(handled.mock_calls), 2)
+        svc_init.assert_called_once_with(
+            self.client,
+            logger_base=unittest.mock.ANY,
+            dependencies={},
+            service_order_index=unittest.mock.ANY,
+        )
+
+    def test_summon_lazily_routes_messages_via_dispatcher(self):
+        handled = unittest.mock.Mock()
+
+        class Svc1(service.Service):
+            ORDER_AFTER = [aioxmpp.dispatcher.SimpleMessageDispatcher]
+
+            @aioxmpp.dispatcher.message_handler(
+                structs.MessageType.NORMAL, None)
+            def handle_message(self, message):
+                handled(self, message)
+
+        self.client.summon_lazily(Svc1)
+        self.assertNotIn(Svc1, self.client._services)
+
+        msg = stanza.Message(structs.MessageType.NORMAL,
+                             from_=self.test_jid.replace(localpart="other"))
+        self.client.summon(
+            aioxmpp.dispatcher.SimpleMessageDispatcher
+        )._feed(msg)
+
+        self.assertIn(Svc1, self.client._services)
+        handled.assert_called_once_with(self.client.summon(Svc1), msg)
+
+    def test_summon_replaces_stub(self):
+        class Svc1(service.Service):
+            @service.iq_handler(structs.IQType.GET, FakeIQPayload)
+            async def handle_iq(self, iq):
+                pass
+
+        self.client.summon_lazily(Svc1)
+        # would raise ValueError if the stub was still registered
+        instance = self.client.summon(Svc1)
+
+        cb, _ = self.client.stream._iq_request_map[
+            structs.IQType.GET, FakeIQPayload
+        ]
+        self.assertEqual(cb, instance.handle_iq)
+
+        # no-op for already summoned services
+        self.client.summon_lazily(Svc1)
+
+    def test_summon_lazily_is_idempotent(self):
+        class Svc1(service.Service):
+            @service.iq_handler(structs.IQType.GET, FakeIQPayload)
+            async def handle_iq(self, iq):
+                pass
+
+        self.client.summon_lazily(Svc1)
+        self.client.summon_lazily(Svc1)
+
+    def test_summon_lazily_records_stub_in_profile(self):
+        class Svc1(service.Service):
+            @service.iq_handler(structs.IQType.GET, FakeIQPayload)
+            async def handle_iq(self, iq):
+                pass
+
+        self.client.profile_services = True
+        self.client.summon_lazily(Svc1)
+
+        entry, = self.client.service_profile
+        self.assertEqual(entry.service, Svc1)
+        self.assertEqual(entry.handlers, 1)
+        self.assertTrue(entry.stub)
+
+    def test_summon_lazily_rejects_non_stanza_handlers(self):
+        class Svc1(service.Service):
+            @service.inbound_message_filter
+            def filter_message(self, message):
+                return message
+
+        with self.assertRaisesRegex(ValueError,
+                                    "cannot be summoned lazily"):
+            self.client.summon_lazily(Svc1)
+
+        self.assertNotIn(Svc1, self.client._services)
+
+    def test_summon_lazily_rejects_descriptors(self):
+        class Svc1(service.Service):
+            ORDER_AFTER = [aioxmpp.DiscoServer]
+
+            feature = aioxmpp.disco.register_feature("urn:example:feature")
+
+        with self.assertRaisesRegex(ValueError,
+                                    "cannot be summoned lazily"):
+            self.client.summon_lazily(Svc1)
+
     def test_connected(self):
         with unittest.mock.patch("aioxmpp.node.UseConnected") as UseConnected:
             result = self.client.connected()
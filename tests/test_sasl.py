@@ -20,18 +20,30 @@
 #
 ########################################################################
 import asyncio
+import base64
+import contextlib
+import functools
+import hashlib
+import hmac
+import json
+import unittest
+import unittest.mock
 
 import aiosasl
+import aiosasl.scram
 
 import aioxmpp.nonza as nonza
 import aioxmpp.sasl as sasl
 import aioxmpp.errors as errors
+import aioxmpp.structs as structs
 
 from aioxmpp.utils import namespaces
 
 from aioxmpp import xmltestutils
 from aioxmpp.testutils import (
     XMLStreamMock,
+    CoroutineMock,
+    run_coroutine,
     run_coroutine_with_peer,
 )
 
@@ -247,3 +259,332 @@ class TestSASLXMPPInterface(xmltestutils.XMLTestCase):
     def tearDown(self):
         del self.xmlstream
         del self.loop
+
+
+class FakeSCRAMServer:
+    """
+    Server side of a SCRAM exchange, speaking the interface of
+    :class:`aiosasl.SASLStateMachine`.
+    """
+
+    def __init__(self, username, password, salt, iteration_count,
+                 hashfun_name="sha1"):
+        self.username = username
+        self.salt = salt
+        self.iteration_count = iteration_count
+        self.hashfun_factory = functools.partial(hashlib.new, hashfun_name)
+        salted_password = hashlib.pbkdf2_hmac(
+            hashfun_name,
+            password.encode("utf-8"),
+            salt,
+            iteration_count,
+        )
+        self.client_key = hmac.new(salted_password, b"Client Key",
+                                   self.hashfun_factory).digest()
+        self.server_key = hmac.new(salted_password, b"Server Key",
+                                   self.hashfun_factory).digest()
+        self.stored_key = self.hashfun_factory(self.client_key).digest()
+        self.authenticated = False
+
+    async def initiate(self, mechanism, payload):
+        assert payload.startswith(b"n,,")
+        self.client_first_bare = payload[3:]
+        fields = dict(parse_scram_message(self.client_first_bare))
+        assert fields[b"n"] == self.username.encode("utf-8")
+        self.nonce = fields[b"r"] + b"servernonce"
+        self.server_first = (
+            b"r=" + self.nonce +
+            b",s=" + base64.b64encode(self.salt) +
+            b",i=" + str(self.iteration_count).encode("ascii")
+        )
+        return aiosasl.SASLState.CHALLENGE, self.server_first
+
+    async def response(self, payload):
+        if payload == b"":
+            return aiosasl.SASLState.SUCCESS, None
+
+        without_proof, _, proof = payload.rpartition(b",p=")
+        auth_message = b",".join([
+            self.client_first_bare,
+            self.server_first,
+            without_proof,
+        ])
+        client_signature = hmac.new(self.stored_key, auth_message,
+                                    self.hashfun_factory).digest()
+        client_key = bytes(
+            a ^ b
+            for a, b in zip(base64.b64decode(proof), client_signature)
+        )
+        if self.hashfun_factory(client_key).digest() != self.stored_key:
+            raise aiosasl.SASLFailure("not-authorized")
+
+        self.authenticated = True
+        server_signature = hmac.new(self.server_key, auth_message,
+                                    self.hashfun_factory).digest()
+        return (
+            aiosasl.SASLState.CHALLENGE,
+            b"v=" + base64.b64encode(server_signature),
+        )
+
+    async def abort(self):
+        pass
+
+
+def parse_scram_message(msg):
+    for part in msg.split(b","):
+        key, _, value = part.partition(b"=")
+        yield key, value
+
+
+SCRAM_TOKEN = ("SCRAM-SHA-1", aiosasl.scram.SCRAMHashInfo("sha1", 1, 4096))
+
+
+class TestSCRAMKeys(unittest.TestCase):
+    def test_derive(self):
+        server = FakeSCRAMServer("user", "pencil", b"salt", 4096)
+        keys = sasl.SCRAMKeys.derive("sha1", b"pencil", b"salt", 4096)
+        self.assertEqual(keys.client_key, server.client_key)
+        self.assertEqual(keys.server_key, server.server_key)
+
+
+class TestSCRAMKeyCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = sasl.SCRAMKeyCache()
+        self.jid = structs.JID.fromstr("user@example.com")
+
+    def tearDown(self):
+        del self.cache
+
+    def test_defaults(self):
+        self.assertEqual(self.cache.maxsize, 128)
+        self.assertIsNone(self.cache.executor)
+
+    def test_maxsize(self):
+        cache = sasl.SCRAMKeyCache(maxsize=2)
+        self.assertEqual(cache.maxsize, 2)
+        cache.maxsize = 3
+        self.assertEqual(cache.maxsize, 3)
+
+    def test_get_keys_derives_in_executor_and_caches(self):
+        executor = unittest.mock.Mock()
+
+        with contextlib.ExitStack() as stack:
+            run_in_executor = stack.enter_context(unittest.mock.patch.object(
+                asyncio.get_event_loop(),
+                "run_in_executor",
+            ))
+            fut = asyncio.Future()
+            fut.set_result(unittest.mock.sentinel.keys)
+            run_in_executor.return_value = fut
+
+            self.cache.executor = executor
+
+            result1 = run_coroutine(self.cache.get_keys(
+                self.jid, "SCRAM-SHA-1", "sha1", b"pencil", b"salt", 4096,
+            ))
+            result2 = run_coroutine(self.cache.get_keys(
+                self.jid, "SCRAM-SHA-1", "sha1", b"pencil", b"salt", 4096,
+            ))
+
+        run_in_executor.assert_called_once_with(
+            executor,
+            sasl.SCRAMKeys.derive,
+            "sha1",
+            b"pencil",
+            b"salt",
+            4096,
+        )
+        self.assertEqual(result1, unittest.mock.sentinel.keys)
+        self.assertEqual(result2, unittest.mock.sentinel.keys)
+        self.assertEqual(
+            self.cache.lookup(self.jid, "SCRAM-SHA-1", b"salt", 4096),
+            unittest.mock.sentinel.keys,
+        )
+
+    def test_get_keys_deduplicates_concurrent_derivations(self):
+        with unittest.mock.patch.object(sasl.SCRAMKeys, "derive") as derive:
+            derive.return_value = unittest.mock.sentinel.keys
+
+            async def login():
+                return await self.cache.get_keys(
+                    self.jid, "SCRAM-SHA-1", "sha1",
+                    b"pencil", b"salt", 4096,
+                )
+
+            results = run_coroutine(asyncio.gather(
+                login(), login(), login(),
+            ))
+
+        derive.assert_called_once_with("sha1", b"pencil", b"salt", 4096)
+        self.assertSequenceEqual(results, [unittest.mock.sentinel.keys] * 3)
+
+    def test_get_keys_does_not_cache_failed_derivation(self):
+        class FooException(Exception):
+            pass
+
+        with unittest.mock.patch.object(sasl.SCRAMKeys, "derive") as derive:
+            derive.side_effect = FooException()
+
+            with self.assertRaises(FooException):
+                run_coroutine(self.cache.get_keys(
+                    self.jid, "SCRAM-SHA-1", "sha1",
+                    b"pencil", b"salt", 4096,
+                ))
+
+        self.assertIsNone(
+            self.cache.lookup(self.jid, "SCRAM-SHA-1", b"salt", 4096),
+        )
+
+    def test_lookup_keys_on_all_parameters(self):
+        with unittest.mock.patch.object(sasl.SCRAMKeys, "derive") as derive:
+            derive.return_value = unittest.mock.sentinel.keys
+            run_coroutine(self.cache.get_keys(
+                self.jid, "SCRAM-SHA-1", "sha1", b"pencil", b"salt", 4096,
+            ))
+
+        self.assertIsNone(self.cache.lookup(
+            self.jid.replace(localpart="other"), "SCRAM-SHA-1", b"salt", 4096,
+        ))
+        self.assertIsNone(self.cache.lookup(
+            self.jid, "SCRAM-SHA-256", b"salt", 4096,
+        ))
+        self.assertIsNone(self.cache.lookup(
+            self.jid, "SCRAM-SHA-1", b"pepper", 4096,
+        ))
+        self.assertIsNone(self.cache.lookup(
+            self.jid, "SCRAM-SHA-1", b"salt", 8192,
+        ))
+
+    def test_invalidate(self):
+        with unittest.mock.patch.object(sasl.SCRAMKeys, "derive") as derive:
+            derive.return_value = unittest.mock.sentinel.keys
+            run_coroutine(self.cache.get_keys(
+                self.jid, "SCRAM-SHA-1", "sha1", b"pencil", b"salt", 4096,
+            ))
+
+        self.cache.invalidate(self.jid, "SCRAM-SHA-1", b"salt", 4096)
+        self.assertIsNone(
+            self.cache.lookup(self.jid, "SCRAM-SHA-1", b"salt", 4096),
+        )
+
+        # must not raise
+        self.cache.invalidate(self.jid, "SCRAM-SHA-1", b"salt", 4096)
+
+    def test_export_import_roundtrip(self):
+        keys = sasl.SCRAMKeys(b"client", b"server")
+        with unittest.mock.patch.object(sasl.SCRAMKeys, "derive") as derive:
+            derive.return_value = keys
+            run_coroutine(self.cache.get_keys(
+                self.jid, "SCRAM-SHA-1", "sha1", b"pencil", b"salt", 4096,
+            ))
+
+        data = self.cache.export_as_json()
+        self.assertEqual(
+            data,
+            [
+                {
+                    "jid": "user@example.com",
+                    "mechanism": "SCRAM-SHA-1",
+                    "salt": "c2FsdA==",
+                    "iteration_count": 4096,
+                    "client_key": "Y2xpZW50",
+                    "server_key": "c2VydmVy",
+                }
+            ]
+        )
+
+        other = sasl.SCRAMKeyCache()
+        other.import_from_json(json.loads(json.dumps(data)))
+        self.assertEqual(
+            other.lookup(self.jid, "SCRAM-SHA-1", b"salt", 4096),
+            keys,
+        )
+
+
+class TestCachingSCRAM(unittest.TestCase):
+    def setUp(self):
+        self.jid = structs.JID.fromstr("user@example.com")
+        self.cache = sasl.SCRAMKeyCache()
+        self.password_provider = CoroutineMock()
+        self.password_provider.return_value = "pencil"
+        self.server = FakeSCRAMServer("user", "pencil", b"salt", 4096)
+
+    def _authenticate(self):
+        mechanism = sasl.CachingSCRAM(
+            self.jid,
+            self.password_provider,
+            self.cache,
+        )
+        run_coroutine(mechanism.authenticate(self.server, SCRAM_TOKEN))
+
+    def test_is_SCRAM(self):
+        self.assertTrue(issubclass(sasl.CachingSCRAM, aiosasl.SCRAM))
+
+    def test_authenticates_and_caches_keys(self):
+        self._authenticate()
+        self.assertTrue(self.server.authenticated)
+        self.password_provider.assert_called_once_with()
+
+        self.assertEqual(
+            self.cache.lookup(self.jid, "SCRAM-SHA-1", b"salt", 4096),
+            (self.server.client_key, self.server.server_key),
+        )
+
+    def test_does_not_ask_for_password_on_cache_hit(self):
+        self._authenticate()
+        self.password_provider.reset_mock()
+
+        self.server.authenticated = False
+        self._authenticate()
+        self.assertTrue(self.server.authenticated)
+        self.password_provider.assert_not_called()
+
+    def test_authenticates_with_imported_keys(self):
+        self._authenticate()
+        data = self.cache.export_as_json()
+
+        self.cache = sasl.SCRAMKeyCache()
+        self.cache.import_from_json(data)
+        self.password_provider.reset_mock()
+        self.password_provider.return_value = None
+
+        self.server.authenticated = False
+        self._authenticate()
+        self.assertTrue(self.server.authenticated)
+        self.password_provider.assert_not_called()
+
+    def test_rederives_on_salt_change(self):
+        self._authenticate()
+        self.password_provider.reset_mock()
+
+        self.server = FakeSCRAMServer("user", "pencil", b"pepper", 4096)
+        self._authenticate()
+        self.assertTrue(self.server.authenticated)
+        self.password_provider.assert_called_once_with()
+
+    def test_invalidates_keys_on_failure(self):
+        self.password_provider.return_value = "wrong"
+
+        with self.assertRaises(aiosasl.AuthenticationFailure):
+            self._authenticate()
+
+        self.assertIsNone(
+            self.cache.lookup(self.jid, "SCRAM-SHA-1", b"salt", 4096),
+        )
+
+    def test_rejects_invalid_server_signature(self):
+        self._authenticate()
+        self.server.server_key = b"wrong"
+
+        with self.assertRaisesRegex(aiosasl.SASLFailure,
+                                    "server signature invalid"):
+            self._authenticate()
+
+    def test_enforces_minimum_iteration_count(self):
+        self.server = FakeSCRAMServer("user", "pencil", b"salt", 1024)
+
+        with self.assertRaisesRegex(aiosasl.SASLFailure,
+                                    "minimum iteration count"):
+            self._authenticate()
+
+        self.password_provider.assert_not_called()
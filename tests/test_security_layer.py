@@ -1641,6 +1641,144 @@ class TestPasswordSASLProvider(xmltestutils.XMLTestCase):
                                     "does not support SASL"):
             self._test_provider(provider)
 
+    def test_uses_CachingSCRAM_with_scram_key_cache(self):
+        self.mechanisms.mechanisms.append(
+            security_layer.SASLMechanism(name="SCRAM-SHA-1")
+        )
+
+        provider = security_layer.PasswordSASLProvider(
+            self._password_provider_wrapper,
+            scram_key_cache=unittest.mock.sentinel.cache,
+        )
+        self.password_provider.return_value = "foo"
+
+        with contextlib.ExitStack() as stack:
+            CachingSCRAM = stack.enter_context(unittest.mock.patch(
+                "aioxmpp.sasl.CachingSCRAM",
+            ))
+            CachingSCRAM.any_supported.return_value = \
+                unittest.mock.sentinel.token
+
+            _execute = stack.enter_context(unittest.mock.patch.object(
+                provider,
+                "_execute",
+                new=CoroutineMock(),
+            ))
+            _execute.return_value = True
+
+            result = run_coroutine(provider.execute(
+                self.client_jid,
+                self.features,
+                self.xmlstream,
+                None,
+            ))
+
+        self.assertTrue(result)
+        CachingSCRAM.assert_called_once_with(
+            self.client_jid,
+            unittest.mock.ANY,
+            unittest.mock.sentinel.cache,
+        )
+        (_, password_provider, _), _ = CachingSCRAM.call_args
+        _execute.assert_called_once_with(
+            unittest.mock.ANY,
+            CachingSCRAM(),
+            unittest.mock.sentinel.token,
+        )
+
+        self.assertEqual(run_coroutine(password_provider()), "foo")
+        self.password_provider.assert_called_once_with(self.client_jid, 0)
+
+    def test_stale_cached_scram_keys_do_not_consume_password_attempt(self):
+        self.mechanisms.mechanisms.append(
+            security_layer.SASLMechanism(name="SCRAM-SHA-1")
+        )
+
+        # the same static provider as used by make_security_layer
+        async def password_provider(jid, nattempt):
+            if nattempt == 0:
+                return "foo"
+            return None
+
+        provider = security_layer.PasswordSASLProvider(
+            password_provider,
+            scram_key_cache=unittest.mock.sentinel.cache,
+        )
+
+        passwords = []
+        calls = []
+
+        async def execute(intf, mechanism, token):
+            calls.append(mechanism)
+            (_, password_provider, _), _ = CachingSCRAM.call_args
+            if len(calls) == 1:
+                # cached keys are used and rejected by the server
+                raise aiosasl.AuthenticationFailure("not-authorized")
+            passwords.append(await password_provider())
+            return True
+
+        with contextlib.ExitStack() as stack:
+            CachingSCRAM = stack.enter_context(unittest.mock.patch(
+                "aioxmpp.sasl.CachingSCRAM",
+            ))
+            CachingSCRAM.any_supported.return_value = \
+                unittest.mock.sentinel.token
+
+            stack.enter_context(unittest.mock.patch.object(
+                provider,
+                "_execute",
+                new=execute,
+            ))
+
+            result = run_coroutine(provider.execute(
+                self.client_jid,
+                self.features,
+                self.xmlstream,
+                None,
+            ))
+
+        self.assertTrue(result)
+        self.assertEqual(len(calls), 2)
+        self.assertSequenceEqual(passwords, ["foo"])
+
+    def test_failures_without_password_request_are_retried_once(self):
+        self.mechanisms.mechanisms.append(
+            security_layer.SASLMechanism(name="SCRAM-SHA-1")
+        )
+
+        provider = security_layer.PasswordSASLProvider(
+            self._password_provider_wrapper,
+            scram_key_cache=unittest.mock.sentinel.cache,
+            max_auth_attempts=2,
+        )
+
+        with contextlib.ExitStack() as stack:
+            CachingSCRAM = stack.enter_context(unittest.mock.patch(
+                "aioxmpp.sasl.CachingSCRAM",
+            ))
+            CachingSCRAM.any_supported.return_value = \
+                unittest.mock.sentinel.token
+
+            _execute = stack.enter_context(unittest.mock.patch.object(
+                provider,
+                "_execute",
+                new=CoroutineMock(),
+            ))
+            _execute.side_effect = aiosasl.AuthenticationFailure(
+                "not-authorized"
+            )
+
+            with self.assertRaises(aiosasl.AuthenticationFailure):
+                run_coroutine(provider.execute(
+                    self.client_jid,
+                    self.features,
+                    self.xmlstream,
+                    None,
+                ))
+
+        self.assertEqual(len(_execute.mock_calls), 3)
+        self.password_provider.assert_not_called()
+
     def test_reject_plain_auth_over_non_tls_stream(self):
         self.mechanisms.mechanisms.append(
             security_layer.SASLMechanism(name="PLAIN")
@@ -2409,13 +2547,15 @@ class Testmake(unittest.TestCase):
 
         PasswordSASLProvider.assert_called_with(
             unittest.mock.sentinel.password_provider,
+            scram_key_cache=None,
         )
 
         SecurityLayer.assert_called_with(
             security_layer.default_ssl_context,
             PKIXCertificateVerifier,
             True,
-            (PasswordSASLProvider(),)
+            (PasswordSASLProvider(),),
+            None,
         )
 
         self.assertEqual(
@@ -2450,13 +2590,15 @@ class Testmake(unittest.TestCase):
 
         PasswordSASLProvider.assert_called_with(
             unittest.mock.sentinel.password_provider,
+            scram_key_cache=None,
         )
 
         SecurityLayer.assert_called_with(
             unittest.mock.sentinel.factory,
             PKIXCertificateVerifier,
             True,
-            (PasswordSASLProvider(),)
+            (PasswordSASLProvider(),),
+            None,
         )
 
         self.assertEqual(
@@ -2490,6 +2632,7 @@ class Testmake(unittest.TestCase):
 
         PasswordSASLProvider.assert_called_with(
             unittest.mock.ANY,
+            scram_key_cache=None,
         )
 
         _, (password_provider, ), _ = PasswordSASLProvider.mock_calls[0]
@@ -2498,7 +2641,8 @@ class Testmake(unittest.TestCase):
             security_layer.default_ssl_context,
             PKIXCertificateVerifier,
             True,
-            (PasswordSASLProvider(),)
+            (PasswordSASLProvider(),),
+            None,
         )
 
         self.assertEqual(
@@ -2552,7 +2696,8 @@ class Testmake(unittest.TestCase):
             security_layer.default_ssl_context,
             unittest.mock.ANY,
             True,
-            (PasswordSASLProvider(),)
+            (PasswordSASLProvider(),),
+            None,
         )
 
         _, (_, factory, *_), _ = SecurityLayer.mock_calls[0]
@@ -2619,6 +2764,7 @@ class Testmake(unittest.TestCase):
 
         PasswordSASLProvider.assert_called_with(
             unittest.mock.sentinel.password_provider,
+            scram_key_cache=None,
         )
 
         self.assertSequenceEqual(
@@ -2635,10 +2781,11 @@ class Testmake(unittest.TestCase):
             security_layer.default_ssl_context,
             unittest.mock.ANY,
             True,
-            (PasswordSASLProvider(),)
+            (PasswordSASLProvider(),),
+            None,
         )
 
-        _, (_, callable, _, _), _ = SecurityLayer.mock_calls[0]
+        _, (_, callable, *_), _ = SecurityLayer.mock_calls[0]
 
         self.assertEqual(
             result,
@@ -2701,6 +2848,7 @@ class Testmake(unittest.TestCase):
 
         PasswordSASLProvider.assert_called_with(
             unittest.mock.sentinel.password_provider,
+            scram_key_cache=None,
         )
 
         self.assertSequenceEqual(
@@ -2717,10 +2865,11 @@ class Testmake(unittest.TestCase):
             security_layer.default_ssl_context,
             unittest.mock.ANY,
             True,
-            (PasswordSASLProvider(),)
+            (PasswordSASLProvider(),),
+            None,
         )
 
-        _, (_, callable, _, _), _ = SecurityLayer.mock_calls[0]
+        _, (_, callable, *_), _ = SecurityLayer.mock_calls[0]
 
         self.assertEqual(
             result,
@@ -2778,16 +2927,18 @@ class Testmake(unittest.TestCase):
 
         PasswordSASLProvider.assert_called_with(
             unittest.mock.sentinel.password_provider,
+            scram_key_cache=None,
         )
 
         SecurityLayer.assert_called_with(
             security_layer.default_ssl_context,
             unittest.mock.ANY,
             True,
-            (PasswordSASLProvider(),)
+            (PasswordSASLProvider(),),
+            None,
         )
 
-        _, (_, callable, _, _), _ = SecurityLayer.mock_calls[0]
+        _, (_, callable, *_), _ = SecurityLayer.mock_calls[0]
 
         self.assertEqual(
             result,
@@ -2840,13 +2991,15 @@ class Testmake(unittest.TestCase):
 
         PasswordSASLProvider.assert_called_with(
             unittest.mock.sentinel.password_provider,
+            scram_key_cache=None,
         )
 
         SecurityLayer.assert_called_with(
             security_layer.default_ssl_context,
             _NullVerifier,
             True,
-            (PasswordSASLProvider(),)
+            (PasswordSASLProvider(),),
+            None,
         )
 
         self.assertEqual(
@@ -2887,6 +3040,7 @@ class Testmake(unittest.TestCase):
 
         PasswordSASLProvider.assert_called_once_with(
             unittest.mock.sentinel.password_provider,
+            scram_key_cache=None,
         )
 
         AnonymousSASLProvider.assert_called_once_with(
@@ -2900,7 +3054,8 @@ class Testmake(unittest.TestCase):
             (
                 AnonymousSASLProvider(),
                 PasswordSASLProvider(),
-            )
+            ),
+            None,
         )
 
         self.assertEqual(
@@ -2951,7 +3106,8 @@ class Testmake(unittest.TestCase):
             True,
             (
                 AnonymousSASLProvider(),
-            )
+            ),
+            None,
         )
 
         self.assertEqual(
@@ -2997,7 +3153,8 @@ class Testmake(unittest.TestCase):
             security_layer.default_ssl_context,
             PKIXCertificateVerifier,
             True,
-            ()
+            (),
+            None,
         )
 
         self.assertEqual(
@@ -3048,7 +3205,8 @@ class Testmake(unittest.TestCase):
             True,
             (
                 AnonymousSASLProvider(),
-            )
+            ),
+            None,
         )
 
         self.assertEqual(
@@ -3096,3 +3254,52 @@ class Testmake(unittest.TestCase):
                     None,
                     anonymous="",
                 )
+
+    def test_with_tls_session_cache(self):
+        with contextlib.ExitStack() as stack:
+            SecurityLayer = stack.enter_context(
+                unittest.mock.patch(
+                    "aioxmpp.security_layer.SecurityLayer"
+                )
+            )
+
+            PasswordSASLProvider = stack.enter_context(
+                unittest.mock.patch(
+                    "aioxmpp.security_layer.PasswordSASLProvider"
+                )
+            )
+
+            PKIXCertificateVerifier = stack.enter_context(
+                unittest.mock.patch(
+                    "aioxmpp.security_layer.PKIXCertificateVerifier"
+                )
+            )
+
+            result = security_layer.make(
+                unittest.mock.sentinel.password_provider,
+                tls_session_cache=unittest.mock.sentinel.tls_session_cache,
+            )
+
+        SecurityLayer.assert_called_with(
+            security_layer.default_ssl_context,
+            PKIXCertificateVerifier,
+            True,
+            (PasswordSASLProvider(),),
+            unittest.mock.sentinel.tls_session_cache,
+        )
+
+        self.assertEqual(
+            result,
+            SecurityLayer(),
+        )
+
+
+class TestSecurityLayer(unittest.TestCase):
+    def test_tls_session_cache_defaults_to_None(self):
+        layer = security_layer.SecurityLayer(
+            unittest.mock.sentinel.ssl_context_factory,
+            unittest.mock.sentinel.certificate_verifier_factory,
+            True,
+            (),
+        )
+        self.assertIsNone(layer.tls_session_cache)